@@ -201,6 +201,7 @@ from skeinforge_tools import profile
 from skeinforge_tools.meta_plugins import polyfile
 from skeinforge_tools.skeinforge_utilities import euclidean
 from skeinforge_tools.skeinforge_utilities import gcodec
+from skeinforge_tools.skeinforge_utilities import parallel
 from skeinforge_tools.skeinforge_utilities import settings
 from skeinforge_tools.skeinforge_utilities import interpret
 import os
@@ -294,7 +295,7 @@ class SkeinforgeRepository:
 def main():
 	"Display the skeinforge dialog."
 	if len( sys.argv ) > 1:
-		writeOutput( ' '.join( sys.argv[ 1 : ] ) )
+		writeOutput( ' '.join( parallel.getArgumentsSetJobs( sys.argv[ 1 : ] ) ) )
 	else:
 		settings.startMainLoopFromConstructor( getNewRepository() )
 
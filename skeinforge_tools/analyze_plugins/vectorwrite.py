@@ -244,6 +244,8 @@ class VectorwriteSkein( svg_codec.SVGCodecSkein ):
 				return
 			elif firstWord == '(<perimeterWidth>':
 				self.perimeterWidth = float( splitLine[ 1 ] )
+			elif firstWord == '(<simplification>':
+				self.simplification = splitLine[ 1 ]
 
 	def parseLine( self, line ):
 		"Parse a gcode line and add it to the outset skein."
@@ -16,6 +16,7 @@ from skeinforge_tools.skeinforge_utilities import consecution
 from skeinforge_tools.skeinforge_utilities import euclidean
 from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import interpret
+from skeinforge_tools.skeinforge_utilities import parallel
 from skeinforge_tools.skeinforge_utilities import settings
 import os
 import sys
@@ -152,7 +153,7 @@ class CraftRepository:
 def main():
 	"Display the craft dialog."
 	if len( sys.argv ) > 1:
-		writeOutput( ' '.join( sys.argv[ 1 : ] ) )
+		writeOutput( ' '.join( parallel.getArgumentsSetJobs( sys.argv[ 1 : ] ) ) )
 	else:
 		settings.startMainLoopFromConstructor( getNewRepository() )
 
@@ -61,6 +61,25 @@ Default is 1.8.
 
 Defines the ratio of the extrusion perimeter width to the layer thickness.  The higher the value the more the perimeter will be inset, the default is 1.8.  A ratio of one means the extrusion is a circle, a typical ratio of 1.8 means the extrusion is a wide oval.  These values should be measured from a test extrusion line.
 
+===Simplification===
+Default is 'Channel'.
+
+The simplification removes the points of the carved loops which barely change the loop.  It is used by carve and by the tools after it, like inset and fill, to simplify loops and paths.
+
+====Channel====
+When selected, the points inside a channel between their neighbors will be removed, with a channel which doubles until it reaches a hundredth of the import radius.  This is the original simplification.
+
+====Douglas Peucker====
+When selected, the points will be removed by the Douglas Peucker algorithm, with a tolerance of a tenth of the import radius, which removes about as many points as the channel.  It is usually the fastest, and on a pathological loop like a growing spiral it switches to a tree of convex hulls, so it takes at most O(n log n log n) time.
+
+====Visvalingam====
+When selected, the least significant points will be removed one at a time, until the remaining points are farther than a tenth of the import radius from the segment between their neighbors.  It takes O(n log n) time on any loop.
+
+===Weld Tolerance===
+Default is zero.
+
+Defines the distance within which the vertices of an stl file are welded into one vertex.  When the 'Weld Tolerance' is zero, only the vertices with the same coordinates are welded.  When it is greater than zero, the vertices whose coordinates round to the same multiple of the 'Weld Tolerance' are welded, which closes the gaps of a mesh whose facets were written with rounding errors.
+
 ==Examples==
 The following examples carve the file Screw Holder Bottom.stl.  The examples are run in a terminal in the folder which contains Screw Holder Bottom.stl and carve.py.
 
@@ -132,12 +151,12 @@ def getCraftedText( fileName, text = '', repository = None ):
 
 def getCraftedTextFromFileName( fileName, repository = None ):
 	"Carve a shape file."
-	carving = svg_codec.getCarving( fileName )
-	if carving == None:
-		return ''
 	if repository == None:
 		repository = CarveRepository()
 		settings.getReadRepository( repository )
+	carving = svg_codec.getCarving( fileName, repository.weldTolerance.value )
+	if carving == None:
+		return ''
 	return CarveSkein().getCarvedSVG( carving, fileName, repository )
 
 def getNewRepository():
@@ -177,6 +196,12 @@ class CarveRepository:
 		self.correctMesh = settings.Radio().getFromRadio( importLatentStringVar, 'Correct Mesh', self, True )
 		self.unprovenMesh = settings.Radio().getFromRadio( importLatentStringVar, 'Unproven Mesh', self, False )
 		self.perimeterWidthOverThickness = settings.FloatSpin().getFromValue( 1.4, 'Perimeter Width over Thickness (ratio):', self, 2.2, 1.8 )
+		self.simplificationLabel = settings.LabelDisplay().getFromName( 'Simplification: ', self )
+		simplificationLatentStringVar = settings.LatentStringVar()
+		self.simplificationChannel = settings.Radio().getFromRadio( simplificationLatentStringVar, 'Channel', self, True )
+		self.simplificationDouglasPeucker = settings.Radio().getFromRadio( simplificationLatentStringVar, 'Douglas Peucker', self, False )
+		self.simplificationVisvalingam = settings.Radio().getFromRadio( simplificationLatentStringVar, 'Visvalingam', self, False )
+		self.weldTolerance = settings.FloatSpin().getFromValue( 0.0, 'Weld Tolerance (mm):', self, 0.1, 0.0 )
 		self.executeTitle = 'Carve'
 
 	def execute( self ):
@@ -199,6 +224,7 @@ class CarveSkein( svg_codec.SVGCodecSkein ):
 		"Parse gnu triangulated surface text and store the carved gcode."
 		self.carving = carving
 		self.repository = repository
+		self.setSimplification( repository )
 		self.layerThickness = repository.layerThickness.value
 		self.setExtrusionDiameterWidth( repository )
 		if repository.infillDirectionBridge.value:
@@ -207,6 +233,7 @@ class CarveSkein( svg_codec.SVGCodecSkein ):
 		importRadius = 0.5 * repository.importCoarseness.value * abs( self.perimeterWidth )
 		carving.setCarveImportRadius( max( importRadius, 0.01 * self.layerThickness ) )
 		carving.setCarveIsCorrectMesh( repository.correctMesh.value )
+		carving.setCarveSimplification( self.simplification )
 		rotatedBoundaryLayers = carving.getCarveRotatedBoundaryLayers()
 		if len( rotatedBoundaryLayers ) < 1:
 			return ''
@@ -222,6 +249,14 @@ class CarveSkein( svg_codec.SVGCodecSkein ):
 		self.bridgeLayerThickness = self.layerThickness * repository.bridgeThicknessMultiplier.value
 		self.perimeterWidth = repository.perimeterWidthOverThickness.value * self.layerThickness
 
+	def setSimplification( self, repository ):
+		"Set the simplification, which is given to the carving and written in the initialization so that the tools after carve use the same simplification."
+		self.simplification = 'Channel'
+		if repository.simplificationDouglasPeucker.value:
+			self.simplification = 'DouglasPeucker'
+		elif repository.simplificationVisvalingam.value:
+			self.simplification = 'Visvalingam'
+
 
 def main():
 	"Display the carve dialog."
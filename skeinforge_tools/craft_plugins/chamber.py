@@ -164,6 +164,7 @@ from skeinforge_tools.skeinforge_utilities import euclidean
 from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import interpret
 from skeinforge_tools.skeinforge_utilities import settings
+from skeinforge_tools.skeinforge_utilities import skein_tree
 import sys
 
 
@@ -180,11 +181,17 @@ def getCraftedTextFromText( gcodeText, chamberRepository = None ):
 	"Chamber a gcode linear move text."
 	if gcodec.isProcedureDoneOrFileIsEmpty( gcodeText, 'chamber' ):
 		return gcodeText
+	return getCraftedTree( skein_tree.getSkeinTreeFromText( gcodeText ), chamberRepository ).getText()
+
+def getCraftedTree( skeinTree, chamberRepository = None ):
+	"Chamber a skein tree."
+	if skeinTree.isProcedureDoneOrEmpty( 'chamber' ):
+		return skeinTree
 	if chamberRepository == None:
 		chamberRepository = settings.getReadRepository( ChamberRepository() )
 	if not chamberRepository.activateChamber.value:
-		return gcodeText
-	return ChamberSkein().getCraftedGcode( gcodeText, chamberRepository )
+		return skeinTree
+	return ChamberSkein().getCraftedTree( skeinTree, chamberRepository )
 
 def getNewRepository():
 	"Get the repository constructor."
@@ -221,49 +228,19 @@ class ChamberRepository:
 
 class ChamberSkein:
 	"A class to chamber a skein of extrusions."
-	def __init__( self ):
-		self.distanceFeedRate = gcodec.DistanceFeedRate()
-		self.lineIndex = 0
-		self.lines = None
-
-	def addParameter( self, firstWord, parameter ):
-		"Add the parameter if it is at least minus three hundred."
-		self.distanceFeedRate.addLine( firstWord + ' S' + euclidean.getRoundedToThreePlaces( parameter ) )
-
-	def getCraftedGcode( self, gcodeText, chamberRepository ):
-		"Parse gcode text and store the chamber gcode."
-		self.chamberRepository = chamberRepository
-		self.lines = gcodec.getTextLines( gcodeText )
-		self.parseInitialization()
-		for line in self.lines[ self.lineIndex : ]:
-			self.parseLine( line )
-		return self.distanceFeedRate.output.getvalue()
-
-	def parseInitialization( self ):
-		"Parse gcode initialization and store the parameters."
-		for self.lineIndex in xrange( len( self.lines ) ):
-			line = self.lines[ self.lineIndex ]
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon( line )
-			firstWord = gcodec.getFirstWord( splitLine )
-			self.distanceFeedRate.parseSplitLine( firstWord, splitLine )
-			if firstWord == '(</extruderInitialization>)':
-				self.distanceFeedRate.addLine( '(<procedureDone> chamber </procedureDone>)' )
-				return
-			self.distanceFeedRate.addLine( line )
-
-	def parseLine( self, line ):
-		"Parse a gcode line and add it to the chamber skein."
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon( line )
-		if len( splitLine ) < 1:
-			return
-		firstWord = splitLine[ 0 ]
-		if firstWord == '(<extrusion>)':
-			self.distanceFeedRate.addLine( line )
-			self.addParameter( 'M115', self.chamberRepository.bedTemperature.value ) # Set bed temperature.
-			self.addParameter( 'M116', self.chamberRepository.chamberTemperature.value ) # Set chamber temperature.
-			self.addParameter( 'M117', self.chamberRepository.holdingForce.value ) # Set holding force.
-			return
-		self.distanceFeedRate.addLine( line )
+	def getCraftedTree( self, skeinTree, chamberRepository ):
+		"Add the procedure done line and the chamber commands to the skein tree."
+		skeinTree.addProcedureDone( 'chamber' )
+		chamberLines = [
+			self.getParameterLine( 'M115', chamberRepository.bedTemperature.value ), # Set bed temperature.
+			self.getParameterLine( 'M116', chamberRepository.chamberTemperature.value ), # Set chamber temperature.
+			self.getParameterLine( 'M117', chamberRepository.holdingForce.value ) ] # Set holding force.
+		skeinTree.addExtrusionBeginningLines( chamberLines )
+		return skeinTree
+
+	def getParameterLine( self, firstWord, parameter ):
+		"Get the parameter line."
+		return firstWord + ' S' + euclidean.getRoundedToThreePlaces( parameter )
 
 
 def main():
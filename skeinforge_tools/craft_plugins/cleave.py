@@ -45,6 +45,11 @@ Default is two millimeters.
 
 Defines the width of the perimeter.
 
+===Weld Tolerance===
+Default is zero.
+
+Defines the distance within which the vertices of an stl file are welded into one vertex.  When the 'Weld Tolerance' is zero, only the vertices with the same coordinates are welded.  When it is greater than zero, the vertices whose coordinates round to the same multiple of the 'Weld Tolerance' are welded, which closes the gaps of a mesh whose facets were written with rounding errors.
+
 ==Examples==
 The following examples cleave the file Screw Holder Bottom.stl.  The examples are run in a terminal in the folder which contains Screw Holder Bottom.stl and cleave.py.
 
@@ -116,12 +121,12 @@ def getCraftedText( fileName, text = '', repository = None ):
 
 def getCraftedTextFromFileName( fileName, repository = None ):
 	"Cleave a shape file."
-	carving = svg_codec.getCarving( fileName )
-	if carving == None:
-		return ''
 	if repository == None:
 		repository = CleaveRepository()
 		settings.getReadRepository( repository )
+	carving = svg_codec.getCarving( fileName, repository.weldTolerance.value )
+	if carving == None:
+		return ''
 	return CleaveSkein().getCarvedSVG( carving, fileName, repository )
 
 def getNewRepository():
@@ -167,6 +172,7 @@ class CleaveRepository:
 		self.correctMesh = settings.Radio().getFromRadio( importLatentStringVar, 'Correct Mesh', self, True )
 		self.unprovenMesh = settings.Radio().getFromRadio( importLatentStringVar, 'Unproven Mesh', self, False )
 		self.perimeterWidth = settings.FloatSpin().getFromValue( 0.4, 'Perimeter Width (mm):', self, 4.0, 2.0 )
+		self.weldTolerance = settings.FloatSpin().getFromValue( 0.0, 'Weld Tolerance (mm):', self, 0.1, 0.0 )
 		self.executeTitle = 'Cleave'
 
 	def execute( self ):
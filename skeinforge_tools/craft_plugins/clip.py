@@ -140,14 +140,14 @@ class ClipSkein:
 			print( "thread of only one point in clip, this should never happen" )
 			print( thread )
 			return
-		self.distanceFeedRate.addLine( 'M101' )
+		self.distanceFeedRate.emitCommand( 'M101' )
 		for point in thread[ 1 : ]:
 			self.distanceFeedRate.addGcodeMovementZWithFeedRate( self.feedRateMinute, point, z )
 
 	def addSegmentToPixelTables( self, location, maskPixelTable, oldLocation ):
 		"Add the segment to the layer and mask table."
 #		segmentTable = {}
-		euclidean.addValueSegmentToPixelTable( oldLocation.dropAxis( 2 ), location.dropAxis( 2 ), self.layerPixelTable, None, self.layerPixelWidth )
+		self.layerPixelGrid.addSegment( oldLocation.dropAxis( 2 ), location.dropAxis( 2 ), None, self.layerPixelWidth )
 #		euclidean.addValueSegmentToPixelTable( oldLocation.dropAxis( 2 ), location.dropAxis( 2 ), segmentTable, None, self.layerPixelWidth )
 #		euclidean.addPixelTableToPixelTable( segmentTable, self.layerPixelTable )
 #		euclidean.addPixelTableToPixelTable( segmentTable, maskPixelTable )
@@ -157,12 +157,12 @@ class ClipSkein:
 	def addTailoredLoopPath( self, line ):
 		"Add a clipped loop path."
 		if self.clipLength > 0.0:
-			removeTable = {}
-			euclidean.addLoopToPixelTable( self.loopPath.path, removeTable, self.layerPixelWidth )
-			euclidean.removePixelTableFromPixelTable( removeTable, self.layerPixelTable )
+			removeGrid = euclidean.PixelGrid()
+			removeGrid.addLoop( self.loopPath.path, None, self.layerPixelWidth )
+			self.layerPixelGrid.removeGrid( removeGrid )
 			self.loopPath.path = euclidean.getClippedLoopPath( self.clipLength, self.loopPath.path )
-			self.loopPath.path = euclidean.getSimplifiedPath( self.loopPath.path, self.perimeterWidth )
-			euclidean.addLoopToPixelTable( self.loopPath.path, self.layerPixelTable, self.layerPixelWidth )
+			self.loopPath.path = euclidean.getSimplifiedPath( self.loopPath.path, self.perimeterWidth, self.distanceFeedRate.simplification )
+			self.layerPixelGrid.addLoop( self.loopPath.path, None, self.layerPixelWidth )
 		if self.oldWiddershins == None:
 			self.addGcodeFromThreadZ( self.loopPath.path, self.loopPath.z )
 		else:
@@ -192,24 +192,24 @@ class ClipSkein:
 		segmentEndLength = segmentLength - self.connectingStepLength
 		while distance < segmentEndLength:
 			alongPoint = distance * segment + path[ - 1 ]
-			if not euclidean.isPointInsideLoops( self.boundaryLoops, alongPoint ):
+			if not self.boundaryLoopGrid.isPointInsideLoops( alongPoint ):
 				return False
 			distance += self.connectingStepLength
 #		removedLayerPixelTable = self.layerPixelTable.copy()
 #		if self.oldLocation in self.maskPixelTableTable:
 #			euclidean.removePixelTableFromPixelTable( self.maskPixelTableTable[ self.oldLocation ], removedLayerPixelTable )
 #		euclidean.addPathToPixelTable( path[ : - 2 ], removedLayerPixelTable, None, self.layerPixelWidth )
-		segmentTable = {}
-		euclidean.addSegmentToPixelTable( path[ - 1 ], locationComplex, segmentTable, 2.0, 2.0, self.layerPixelWidth )
+		segmentGrid = euclidean.PixelGrid()
+		segmentGrid.addShortenedSegment( path[ - 1 ], locationComplex, 2.0, 2.0, self.layerPixelWidth )
 #		euclidean.addValueSegmentToPixelTable( path[ - 1 ], locationComplex, segmentTable, None, self.layerPixelWidth )
 #		euclidean.addValueSegmentToPixelTable( path[ - 1 ], locationComplex, segmentTable, None, self.layerPixelWidth )
 #		maskPixelTable = {}
 #		if location in self.maskPixelTableTable:
 #			maskPixelTable = self.maskPixelTableTable[ location ]
-		if euclidean.isPixelTableIntersecting( self.layerPixelTable, segmentTable, {} ):
+		if self.layerPixelGrid.isIntersecting( segmentGrid ):
 #		if euclidean.isPixelTableIntersecting( removedLayerPixelTable, segmentTable, {} ):
 			return False
-		euclidean.addValueSegmentToPixelTable( path[ - 1 ], locationComplex, self.layerPixelTable, None, self.layerPixelWidth )
+		self.layerPixelGrid.addSegment( path[ - 1 ], locationComplex, None, self.layerPixelWidth )
 #		euclidean.addPixelTableToPixelTable( segmentTable, self.layerPixelTable )
 		return True
 
@@ -217,6 +217,7 @@ class ClipSkein:
 		"Parse gcode text and store the clip gcode."
 		self.lines = gcodec.getTextLines( gcodeText )
 		self.parseInitialization( clipRepository )
+		self.layerSummaryTable = gcodec.LayerSummaryTable().getFromGcodeLines( self.lines, self.lineIndex )
 		for self.lineIndex in xrange( self.lineIndex, len( self.lines ) ):
 			line = self.lines[ self.lineIndex ]
 			self.parseLine( line )
@@ -306,23 +307,23 @@ class ClipSkein:
 				self.addTailoredLoopPath( line )
 				return
 		elif firstWord == '(<layer>':
-			self.setLayerPixelTable()
+			self.setLayerPixelGrid()
 		if firstWord == '(<loop>' or firstWord == '(<perimeter>':
 			self.isLoopPerimeter = True
 		if self.loopPath == None:
 			self.distanceFeedRate.addLine( line )
 
-	def setLayerPixelTable( self ):
-		"Set the layer pixel table."
-		boundaryLoop = None
+	def setLayerPixelGrid( self ):
+		"Set the layer pixel grid."
 		extruderActive = False
+		layerSummary = self.layerSummaryTable.getLayerSummary( self.lineIndex )
 		maskPixelTable = {}
-		self.boundaryLoops = []
+		self.boundaryLoops = layerSummary.boundaryLoops
 		self.maskPixelTableTable = {}
 		self.lastInactiveLocation = None
-		self.layerPixelTable = {}
+		self.layerPixelGrid = euclidean.PixelGrid()
 		oldLocation = self.oldLocation
-		for afterIndex in xrange( self.lineIndex + 1, len( self.lines ) ):
+		for afterIndex in xrange( self.lineIndex + 1, layerSummary.endIndex ):
 			line = self.lines[ afterIndex ]
 			splitLine = gcodec.getSplitLineBeforeBracketSemicolon( line )
 			firstWord = gcodec.getFirstWord( splitLine )
@@ -340,16 +341,7 @@ class ClipSkein:
 					self.addSegmentToPixelTables( self.lastInactiveLocation, maskPixelTable, oldLocation )
 				extruderActive = False
 				maskPixelTable = {}
-			elif firstWord == '(</boundaryPerimeter>)':
-				boundaryLoop = None
-			elif firstWord == '(<boundaryPoint>':
-				if boundaryLoop == None:
-					boundaryLoop = []
-					self.boundaryLoops.append( boundaryLoop )
-				location = gcodec.getLocationFromSplitLine( None, splitLine )
-				boundaryLoop.append( location.dropAxis( 2 ) )
-			elif firstWord == '(</layer>)':
-				return
+		self.boundaryLoopGrid = euclidean.LoopGrid( self.boundaryLoops )
 
 def main():
 	"Display the clip dialog."
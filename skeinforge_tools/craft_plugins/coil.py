@@ -135,7 +135,7 @@ class CoilSkein:
 			boundaryLayerBegin = boundaryLayers[ boundaryLayerIndex - 1 ]
 			boundaryLayerEnd = boundaryLayers[ boundaryLayerIndex + 1 ]
 			beginLocation = Vector3( 0.0, 0.0, 0.5 * ( boundaryLayerBegin.z + boundaryLayer.z ) )
-			outsetLoop = intercircle.getLargestInsetLoopFromLoop( boundaryLayer.loops[ 0 ], - radius )
+			outsetLoop = intercircle.getLargestInsetLoopFromLoop( boundaryLayer.loops[ 0 ], - radius, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 			self.addCoilToThread( beginLocation, 0.5 * ( boundaryLayer.z + boundaryLayerEnd.z ), outsetLoop, thread )
 		self.addGcodeFromThread( thread )
 		self.distanceFeedRate.addLine( '(</surroundingLoop>)' )
@@ -190,10 +190,10 @@ class CoilSkein:
 			print( "thread of only one point in addGcodeFromThread in coil, this should never happen" )
 			print( thread )
 			return
-		self.distanceFeedRate.addLine( "M101" ) # Turn extruder on.
+		self.distanceFeedRate.emitCommand( 'M101' ) # Turn extruder on.
 		for location in thread[ 1 : ]:
 			self.distanceFeedRate.addGcodeMovementZ( location.dropAxis( 2 ), location.z )
-		self.distanceFeedRate.addLine( "M103" ) # Turn extruder off.
+		self.distanceFeedRate.emitCommand( 'M103' ) # Turn extruder off.
 
 	def getCraftedGcode( self, gcodeText, repository ):
 		"Parse gcode text and store the coil gcode."
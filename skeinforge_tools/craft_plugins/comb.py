@@ -126,17 +126,15 @@ class CombSkein:
 	def __init__( self ):
 		self.betweenTable = {}
 		self.betweenTable = {}
-		self.boundaryLoop = None
+		self.boundaryGridTable = {}
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
 		self.extruderActive = False
-		self.layer = None
 		self.layerTable = {}
 		self.layerZ = None
 		self.lineIndex = 0
 		self.lines = None
 		self.nextLayerZ = None
 		self.oldLocation = None
-		self.oldZ = None
 
 	def addGcodePathZ( self, feedRateMinute, path, z ):
 		"Add a gcode path, without modifying the extruder, to the output."
@@ -158,7 +156,7 @@ class CombSkein:
 			return
 		if len( pathAround ) < 2:
 			return
-		loop = intercircle.getLargestInsetLoopFromLoopNoMatterWhat( loop, self.combInset )
+		loop = intercircle.getLargestInsetLoopFromLoopNoMatterWhat( loop, self.combInset, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 		penultimatePoint = pathAround[ - 2 ]
 		lastPoint = pathAround[ - 1 ]
 		nearestEndDistanceIndex = euclidean.getNearestDistanceIndex( end, loop )
@@ -169,41 +167,29 @@ class CombSkein:
 		if nearestEndMinusLastLength <= 0.0:
 			return
 		nearestEndMinusLastSegment = nearestEndMinusLast / nearestEndMinusLastLength
-		betweens = self.getBetweens()
-		if self.getIsRunningJumpPathAdded( betweens, end, lastPoint, nearestEndMinusLastSegment, pathAround, penultimatePoint, self.runningJumpSpace ):
+		betweenGrid = self.getBetweenGrid()
+		if self.getIsRunningJumpPathAdded( betweenGrid, end, lastPoint, nearestEndMinusLastSegment, pathAround, penultimatePoint, self.runningJumpSpace ):
 			return
 		doubleCombInset = 2.0 * self.combInset
 		shortJumpSpace = 0.5 * self.runningJumpSpace
 		if shortJumpSpace < doubleCombInset:
 			return
-		if self.getIsRunningJumpPathAdded( betweens, end, lastPoint, nearestEndMinusLastSegment, pathAround, penultimatePoint, shortJumpSpace ):
+		if self.getIsRunningJumpPathAdded( betweenGrid, end, lastPoint, nearestEndMinusLastSegment, pathAround, penultimatePoint, shortJumpSpace ):
 			return
 		shortJumpSpace = 0.25 * self.runningJumpSpace
 		if shortJumpSpace < doubleCombInset:
 			return
-		self.getIsRunningJumpPathAdded( betweens, end, lastPoint, nearestEndMinusLastSegment, pathAround, penultimatePoint, shortJumpSpace )
-
-	def addToLoop( self, location ):
-		"Add a location to loop."
-		if self.layer == None:
-			if not self.oldZ in self.layerTable:
-				self.layerTable[ self.oldZ ] = []
-			self.layer = self.layerTable[ self.oldZ ]
-		if self.boundaryLoop == None:
-			self.boundaryLoop = [] #starting with an empty array because a closed loop does not have to restate its beginning
-			self.layer.append( self.boundaryLoop )
-		if self.boundaryLoop != None:
-			self.boundaryLoop.append( location.dropAxis( 2 ) )
-
-	def getBetweens( self ):
-		"Set betweens for the layer."
+		self.getIsRunningJumpPathAdded( betweenGrid, end, lastPoint, nearestEndMinusLastSegment, pathAround, penultimatePoint, shortJumpSpace )
+
+	def getBetweenGrid( self ):
+		"Get the loop grid of the betweens for the layer, which is only made once for each layer."
 		if self.layerZ in self.betweenTable:
 			return self.betweenTable[ self.layerZ ]
-		if self.layerZ not in self.layerTable:
-			return []
-		self.betweenTable[ self.layerZ ] = []
-		for boundaryLoop in self.layerTable[ self.layerZ ]:
-			self.betweenTable[ self.layerZ ] += intercircle.getInsetLoopsFromLoop( self.betweenInset, boundaryLoop )
+		betweens = []
+		if self.layerZ in self.layerTable:
+			for boundaryLoop in self.layerTable[ self.layerZ ]:
+				betweens += intercircle.getInsetLoopsFromLoop( self.betweenInset, boundaryLoop, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
+		self.betweenTable[ self.layerZ ] = euclidean.LoopGrid( betweens )
 		return self.betweenTable[ self.layerZ ]
 
 	def getBoundaries( self ):
@@ -212,14 +198,18 @@ class CombSkein:
 			return self.layerTable[ self.layerZ ]
 		return []
 
+	def getBoundaryGrid( self ):
+		"Get the loop grid of the boundaries for the layer, which is only made once for each layer."
+		if self.layerZ not in self.boundaryGridTable:
+			self.boundaryGridTable[ self.layerZ ] = euclidean.LoopGrid( self.getBoundaries() )
+		return self.boundaryGridTable[ self.layerZ ]
+
 	def getCraftedGcode( self, combRepository, gcodeText ):
 		"Parse gcode text and store the comb gcode."
 		self.combRepository = combRepository
 		self.lines = gcodec.getTextLines( gcodeText )
 		self.parseInitialization( combRepository )
-		for lineIndex in xrange( self.lineIndex, len( self.lines ) ):
-			line = self.lines[ lineIndex ]
-			self.parseBoundariesLayers( combRepository, line )
+		self.setLayerTable()
 		for lineIndex in xrange( self.lineIndex, len( self.lines ) ):
 			line = self.lines[ lineIndex ]
 			self.parseLine( line )
@@ -231,19 +221,19 @@ class CombSkein:
 			print( 'this should never happen but it does not really matter, begin == end in getIsAsFarAndNotIntersecting in comb.' )
 			print( begin )
 			return True
-		return not euclidean.isLineIntersectingLoops( self.getBetweens(), begin, end )
+		return not self.getBetweenGrid().isLineIntersecting( begin, end )
 
-	def getIsRunningJumpPathAdded( self, betweens, end, lastPoint, nearestEndMinusLastSegment, pathAround, penultimatePoint, runningJumpSpace ):
+	def getIsRunningJumpPathAdded( self, betweenGrid, end, lastPoint, nearestEndMinusLastSegment, pathAround, penultimatePoint, runningJumpSpace ):
 		"Add a running jump path if possible, and return if it was added."
 		jumpStartPoint = lastPoint - nearestEndMinusLastSegment * runningJumpSpace
-		if euclidean.isLineIntersectingLoops( betweens, penultimatePoint, jumpStartPoint ):
+		if betweenGrid.isLineIntersecting( penultimatePoint, jumpStartPoint ):
 			return False
 		pathAround[ - 1 ] = jumpStartPoint
 		return True
 
 	def getPathBetween( self, betweenFirst, betweenSecond, isLeavingPerimeter, loopFirst ):
 		"Add a path between the perimeter and the fill."
-		loopFirst = intercircle.getLargestInsetLoopFromLoopNoMatterWhat( loopFirst, self.combInset )
+		loopFirst = intercircle.getLargestInsetLoopFromLoopNoMatterWhat( loopFirst, self.combInset, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 		nearestFirstDistanceIndex = euclidean.getNearestDistanceIndex( betweenFirst, loopFirst )
 		nearestSecondDistanceIndex = euclidean.getNearestDistanceIndex( betweenSecond, loopFirst )
 		firstBeginIndex = ( nearestFirstDistanceIndex.index + 1 ) % len( loopFirst )
@@ -290,7 +280,7 @@ class CombSkein:
 		endRotated = segmentYMirror * end
 		y = beginRotated.imag
 		boundaries = self.getBoundaries()
-		for boundaryIndex in xrange( len( boundaries ) ):
+		for boundaryIndex in self.getBoundaryGrid().getLoopIndexesOverlappingBox( euclidean.getMinimum( begin, end ), euclidean.getMaximum( begin, end ) ):
 			boundary = boundaries[ boundaryIndex ]
 			boundaryRotated = euclidean.getPointsRoundZAxis( segmentYMirror, boundary )
 			euclidean.addXIntersectionIndexesFromLoopY( boundaryRotated, boundaryIndex, switchX, y )
@@ -351,22 +341,6 @@ class CombSkein:
 			pathIndex -= 1
 		return pathAround[ : 1 ]
 
-	def parseBoundariesLayers( self, combRepository, line ):
-		"Parse a gcode line."
-		splitLine = gcodec.getSplitLineBeforeBracketSemicolon( line )
-		if len( splitLine ) < 1:
-			return
-		firstWord = splitLine[ 0 ]
-		if firstWord == 'M103':
-			self.boundaryLoop = None
-		elif firstWord == '(<boundaryPoint>':
-			location = gcodec.getLocationFromSplitLine( None, splitLine )
-			self.addToLoop( location )
-		elif firstWord == '(<layer>':
-			self.boundaryLoop = None
-			self.layer = None
-			self.oldZ = float( splitLine[ 1 ] )
-
 	def parseInitialization( self, combRepository ):
 		"Parse gcode initialization and store the parameters."
 		for self.lineIndex in xrange( len( self.lines ) ):
@@ -407,6 +381,15 @@ class CombSkein:
 				self.layerZ = self.nextLayerZ
 		self.distanceFeedRate.addLine( line )
 
+	def setLayerTable( self ):
+		"Set the table of the boundary loops of each layer z from the layer summaries."
+		layerSummaryTable = gcodec.LayerSummaryTable().getFromGcodeLines( self.lines, self.lineIndex )
+		for layerSummary in layerSummaryTable.layerSummaries:
+			if len( layerSummary.boundaryLoops ) > 0:
+				if layerSummary.z not in self.layerTable:
+					self.layerTable[ layerSummary.z ] = []
+				self.layerTable[ layerSummary.z ] += layerSummary.boundaryLoops
+
 
 def main():
 	"Display the comb dialog."
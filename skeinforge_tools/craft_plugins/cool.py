@@ -180,7 +180,7 @@ class CoolSkein:
 		"Add the minimum radius cool orbits."
 		if len( self.boundaryLayer.loops ) < 1:
 			return
-		insetBoundaryLoops = intercircle.getInsetLoopsFromLoops( self.perimeterWidth, self.boundaryLayer.loops )
+		insetBoundaryLoops = intercircle.getInsetLoopsFromLoops( self.perimeterWidth, self.boundaryLayer.loops, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 		if len( insetBoundaryLoops ) < 1:
 			insetBoundaryLoops = self.boundaryLayer.loops
 		largestLoop = euclidean.getLargestLoop( insetBoundaryLoops )
@@ -218,7 +218,7 @@ class CoolSkein:
 
 	def addGcodeFromFeedRateMovementZ( self, feedRateMinute, point, z ):
 		"Add a movement to the output."
-		self.distanceFeedRate.addLine( self.distanceFeedRate.getLinearGcodeMovementWithFeedRate( feedRateMinute, point, z ) )
+		self.distanceFeedRate.addGcodeMovementZWithFeedRate( feedRateMinute, point, z )
 
 	def addOrbitsIfNecessary( self, remainingOrbitTime ):
 		"Parse a gcode line and add it to the cool skein."
@@ -247,6 +247,7 @@ class CoolSkein:
 		self.lines = gcodec.getTextLines( gcodeText )
 		self.minimumArea = 4.0 * coolRepository.minimumOrbitalRadius.value * coolRepository.minimumOrbitalRadius.value
 		self.parseInitialization()
+		self.layerSummaryTable = gcodec.LayerSummaryTable().getFromGcodeLines( self.lines, self.lineIndex, self.feedRateMinute )
 		self.boundingRectangle = gcodec.BoundingRectangle().getFromGcodeLines( self.lines[ self.lineIndex : ], 0.5 * self.perimeterWidth )
 		margin = 0.2 * self.perimeterWidth
 		halfCornerMargin = self.halfCorner + complex( margin, margin )
@@ -261,23 +262,7 @@ class CoolSkein:
 
 	def getLayerTime( self ):
 		"Get the time the extruder spends on the layer."
-		feedRateMinute = self.feedRateMinute
-		layerTime = 0.0
-		lastThreadLocation = self.oldLocation
-		for lineIndex in xrange( self.lineIndex, len( self.lines ) ):
-			line = self.lines[ lineIndex ]
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon( line )
-			firstWord = gcodec.getFirstWord( splitLine )
-			if firstWord == 'G1':
-				location = gcodec.getLocationFromSplitLine( lastThreadLocation, splitLine )
-				feedRateMinute = gcodec.getFeedRateMinute( feedRateMinute, splitLine )
-				if lastThreadLocation != None:
-					feedRateSecond = feedRateMinute / 60.0
-					layerTime += location.distance( lastThreadLocation ) / feedRateSecond
-				lastThreadLocation = location
-			elif firstWord == '(</layer>)':
-				return layerTime
-		return layerTime
+		return self.layerSummaryTable.getLayerSummary( self.lineIndex ).layerTime
 
 	def parseInitialization( self ):
 		"Parse gcode initialization and store the parameters."
@@ -166,9 +166,9 @@ class DrillSkein:
 	def addGcodeFromVerticalThread( self, point, zBegin, zEnd ):
 		"Add a thread to the output."
 		self.distanceFeedRate.addGcodeMovementZ( point, zBegin )
-		self.distanceFeedRate.addLine( "M101" ) # Turn extruder on.
+		self.distanceFeedRate.emitCommand( 'M101' ) # Turn extruder on.
 		self.distanceFeedRate.addGcodeMovementZ( point, zEnd )
-		self.distanceFeedRate.addLine( "M103" ) # Turn extruder off.
+		self.distanceFeedRate.emitCommand( 'M103' ) # Turn extruder off.
 
 	def addThreadLayerIfNone( self ):
 		"Add a thread layer if it is none."
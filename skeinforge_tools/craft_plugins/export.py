@@ -9,6 +9,11 @@ http://www.bitsfrombytes.com/wiki/index.php?title=Skeinforge_Export
 The default 'Activate Export' checkbox is on.  When it is on, the functions described below will work, when it is off, the functions will not be called.
 
 ==Settings==
+===Activate Cache===
+Default is on.
+
+When selected, the output of each craft procedure and the geometry of each layer are saved in the cache folder in the .skeinforge folder in the home directory, so that when the file is crafted again only the procedures and layers whose inputs have changed are crafted.  When it is off, nothing is read from or written to the cache, and the skeinforge_tools code is not hashed to make the cache keys.
+
 ===Also Send Output To===
 Default is empty.
 
@@ -27,6 +32,11 @@ Default is gcode.
 
 Defines the file extension added to the name of the output file.
 
+===Maximum Cache Size===
+Default is 256 megabytes.
+
+Defines the maximum size of the cache folder.  When the cache is bigger, the least recently used outputs are deleted.
+
 ===Save Penultimate Gcode===
 Default is off.
 
@@ -221,6 +231,8 @@ class ExportRepository:
 			self.exportPlugins.append( exportPlugin )
 		self.fileExtension = settings.StringSetting().getFromValue( 'File Extension:', self, 'gcode' )
 		self.savePenultimateGcode = settings.BooleanSetting().getFromValue( 'Save Penultimate Gcode', self, False )
+		self.activateCache = settings.BooleanSetting().getFromValue( 'Activate Cache', self, True )
+		self.maximumCacheSize = settings.IntSpin().getFromValue( 16, 'Maximum Cache Size (megabytes):', self, 4096, 256 )
 		self.executeTitle = 'Export'
 
 	def execute( self ):
@@ -233,7 +245,7 @@ class ExportRepository:
 class ExportSkein:
 	"A class to export a skein of extrusions."
 	def __init__( self ):
-		self.decimalPlacesExported = 2
+		self.formatter = euclidean.getFixedPointFormatter( 2 )
 		self.output = cStringIO.StringIO()
 
 	def addLine( self, line ):
@@ -248,20 +260,19 @@ class ExportSkein:
 			self.parseLine( exportRepository, line )
 		return self.output.getvalue()
 
-	def getLineWithTruncatedNumber( self, character, line ):
-		'Get a line with the number after the character truncated.'
-		indexOfCharacter = line.find( character )
-		if indexOfCharacter < 0:
-			return line
-		indexOfNumberEnd = line.find( ' ', indexOfCharacter )
-		if indexOfNumberEnd < 0:
-			indexOfNumberEnd = len( line )
-		indexOfNumberStart = indexOfCharacter + 1
-		numberString = line[ indexOfNumberStart : indexOfNumberEnd ]
-		if numberString == '':
-			return line
-		roundedNumberString = euclidean.getRoundedToDecimalPlacesString( self.decimalPlacesExported, float( numberString ) )
-		return line[ : indexOfNumberStart ] + roundedNumberString + line[ indexOfNumberEnd : ]
+	def getLineWithTruncatedNumbers( self, line ):
+		'Get a line with the X, Y, Z, I, J and R numbers truncated to the exported decimal places, in one pass over the words.'
+		words = line.split( ' ' )
+		truncatedLetters = ''
+		for wordIndex in xrange( 1, len( words ) ):
+			word = words[ wordIndex ]
+			letter = word[ : 1 ]
+			if letter == '(' or letter == ';':
+				return ' '.join( words )
+			if len( word ) > 1 and letter in 'XYZIJR' and letter not in truncatedLetters:
+				truncatedLetters += letter
+				words[ wordIndex ] = letter + self.formatter.getString( float( word[ 1 : ] ) )
+		return ' '.join( words )
 
 	def parseLine( self, exportRepository, line ):
 		"Parse a gcode line."
@@ -270,7 +281,7 @@ class ExportSkein:
 			return
 		firstWord = splitLine[ 0 ]
 		if firstWord == '(<decimalPlacesCarried>':
-			self.decimalPlacesExported = max( 1, int( splitLine[ 1 ] ) - 1 )
+			self.formatter = euclidean.getFixedPointFormatter( max( 1, int( splitLine[ 1 ] ) - 1 ) )
 		if firstWord[ 0 ] == '(' and exportRepository.deleteComments.value:
 			return
 		if firstWord == '(</extruderInitialization>)':
@@ -278,13 +289,7 @@ class ExportSkein:
 		if firstWord != 'G1' and firstWord != 'G2' and firstWord != 'G3' :
 			self.addLine( line )
 			return
-		line = self.getLineWithTruncatedNumber( 'X', line )
-		line = self.getLineWithTruncatedNumber( 'Y', line )
-		line = self.getLineWithTruncatedNumber( 'Z', line )
-		line = self.getLineWithTruncatedNumber( 'I', line )
-		line = self.getLineWithTruncatedNumber( 'J', line )
-		line = self.getLineWithTruncatedNumber( 'R', line )
-		self.addLine( line )
+		self.addLine( self.getLineWithTruncatedNumbers( line ) )
 
 
 def main():
@@ -93,6 +93,11 @@ Default is one, giving alternating cross hatching.
 
 Defines the number of layers that the infill begin rotation will repeat.  With a value higher than one, the infill will go in one direction more often, giving the object more strength in one direction and less in the other, this is useful for beams and cantilevers.
 
+====Infill Order Improvement Time====
+Default is zero seconds.
+
+The infill paths are extruded in nearest neighbour order, each path is the path with the endpoint nearest to the end of the path before it.  When the infill order improvement time is above zero, that order is improved by reversing runs of paths when that shortens the travel, until no reversal shortens the travel or the time for each group of infill paths has passed.  This shortens the print time, but because the improvement stops after the time has passed, the infill order could be different on a slower computer.
+
 ====Infill Perimeter Overlap====
 Default is 0.15.
 
@@ -181,8 +186,14 @@ from skeinforge_tools.skeinforge_utilities import euclidean
 from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import intercircle
 from skeinforge_tools.skeinforge_utilities import interpret
+from skeinforge_tools.skeinforge_utilities import path_order
+from skeinforge_tools.skeinforge_utilities import scanline
+from skeinforge_tools.skeinforge_utilities import parallel
 from skeinforge_tools.skeinforge_utilities import settings
+from skeinforge_tools.skeinforge_utilities import skein_tree
+from skeinforge_tools.skeinforge_utilities import stage_cache
 from skeinforge_tools.skeinforge_utilities.vector3 import Vector3
+import cStringIO
 import math
 import sys
 
@@ -330,7 +341,7 @@ __license__ = "GPL 3.0"
 # concept, spreadsheet to python and/or javascript
 # concept, blog, frequent updates, mix associated news
 
-def addAroundGridPoint( arounds, gridPoint, gridPointInsetX, gridPointInsetY, gridPoints, gridSearchRadius, isBothOrNone, isDoubleJunction, isJunctionWide, paths, pixelTable, width ):
+def addAroundGridPoint( arounds, gridPoint, gridPointInsetX, gridPointInsetY, gridPoints, gridSearchRadius, isBothOrNone, isDoubleJunction, isJunctionWide, paths, pixelGrid, width ):
 	"Add the path around the grid point."
 	closestPathIndex = None
 	aroundIntersectionPaths = []
@@ -358,8 +369,8 @@ def addAroundGridPoint( arounds, gridPoint, gridPointInsetX, gridPointInsetY, gr
 	segmentFirstPixel = euclidean.getStepKeyFromPoint( complex( gridPoint.real, segmentFirstY ) / width )
 	segmentSecondPixel = euclidean.getStepKeyFromPoint( complex( gridPoint.real, segmentSecondY ) / width )
 	pathIndexTable = {}
-	addPathIndexFirstSegment( gridPixel, pathIndexTable, pixelTable, segmentFirstPixel )
-	addPathIndexSecondSegment( gridPixel, pathIndexTable, pixelTable, segmentSecondPixel )
+	addPathIndexFirstSegment( gridPixel, pathIndexTable, pixelGrid, segmentFirstPixel )
+	addPathIndexSecondSegment( gridPixel, pathIndexTable, pixelGrid, segmentSecondPixel )
 	for pathIndex in pathIndexTable.keys():
 		path = paths[ pathIndex ]
 		for pointIndex in xrange( len( path ) - 1 ):
@@ -379,55 +390,55 @@ def addAroundGridPoint( arounds, gridPoint, gridPointInsetX, gridPointInsetY, gr
 		setIsOutside( yCloseToCenterPath, yIntersectionPaths )
 	if len( yCloseToCenterPaths ) < 2:
 		yCloseToCenterPaths[ 0 ].gridPoint = gridPoint
-		insertGridPointPair( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, paths, pixelTable, yCloseToCenterPaths[ 0 ], width )
+		insertGridPointPair( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, paths, pixelGrid, yCloseToCenterPaths[ 0 ], width )
 		return
 	plusMinusSign = getPlusMinusSign( yCloseToCenterPaths[ 1 ].y - yCloseToCenterPaths[ 0 ].y )
 	yCloseToCenterPaths[ 0 ].gridPoint = complex( gridPoint.real, gridPoint.imag - plusMinusSign * gridPointInsetY )
 	yCloseToCenterPaths[ 1 ].gridPoint = complex( gridPoint.real, gridPoint.imag + plusMinusSign * gridPointInsetY )
 	yCloseToCenterPaths.sort( comparePointIndexDescending )
-	insertGridPointPairs( gridPoint, gridPointInsetX, gridPoints, yCloseToCenterPaths[ 0 ], yCloseToCenterPaths[ 1 ], isBothOrNone, isJunctionWide, paths, pixelTable, width )
+	insertGridPointPairs( gridPoint, gridPointInsetX, gridPoints, yCloseToCenterPaths[ 0 ], yCloseToCenterPaths[ 1 ], isBothOrNone, isJunctionWide, paths, pixelGrid, width )
 
-def addPath( infillWidth, infillPaths, path, rotationPlaneAngle ):
+def addPath( infillWidth, infillPaths, path, rotationPlaneAngle, simplification ):
 	"Add simplified path to fill."
-	simplifiedPath = euclidean.getSimplifiedPath( path, infillWidth )
+	simplifiedPath = euclidean.getSimplifiedPath( path, infillWidth, simplification )
 	if len( simplifiedPath ) < 2:
 		return
 	planeRotated = euclidean.getPointsRoundZAxis( rotationPlaneAngle, simplifiedPath )
 	infillPaths.append( planeRotated )
 
-def addPathIndexFirstSegment( gridPixel, pathIndexTable, pixelTable, segmentFirstPixel ):
+def addPathIndexFirstSegment( gridPixel, pathIndexTable, pixelGrid, segmentFirstPixel ):
 	"Add the path index of the closest segment found toward the second segment."
 	for yStep in xrange( gridPixel[ 1 ], segmentFirstPixel[ 1 ] - 1, - 1 ):
-		if getKeyIsInPixelTableAddValue( ( gridPixel[ 0 ], yStep ), pathIndexTable, pixelTable ):
+		if getKeyIsInPixelGridAddValue( ( gridPixel[ 0 ], yStep ), pathIndexTable, pixelGrid ):
 			return
 
-def addPathIndexSecondSegment( gridPixel, pathIndexTable, pixelTable, segmentSecondPixel ):
+def addPathIndexSecondSegment( gridPixel, pathIndexTable, pixelGrid, segmentSecondPixel ):
 	"Add the path index of the closest segment found toward the second segment."
 	for yStep in xrange( gridPixel[ 1 ], segmentSecondPixel[ 1 ] + 1 ):
-		if getKeyIsInPixelTableAddValue( ( gridPixel[ 0 ], yStep ), pathIndexTable, pixelTable ):
+		if getKeyIsInPixelGridAddValue( ( gridPixel[ 0 ], yStep ), pathIndexTable, pixelGrid ):
 			return
 
-def addPointOnPath( path, pathIndex, pixelTable, point, pointIndex, width ):
-	"Add a point to a path and the pixel table."
+def addPointOnPath( path, pathIndex, pixelGrid, point, pointIndex, width ):
+	"Add a point to a path and the pixel grid."
 	pointIndexMinusOne = pointIndex - 1
 	if pointIndex < len( path ) and pointIndexMinusOne >= 0:
-		segmentTable = {}
+		segmentGrid = euclidean.PixelGrid()
 		begin = path[ pointIndexMinusOne ]
 		end = path[ pointIndex ]
-		euclidean.addValueSegmentToPixelTable( begin, end, segmentTable, pathIndex, width )
-		euclidean.removePixelTableFromPixelTable( segmentTable, pixelTable )
+		segmentGrid.addSegment( begin, end, pathIndex, width )
+		pixelGrid.removeGrid( segmentGrid )
 	if pointIndexMinusOne >= 0:
 		begin = path[ pointIndexMinusOne ]
-		euclidean.addValueSegmentToPixelTable( begin, point, pixelTable, pathIndex, width )
+		pixelGrid.addSegment( begin, point, pathIndex, width )
 	if pointIndex < len( path ):
 		end = path[ pointIndex ]
-		euclidean.addValueSegmentToPixelTable( point, end, pixelTable, pathIndex, width )
+		pixelGrid.addSegment( point, end, pathIndex, width )
 	path.insert( pointIndex, point )
 
-def addPointOnPathIfFree( path, pathIndex, pixelTable, point, pointIndex, width ):
+def addPointOnPathIfFree( path, pathIndex, pixelGrid, point, pointIndex, width ):
 	"Add the closest point to a path, if the point added to a path is free."
-	if isAddedPointOnPathFree( path, pixelTable, point, pointIndex, width ):
-		addPointOnPath( path, pathIndex, pixelTable, point, pointIndex, width )
+	if isAddedPointOnPathFree( path, pixelGrid, point, pointIndex, width ):
+		addPointOnPath( path, pathIndex, pixelGrid, point, pointIndex, width )
 
 def addShortenedLineSegment( lineSegment, shortenDistance, shortenedSegments ):
 	"Add shortened line segment."
@@ -502,26 +513,26 @@ def comparePointIndexDescending( self, other ):
 		return 1
 	return 0
 
-def createExtraFillLoops( radius, shouldExtraLoopsBeAdded, surroundingLoop ):
+def createExtraFillLoops( radius, shouldExtraLoopsBeAdded, simplification, surroundingLoop ):
 	"Create extra fill loops."
 	for innerSurrounding in surroundingLoop.innerSurroundings:
-		createFillForSurroundings( radius, shouldExtraLoopsBeAdded, innerSurrounding.innerSurroundings )
+		createFillForSurroundings( radius, shouldExtraLoopsBeAdded, simplification, innerSurrounding.innerSurroundings )
 	outsides = []
 	insides = euclidean.getInsidesAddToOutsides( surroundingLoop.getFillLoops(), outsides )
 	allFillLoops = []
 	for outside in outsides:
 		transferredLoops = euclidean.getTransferredPaths( insides, outside )
-		allFillLoops += getExtraFillLoops( transferredLoops, outside, radius )
+		allFillLoops += getExtraFillLoops( transferredLoops, outside, radius, simplification )
 	surroundingLoop.lastFillLoops = allFillLoops
 	if shouldExtraLoopsBeAdded:
 		surroundingLoop.extraLoops += allFillLoops
 	if len( allFillLoops ) > 0:
 		surroundingLoop.lastExistingFillLoops = allFillLoops
 
-def createFillForSurroundings( radius, shouldExtraLoopsBeAdded, surroundingLoops ):
+def createFillForSurroundings( radius, shouldExtraLoopsBeAdded, simplification, surroundingLoops ):
 	"Create extra fill loops for surrounding loops."
 	for surroundingLoop in surroundingLoops:
-		createExtraFillLoops( radius, shouldExtraLoopsBeAdded, surroundingLoop )
+		createExtraFillLoops( radius, shouldExtraLoopsBeAdded, simplification, surroundingLoop )
 
 def getAdditionalLength( path, point, pointIndex ):
 	"Get the additional length added by inserting a point into a path."
@@ -539,11 +550,17 @@ def getCraftedTextFromText( gcodeText, fillRepository = None ):
 	"Fill the inset gcode text."
 	if gcodec.isProcedureDoneOrFileIsEmpty( gcodeText, 'fill' ):
 		return gcodeText
+	return getCraftedTree( skein_tree.getSkeinStreamFromText( gcodeText ), fillRepository ).getText()
+
+def getCraftedTree( skeinTree, fillRepository = None ):
+	"Fill a skein tree."
+	if skeinTree.isProcedureDoneOrEmpty( 'fill' ):
+		return skeinTree
 	if fillRepository == None:
 		fillRepository = settings.getReadRepository( FillRepository() )
 	if not fillRepository.activateFill.value:
-		return gcodeText
-	return FillSkein().getCraftedGcode( fillRepository, gcodeText )
+		return skeinTree
+	return FillSkein().getCraftedTree( fillRepository, skeinTree )
 
 def getClosestOppositeIntersectionPaths( yIntersectionPaths ):
 	"Get the close to center paths, starting with the first and an additional opposite if it exists."
@@ -557,7 +574,7 @@ def getClosestOppositeIntersectionPaths( yIntersectionPaths ):
 			return yCloseToCenterPaths
 	return yCloseToCenterPaths
 
-def getExtraFillLoops( insideLoops, outsideLoop, radius ):
+def getExtraFillLoops( insideLoops, outsideLoop, radius, simplification ):
 	"Get extra loops between inside and outside loops."
 	greaterThanRadius = 1.4 * radius # later 1.01 * radius
 	extraFillLoops = []
@@ -565,7 +582,7 @@ def getExtraFillLoops( insideLoops, outsideLoop, radius ):
 	centers = intercircle.getCentersFromPoints( points, greaterThanRadius )
 	otherLoops = insideLoops + [ outsideLoop ]
 	for center in centers:
-		inset = intercircle.getSimplifiedInsetFromClockwiseLoop( center, radius )
+		inset = intercircle.getSimplifiedInsetFromClockwiseLoop( center, radius, simplification )
 		if intercircle.isLargeSameDirection( inset, center, radius ):
 			if isPathAlwaysInsideLoop( outsideLoop, inset ):
 				if isPathAlwaysOutsideLoops( insideLoops, inset ):
@@ -574,16 +591,16 @@ def getExtraFillLoops( insideLoops, outsideLoop, radius ):
 						extraFillLoops.append( inset )
 	return extraFillLoops
 
-def getKeyIsInPixelTableAddValue( key, pathIndexTable, pixelTable ):
-	"Determine if the key is in the pixel table, and if it is and if the value is not None add it to the path index table."
-	if key in pixelTable:
-		value = pixelTable[ key ]
+def getKeyIsInPixelGridAddValue( key, pathIndexTable, pixelGrid ):
+	"Determine if the key is in the pixel grid, and if it is and if the value is not None add it to the path index table."
+	if pixelGrid.isPixelOccupied( key ):
+		value = pixelGrid.getPixelValue( key )
 		if value != None:
 			pathIndexTable[ value ] = None
 		return True
 	return False
 
-def getNonIntersectingGridPointLine( gridPointInsetX, isJunctionWide, paths, pixelTable, yIntersectionPath, width ):
+def getNonIntersectingGridPointLine( gridPointInsetX, isJunctionWide, paths, pixelGrid, yIntersectionPath, width ):
 	"Get the points around the grid point that is junction wide that do not intersect."
 	pointIndexPlusOne = yIntersectionPath.getPointIndexPlusOne()
 	path = yIntersectionPath.getPath( paths )
@@ -593,13 +610,13 @@ def getNonIntersectingGridPointLine( gridPointInsetX, isJunctionWide, paths, pix
 	if isJunctionWide:
 		gridPointXFirst = complex( yIntersectionPath.gridPoint.real - plusMinusSign * gridPointInsetX, yIntersectionPath.gridPoint.imag )
 		gridPointXSecond = complex( yIntersectionPath.gridPoint.real + plusMinusSign * gridPointInsetX, yIntersectionPath.gridPoint.imag )
-		if isAddedPointOnPathFree( path, pixelTable, gridPointXSecond, pointIndexPlusOne, width ):
-			if isAddedPointOnPathFree( path, pixelTable, gridPointXFirst, pointIndexPlusOne, width ):
+		if isAddedPointOnPathFree( path, pixelGrid, gridPointXSecond, pointIndexPlusOne, width ):
+			if isAddedPointOnPathFree( path, pixelGrid, gridPointXFirst, pointIndexPlusOne, width ):
 				return [ gridPointXSecond, gridPointXFirst ]
-			if isAddedPointOnPathFree( path, pixelTable, yIntersectionPath.gridPoint, pointIndexPlusOne, width ):
+			if isAddedPointOnPathFree( path, pixelGrid, yIntersectionPath.gridPoint, pointIndexPlusOne, width ):
 				return [ gridPointXSecond, yIntersectionPath.gridPoint ]
 			return [ gridPointXSecond ]
-	if isAddedPointOnPathFree( path, pixelTable, yIntersectionPath.gridPoint, pointIndexPlusOne, width ):
+	if isAddedPointOnPathFree( path, pixelGrid, yIntersectionPath.gridPoint, pointIndexPlusOne, width ):
 		return [ yIntersectionPath.gridPoint ]
 	return []
 
@@ -653,37 +670,37 @@ def getYIntersectionInsideYSegment( segmentFirstY, segmentSecondY, complexFirst,
 		return yIntersection
 	return None
 
-def insertGridPointPair( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, paths, pixelTable, yIntersectionPath, width ):
+def insertGridPointPair( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, paths, pixelGrid, yIntersectionPath, width ):
 	"Insert a pair of points around the grid point is is junction wide, otherwise inset one point."
-	linePath = getNonIntersectingGridPointLine( gridPointInsetX, isJunctionWide, paths, pixelTable, yIntersectionPath, width )
-	insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, linePath, paths, pixelTable, yIntersectionPath, width )
+	linePath = getNonIntersectingGridPointLine( gridPointInsetX, isJunctionWide, paths, pixelGrid, yIntersectionPath, width )
+	insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, linePath, paths, pixelGrid, yIntersectionPath, width )
 
-def insertGridPointPairs( gridPoint, gridPointInsetX, gridPoints, intersectionPathFirst, intersectionPathSecond, isBothOrNone, isJunctionWide, paths, pixelTable, width ):
+def insertGridPointPairs( gridPoint, gridPointInsetX, gridPoints, intersectionPathFirst, intersectionPathSecond, isBothOrNone, isJunctionWide, paths, pixelGrid, width ):
 	"Insert a pair of points around a pair of grid points."
-	gridPointLineFirst = getNonIntersectingGridPointLine( gridPointInsetX, isJunctionWide, paths, pixelTable, intersectionPathFirst, width )
+	gridPointLineFirst = getNonIntersectingGridPointLine( gridPointInsetX, isJunctionWide, paths, pixelGrid, intersectionPathFirst, width )
 	if len( gridPointLineFirst ) < 1:
 		if isBothOrNone:
 			return
 		intersectionPathSecond.gridPoint = gridPoint
-		insertGridPointPair( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, paths, pixelTable, intersectionPathSecond, width )
+		insertGridPointPair( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, paths, pixelGrid, intersectionPathSecond, width )
 		return
-	gridPointLineSecond = getNonIntersectingGridPointLine( gridPointInsetX, isJunctionWide, paths, pixelTable, intersectionPathSecond, width )
+	gridPointLineSecond = getNonIntersectingGridPointLine( gridPointInsetX, isJunctionWide, paths, pixelGrid, intersectionPathSecond, width )
 	if len( gridPointLineSecond ) > 0:
-		insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, gridPointLineFirst, paths, pixelTable, intersectionPathFirst, width )
-		insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, gridPointLineSecond, paths, pixelTable, intersectionPathSecond, width )
+		insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, gridPointLineFirst, paths, pixelGrid, intersectionPathFirst, width )
+		insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, gridPointLineSecond, paths, pixelGrid, intersectionPathSecond, width )
 		return
 	if isBothOrNone:
 		return
 	originalGridPointFirst = intersectionPathFirst.gridPoint
 	intersectionPathFirst.gridPoint = gridPoint
-	gridPointLineFirstCenter = getNonIntersectingGridPointLine( gridPointInsetX, isJunctionWide, paths, pixelTable, intersectionPathFirst, width )
+	gridPointLineFirstCenter = getNonIntersectingGridPointLine( gridPointInsetX, isJunctionWide, paths, pixelGrid, intersectionPathFirst, width )
 	if len( gridPointLineFirstCenter ) > 0:
-		insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, gridPointLineFirstCenter, paths, pixelTable, intersectionPathFirst, width )
+		insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, gridPointLineFirstCenter, paths, pixelGrid, intersectionPathFirst, width )
 		return
 	intersectionPathFirst.gridPoint = originalGridPointFirst
-	insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, gridPointLineFirst, paths, pixelTable, intersectionPathFirst, width )
+	insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, gridPointLineFirst, paths, pixelGrid, intersectionPathFirst, width )
 
-def insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, linePath, paths, pixelTable, yIntersectionPath, width ):
+def insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJunctionWide, linePath, paths, pixelGrid, yIntersectionPath, width ):
 	"Insert a pair of points around the grid point is is junction wide, otherwise inset one point."
 	if len( linePath ) < 1:
 		return
@@ -711,37 +728,37 @@ def insertGridPointPairWithLinePath( gridPoint, gridPointInsetX, gridPoints, isJ
 			if intersectionBeginSegmentLength > 1.1 * distanceYAbsoluteInset:
 				intersectionBeginPoint = intersectionPoint + intersectionBeginSegment * distanceYAbsoluteInset / intersectionBeginSegmentLength
 	for point in linePath:
-		addPointOnPath( path, yIntersectionPath.pathIndex, pixelTable, point, yIntersectionPath.getPointIndexPlusOne(), width )
+		addPointOnPath( path, yIntersectionPath.pathIndex, pixelGrid, point, yIntersectionPath.getPointIndexPlusOne(), width )
 	if intersectionBeginPoint != None:
-		addPointOnPath( path, yIntersectionPath.pathIndex, pixelTable, intersectionBeginPoint, yIntersectionPath.getPointIndexPlusOne(), width )
+		addPointOnPath( path, yIntersectionPath.pathIndex, pixelGrid, intersectionBeginPoint, yIntersectionPath.getPointIndexPlusOne(), width )
 
-def isAddedPointOnPathFree( path, pixelTable, point, pointIndex, width ):
-	"Determine if the point added to a path is intersecting the pixel table or the path."
+def isAddedPointOnPathFree( path, pixelGrid, point, pointIndex, width ):
+	"Determine if the point added to a path is intersecting the pixel grid or the path."
 	if pointIndex > 0 and pointIndex < len( path ):
 		if isSharpCorner( ( path[ pointIndex - 1 ] ), point, ( path[ pointIndex ] ) ):
 			return False
 	pointIndexMinusOne = pointIndex - 1
 	if pointIndexMinusOne >= 0:
-		maskTable = {}
+		maskGrid = euclidean.PixelGrid()
 		begin = path[ pointIndexMinusOne ]
 		if pointIndex < len( path ):
 			end = path[ pointIndex ]
-			euclidean.addValueSegmentToPixelTable( begin, end, maskTable, None, width )
-		segmentTable = {}
-		euclidean.addSegmentToPixelTable( point, begin, segmentTable, 0.0, 2.0, width )
-		if euclidean.isPixelTableIntersecting( pixelTable, segmentTable, maskTable ):
+			maskGrid.addSegment( begin, end, None, width )
+		segmentGrid = euclidean.PixelGrid()
+		segmentGrid.addShortenedSegment( point, begin, 0.0, 2.0, width )
+		if pixelGrid.isIntersecting( segmentGrid, maskGrid ):
 			return False
 		if isAddedPointOnPathIntersectingPath( begin, path, point, pointIndexMinusOne ):
 			return False
 	if pointIndex < len( path ):
-		maskTable = {}
+		maskGrid = euclidean.PixelGrid()
 		begin = path[ pointIndex ]
 		if pointIndexMinusOne >= 0:
 			end = path[ pointIndexMinusOne ]
-			euclidean.addValueSegmentToPixelTable( begin, end, maskTable, None, width )
-		segmentTable = {}
-		euclidean.addSegmentToPixelTable( point, begin, segmentTable, 0.0, 2.0, width )
-		if euclidean.isPixelTableIntersecting( pixelTable, segmentTable, maskTable ):
+			maskGrid.addSegment( begin, end, None, width )
+		segmentGrid = euclidean.PixelGrid()
+		segmentGrid.addShortenedSegment( point, begin, 0.0, 2.0, width )
+		if pixelGrid.isIntersecting( segmentGrid, maskGrid ):
 			return False
 		if isAddedPointOnPathIntersectingPath( begin, path, point, pointIndex ):
 			return False
@@ -797,7 +814,7 @@ def isPathAlwaysOutsideLoops( loops, path ):
 #			return True
 #	return False
 
-def isPointAddedAroundClosest( aroundPixelTable, layerExtrusionWidth, paths, removedEndpointPoint, width ):
+def isPointAddedAroundClosest( aroundPixelGrid, layerExtrusionWidth, paths, removedEndpointPoint, width ):
 	"Add the closest removed endpoint to the path, with minimal twisting."
 	closestDistanceSquared = 999999999999999999.0
 	closestPathIndex = None
@@ -815,10 +832,10 @@ def isPointAddedAroundClosest( aroundPixelTable, layerExtrusionWidth, paths, rem
 		return
 	closestPath = paths[ closestPathIndex ]
 	closestPointIndex = getWithLeastLength( closestPath, removedEndpointPoint )
-	if isAddedPointOnPathFree( closestPath, aroundPixelTable, removedEndpointPoint, closestPointIndex, width ):
-		addPointOnPath( closestPath, closestPathIndex, aroundPixelTable, removedEndpointPoint, closestPointIndex, width )
+	if isAddedPointOnPathFree( closestPath, aroundPixelGrid, removedEndpointPoint, closestPointIndex, width ):
+		addPointOnPath( closestPath, closestPathIndex, aroundPixelGrid, removedEndpointPoint, closestPointIndex, width )
 		return True
-	return isSidePointAdded( aroundPixelTable, closestPath, closestPathIndex, closestPointIndex, layerExtrusionWidth, removedEndpointPoint, width )
+	return isSidePointAdded( aroundPixelGrid, closestPath, closestPathIndex, closestPointIndex, layerExtrusionWidth, removedEndpointPoint, width )
 
 def isSegmentAround( aroundSegments, segment ):
 	"Determine if there is another segment around."
@@ -857,7 +874,7 @@ def isSharpCorner( beginComplex, centerComplex, endComplex ):
 	centerEndComplex /= centerEndLength
 	return euclidean.getDotProduct( centerBeginComplex, centerEndComplex ) > 0.9
 
-def isSidePointAdded( aroundPixelTable, closestPath, closestPathIndex, closestPointIndex, layerExtrusionWidth, removedEndpointPoint, width ):
+def isSidePointAdded( aroundPixelGrid, closestPath, closestPathIndex, closestPointIndex, layerExtrusionWidth, removedEndpointPoint, width ):
 	"Add side point along with the closest removed endpoint to the path, with minimal twisting."
 	if closestPointIndex <= 0 or closestPointIndex >= len( closestPath ):
 		return False
@@ -892,31 +909,31 @@ def isSidePointAdded( aroundPixelTable, closestPath, closestPathIndex, closestPo
 	if abs( sidePoint -  farthest ) > abs( sidePointOther -  farthest ):
 		perpendicular = - perpendicular
 		sidePoint = sidePointOther
-	maskTable = {}
-	closestSegmentTable = {}
-	toPerpendicularTable = {}
-	euclidean.addValueSegmentToPixelTable( pointBegin, pointEnd, maskTable, None, width )
-	euclidean.addValueSegmentToPixelTable( closest, removedEndpointPoint, closestSegmentTable, None, width )
-	euclidean.addValueSegmentToPixelTable( sidePoint, farthest, toPerpendicularTable, None, width )
-	if euclidean.isPixelTableIntersecting( aroundPixelTable, toPerpendicularTable, maskTable ) or euclidean.isPixelTableIntersecting( closestSegmentTable, toPerpendicularTable, maskTable ):
+	maskGrid = euclidean.PixelGrid()
+	closestSegmentGrid = euclidean.PixelGrid()
+	toPerpendicularGrid = euclidean.PixelGrid()
+	maskGrid.addSegment( pointBegin, pointEnd, None, width )
+	closestSegmentGrid.addSegment( closest, removedEndpointPoint, None, width )
+	toPerpendicularGrid.addSegment( sidePoint, farthest, None, width )
+	if aroundPixelGrid.isIntersecting( toPerpendicularGrid, maskGrid ) or closestSegmentGrid.isIntersecting( toPerpendicularGrid, maskGrid ):
 		sidePoint = removedEndpointPoint - perpendicular
-		toPerpendicularTable = {}
-		euclidean.addValueSegmentToPixelTable( sidePoint, farthest, toPerpendicularTable, None, width )
-		if euclidean.isPixelTableIntersecting( aroundPixelTable, toPerpendicularTable, maskTable ) or euclidean.isPixelTableIntersecting( closestSegmentTable, toPerpendicularTable, maskTable ):
+		toPerpendicularGrid = euclidean.PixelGrid()
+		toPerpendicularGrid.addSegment( sidePoint, farthest, None, width )
+		if aroundPixelGrid.isIntersecting( toPerpendicularGrid, maskGrid ) or closestSegmentGrid.isIntersecting( toPerpendicularGrid, maskGrid ):
 			return False
 	if insertPointBefore != None:
-		addPointOnPathIfFree( closestPath, closestPathIndex, aroundPixelTable, insertPointBefore, closestPointIndex, width )
-	addPointOnPathIfFree( closestPath, closestPathIndex, aroundPixelTable, sidePoint, closestPointIndex, width )
+		addPointOnPathIfFree( closestPath, closestPathIndex, aroundPixelGrid, insertPointBefore, closestPointIndex, width )
+	addPointOnPathIfFree( closestPath, closestPathIndex, aroundPixelGrid, sidePoint, closestPointIndex, width )
 	if insertPointAfter != None:
-		addPointOnPathIfFree( closestPath, closestPathIndex, aroundPixelTable, insertPointAfter, closestPointIndex, width )
+		addPointOnPathIfFree( closestPath, closestPathIndex, aroundPixelGrid, insertPointAfter, closestPointIndex, width )
 	return True
 
-def removeEndpoints( aroundPixelTable, layerExtrusionWidth, paths, removedEndpoints, aroundWidth ):
+def removeEndpoints( aroundPixelGrid, layerExtrusionWidth, paths, removedEndpoints, aroundWidth ):
 	"Remove endpoints which are added to the path."
 	for removedEndpointIndex in xrange( len( removedEndpoints ) - 1, - 1, - 1 ):
 		removedEndpoint = removedEndpoints[ removedEndpointIndex ]
 		removedEndpointPoint = removedEndpoint.point
-		if isPointAddedAroundClosest( aroundPixelTable, layerExtrusionWidth, paths, removedEndpointPoint, aroundWidth ):
+		if isPointAddedAroundClosest( aroundPixelGrid, layerExtrusionWidth, paths, removedEndpointPoint, aroundWidth ):
 			removedEndpoints.remove( removedEndpoint )
 
 def setIsOutside( yCloseToCenterPath, yIntersectionPaths ):
@@ -962,6 +979,7 @@ class FillRepository:
 		self.infillBeginRotationRepeat = settings.IntSpin().getFromValue( 0, 'Infill Begin Rotation Repeat (layers):', self, 3, 1 )
 		self.infillInteriorDensityOverExteriorDensity = settings.FloatSpin().getFromValue( 0.8, 'Infill Interior Density over Exterior Density (ratio):', self, 1.0, 0.9 )
 		self.infillOddLayerExtraRotation = settings.FloatSpin().getFromValue( 30.0, 'Infill Odd Layer Extra Rotation (degrees):', self, 90.0, 90.0 )
+		self.infillOrderImprovementTime = settings.FloatSpin().getFromValue( 0.0, 'Infill Order Improvement Time (seconds):', self, 10.0, 0.0 )
 		self.infillPatternLabel = settings.LabelDisplay().getFromName( 'Infill Pattern:', self )
 		infillLatentStringVar = settings.LatentStringVar()
 		self.infillPatternGridHexagonal = settings.Radio().getFromRadio( infillLatentStringVar, 'Grid Hexagonal', self, False )
@@ -994,148 +1012,31 @@ class FillSkein:
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
 		self.extruderActive = False
 		self.fillInset = 0.18
+		self.extraShellsList = []
+		self.headerKey = None
 		self.isPerimeter = False
 		self.lastExtraShells = - 1
-		self.lineIndex = 0
+		self.layerKeys = []
 		self.oldLocation = None
 		self.oldOrderedLocation = Vector3()
 		self.rotatedLayer = None
 		self.rotatedLayers = []
-		self.shutdownLineIndex = sys.maxint
 		self.surroundingLoop = None
 		self.thread = None
 
-	def addFill( self, layerIndex ):
-		"Add fill to the carve layer."
-		alreadyFilledArounds = []
-		aroundPixelTable = {}
-		arounds = []
-		betweenWidth = self.betweenWidth
-		self.layerExtrusionWidth = self.infillWidth
-		layerFillInset = self.fillInset
+	def addFill( self, layerIndex, surroundingLoops ):
+		"Add the fill of the surrounding loops to the carve layer."
 		rotatedLayer = self.rotatedLayers[ layerIndex ]
-#		if layerIndex > 2:
-#			return
-#		print( 'layer index: %s  z: %s' % ( layerIndex, rotatedLayer.z ) )
 		self.distanceFeedRate.addLine( '(<layer> %s )' % rotatedLayer.z )
-		layerRotationAroundZAngle = self.getLayerRoundZ( layerIndex )
-		reverseZRotationAngle = complex( layerRotationAroundZAngle.real, - layerRotationAroundZAngle.imag )
-		surroundingCarves = []
-		layerRemainder = layerIndex % int( round( self.fillRepository.diaphragmPeriod.value ) )
-		if layerRemainder >= int( round( self.fillRepository.diaphragmThickness.value ) ) and rotatedLayer.rotation == None:
-			for surroundingIndex in xrange( 1, self.solidSurfaceThickness + 1 ):
-				self.addRotatedCarve( layerIndex - surroundingIndex, reverseZRotationAngle, surroundingCarves )
-				self.addRotatedCarve( layerIndex + surroundingIndex, reverseZRotationAngle, surroundingCarves )
-		extraShells = self.fillRepository.extraShellsSparseLayer.value
-		if len( surroundingCarves ) < self.doubleSolidSurfaceThickness:
-			extraShells = self.fillRepository.extraShellsAlternatingSolidLayer.value
-			if self.lastExtraShells != self.fillRepository.extraShellsBase.value:
-				extraShells = self.fillRepository.extraShellsBase.value
 		if rotatedLayer.rotation != None:
-			extraShells = 0
-			betweenWidth *= self.bridgeWidthMultiplier
-			self.layerExtrusionWidth = self.infillWidth * self.bridgeWidthMultiplier
-			layerFillInset = self.fillInset * self.bridgeWidthMultiplier
 			self.distanceFeedRate.addLine( '(<bridgeRotation> %s )' % rotatedLayer.rotation )
-		aroundInset = 0.25 * self.layerExtrusionWidth
-		aroundWidth = 0.25 * self.layerExtrusionWidth
-		self.lastExtraShells = extraShells
-		gridPointInsetX = 0.5 * layerFillInset
-		doubleExtrusionWidth = 2.0 * self.layerExtrusionWidth
-		endpoints = []
-		infillPaths = []
-		layerInfillSolidity = self.infillSolidity
-		self.isDoubleJunction = True
-		self.isJunctionWide = True
-		if self.fillRepository.infillPatternGridHexagonal.value:
-			if abs( euclidean.getDotProduct( layerRotationAroundZAngle, euclidean.getUnitPolar( self.infillBeginRotation ) ) ) < math.sqrt( 0.5 ):
-				layerInfillSolidity *= 0.5
-				self.isDoubleJunction = False
-			else:
-				self.isJunctionWide = False
-		rotatedExtruderLoops = []
-#		for surroundingLoop in rotatedLayer.surroundingLoops:
-#			surroundingLoop.fillBoundaries = intercircle.getInsetLoopsFromLoop( betweenWidth, surroundingLoop.boundary )
-#			surroundingLoop.lastExistingFillLoops = surroundingLoop.fillBoundaries
-		surroundingLoops = euclidean.getOrderedSurroundingLoops( self.layerExtrusionWidth, rotatedLayer.surroundingLoops )
-#		if isPerimeterPathInSurroundLoops( surroundingLoops ):
-#			extraShells = 0
-		createFillForSurroundings( betweenWidth, False, surroundingLoops )
-		for extraShellIndex in xrange( extraShells ):
-			createFillForSurroundings( self.layerExtrusionWidth, True, surroundingLoops )
-		fillLoops = euclidean.getFillOfSurroundings( surroundingLoops )
-		slightlyGreaterThanFill = 1.01 * layerFillInset
-		for loop in fillLoops:
-			alreadyFilledLoop = []
-			alreadyFilledArounds.append( alreadyFilledLoop )
-			planeRotatedPerimeter = euclidean.getPointsRoundZAxis( reverseZRotationAngle, loop )
-			rotatedExtruderLoops.append( planeRotatedPerimeter )
-			centers = intercircle.getCentersFromLoop( planeRotatedPerimeter, slightlyGreaterThanFill )
-			euclidean.addLoopToPixelTable( planeRotatedPerimeter, aroundPixelTable, aroundWidth )
-			for center in centers:
-				alreadyFilledInset = intercircle.getSimplifiedInsetFromClockwiseLoop( center, layerFillInset )
-				if intercircle.isLargeSameDirection( alreadyFilledInset, center, layerFillInset ):
-					alreadyFilledLoop.append( alreadyFilledInset )
-					around = intercircle.getSimplifiedInsetFromClockwiseLoop( center, aroundInset )
-					if euclidean.isPathInsideLoop( planeRotatedPerimeter, around ) == euclidean.isWiddershins( planeRotatedPerimeter ):
-						around.reverse()
-						arounds.append( around )
-						euclidean.addLoopToPixelTable( around, aroundPixelTable, aroundWidth )
-		if len( arounds ) < 1:
-			self.addThreadsBridgeLayer( rotatedLayer, surroundingLoops )
-			return
-		back = euclidean.getBackOfLoops( arounds )
-		front = euclidean.getFrontOfLoops( arounds )
-		area = self.getCarveArea( layerIndex )
-		if area > 0.0 and len( surroundingCarves ) >= self.doubleSolidSurfaceThickness:
-			areaChange = 0.0
-			for surroundingIndex in xrange( 1, self.solidSurfaceThickness + 1 ):
-				areaChange = max( areaChange, self.getAreaChange( area, layerIndex - surroundingIndex ) )
-				areaChange = max( areaChange, self.getAreaChange( area, layerIndex + surroundingIndex ) )
-			if areaChange < 0.5 or self.solidSurfaceThickness == 0:
-				if self.fillRepository.infillInteriorDensityOverExteriorDensity.value <= 0.0:
-					self.addThreadsBridgeLayer( rotatedLayer, surroundingLoops )
-				self.layerExtrusionWidth /= self.fillRepository.infillInteriorDensityOverExteriorDensity.value
-		front = math.ceil( front / self.layerExtrusionWidth ) * self.layerExtrusionWidth
-		fillWidth = back - front
-		numberOfLines = int( math.ceil( fillWidth / self.layerExtrusionWidth ) )
-		self.frontOverWidth = 0.0
-		self.horizontalSegmentLists = euclidean.getHorizontalSegmentListsFromLoopLists( alreadyFilledArounds, front, numberOfLines, rotatedExtruderLoops, self.layerExtrusionWidth )
-		self.surroundingXIntersectionLists = []
-		self.yList = []
-		removedEndpoints = []
-		if len( surroundingCarves ) >= self.doubleSolidSurfaceThickness:
-			xIntersectionIndexLists = []
-			self.frontOverWidth = euclidean.getFrontOverWidthAddXListYList( front, surroundingCarves, numberOfLines, xIntersectionIndexLists, self.layerExtrusionWidth, self.yList )
-			for fillLine in xrange( len( self.horizontalSegmentLists ) ):
-				xIntersectionIndexList = xIntersectionIndexLists[ fillLine ]
-				surroundingXIntersections = euclidean.getIntersectionOfXIntersectionIndexes( self.doubleSolidSurfaceThickness, xIntersectionIndexList )
-				self.surroundingXIntersectionLists.append( surroundingXIntersections )
-				addSparseEndpoints( doubleExtrusionWidth, endpoints, fillLine, self.horizontalSegmentLists, layerInfillSolidity, removedEndpoints, self.solidSurfaceThickness, surroundingXIntersections )
-		else:
-			for fillLine in xrange( len( self.horizontalSegmentLists ) ):
-				addSparseEndpoints( doubleExtrusionWidth, endpoints, fillLine, self.horizontalSegmentLists, layerInfillSolidity, removedEndpoints, self.solidSurfaceThickness, None )
-		if len( endpoints ) < 1:
-			self.addThreadsBridgeLayer( rotatedLayer, surroundingLoops )
-			return
-		paths = euclidean.getPathsFromEndpoints( endpoints, self.layerExtrusionWidth, aroundPixelTable, aroundWidth )
-		if self.isGridToBeExtruded():
-			self.addGrid( arounds, fillLoops, gridPointInsetX, layerIndex, paths, aroundPixelTable, reverseZRotationAngle, surroundingCarves, aroundWidth )
-		oldRemovedEndpointLength = len( removedEndpoints ) + 1
-		while oldRemovedEndpointLength - len( removedEndpoints ) > 0:
-			oldRemovedEndpointLength = len( removedEndpoints )
-			removeEndpoints( aroundPixelTable, self.layerExtrusionWidth, paths, removedEndpoints, aroundWidth )
-		paths = euclidean.getConnectedPaths( paths, aroundPixelTable, aroundWidth )
-		for path in paths:
-			addPath( self.layerExtrusionWidth, infillPaths, path, layerRotationAroundZAngle )
-		euclidean.transferPathsToSurroundingLoops( infillPaths, surroundingLoops )
 		self.addThreadsBridgeLayer( rotatedLayer, surroundingLoops )
 
 	def addGcodeFromThreadZ( self, thread, z ):
 		"Add a gcode thread to the output."
 		self.distanceFeedRate.addGcodeFromThreadZ( thread, z )
 
-	def addGrid( self, arounds, fillLoops, gridPointInsetX, layerIndex, paths, pixelTable, reverseZRotationAngle, surroundingCarves, width ):
+	def addGrid( self, arounds, fillLoops, gridPointInsetX, layerIndex, paths, pixelGrid, reverseZRotationAngle, surroundingCarves, width ):
 		"Add the grid to the infill layer."
 		if len( surroundingCarves ) < self.doubleSolidSurfaceThickness:
 			return
@@ -1149,7 +1050,7 @@ class FillSkein:
 			pathGroups.append( ( pathIndexBegin, len( explodedPaths ) ) )
 		for pathIndex in xrange( len( explodedPaths ) ):
 			explodedPath = explodedPaths[ pathIndex ]
-			euclidean.addPathToPixelTable( explodedPath, pixelTable, pathIndex, width )
+			pixelGrid.addPath( explodedPath, pathIndex, width )
 		gridPoints = self.getGridPoints( fillLoops, reverseZRotationAngle )
 		gridPointInsetY = gridPointInsetX * ( 1.0 - self.fillRepository.gridExtraOverlap.value )
 		if self.fillRepository.infillPatternGridRectangular.value:
@@ -1166,11 +1067,11 @@ class FillSkein:
 		oldGridPointLength = len( gridPoints ) + 1
 		while oldGridPointLength - len( gridPoints ) > 0:
 			oldGridPointLength = len( gridPoints )
-			self.addRemainingGridPoints( arounds, gridPointInsetX, gridPointInsetY, gridPoints, True, explodedPaths, pixelTable, width )
+			self.addRemainingGridPoints( arounds, gridPointInsetX, gridPointInsetY, gridPoints, True, explodedPaths, pixelGrid, width )
 		oldGridPointLength = len( gridPoints ) + 1
 		while oldGridPointLength - len( gridPoints ) > 0:
 			oldGridPointLength = len( gridPoints )
-			self.addRemainingGridPoints( arounds, gridPointInsetX, gridPointInsetY, gridPoints, False, explodedPaths, pixelTable, width )
+			self.addRemainingGridPoints( arounds, gridPointInsetX, gridPointInsetY, gridPoints, False, explodedPaths, pixelGrid, width )
 		for pathGroupIndex in xrange( len( pathGroups ) ):
 			pathGroup = pathGroups[ pathGroupIndex ]
 			paths[ pathGroupIndex ] = []
@@ -1198,11 +1099,11 @@ class FillSkein:
 			gridXStep = self.getNextGripXStep( gridXStep )
 			gridXOffset = offset + gridWidth * float( gridXStep )
 
-	def addRemainingGridPoints( self, arounds, gridPointInsetX, gridPointInsetY, gridPoints, isBothOrNone, paths, pixelTable, width ):
+	def addRemainingGridPoints( self, arounds, gridPointInsetX, gridPointInsetY, gridPoints, isBothOrNone, paths, pixelGrid, width ):
 		"Add the remaining grid points to the grid point list."
 		for gridPointIndex in xrange( len( gridPoints ) - 1, - 1, - 1 ):
 			gridPoint = gridPoints[ gridPointIndex ]
-			addAroundGridPoint( arounds, gridPoint, gridPointInsetX, gridPointInsetY, gridPoints, self.gridRadius, isBothOrNone, self.isDoubleJunction, self.isJunctionWide, paths, pixelTable, width )
+			addAroundGridPoint( arounds, gridPoint, gridPointInsetX, gridPointInsetY, gridPoints, self.gridRadius, isBothOrNone, self.isDoubleJunction, self.isJunctionWide, paths, pixelGrid, width )
 
 	def addRotatedCarve( self, layerIndex, reverseZRotationAngle, surroundingCarves ):
 		"Add a rotated carve to the surrounding carves."
@@ -1239,10 +1140,10 @@ class FillSkein:
 		layerArea = self.getCarveArea( layerIndex )
 		return 1.0 - min( area, layerArea ) / max( area, layerArea )
 
-	def getCraftedGcode( self, fillRepository, gcodeText ):
-		"Parse gcode text and store the bevel gcode."
+	def getCraftedTree( self, fillRepository, skeinTree ):
+		"Fill the skein tree, the layers are filled as they are read from the stream."
 		self.fillRepository = fillRepository
-		self.lines = gcodec.getTextLines( gcodeText )
+		path_order.globalImprovementSeconds = fillRepository.infillOrderImprovementTime.value
 		self.threadSequence = None
 		if fillRepository.threadSequenceInfillLoops.value:
 			self.threadSequence = [ 'infill', 'loops', 'perimeter' ]
@@ -1262,7 +1163,7 @@ class FillSkein:
 			print( '"Infill Perimeter Overlap" is greater than 0.7, which may create problems with the infill, like threads going through empty space.' )
 			print( 'If you want to stretch the infill a lot, set "Path Stretch over Perimeter Width" in stretch to a high value instead of setting "Infill Perimeter Overlap" to a high value.' )
 			print( '' )
-		self.parseInitialization()
+		self.parseInitialization( skeinTree )
 		self.betweenWidth = self.perimeterWidth - 0.5 * self.infillWidth
 		self.fillInset = self.infillWidth - self.infillWidth * self.fillRepository.infillPerimeterOverlap.value
 		if self.fillRepository.infillInteriorDensityOverExteriorDensity.value > 0:
@@ -1274,12 +1175,169 @@ class FillSkein:
 		self.infillOddLayerExtraRotation = math.radians( fillRepository.infillOddLayerExtraRotation.value )
 		self.solidSurfaceThickness = int( round( self.fillRepository.solidSurfaceThickness.value ) )
 		self.doubleSolidSurfaceThickness = self.solidSurfaceThickness + self.solidSurfaceThickness
-		for lineIndex in xrange( self.lineIndex, len( self.lines ) ):
-			self.parseLine( lineIndex )
-		for layerIndex in xrange( len( self.rotatedLayers ) ):
-			self.addFill( layerIndex )
-		self.distanceFeedRate.addLines( self.lines[ self.shutdownLineIndex : ] )
-		return self.distanceFeedRate.output.getvalue()
+		self.headerKey = stage_cache.getHeaderKey( 'fill', fillRepository, skeinTree.headerLines[ : - 1 ] )
+		threadSequenceLine = self.distanceFeedRate.getTagBracketedLine( 'threadSequenceString', ' '.join( self.threadSequence ) )
+		skeinTree.addHeaderLinesBeforeFirstWord( '(<perimeterWidth>', [ threadSequenceLine ] )
+		skeinTree.addProcedureDone( 'fill' )
+		parsedElements = self.getParsedElementGenerator( skeinTree.decimalPlacesCarried, skeinTree.elements )
+		skeinTree.elements = skein_tree.SkeinTree().getExtrusionElementGenerator( self.getFilledLineGenerator( parsedElements ) )
+		return skeinTree
+
+	def getFillLayerKeys( self, layerIndexes ):
+		"Get the key of each layer for the layer cache, which depends on the layer index, the extra shells and the layers which can be surrounding carves."
+		if self.headerKey == None:
+			return None
+		fillLayerKeys = []
+		for layerIndex in layerIndexes:
+			surroundingKeys = self.layerKeys[ max( 0, layerIndex - self.solidSurfaceThickness ) : layerIndex + self.solidSurfaceThickness + 1 ]
+			fillLayerKeys.append( stage_cache.getHashKey( [ str( layerIndex ), str( self.extraShellsList[ layerIndex ] ) ] + surroundingKeys ) )
+		return fillLayerKeys
+
+	def getFilledLineGenerator( self, parsedElements ):
+		"Get a generator of the filled layer lines.  A batch of layers is filled once the layers up to the solid surface thickness above the batch have been parsed."
+		layerIndexes = []
+		for element, layersBelow, layersAbove in skein_tree.getLayerWindowGenerator( parsedElements, 0, self.solidSurfaceThickness ):
+			if element.__class__ == skein_tree.SkeinLayer:
+				layerIndex = len( self.extraShellsList )
+				self.setExtraShells( layerIndex )
+				layerIndexes.append( layerIndex )
+				if len( layerIndexes ) >= parallel.getBatchSize():
+					for line in self.getFilledLines( layerIndexes ):
+						yield line
+					layerIndexes = []
+		for line in self.getFilledLines( layerIndexes ):
+			yield line
+
+	def getFilledLines( self, layerIndexes ):
+		"Fill the layers and get their lines, then let go of the layers which the next layers do not surround."
+		if len( layerIndexes ) < 1:
+			return []
+		surroundingLoopsList = stage_cache.getLayerResults( self, 'getFilledSurroundingLoops', layerIndexes, self.getFillLayerKeys( layerIndexes ) )
+		for layerIndex, surroundingLoops in zip( layerIndexes, surroundingLoopsList ):
+			self.addFill( layerIndex, surroundingLoops )
+		filledLines = gcodec.getTextLines( self.distanceFeedRate.output.getvalue() )
+		self.distanceFeedRate.output = cStringIO.StringIO()
+		for layerIndex in xrange( layerIndexes[ - 1 ] + 1 - self.solidSurfaceThickness ):
+			self.rotatedLayers[ layerIndex ] = None
+			if self.headerKey != None:
+				self.layerKeys[ layerIndex ] = None
+		return filledLines
+
+	def getFilledSurroundingLoops( self, layerIndex ):
+		"Get the surrounding loops of the carve layer with their extra loops and infill paths, this only depends on the carve layers so the layers can be filled in any order."
+		alreadyFilledArounds = []
+		arounds = []
+		betweenWidth = self.betweenWidth
+		self.layerExtrusionWidth = self.infillWidth
+		layerFillInset = self.fillInset
+		rotatedLayer = self.rotatedLayers[ layerIndex ]
+#		if layerIndex > 2:
+#			return
+#		print( 'layer index: %s  z: %s' % ( layerIndex, rotatedLayer.z ) )
+		layerRotationAroundZAngle = self.getLayerRoundZ( layerIndex )
+		reverseZRotationAngle = complex( layerRotationAroundZAngle.real, - layerRotationAroundZAngle.imag )
+		surroundingCarves = []
+		if self.isSurroundingCarveLayer( layerIndex ):
+			for surroundingIndex in xrange( 1, self.solidSurfaceThickness + 1 ):
+				self.addRotatedCarve( layerIndex - surroundingIndex, reverseZRotationAngle, surroundingCarves )
+				self.addRotatedCarve( layerIndex + surroundingIndex, reverseZRotationAngle, surroundingCarves )
+		extraShells = self.extraShellsList[ layerIndex ]
+		if rotatedLayer.rotation != None:
+			betweenWidth *= self.bridgeWidthMultiplier
+			self.layerExtrusionWidth = self.infillWidth * self.bridgeWidthMultiplier
+			layerFillInset = self.fillInset * self.bridgeWidthMultiplier
+		aroundInset = 0.25 * self.layerExtrusionWidth
+		aroundWidth = 0.25 * self.layerExtrusionWidth
+		gridPointInsetX = 0.5 * layerFillInset
+		doubleExtrusionWidth = 2.0 * self.layerExtrusionWidth
+		endpoints = []
+		infillPaths = []
+		layerInfillSolidity = self.infillSolidity
+		self.isDoubleJunction = True
+		self.isJunctionWide = True
+		if self.fillRepository.infillPatternGridHexagonal.value:
+			if abs( euclidean.getDotProduct( layerRotationAroundZAngle, euclidean.getUnitPolar( self.infillBeginRotation ) ) ) < math.sqrt( 0.5 ):
+				layerInfillSolidity *= 0.5
+				self.isDoubleJunction = False
+			else:
+				self.isJunctionWide = False
+		rotatedExtruderLoops = []
+#		for surroundingLoop in rotatedLayer.surroundingLoops:
+#			surroundingLoop.fillBoundaries = intercircle.getInsetLoopsFromLoop( betweenWidth, surroundingLoop.boundary )
+#			surroundingLoop.lastExistingFillLoops = surroundingLoop.fillBoundaries
+		surroundingLoops = euclidean.getOrderedSurroundingLoops( self.layerExtrusionWidth, rotatedLayer.surroundingLoops )
+#		if isPerimeterPathInSurroundLoops( surroundingLoops ):
+#			extraShells = 0
+		createFillForSurroundings( betweenWidth, False, self.distanceFeedRate.simplification, surroundingLoops )
+		for extraShellIndex in xrange( extraShells ):
+			createFillForSurroundings( self.layerExtrusionWidth, True, self.distanceFeedRate.simplification, surroundingLoops )
+		fillLoops = euclidean.getFillOfSurroundings( surroundingLoops )
+		slightlyGreaterThanFill = 1.01 * layerFillInset
+		for loop in fillLoops:
+			rotatedExtruderLoops.append( euclidean.getPointsRoundZAxis( reverseZRotationAngle, loop ) )
+		aroundPixelGrid = euclidean.getPixelGridAroundLoops( rotatedExtruderLoops, aroundWidth )
+		extruderLoopGrid = euclidean.LoopGrid( rotatedExtruderLoops )
+		for extruderLoopIndex in xrange( len( rotatedExtruderLoops ) ):
+			planeRotatedPerimeter = rotatedExtruderLoops[ extruderLoopIndex ]
+			alreadyFilledLoop = []
+			alreadyFilledArounds.append( alreadyFilledLoop )
+			centers = intercircle.getCentersFromLoop( planeRotatedPerimeter, slightlyGreaterThanFill )
+			aroundPixelGrid.addLoop( planeRotatedPerimeter, None, aroundWidth )
+			for center in centers:
+				alreadyFilledInset = intercircle.getSimplifiedInsetFromClockwiseLoop( center, layerFillInset, self.distanceFeedRate.simplification )
+				if intercircle.isLargeSameDirection( alreadyFilledInset, center, layerFillInset ):
+					alreadyFilledLoop.append( alreadyFilledInset )
+					around = intercircle.getSimplifiedInsetFromClockwiseLoop( center, aroundInset, self.distanceFeedRate.simplification )
+					if extruderLoopGrid.isPathInsideLoop( extruderLoopIndex, around ) == extruderLoopGrid.isWiddershins( extruderLoopIndex ):
+						around.reverse()
+						arounds.append( around )
+						aroundPixelGrid.addLoop( around, None, aroundWidth )
+		if len( arounds ) < 1:
+			return surroundingLoops
+		back = euclidean.getBackOfLoops( arounds )
+		front = euclidean.getFrontOfLoops( arounds )
+		area = self.getCarveArea( layerIndex )
+		if area > 0.0 and len( surroundingCarves ) >= self.doubleSolidSurfaceThickness:
+			areaChange = 0.0
+			for surroundingIndex in xrange( 1, self.solidSurfaceThickness + 1 ):
+				areaChange = max( areaChange, self.getAreaChange( area, layerIndex - surroundingIndex ) )
+				areaChange = max( areaChange, self.getAreaChange( area, layerIndex + surroundingIndex ) )
+			if areaChange < 0.5 or self.solidSurfaceThickness == 0:
+				self.layerExtrusionWidth /= self.fillRepository.infillInteriorDensityOverExteriorDensity.value
+		front = math.ceil( front / self.layerExtrusionWidth ) * self.layerExtrusionWidth
+		fillWidth = back - front
+		numberOfLines = int( math.ceil( fillWidth / self.layerExtrusionWidth ) )
+		self.frontOverWidth = 0.0
+		self.horizontalSegmentLists = euclidean.getHorizontalSegmentListsFromLoopLists( alreadyFilledArounds, front, numberOfLines, rotatedExtruderLoops, self.layerExtrusionWidth )
+		self.surroundingXIntersectionLists = []
+		removedEndpoints = []
+		if len( surroundingCarves ) >= self.doubleSolidSurfaceThickness:
+			self.frontOverWidth = front / self.layerExtrusionWidth
+			surroundingCrossingsTable = scanline.getCrossingsTable( front, scanline.getIndexedLoopLists( surroundingCarves ), self.layerExtrusionWidth, numberOfLines )
+			for fillLine in xrange( len( self.horizontalSegmentLists ) ):
+				surroundingCrossings = []
+				if fillLine in surroundingCrossingsTable:
+					surroundingCrossings = surroundingCrossingsTable[ fillLine ]
+				surroundingXIntersections = scanline.getIntersectionOfCrossings( surroundingCrossings, self.doubleSolidSurfaceThickness )
+				self.surroundingXIntersectionLists.append( surroundingXIntersections )
+				addSparseEndpoints( doubleExtrusionWidth, endpoints, fillLine, self.horizontalSegmentLists, layerInfillSolidity, removedEndpoints, self.solidSurfaceThickness, surroundingXIntersections )
+		else:
+			for fillLine in xrange( len( self.horizontalSegmentLists ) ):
+				addSparseEndpoints( doubleExtrusionWidth, endpoints, fillLine, self.horizontalSegmentLists, layerInfillSolidity, removedEndpoints, self.solidSurfaceThickness, None )
+		if len( endpoints ) < 1:
+			return surroundingLoops
+		paths = euclidean.getPathsFromEndpoints( endpoints, self.layerExtrusionWidth, aroundPixelGrid, aroundWidth )
+		if self.isGridToBeExtruded():
+			self.addGrid( arounds, fillLoops, gridPointInsetX, layerIndex, paths, aroundPixelGrid, reverseZRotationAngle, surroundingCarves, aroundWidth )
+		oldRemovedEndpointLength = len( removedEndpoints ) + 1
+		while oldRemovedEndpointLength - len( removedEndpoints ) > 0:
+			oldRemovedEndpointLength = len( removedEndpoints )
+			removeEndpoints( aroundPixelGrid, self.layerExtrusionWidth, paths, removedEndpoints, aroundWidth )
+		paths = euclidean.getConnectedPaths( paths, aroundPixelGrid, aroundWidth )
+		for path in paths:
+			addPath( self.layerExtrusionWidth, infillPaths, path, layerRotationAroundZAngle, self.distanceFeedRate.simplification )
+		euclidean.transferPathsToSurroundingLoops( infillPaths, surroundingLoops )
+		return surroundingLoops
 
 	def getGridPoints( self, fillLoops, reverseZRotationAngle ):
 		"Get the grid pointsl."
@@ -1296,16 +1354,18 @@ class FillSkein:
 		gridInset = 1.2 * self.interiorExtrusionWidth
 		slightlyGreaterThanFill = 1.01 * gridInset
 		for loop in fillLoops:
+			gridRotatedExtruderLoops.append( euclidean.getPointsRoundZAxis( reverseRotationBaseAngle, loop ) )
+		gridExtruderLoopGrid = euclidean.LoopGrid( gridRotatedExtruderLoops )
+		for extruderLoopIndex in xrange( len( gridRotatedExtruderLoops ) ):
 			gridAlreadyFilledLoop = []
 			gridAlreadyFilledArounds.append( gridAlreadyFilledLoop )
-			planeRotatedPerimeter = euclidean.getPointsRoundZAxis( reverseRotationBaseAngle, loop )
-			gridRotatedExtruderLoops.append( planeRotatedPerimeter )
+			planeRotatedPerimeter = gridRotatedExtruderLoops[ extruderLoopIndex ]
 			centers = intercircle.getCentersFromLoop( planeRotatedPerimeter, slightlyGreaterThanFill )
 			for center in centers:
-				alreadyFilledInset = intercircle.getSimplifiedInsetFromClockwiseLoop( center, gridInset )
+				alreadyFilledInset = intercircle.getSimplifiedInsetFromClockwiseLoop( center, gridInset, self.distanceFeedRate.simplification )
 				if euclidean.isWiddershins( alreadyFilledInset ) == euclidean.isWiddershins( center ):
 					gridAlreadyFilledLoop.append( alreadyFilledInset )
-					if euclidean.isPathInsideLoop( planeRotatedPerimeter, alreadyFilledInset ) == euclidean.isWiddershins( planeRotatedPerimeter ):
+					if gridExtruderLoopGrid.isPathInsideLoop( extruderLoopIndex, alreadyFilledInset ) == gridExtruderLoopGrid.isWiddershins( extruderLoopIndex ):
 						for point in alreadyFilledInset:
 							back = max( back, point.imag )
 							front = min( front, point.imag )
@@ -1358,6 +1418,31 @@ class FillSkein:
 			area += euclidean.getPolygonArea( surroundingLoop.boundary )
 		return area
 
+	def getNumberOfSurroundingCarves( self, layerIndex ):
+		"Get the number of surrounding carves which getFilledSurroundingLoops will add for the layer."
+		if not self.isSurroundingCarveLayer( layerIndex ):
+			return 0
+		numberOfSurroundingCarves = 0
+		for surroundingIndex in xrange( 1, self.solidSurfaceThickness + 1 ):
+			if layerIndex - surroundingIndex >= 0:
+				numberOfSurroundingCarves += 1
+			if layerIndex + surroundingIndex < len( self.rotatedLayers ):
+				numberOfSurroundingCarves += 1
+		return numberOfSurroundingCarves
+
+	def getParsedElementGenerator( self, decimalPlacesCarried, elements ):
+		"Get a generator of the extrusion elements, each element is parsed as it is read."
+		for element in elements:
+			lines = [ element ]
+			if element.__class__ != str:
+				lines = []
+				element.addToLines( decimalPlacesCarried, lines )
+			for line in lines:
+				self.parseLine( line )
+			if element.__class__ == skein_tree.SkeinLayer and self.headerKey != None:
+				self.layerKeys.append( stage_cache.getHashKey( [ self.headerKey ] + lines ) )
+			yield element
+
 	def isGridToBeExtruded( self ):
 		"Determine if the grid is to be extruded."
 		return ( not self.fillRepository.infillPatternLine.value ) and self.fillRepository.infillInteriorDensityOverExteriorDensity.value > 0
@@ -1379,6 +1464,13 @@ class FillSkein:
 					return True
 		return False
 
+	def isSurroundingCarveLayer( self, layerIndex ):
+		"Determine if the surrounding carves should be added for the layer, which is false for the diaphragm and bridge layers."
+		layerRemainder = layerIndex % int( round( self.fillRepository.diaphragmPeriod.value ) )
+		if layerRemainder < int( round( self.fillRepository.diaphragmThickness.value ) ):
+			return False
+		return self.rotatedLayers[ layerIndex ].rotation == None
+
 	def linearMove( self, splitLine ):
 		"Add a linear move to the thread."
 		location = gcodec.getLocationFromSplitLine( self.oldLocation, splitLine )
@@ -1386,22 +1478,14 @@ class FillSkein:
 			self.addToThread( location )
 		self.oldLocation = location
 
-	def parseInitialization( self ):
-		"Parse gcode initialization and store the parameters."
-		for self.lineIndex in xrange( len( self.lines ) ):
-			line = self.lines[ self.lineIndex ]
+	def parseInitialization( self, skeinTree ):
+		"Parse gcode initialization and store the parameters, the header lines are added to the distance feed rate for its state and the output is then let go of."
+		for line in skeinTree.headerLines:
 			splitLine = gcodec.getSplitLineBeforeBracketSemicolon( line )
 			firstWord = gcodec.getFirstWord( splitLine )
 			self.distanceFeedRate.parseSplitLine( firstWord, splitLine )
 			if firstWord == '(<perimeterWidth>':
 				self.perimeterWidth = float( splitLine[ 1 ] )
-				threadSequenceString = ' '.join( self.threadSequence )
-				self.distanceFeedRate.addTagBracketedLine( 'threadSequenceString', threadSequenceString )
-			elif firstWord == '(</extruderInitialization>)':
-				self.distanceFeedRate.addLine( '(<procedureDone> fill </procedureDone>)' )
-			elif firstWord == '(<extrusion>)':
-				self.distanceFeedRate.addLine( line )
-				return
 			elif firstWord == '(<bridgeWidthMultiplier>':
 				self.bridgeWidthMultiplier = float( splitLine[ 1 ] )
 			elif firstWord == '(<layerThickness>':
@@ -1409,10 +1493,10 @@ class FillSkein:
 				self.infillWidth = self.fillRepository.infillWidthOverThickness.value * self.layerThickness
 				self.interiorExtrusionWidth = self.infillWidth
 			self.distanceFeedRate.addLine( line )
- 
-	def parseLine( self, lineIndex ):
+		self.distanceFeedRate.output = cStringIO.StringIO()
+
+	def parseLine( self, line ):
 		"Parse a gcode line and add it to the fill skein."
-		line = self.lines[ lineIndex ]
 		splitLine = gcodec.getSplitLineBeforeBracketSemicolon( line )
 		if len( splitLine ) < 1:
 			return
@@ -1436,8 +1520,6 @@ class FillSkein:
 		elif firstWord == '(<bridgeRotation>':
 			secondWordWithoutBrackets = splitLine[ 1 ].replace( '(', '' ).replace( ')', '' )
 			self.rotatedLayer.rotation = complex( secondWordWithoutBrackets )
-		elif firstWord == '(</extrusion>)':
-			self.shutdownLineIndex = lineIndex
 		elif firstWord == '(<layer>':
 			self.rotatedLayer = RotatedLayer( float( splitLine[ 1 ] ) )
 			self.rotatedLayers.append( self.rotatedLayer )
@@ -1445,6 +1527,18 @@ class FillSkein:
 		elif firstWord == '(<perimeter>':
 			self.isPerimeter = True
 
+	def setExtraShells( self, layerIndex ):
+		"Set the number of extra shells of the layer, which depends on the number of extra shells of the layer below."
+		extraShells = self.fillRepository.extraShellsSparseLayer.value
+		if self.getNumberOfSurroundingCarves( layerIndex ) < self.doubleSolidSurfaceThickness:
+			extraShells = self.fillRepository.extraShellsAlternatingSolidLayer.value
+			if self.lastExtraShells != self.fillRepository.extraShellsBase.value:
+				extraShells = self.fillRepository.extraShellsBase.value
+		if self.rotatedLayers[ layerIndex ].rotation != None:
+			extraShells = 0
+		self.extraShellsList.append( extraShells )
+		self.lastExtraShells = extraShells
+
 	def setGridVariables( self, fillRepository ):
 		"Set the grid variables."
 		self.gridRadius = self.interiorExtrusionWidth / self.infillSolidity
@@ -1471,8 +1565,10 @@ class RotatedLayer:
 		return '%s, %s, %s' % ( self.z, self.rotation, self.surroundingLoops )
 
 
-class YIntersectionPath:
+class YIntersectionPath( object ):
 	"A class to hold the y intersection position, the loop which it intersected and the point index of the loop which it intersected."
+	__slots__ = [ 'gridPoint', 'isOutside', 'pathIndex', 'pointIndex', 'y', 'yMinusCenter' ]
+
 	def __init__( self, pathIndex, pointIndex, y ):
 		"Initialize from the path, point index, and y."
 		self.pathIndex = pathIndex
@@ -147,7 +147,7 @@ class BevelSkein:
 
 	def addLinearMovePoint( self, feedRateMinute, point ):
 		"Add a gcode linear move, feedRate and newline to the output."
-		self.distanceFeedRate.addLine( self.distanceFeedRate.getLinearGcodeMovementWithFeedRate( feedRateMinute, point.dropAxis( 2 ), point.z ) )
+		self.distanceFeedRate.addGcodeMovementZWithFeedRate( feedRateMinute, point.dropAxis( 2 ), point.z )
 
 	def getCornerFeedRate( self ):
 		"Get the corner feed rate, which may be based on the intermediate feed rate."
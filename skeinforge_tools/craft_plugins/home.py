@@ -132,12 +132,12 @@ class HomeSkein:
 		alongWay = self.absolutePerimeterWidth / beginEndDistance
 		closeToEnd = euclidean.getIntermediateLocation( alongWay, end, begin )
 		closeToEnd.z = self.highestZ
-		self.distanceFeedRate.addLine( self.distanceFeedRate.getLinearGcodeMovementWithFeedRate( self.travelFeedRatePerMinute, closeToEnd.dropAxis( 2 ), closeToEnd.z ) )
+		self.distanceFeedRate.addGcodeMovementZWithFeedRate( self.travelFeedRatePerMinute, closeToEnd.dropAxis( 2 ), closeToEnd.z )
 
 	def addHopUp( self, location ):
 		"Add hop to highest point."
 		locationUp = Vector3( location.x, location.y, self.highestZ )
-		self.distanceFeedRate.addLine( self.distanceFeedRate.getLinearGcodeMovementWithFeedRate( self.travelFeedRatePerMinute, locationUp.dropAxis( 2 ), locationUp.z ) )
+		self.distanceFeedRate.addGcodeMovementZWithFeedRate( self.travelFeedRatePerMinute, locationUp.dropAxis( 2 ), locationUp.z )
 
 	def addHomeTravel( self, splitLine ):
 		"Add the home travel gcode."
@@ -149,13 +149,13 @@ class HomeSkein:
 		if self.oldLocation == None:
 			return
 		if self.extruderActive:
-			self.distanceFeedRate.addLine( 'M103' )
+			self.distanceFeedRate.emitCommand( 'M103' )
 		self.addHopUp( self.oldLocation )
 		self.distanceFeedRate.addLinesSetAbsoluteDistanceMode( self.homingLines )
 		self.addHopUp( self.oldLocation )
 		self.addFloat( self.oldLocation, location )
 		if self.extruderActive:
-			self.distanceFeedRate.addLine( 'M101' )
+			self.distanceFeedRate.emitCommand( 'M101' )
 
 	def getCraftedGcode( self, gcodeText, homeRepository ):
 		"Parse gcode text and store the home gcode."
@@ -17,6 +17,20 @@ Default is one.
 
 Defines the ratio of the extrusion width of a bridge layer over the extrusion width of the typical non bridge layers.
 
+===Inset Engine===
+Default is 'Circle Intersection'.
+
+The inset engine is used by inset and by the tools after it, like comb, cool and raft, to inset and outset loops.
+
+====Circle Intersection====
+When selected, the loops will be inset by intersecting the circles around the points of the loop.  This is the original inset engine.
+
+====Vertex Offset====
+When selected, each segment of the loop will be offset by the inset, the offset segments will be joined with a miter or with an arc, and the parts of the offset loop which cross over the rest will be removed.
+
+====Cross Check====
+When selected, the loops will be inset with both engines, the circle intersection loops will be used and a warning will be printed when the area of the vertex offset loops is different.
+
 ===Loop Order Choice===
 Default loop order choice is 'Ascending Area'.
 
@@ -88,6 +102,7 @@ from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import intercircle
 from skeinforge_tools.skeinforge_utilities import interpret
 from skeinforge_tools.skeinforge_utilities import settings
+from skeinforge_tools.skeinforge_utilities import stage_cache
 from skeinforge_tools.skeinforge_utilities import triangle_mesh
 from skeinforge_tools.skeinforge_utilities.vector3 import Vector3
 import math
@@ -100,7 +115,7 @@ __date__ = "$Date: 2008/28/04 $"
 __license__ = "GPL 3.0"
 
 
-def addAlreadyFilledArounds( alreadyFilledArounds, loop, radius ):
+def addAlreadyFilledArounds( alreadyFilledArounds, loop, radius, simplification ):
 	"Add already filled loops around loop to alreadyFilledArounds."
 	radius = abs( radius )
 	alreadyFilledLoop = []
@@ -108,7 +123,7 @@ def addAlreadyFilledArounds( alreadyFilledArounds, loop, radius ):
 	muchGreaterThanRadius = 2.5 * radius
 	centers = intercircle.getCentersFromLoop( loop, slightlyGreaterThanRadius )
 	for center in centers:
-		alreadyFilledInset = intercircle.getSimplifiedInsetFromClockwiseLoop( center, radius )
+		alreadyFilledInset = intercircle.getSimplifiedInsetFromClockwiseLoop( center, radius, simplification )
 		if intercircle.isLargeSameDirection( alreadyFilledInset, center, radius ):
 			alreadyFilledLoop.append( alreadyFilledInset )
 	if len( alreadyFilledLoop ) > 0:
@@ -225,14 +240,27 @@ def isCloseToLast( paths, point, radius ):
 	return abs( lastPath[ - 1 ] - point ) < radius
 
 def isIntersectingItself( loop, width ):
-	"Determine if the loop is intersecting itself."
-	outlines = []
+	"Determine if the loop is intersecting the outlines of the segments before it, only the segment and outline pairs found by the sweep are checked."
+	segments = []
 	for pointIndex in xrange( len( loop ) ):
-		pointBegin = loop[ pointIndex ]
-		pointEnd = loop[ ( pointIndex + 1 ) % len( loop ) ]
-		if euclidean.isLineIntersectingLoops( outlines, pointBegin, pointEnd ):
-			return True
-		addSegmentOutline( False, outlines, pointBegin, pointEnd, width )
+		segments.append( ( loop[ pointIndex ], loop[ ( pointIndex + 1 ) % len( loop ) ] ) )
+	outlinePointIndexes = []
+	for pointIndex in xrange( len( loop ) ):
+		outlines = []
+		addSegmentOutline( False, outlines, segments[ pointIndex ][ 0 ], segments[ pointIndex ][ 1 ], width )
+		for outline in outlines:
+			for outlinePointIndex in xrange( len( outline ) ):
+				segments.append( ( outline[ outlinePointIndex ], outline[ ( outlinePointIndex + 1 ) % len( outline ) ] ) )
+				outlinePointIndexes.append( pointIndex )
+	for firstIndex, secondIndex in euclidean.getSweptSegmentIndexPairs( segments ):
+		pointIndex = min( firstIndex, secondIndex )
+		outlineIndex = max( firstIndex, secondIndex ) - len( loop )
+		if pointIndex < len( loop ) and outlineIndex >= 0:
+			if outlinePointIndexes[ outlineIndex ] < pointIndex:
+				pointBegin, pointEnd = segments[ pointIndex ]
+				outlineBegin, outlineEnd = segments[ outlineIndex + len( loop ) ]
+				if euclidean.isLineIntersectingSegment( pointBegin, pointEnd, outlineBegin, outlineEnd ):
+					return True
 	return False
 
 def isIntersectingWithinLists( loop, loopLists ):
@@ -266,6 +294,10 @@ class InsetRepository:
 		self.openWikiManualHelpPage = settings.HelpPage().getOpenFromAbsolute( 'http://www.bitsfrombytes.com/wiki/index.php?title=Skeinforge_Inset' )
 		self.addCustomCodeForTemperatureReading = settings.BooleanSetting().getFromValue( 'Add Custom Code for Temperature Reading', self, True )
 		self.bridgeWidthMultiplier = settings.FloatSpin().getFromValue( 0.8, 'Bridge Width Multiplier (ratio):', self, 1.2, 1.0 )
+		self.insetEngineChoice = settings.MenuButtonDisplay().getFromName( 'Inset Engine:', self )
+		self.insetEngineCircleIntersection = settings.MenuRadio().getFromMenuButtonDisplay( self.insetEngineChoice, 'Circle Intersection', self, True )
+		self.insetEngineVertexOffset = settings.MenuRadio().getFromMenuButtonDisplay( self.insetEngineChoice, 'Vertex Offset', self, False )
+		self.insetEngineCrossCheck = settings.MenuRadio().getFromMenuButtonDisplay( self.insetEngineChoice, 'Cross Check', self, False )
 		self.loopOrderChoice = settings.MenuButtonDisplay().getFromName( 'Loop Order Choice:', self )
 		self.loopOrderAscendingArea = settings.MenuRadio().getFromMenuButtonDisplay( self.loopOrderChoice, 'Ascending Area', self, True )
 		self.loopOrderDescendingArea = settings.MenuRadio().getFromMenuButtonDisplay( self.loopOrderChoice, 'Descending Area', self, False )
@@ -283,8 +315,8 @@ class InsetRepository:
 class InsetSkein:
 	"A class to inset a skein of extrusions."
 	def __init__( self ):
-		self.boundary = None
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
+		self.layerIndex = - 1
 		self.lineIndex = 0
 		self.rotatedBoundaryLayer = None
 
@@ -330,7 +362,7 @@ class InsetSkein:
 
 	def addGcodeFromRemainingLoop( self, loop, loopLists, radius, z ):
 		"Add the remainder of the loop which does not overlap the alreadyFilledArounds loops."
-		boundary = intercircle.getLargestInsetLoopFromLoopNoMatterWhat( loop, - radius )
+		boundary = intercircle.getLargestInsetLoopFromLoopNoMatterWhat( loop, - radius, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 		euclidean.addSurroundingLoopBeginning( self.distanceFeedRate, boundary, z )
 		self.addGcodePerimeterBlockFromRemainingLoop( loop, loopLists, radius, z )
 		self.distanceFeedRate.addLine( '(</boundaryPerimeter>)' )
@@ -346,7 +378,7 @@ class InsetSkein:
 			self.addGcodeFromPerimeterPaths( isIntersectingSelf, loop, loopLists, radius, z )
 		else:
 			self.distanceFeedRate.addPerimeterBlock( loop, z )
-		addAlreadyFilledArounds( loopLists, loop, self.overlapRemovalWidth )
+		addAlreadyFilledArounds( loopLists, loop, self.overlapRemovalWidth, self.distanceFeedRate.simplification )
 
 	def addInitializationToOutput( self ):
 		"Add initialization gcode to the output."
@@ -360,7 +392,7 @@ class InsetSkein:
 		if rotatedBoundaryLayer.rotation != None:
 			halfWidth *= self.repository.bridgeWidthMultiplier.value
 			self.distanceFeedRate.addTagBracketedLine( 'bridgeRotation', rotatedBoundaryLayer.rotation )
-		extrudateLoops = intercircle.getInsetLoopsFromLoops( halfWidth, rotatedBoundaryLayer.loops )
+		extrudateLoops = intercircle.getInsetLoopsFromLoops( halfWidth, rotatedBoundaryLayer.loops, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 		if self.repository.loopOrderAscendingArea.value:
 			extrudateLoops = triangle_mesh.getLoopsInOrderOfArea( triangle_mesh.compareAreaAscending, extrudateLoops )
 		else:
@@ -373,10 +405,22 @@ class InsetSkein:
 		self.repository = repository
 		self.lines = gcodec.getTextLines( gcodeText )
 		self.parseInitialization()
+		self.distanceFeedRate.insetEngine = self.getInsetEngine()
+		self.rotatedBoundaryLayers = gcodec.getRotatedBoundaryLayers( self.lines[ self.lineIndex : ] )
+		layerKeys = stage_cache.getLayerKeys( 'inset', repository, self.lines, self.lineIndex )
+		self.layerTexts = stage_cache.getLayerOutputTexts( self, 'addInset', self.rotatedBoundaryLayers, layerKeys )
 		for line in self.lines[ self.lineIndex : ]:
 			self.parseLine( line )
 		return self.distanceFeedRate.output.getvalue()
 
+	def getInsetEngine( self ):
+		"Get the inset engine chosen in the settings, which is also written in the initialization so that the tools after inset use the same engine."
+		if self.repository.insetEngineVertexOffset.value:
+			return 'VertexOffset'
+		if self.repository.insetEngineCrossCheck.value:
+			return 'CrossCheck'
+		return 'CircleIntersection'
+
 	def parseInitialization( self ):
 		"Parse gcode initialization and store the parameters."
 		for self.lineIndex in xrange( len( self.lines ) ):
@@ -387,6 +431,7 @@ class InsetSkein:
 			if firstWord == '(<decimalPlacesCarried>':
 				self.addInitializationToOutput()
 				self.distanceFeedRate.addTagBracketedLine( 'bridgeWidthMultiplier', self.distanceFeedRate.getRounded( self.repository.bridgeWidthMultiplier.value ) )
+				self.distanceFeedRate.addTagBracketedLine( 'insetEngine', self.getInsetEngine() )
 			elif firstWord == '(</extruderInitialization>)':
 				self.distanceFeedRate.addTagBracketedLine( 'procedureDone', 'inset' )
 			elif firstWord == '(<extrusion>)':
@@ -404,26 +449,18 @@ class InsetSkein:
 		if len( splitLine ) < 1:
 			return
 		firstWord = splitLine[ 0 ]
-		if firstWord == '(<boundaryPoint>':
-			location = gcodec.getLocationFromSplitLine( None, splitLine )
-			self.boundary.append( location.dropAxis( 2 ) )
-		elif ( firstWord == '(<bridgeRotation>' or firstWord == '<!--bridgeRotation-->' ):
-			secondWordWithoutBrackets = splitLine[ 1 ].replace( '(', '' ).replace( ')', '' )
-			self.rotatedBoundaryLayer.rotation = complex( secondWordWithoutBrackets )
+		if firstWord == '(<layer>':
+			self.layerIndex += 1
+			self.rotatedBoundaryLayer = self.rotatedBoundaryLayers[ self.layerIndex ]
+			self.distanceFeedRate.addLine( line )
 		elif firstWord == '(</extrusion>)':
 				self.distanceFeedRate.addLine( line )
 				if self.repository.turnExtruderHeaterOffAtShutDown.value:
 					self.distanceFeedRate.addLine( 'M104 S0' ) # Turn extruder heater off.
 				return
-		elif firstWord == '(<layer>':
-			self.rotatedBoundaryLayer = euclidean.RotatedLoopLayer( float( splitLine[ 1 ] ) )
-			self.distanceFeedRate.addLine( line )
 		elif firstWord == '(</layer>)':
-			self.addInset( self.rotatedBoundaryLayer )
+			self.distanceFeedRate.addLines( gcodec.getTextLines( self.layerTexts[ self.layerIndex ] ) )
 			self.rotatedBoundaryLayer = None
-		elif firstWord == '(<surroundingLoop>)':
-			self.boundary = []
-			self.rotatedBoundaryLayer.loops.append( self.boundary )
 		if self.rotatedBoundaryLayer == None:
 			self.distanceFeedRate.addLine( line )
 
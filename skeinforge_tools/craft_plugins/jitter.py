@@ -165,7 +165,7 @@ class JitterSkein:
 			print( "zero length vertex positions array which was skipped over, this should never happen" )
 		if len( thread ) < 2:
 			return
-		self.distanceFeedRate.addLine( 'M101' )
+		self.distanceFeedRate.emitCommand( 'M101' )
 		self.addGcodePathZ( self.feedRateMinute, thread[ 1 : ], z )
 
 	def addGcodeMovementZ( self, feedRateMinute, point, z ):
@@ -85,6 +85,7 @@ from skeinforge_tools.skeinforge_utilities import euclidean
 from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import intercircle
 from skeinforge_tools.skeinforge_utilities import interpret
+from skeinforge_tools.skeinforge_utilities import scanline
 from skeinforge_tools.skeinforge_utilities import settings
 from skeinforge_tools.skeinforge_utilities import triangle_mesh
 from skeinforge_tools.skeinforge_utilities.vector3 import Vector3
@@ -190,7 +191,7 @@ class MillRepository:
 class MillSkein:
 	"A class to mill a skein of extrusions."
 	def __init__( self ):
-		self.aroundPixelTable = {}
+		self.aroundPixelGrid = euclidean.PixelGrid()
 		self.average = Average()
 		self.boundaryLayers = []
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
@@ -220,15 +221,15 @@ class MillSkein:
 		endpoints = euclidean.getEndpointsFromSegmentTable( boundaryLayer.segmentTable )
 		if len( endpoints ) < 1:
 			return
-		paths = euclidean.getPathsFromEndpoints( endpoints, self.millWidth, self.aroundPixelTable, self.aroundWidth )
-		paths = euclidean.getConnectedPaths( paths, self.aroundPixelTable, self.aroundWidth ) # this is probably unnecesary
+		paths = euclidean.getPathsFromEndpoints( endpoints, self.millWidth, self.aroundPixelGrid, self.aroundWidth )
+		paths = euclidean.getConnectedPaths( paths, self.aroundPixelGrid, self.aroundWidth ) # this is probably unnecesary
 		averageZ = self.average.getAverage()
 		if self.repository.addInnerLoops.value:
 			self.addGcodeFromLoops( boundaryLayer.innerLoops, averageZ )
 		if self.repository.addOuterLoops.value:
 			self.addGcodeFromLoops( boundaryLayer.outerLoops, averageZ )
 		for path in paths:
-			simplifiedPath = euclidean.getSimplifiedPath( path, self.millWidth )
+			simplifiedPath = euclidean.getSimplifiedPath( path, self.millWidth, self.distanceFeedRate.simplification )
 			self.distanceFeedRate.addGcodeFromThreadZ( simplifiedPath, averageZ )
 
 	def addSegmentTableLoops( self, boundaryLayerIndex ):
@@ -251,7 +252,7 @@ class MillSkein:
 		boundaryLayer.outerLoops = []
 		millRadius = 0.75 * self.millWidth
 		loops = triangle_mesh.getInclusiveLoops( betweenPoints, betweenPoints, millRadius )
-		loops = euclidean.getSimplifiedLoops( loops, millRadius )
+		loops = euclidean.getSimplifiedLoops( loops, millRadius, self.distanceFeedRate.simplification )
 		for loop in loops:
 			if isPointOfTableInLoop( loop, innerPointTable ):
 				boundaryLayer.innerLoops.append( loop )
@@ -285,9 +286,7 @@ class MillSkein:
 
 	def getHorizontalXIntersectionsTable( self, loops ):
 		"Get the horizontal x intersections table from the loops."
-		horizontalXIntersectionsTable = {}
-		euclidean.addXIntersectionsFromLoopsForTable( loops, horizontalXIntersectionsTable, self.millWidth )
-		return horizontalXIntersectionsTable
+		return scanline.getXIntersectionsTable( loops, self.millWidth )
 
 	def getVerticalSegmentTableForXIntersectionsTable( self, xIntersectionsTable ):
 		"Get the vertical segment table from the xIntersectionsTable which has the x and y swapped."
@@ -324,8 +323,8 @@ class MillSkein:
 		if len( self.boundaryLayers ) < 2:
 			return
 		for boundaryLayer in self.boundaryLayers:
-			boundaryLayer.innerOutsetLoops = intercircle.getInsetSeparateLoopsFromLoops( - self.loopInnerOutset, boundaryLayer.loops )
-			boundaryLayer.outerOutsetLoops = intercircle.getInsetSeparateLoopsFromLoops( - self.loopOuterOutset, boundaryLayer.loops )
+			boundaryLayer.innerOutsetLoops = intercircle.getInsetSeparateLoopsFromLoops( - self.loopInnerOutset, boundaryLayer.loops, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
+			boundaryLayer.outerOutsetLoops = intercircle.getInsetSeparateLoopsFromLoops( - self.loopOuterOutset, boundaryLayer.loops, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 			boundaryLayer.innerHorizontalTable = self.getHorizontalXIntersectionsTable( boundaryLayer.innerOutsetLoops )
 			boundaryLayer.outerHorizontalTable = self.getHorizontalXIntersectionsTable( boundaryLayer.outerOutsetLoops )
 			boundaryLayer.innerVerticalTable = self.getHorizontalXIntersectionsTable( euclidean.getDiagonalFlippedLoops( boundaryLayer.innerOutsetLoops ) )
@@ -373,14 +372,14 @@ class MillSkein:
 			if self.isExtruderActive:
 				self.average.addValue( location.z )
 				if self.oldLocation != None:
-					euclidean.addValueSegmentToPixelTable( self.oldLocation.dropAxis( 2 ), location.dropAxis( 2 ), self.aroundPixelTable, None, self.aroundWidth )
+					self.aroundPixelGrid.addSegment( self.oldLocation.dropAxis( 2 ), location.dropAxis( 2 ), None, self.aroundWidth )
 			self.oldLocation = location
 		elif firstWord == 'M101':
 			self.isExtruderActive = True
 		elif firstWord == 'M103':
 			self.isExtruderActive = False
 		elif firstWord == '(<layer>':
-			self.aroundPixelTable = {}
+			self.aroundPixelGrid = euclidean.PixelGrid()
 			self.average.reset()
 		elif firstWord == '(</layer>)':
 			if len( self.boundaryLayers ) > self.layerIndex:
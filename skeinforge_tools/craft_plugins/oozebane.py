@@ -239,7 +239,7 @@ class OozebaneSkein:
 			return line
 		locationBack = location + segment * distanceBack / segmentLength
 		self.distanceFeedRate.addLine( self.getLinearMoveWithFeedRate( self.operatingFeedRateMinute, locationBack ) )
-		self.distanceFeedRate.addLine( 'M101' )
+		self.distanceFeedRate.emitCommand( 'M101' )
 		if self.isCloseToEither( locationBack, location, self.oldLocation ):
 			return ''
 		return self.getLinearMoveWithFeedRate( self.operatingFeedRateMinute, location )
@@ -56,6 +56,7 @@ from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import intercircle
 from skeinforge_tools.skeinforge_utilities import interpret
 from skeinforge_tools.skeinforge_utilities import settings
+from skeinforge_tools.skeinforge_utilities import stage_cache
 from skeinforge_tools.skeinforge_utilities import triangle_mesh
 import sys
 
@@ -109,14 +110,14 @@ class OutsetRepository:
 class OutsetSkein:
 	"A class to outset a skein of extrusions."
 	def __init__( self ):
-		self.boundary = None
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
+		self.layerIndex = - 1
 		self.lineIndex = 0
 		self.rotatedBoundaryLayer = None
 
 	def addGcodeFromRemainingLoop( self, loop, radius, z ):
 		"Add the remainder of the loop."
-		boundary = intercircle.getLargestInsetLoopFromLoopNoMatterWhat( loop, radius )
+		boundary = intercircle.getLargestInsetLoopFromLoopNoMatterWhat( loop, radius, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 		euclidean.addSurroundingLoopBeginning( self.distanceFeedRate, boundary, z )
 		self.distanceFeedRate.addPerimeterBlock( loop, z )
 		self.distanceFeedRate.addLine( '(</boundaryPerimeter>)' )
@@ -124,7 +125,7 @@ class OutsetSkein:
 
 	def addOutset( self, rotatedBoundaryLayer ):
 		"Add outset to the layer."
-		extrudateLoops = intercircle.getInsetLoopsFromLoops( - self.absoluteHalfPerimeterWidth, rotatedBoundaryLayer.loops )
+		extrudateLoops = intercircle.getInsetLoopsFromLoops( - self.absoluteHalfPerimeterWidth, rotatedBoundaryLayer.loops, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 		sortedLoops = triangle_mesh.getLoopsInOrderOfArea( triangle_mesh.compareAreaAscending, extrudateLoops )
 		for sortedLoop in sortedLoops:
 			self.addGcodeFromRemainingLoop( sortedLoop, self.absoluteHalfPerimeterWidth, rotatedBoundaryLayer.z )
@@ -134,6 +135,9 @@ class OutsetSkein:
 		self.repository = repository
 		self.lines = gcodec.getTextLines( gcodeText )
 		self.parseInitialization()
+		self.rotatedBoundaryLayers = gcodec.getRotatedBoundaryLayers( self.lines[ self.lineIndex : ] )
+		layerKeys = stage_cache.getLayerKeys( 'outset', repository, self.lines, self.lineIndex )
+		self.layerTexts = stage_cache.getLayerOutputTexts( self, 'addOutset', self.rotatedBoundaryLayers, layerKeys )
 		for lineIndex in xrange( self.lineIndex, len( self.lines ) ):
 			self.parseLine( lineIndex )
 		return self.distanceFeedRate.output.getvalue()
@@ -161,18 +165,13 @@ class OutsetSkein:
 		if len( splitLine ) < 1:
 			return
 		firstWord = splitLine[ 0 ]
-		if firstWord == '(<boundaryPoint>':
-			location = gcodec.getLocationFromSplitLine( None, splitLine )
-			self.boundary.append( location.dropAxis( 2 ) )
-		elif firstWord == '(<layer>':
-			self.rotatedBoundaryLayer = euclidean.RotatedLoopLayer( float( splitLine[ 1 ] ) )
+		if firstWord == '(<layer>':
+			self.layerIndex += 1
+			self.rotatedBoundaryLayer = self.rotatedBoundaryLayers[ self.layerIndex ]
 			self.distanceFeedRate.addLine( line )
 		elif firstWord == '(</layer>)':
-			self.addOutset( self.rotatedBoundaryLayer )
+			self.distanceFeedRate.addLines( gcodec.getTextLines( self.layerTexts[ self.layerIndex ] ) )
 			self.rotatedBoundaryLayer = None
-		elif firstWord == '(<surroundingLoop>)':
-			self.boundary = []
-			self.rotatedBoundaryLayer.loops.append( self.boundary )
 		if self.rotatedBoundaryLayer == None:
 			self.distanceFeedRate.addLine( line )
 
@@ -188,13 +188,13 @@ class PrefaceSkein:
 		self.distanceFeedRate.addTagBracketedLine( 'version', versionText ) # GCode formatted comment
 		self.distanceFeedRate.addLine( '(<extruderInitialization>)' ) # GCode formatted comment
 		if self.prefaceRepository.setPositioningToAbsolute.value:
-			self.distanceFeedRate.addLine( 'G90' ) # Set positioning to absolute.
+			self.distanceFeedRate.emitCommand( 'G90' ) # Set positioning to absolute.
 		if self.prefaceRepository.setUnitsToMillimeters.value:
 			self.distanceFeedRate.addLine( 'G21' ) # Set units to millimeters.
 		if self.prefaceRepository.startAtHome.value:
 			self.distanceFeedRate.addLine( 'G28' ) # Start at home.
 		if self.prefaceRepository.turnExtruderOffAtStartUp.value:
-			self.distanceFeedRate.addLine( 'M103' ) # Turn extruder off.
+			self.distanceFeedRate.emitCommand( 'M103' ) # Turn extruder off.
 		craftTypeName = profile.getCraftTypeName()
 		self.distanceFeedRate.addTagBracketedLine( 'craftTypeName', craftTypeName )
 		self.distanceFeedRate.addTagBracketedLine( 'decimalPlacesCarried', self.distanceFeedRate.decimalPlacesCarried )
@@ -203,6 +203,7 @@ class PrefaceSkein:
 			self.distanceFeedRate.addTagBracketedLine( 'meta', self.prefaceRepository.meta.value )
 		self.distanceFeedRate.addTagBracketedLine( 'perimeterWidth', self.distanceFeedRate.getRounded( self.perimeterWidth ) )
 		self.distanceFeedRate.addTagBracketedLine( 'profileName', profile.getProfileName( craftTypeName ) )
+		self.distanceFeedRate.addTagBracketedLine( 'simplification', self.distanceFeedRate.simplification )
 		self.distanceFeedRate.addTagBracketedLine( 'procedureDone', 'carve' )
 		self.distanceFeedRate.addTagBracketedLine( 'procedureDone', 'preface' )
 		self.distanceFeedRate.addLine( '(</extruderInitialization>)' ) # Initialization is finished, extrusion is starting.
@@ -252,7 +253,7 @@ class PrefaceSkein:
 		"Add shutdown gcode to the output."
 		self.distanceFeedRate.addLine( '(</extrusion>)' ) # GCode formatted comment
 		if self.prefaceRepository.turnExtruderOffAtShutDown.value:
-			self.distanceFeedRate.addLine( 'M103' ) # Turn extruder motor off.
+			self.distanceFeedRate.emitCommand( 'M103' ) # Turn extruder motor off.
 		self.addFromUpperLowerFile( self.prefaceRepository.nameOfEndFile.value ) # Add an end file if it exists.
 
 	def addTextData( self, line ):
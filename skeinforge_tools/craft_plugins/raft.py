@@ -213,11 +213,13 @@ import __init__
 
 from skeinforge_tools import profile
 from skeinforge_tools.meta_plugins import polyfile
+from skeinforge_tools.skeinforge_utilities import boolean_loops
 from skeinforge_tools.skeinforge_utilities import consecution
 from skeinforge_tools.skeinforge_utilities import euclidean
 from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import intercircle
 from skeinforge_tools.skeinforge_utilities import interpret
+from skeinforge_tools.skeinforge_utilities import scanline
 from skeinforge_tools.skeinforge_utilities import settings
 from skeinforge_tools.skeinforge_utilities.vector3 import Vector3
 import math
@@ -455,11 +457,8 @@ class RaftSkein:
 		self.supportLayers.append( supportLayer )
 		if len( self.boundaryLayers[ boundaryLayerIndex ].loops ) > 0:
 			return
-		aboveXIntersectionsTable = {}
-		euclidean.addXIntersectionsFromLoopsForTable( self.getInsetLoopsAbove( boundaryLayerIndex ), aboveXIntersectionsTable, self.interfaceStep )
-		belowXIntersectionsTable = {}
-		euclidean.addXIntersectionsFromLoopsForTable( self.getInsetLoopsBelow( boundaryLayerIndex ), belowXIntersectionsTable, self.interfaceStep )
-		supportLayer.xIntersectionsTable = euclidean.getIntersectionOfXIntersectionsTables( [ aboveXIntersectionsTable, belowXIntersectionsTable ] )
+		supportLoops = boolean_loops.getIntersectionLoops( self.getInsetLoopsAbove( boundaryLayerIndex ), self.getInsetLoopsBelow( boundaryLayerIndex ) )
+		euclidean.addXIntersectionsFromLoopsForTable( supportLoops, supportLayer.xIntersectionsTable, self.interfaceStep )
 
 	def addFlowRateLineIfDifferent( self, flowRateOutputString ):
 		"Add a line of flow rate if different."
@@ -521,15 +520,15 @@ class RaftSkein:
 		endpoints = euclidean.getEndpointsFromSegments( segments )
 		if len( endpoints ) < 1:
 			return
-		aroundPixelTable = {}
+		aroundPixelGrid = euclidean.PixelGrid()
 		aroundWidth = 0.25 * layerLayerThickness
-		paths = euclidean.getPathsFromEndpoints( endpoints, layerLayerThickness, aroundPixelTable, aroundWidth )
-		paths = euclidean.getConnectedPaths( paths, aroundPixelTable, aroundWidth ) # this is probably unnecesary
+		paths = euclidean.getPathsFromEndpoints( endpoints, layerLayerThickness, aroundPixelGrid, aroundWidth )
+		paths = euclidean.getConnectedPaths( paths, aroundPixelGrid, aroundWidth ) # this is probably unnecesary
 		self.addFlowRateValueIfDifferent( flowRateMultiplier * self.oldFlowRateInput )
 		self.addLayerLine( z )
 		self.addFlowRateValueIfDifferent( self.oldFlowRateInput )
 		for path in paths:
-			simplifiedPath = euclidean.getSimplifiedPath( path, layerLayerThickness )
+			simplifiedPath = euclidean.getSimplifiedPath( path, layerLayerThickness, self.distanceFeedRate.simplification )
 			self.distanceFeedRate.addGcodeFromFeedRateThreadZ( feedRateMinute, simplifiedPath, z )
 		self.extrusionTop += layerLayerThickness
 
@@ -548,7 +547,7 @@ class RaftSkein:
 		"Add the orbits before the operating layers."
 		if len( boundaryLoops ) < 1:
 			return
-		insetBoundaryLoops = intercircle.getInsetLoopsFromLoops( self.perimeterWidth, boundaryLoops )
+		insetBoundaryLoops = intercircle.getInsetLoopsFromLoops( self.perimeterWidth, boundaryLoops, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 		if len( insetBoundaryLoops ) < 1:
 			insetBoundaryLoops = boundaryLoops
 		largestLoop = euclidean.getLargestLoop( insetBoundaryLoops )
@@ -573,7 +572,7 @@ class RaftSkein:
 		originalExtent = self.cornerHighComplex - self.cornerLowComplex
 		self.raftOutsetRadius = self.repository.raftMargin.value + self.repository.raftAdditionalMarginOverLengthPercent.value * 0.01 * max( originalExtent.real, originalExtent.imag )
 		self.setBoundaryLayers()
-		outsetSeparateLoops = intercircle.getInsetSeparateLoopsFromLoops( - self.raftOutsetRadius, self.boundaryLayers[ 0 ].loops, 0.8 )
+		outsetSeparateLoops = intercircle.getInsetSeparateLoopsFromLoops( - self.raftOutsetRadius, self.boundaryLayers[ 0 ].loops, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification, 0.8 )
 		self.interfaceIntersectionsTable = {}
 		euclidean.addXIntersectionsFromLoopsForTable( outsetSeparateLoops, self.interfaceIntersectionsTable, self.interfaceStep )
 		if len( self.supportLayers ) > 0:
@@ -609,7 +608,7 @@ class RaftSkein:
 			self.addLayerLine( boundaryZ )
 			temperatureChangeTimeBeforeFirstLayer = self.getTemperatureChangeTime( self.objectFirstLayerPerimeterTemperature )
 			self.addTemperatureLineIfDifferent( self.objectFirstLayerPerimeterTemperature )
-			largestOutsetLoop = intercircle.getLargestInsetLoopFromLoop( euclidean.getLargestLoop( outsetSeparateLoops ), - self.raftOutsetRadius )
+			largestOutsetLoop = intercircle.getLargestInsetLoopFromLoop( euclidean.getLargestLoop( outsetSeparateLoops ), - self.raftOutsetRadius, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 			intercircle.addOrbitsIfLarge( self.distanceFeedRate, largestOutsetLoop, self.orbitalFeedRatePerSecond, temperatureChangeTimeBeforeFirstLayer, boundaryZ )
 			self.addLineLayerStart = False
 
@@ -631,35 +630,32 @@ class RaftSkein:
 			return
 		boundaryLayer = self.boundaryLayers[ layerIndex ]
 		rise = aboveLayer.z - boundaryLayer.z
-		outsetSupportLoops = intercircle.getInsetSeparateLoopsFromLoops( - self.minimumSupportRatio * rise, boundaryLayer.loops )
+		outsetSupportLoops = intercircle.getInsetSeparateLoopsFromLoops( - self.minimumSupportRatio * rise, boundaryLayer.loops, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 		numberOfSubSteps = 4
 		subStepSize = self.interfaceStep / float( numberOfSubSteps )
 		aboveIntersectionsTable = {}
-		euclidean.addXIntersectionsFromLoopsForTable( aboveLoops, aboveIntersectionsTable, subStepSize )
-		outsetIntersectionsTable = {}
-		euclidean.addXIntersectionsFromLoopsForTable( outsetSupportLoops, outsetIntersectionsTable, subStepSize )
-		euclidean.subtractXIntersectionsTable( aboveIntersectionsTable, outsetIntersectionsTable )
+		euclidean.addXIntersectionsFromLoopsForTable( boolean_loops.getDifferenceLoops( aboveLoops, outsetSupportLoops ), aboveIntersectionsTable, subStepSize )
 		for aboveIntersectionsTableKey in aboveIntersectionsTable.keys():
 			supportIntersectionsTableKey = int( round( float( aboveIntersectionsTableKey ) / numberOfSubSteps ) )
-			xIntersectionIndexList = []
+			crossings = []
 			if supportIntersectionsTableKey in supportLayer.xIntersectionsTable:
-				euclidean.addXIntersectionIndexesFromXIntersections( 0, xIntersectionIndexList, supportLayer.xIntersectionsTable[ supportIntersectionsTableKey ] )
-			euclidean.addXIntersectionIndexesFromXIntersections( 1, xIntersectionIndexList, aboveIntersectionsTable[ aboveIntersectionsTableKey ] )
-			supportLayer.xIntersectionsTable[ supportIntersectionsTableKey ] = euclidean.getJoinOfXIntersectionIndexes( xIntersectionIndexList )
+				scanline.addCrossingsFromXIntersections( crossings, 0, supportLayer.xIntersectionsTable[ supportIntersectionsTableKey ] )
+			scanline.addCrossingsFromXIntersections( crossings, 1, aboveIntersectionsTable[ aboveIntersectionsTableKey ] )
+			supportLayer.xIntersectionsTable[ supportIntersectionsTableKey ] = scanline.getJoinOfCrossings( crossings )
 
 	def addSupportLayerTemperature( self, endpoints, z ):
 		"Add support layer and temperature before the object layer."
 		self.distanceFeedRate.addLinesSetAbsoluteDistanceMode( self.supportStartLines )
 		self.addTemperatureOrbits( endpoints, self.supportedLayersTemperature, z )
-		aroundPixelTable = {}
+		aroundPixelGrid = euclidean.PixelGrid()
 		layerFillInset = 0.9 * self.perimeterWidth
 		aroundWidth = 0.12 * layerFillInset
 		boundaryLoops = self.boundaryLayers[ self.layerIndex ].loops
 		halfSupportOutset = 0.5 * self.supportOutset
-		aroundBoundaryLoops = intercircle.getAroundsFromLoops( boundaryLoops, halfSupportOutset )
+		aroundBoundaryLoops = intercircle.getAroundsFromLoops( boundaryLoops, halfSupportOutset, self.distanceFeedRate.simplification )
 		for aroundBoundaryLoop in aroundBoundaryLoops:
-			euclidean.addLoopToPixelTable( aroundBoundaryLoop, aroundPixelTable, aroundWidth )
-		paths = euclidean.getPathsFromEndpoints( endpoints, layerFillInset, aroundPixelTable, aroundWidth )
+			aroundPixelGrid.addLoop( aroundBoundaryLoop, None, aroundWidth )
+		paths = euclidean.getPathsFromEndpoints( endpoints, layerFillInset, aroundPixelGrid, aroundWidth )
 		self.addFlowRateValueIfDifferent( self.supportFlowRate )
 		for path in paths:
 			self.distanceFeedRate.addGcodeFromFeedRateThreadZ( self.feedRateMinute, path, z )
@@ -695,7 +691,7 @@ class RaftSkein:
 			intercircle.addOrbitsIfLarge( self.distanceFeedRate, squareLoop, self.orbitalFeedRatePerSecond, temperatureTimeChange, z )
 			return
 		perimeterInset = 0.4 * self.perimeterWidth
-		insetBoundaryLoops = intercircle.getInsetLoopsFromLoops( perimeterInset, boundaryLoops )
+		insetBoundaryLoops = intercircle.getInsetLoopsFromLoops( perimeterInset, boundaryLoops, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 		if len( insetBoundaryLoops ) < 1:
 			insetBoundaryLoops = boundaryLoops
 		largestLoop = euclidean.getLargestLoop( insetBoundaryLoops )
@@ -756,7 +752,7 @@ class RaftSkein:
 	def getInsetLoops( self, boundaryLayerIndex ):
 		"Inset the support loops if they are not already inset."
 		if boundaryLayerIndex not in self.insetTable:
-			self.insetTable[ boundaryLayerIndex ] = intercircle.getInsetSeparateLoopsFromLoops( self.quarterPerimeterWidth, self.boundaryLayers[ boundaryLayerIndex ].loops )
+			self.insetTable[ boundaryLayerIndex ] = intercircle.getInsetSeparateLoopsFromLoops( self.quarterPerimeterWidth, self.boundaryLayers[ boundaryLayerIndex ].loops, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 		return self.insetTable[ boundaryLayerIndex ]
 
 	def getInsetLoopsAbove( self, boundaryLayerIndex ):
@@ -972,7 +968,7 @@ class RaftSkein:
 			self.addSegmentTablesToSupportLayers()
 			return
 		for boundaryLayer in self.boundaryLayers:
-			supportLoops = intercircle.getInsetSeparateLoopsFromLoops( - self.supportOutset, boundaryLayer.loops )
+			supportLoops = intercircle.getInsetSeparateLoopsFromLoops( - self.supportOutset, boundaryLayer.loops, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 			supportLayer = SupportLayer( supportLoops )
 			self.supportLayers.append( supportLayer )
 		for supportLayerIndex in xrange( len( self.supportLayers ) - 1 ):
@@ -1000,34 +996,17 @@ class RaftSkein:
 
 	def setCornersZ( self ):
 		"Set maximum and minimum corners and z."
-		boundaryLoop = None
-		boundaryLayer = None
-		layerIndex = - 1
 		self.cornerHighComplex = complex( - 999999999.0, - 999999999.0 )
 		self.cornerLow = Vector3( 999999999.0, 999999999.0, 999999999.0 )
 		self.firstLayerLoops = []
-		for line in self.lines[ self.lineIndex : ]:
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon( line )
-			firstWord = gcodec.getFirstWord( splitLine )
-			if firstWord == '(</boundaryPerimeter>)':
-				boundaryLoop = None
-			elif firstWord == '(<boundaryPoint>':
-				location = gcodec.getLocationFromSplitLine( None, splitLine )
-				if boundaryLoop == None:
-					boundaryLoop = []
-					boundaryLayer.loops.append( boundaryLoop )
-				boundaryLoop.append( location.dropAxis( 2 ) )
-				self.cornerHighComplex = euclidean.getMaximum( self.cornerHighComplex, location.dropAxis( 2 ) )
-				self.cornerLow = euclidean.getPointMinimum( self.cornerLow, location )
-			elif firstWord == '(<layer>':
-				z = float( splitLine[ 1 ] )
-				boundaryLayer = euclidean.LoopLayer( z )
-				self.boundaryLayers.append( boundaryLayer )
-			elif firstWord == '(<layer>':
-				layerIndex += 1
-				if self.repository.supportChoiceNone.value:
-					if layerIndex > 1:
-						return
+		layerSummaryTable = gcodec.LayerSummaryTable().getFromGcodeLines( self.lines, self.lineIndex )
+		for layerSummary in layerSummaryTable.layerSummaries:
+			boundaryLayer = euclidean.LoopLayer( layerSummary.z )
+			boundaryLayer.loops = layerSummary.boundaryLoops
+			self.boundaryLayers.append( boundaryLayer )
+			if layerSummary.cornerMaximum != None:
+				self.cornerHighComplex = euclidean.getMaximum( self.cornerHighComplex, layerSummary.cornerMaximum.dropAxis( 2 ) )
+				self.cornerLow = euclidean.getPointMinimum( self.cornerLow, layerSummary.cornerMinimum )
 
 	def subtractJoinedFill( self, supportLayerIndex ):
 		"Join the fill then subtract it from the support layer table."
@@ -108,6 +108,7 @@ from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import intercircle
 from skeinforge_tools.skeinforge_utilities import interpret
 from skeinforge_tools.skeinforge_utilities import settings
+from skeinforge_tools.skeinforge_utilities import skein_tree
 import math
 import sys
 
@@ -125,11 +126,17 @@ def getCraftedTextFromText( gcodeText, repository = None ):
 	"Temperature a gcode linear move text."
 	if gcodec.isProcedureDoneOrFileIsEmpty( gcodeText, 'temperature' ):
 		return gcodeText
+	return getCraftedTree( skein_tree.getSkeinTreeFromText( gcodeText ), repository ).getText()
+
+def getCraftedTree( skeinTree, repository = None ):
+	"Temperature a skein tree."
+	if skeinTree.isProcedureDoneOrEmpty( 'temperature' ):
+		return skeinTree
 	if repository == None:
 		repository = settings.getReadRepository( TemperatureRepository() )
 	if not repository.activateTemperature.value:
-		return gcodeText
-	return TemperatureSkein().getCraftedGcode( gcodeText, repository )
+		return skeinTree
+	return TemperatureSkein().getCraftedTree( skeinTree, repository )
 
 def getNewRepository():
 	"Get the repository constructor."
@@ -176,41 +183,23 @@ class TemperatureSkein:
 	"A class to temperature a skein of extrusions."
 	def __init__( self ):
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
-		self.lineIndex = 0
-		self.lines = None
-
-	def getCraftedGcode( self, gcodeText, repository ):
-		"Parse gcode text and store the temperature gcode."
-		self.repository = repository
-		self.lines = gcodec.getTextLines( gcodeText )
-		self.parseInitialization()
-		self.distanceFeedRate.addLines( self.lines[ self.lineIndex : ] )
-#		for line in self.lines[ self.lineIndex : ]:
-#			self.parseLine( line )
-		return self.distanceFeedRate.output.getvalue()
-
-	def parseInitialization( self ):
-		"Parse gcode initialization and store the parameters."
-		for self.lineIndex in xrange( len( self.lines ) ):
-			line = self.lines[ self.lineIndex ]
-			splitLine = gcodec.getSplitLineBeforeBracketSemicolon( line )
-			firstWord = gcodec.getFirstWord( splitLine )
-			self.distanceFeedRate.parseSplitLine( firstWord, splitLine )
-			if firstWord == '(</extruderInitialization>)':
-				self.distanceFeedRate.addLine( '(<procedureDone> temperature </procedureDone>)' )
-				return
-			elif firstWord == '(<perimeterWidth>':
-				self.distanceFeedRate.addTagBracketedLine( 'coolingRate', self.repository.coolingRate.value )
-				self.distanceFeedRate.addTagBracketedLine( 'heatingRate', self.repository.heatingRate.value )
-				self.distanceFeedRate.addTagBracketedLine( 'chamberTemperature', self.repository.chamberTemperature.value )
-				self.distanceFeedRate.addTagBracketedLine( 'baseTemperature', self.repository.baseTemperature.value )
-				self.distanceFeedRate.addTagBracketedLine( 'interfaceTemperature', self.repository.interfaceTemperature.value )
-				self.distanceFeedRate.addTagBracketedLine( 'objectFirstLayerInfillTemperature', self.repository.objectFirstLayerInfillTemperature.value )
-				self.distanceFeedRate.addTagBracketedLine( 'objectFirstLayerPerimeterTemperature', self.repository.objectFirstLayerPerimeterTemperature.value )
-				self.distanceFeedRate.addTagBracketedLine( 'objectNextLayersTemperature', self.repository.objectNextLayersTemperature.value )
-				self.distanceFeedRate.addTagBracketedLine( 'supportLayersTemperature', self.repository.supportLayersTemperature.value )
-				self.distanceFeedRate.addTagBracketedLine( 'supportedLayersTemperature', self.repository.supportedLayersTemperature.value )
-			self.distanceFeedRate.addLine( line )
+
+	def getCraftedTree( self, skeinTree, repository ):
+		"Add the temperature tags and the procedure done line to the skein tree."
+		temperatureLines = []
+		temperatureLines.append( self.distanceFeedRate.getTagBracketedLine( 'coolingRate', repository.coolingRate.value ) )
+		temperatureLines.append( self.distanceFeedRate.getTagBracketedLine( 'heatingRate', repository.heatingRate.value ) )
+		temperatureLines.append( self.distanceFeedRate.getTagBracketedLine( 'chamberTemperature', repository.chamberTemperature.value ) )
+		temperatureLines.append( self.distanceFeedRate.getTagBracketedLine( 'baseTemperature', repository.baseTemperature.value ) )
+		temperatureLines.append( self.distanceFeedRate.getTagBracketedLine( 'interfaceTemperature', repository.interfaceTemperature.value ) )
+		temperatureLines.append( self.distanceFeedRate.getTagBracketedLine( 'objectFirstLayerInfillTemperature', repository.objectFirstLayerInfillTemperature.value ) )
+		temperatureLines.append( self.distanceFeedRate.getTagBracketedLine( 'objectFirstLayerPerimeterTemperature', repository.objectFirstLayerPerimeterTemperature.value ) )
+		temperatureLines.append( self.distanceFeedRate.getTagBracketedLine( 'objectNextLayersTemperature', repository.objectNextLayersTemperature.value ) )
+		temperatureLines.append( self.distanceFeedRate.getTagBracketedLine( 'supportLayersTemperature', repository.supportLayersTemperature.value ) )
+		temperatureLines.append( self.distanceFeedRate.getTagBracketedLine( 'supportedLayersTemperature', repository.supportedLayersTemperature.value ) )
+		skeinTree.addHeaderLinesBeforeFirstWord( '(<perimeterWidth>', temperatureLines )
+		skeinTree.addProcedureDone( 'temperature' )
+		return skeinTree
 
 
 def main():
@@ -223,7 +223,7 @@ class TowerSkein:
 			aboveIndex = self.oldLayerIndex + 1
 			if aboveIndex >= len( self.threadLayers ):
 				return
-			outsetRemovedLoop = removedIsland.boundingLoop.getOutsetBoundingLoop( outsetDistance )
+			outsetRemovedLoop = removedIsland.boundingLoop.getOutsetBoundingLoop( outsetDistance, self.distanceFeedRate.simplification )
 			islandsWithin = []
 			for island in self.threadLayers[ aboveIndex ].islands:
 				if self.isInsideRemovedOutsideCone( island, outsetRemovedLoop, aboveIndex ):
@@ -306,7 +306,7 @@ class TowerSkein:
 			islands = self.threadLayers[ layerIndex ].islands
 			outsetDistance = self.perimeterWidth * ( untilLayerIndex - layerIndex ) * coneAngleTangent + 0.5 * self.perimeterWidth
 			for belowIsland in self.threadLayers[ layerIndex ].islands:
-				outsetIslandLoop = belowIsland.boundingLoop.getOutsetBoundingLoop( outsetDistance )
+				outsetIslandLoop = belowIsland.boundingLoop.getOutsetBoundingLoop( outsetDistance, self.distanceFeedRate.simplification )
 				if island.boundingLoop.isOverlappingAnother( outsetIslandLoop ):
 					return False
 		return True
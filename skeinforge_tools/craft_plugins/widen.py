@@ -63,6 +63,7 @@ from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import intercircle
 from skeinforge_tools.skeinforge_utilities import interpret
 from skeinforge_tools.skeinforge_utilities import settings
+from skeinforge_tools.skeinforge_utilities import stage_cache
 from skeinforge_tools.skeinforge_utilities import triangle_mesh
 import os
 import sys
@@ -153,7 +154,7 @@ def getSegmentsFromPoints( loops, pointBegin, pointEnd ):
 			endpoint.point *= normalizedSegment
 	return segments
 
-def getWidenedLoop( loop, loopList, outsetLoop, radius, tinyRadius ):
+def getWidenedLoop( loop, loopList, outsetLoop, radius, simplification, tinyRadius ):
 	"Get the widened loop."
 	intersectingWithinLoops = getIntersectingWithinLoops( loop, loopList, outsetLoop )
 	if len( intersectingWithinLoops ) < 1:
@@ -180,7 +181,7 @@ def getWidenedLoop( loop, loopList, outsetLoop, radius, tinyRadius ):
 		widenedLoop += path
 	if abs( widenedLoop[ 0 ] - widenedLoop[ - 1 ] ) < tinyRadius:
 		widenedLoop = widenedLoop[ 1 : ]
-	return euclidean.getSimplifiedLoop( widenedLoop, radius )
+	return euclidean.getSimplifiedLoop( widenedLoop, radius, simplification )
 
 def writeOutput( fileName = '' ):
 	"Widen the carving of a gcode file."
@@ -209,8 +210,8 @@ class WidenRepository:
 class WidenSkein:
 	"A class to widen a skein of extrusions."
 	def __init__( self ):
-		self.boundary = None
 		self.distanceFeedRate = gcodec.DistanceFeedRate()
+		self.layerIndex = - 1
 		self.lineIndex = 0
 		self.rotatedBoundaryLayer = None
 
@@ -219,21 +220,20 @@ class WidenSkein:
 		loops = triangle_mesh.getLoopsInOrderOfArea( triangle_mesh.compareAreaAscending, rotatedBoundaryLayer.loops )
 		widdershinsLoops = []
 		clockwiseInsetLoops = []
+		loopGrid = euclidean.LoopGrid( loops )
 		for loopIndex in xrange( len( loops ) ):
 			loop = loops[ loopIndex ]
-			if euclidean.isWiddershins( loop ):
-				otherLoops = loops[ : loopIndex ] + loops[ loopIndex + 1 : ]
-				leftPoint = euclidean.getLeftPoint( loop )
-				if euclidean.isPointInsideLoops( otherLoops, leftPoint ):
+			if loopGrid.isWiddershins( loopIndex ):
+				if loopGrid.isPathInsideLoops( loop, loopIndex ):
 					self.distanceFeedRate.addGcodeFromLoop( loop, rotatedBoundaryLayer.z )
 				else:
 					widdershinsLoops.append( loop )
 			else:
-				clockwiseInsetLoops += intercircle.getInsetLoopsFromLoop( self.doublePerimeterWidth, loop )
+				clockwiseInsetLoops += intercircle.getInsetLoopsFromLoop( self.doublePerimeterWidth, loop, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
 				self.distanceFeedRate.addGcodeFromLoop( loop, rotatedBoundaryLayer.z )
 		for widdershinsLoop in widdershinsLoops:
-			outsetLoop = intercircle.getLargestInsetLoopFromLoop( widdershinsLoop, - self.doublePerimeterWidth )
-			widenedLoop = getWidenedLoop( widdershinsLoop, clockwiseInsetLoops, outsetLoop, self.perimeterWidth, self.tinyRadius )
+			outsetLoop = intercircle.getLargestInsetLoopFromLoop( widdershinsLoop, - self.doublePerimeterWidth, self.distanceFeedRate.insetEngine, self.distanceFeedRate.simplification )
+			widenedLoop = getWidenedLoop( widdershinsLoop, clockwiseInsetLoops, outsetLoop, self.perimeterWidth, self.distanceFeedRate.simplification, self.tinyRadius )
 			self.distanceFeedRate.addGcodeFromLoop( widenedLoop, rotatedBoundaryLayer.z )
 
 	def getCraftedGcode( self, gcodeText, repository ):
@@ -241,6 +241,9 @@ class WidenSkein:
 		self.repository = repository
 		self.lines = gcodec.getTextLines( gcodeText )
 		self.parseInitialization()
+		self.rotatedBoundaryLayers = gcodec.getRotatedBoundaryLayers( self.lines[ self.lineIndex : ] )
+		layerKeys = stage_cache.getLayerKeys( 'widen', repository, self.lines, self.lineIndex )
+		self.layerTexts = stage_cache.getLayerOutputTexts( self, 'addWiden', self.rotatedBoundaryLayers, layerKeys )
 		for line in self.lines[ self.lineIndex : ]:
 			self.parseLine( line )
 		return self.distanceFeedRate.output.getvalue()
@@ -269,18 +272,13 @@ class WidenSkein:
 		if len( splitLine ) < 1:
 			return
 		firstWord = splitLine[ 0 ]
-		if firstWord == '(<boundaryPoint>':
-			location = gcodec.getLocationFromSplitLine( None, splitLine )
-			self.boundary.append( location.dropAxis( 2 ) )
-		elif firstWord == '(<layer>':
-			self.rotatedBoundaryLayer = euclidean.RotatedLoopLayer( float( splitLine[ 1 ] ) )
+		if firstWord == '(<layer>':
+			self.layerIndex += 1
+			self.rotatedBoundaryLayer = self.rotatedBoundaryLayers[ self.layerIndex ]
 			self.distanceFeedRate.addLine( line )
 		elif firstWord == '(</layer>)':
-			self.addWiden( self.rotatedBoundaryLayer )
+			self.distanceFeedRate.addLines( gcodec.getTextLines( self.layerTexts[ self.layerIndex ] ) )
 			self.rotatedBoundaryLayer = None
-		elif firstWord == '(<surroundingLoop>)':
-			self.boundary = []
-			self.rotatedBoundaryLayer.loops.append( self.boundary )
 		if self.rotatedBoundaryLayer == None:
 			self.distanceFeedRate.addLine( line )
 
@@ -208,7 +208,7 @@ class WipeSkein:
 			return
 		self.shouldWipe = False
 		if self.extruderActive:
-			self.distanceFeedRate.addLine( 'M103' )
+			self.distanceFeedRate.emitCommand( 'M103' )
 		if self.oldLocation != None:
 			self.addHop( self.oldLocation, self.locationArrival )
 		self.distanceFeedRate.addLine( self.getLinearMoveWithFeedRate( self.travelFeedRatePerMinute, self.locationArrival ) )
@@ -216,7 +216,7 @@ class WipeSkein:
 		self.distanceFeedRate.addLine( self.getLinearMoveWithFeedRate( self.travelFeedRatePerMinute, self.locationDeparture ) )
 		self.addHop( self.locationDeparture, location )
 		if self.extruderActive:
-			self.distanceFeedRate.addLine( 'M101' )
+			self.distanceFeedRate.emitCommand( 'M101' )
 
 	def getCraftedGcode( self, gcodeText, wipeRepository ):
 		"Parse gcode text and store the wipe gcode."
@@ -51,10 +51,9 @@ __date__ = "$Date: 2008/21/04 $"
 __license__ = "GPL 3.0"
 
 
-def addFacesGivenText( objText, triangleMesh ):
-	"Add faces given obj text."
-	lines = gcodec.getTextLines( objText )
-	for line in lines:
+def addFacesGivenFile( fileName, triangleMesh ):
+	"Add faces given an obj file, which is read a chunk at a time so the entire text is never in memory."
+	for line in gcodec.getFileLineGenerator( fileName ):
 		splitLine = line.split()
 		firstWord = gcodec.getFirstWord( splitLine )
 		if firstWord == 'v':
@@ -83,11 +82,10 @@ def getCarving( fileName = '' ):
 			print( "There is no obj file in this folder." )
 			return None
 		fileName = unmodified[ 0 ]
-	objText = gcodec.getFileText( fileName, 'rb' )
-	if objText == '':
+	if gcodec.getFileHead( fileName, 1 ) == '':
 		return None
 	triangleMesh = triangle_mesh.TriangleMesh()
-	addFacesGivenText( objText, triangleMesh )
+	addFacesGivenFile( fileName, triangleMesh )
 	triangleMesh.setEdgesForAllFaces()
 	return triangleMesh
 
@@ -117,6 +117,10 @@ class PythonCarving:
 		"Set the is correct mesh flag."
 		pass
 
+	def setCarveSimplification( self, simplification ):
+		"Set the simplification algorithm."
+		pass
+
 
 def main():
 	"Display the inset dialog."
@@ -182,6 +182,10 @@ class SLCCarving:
 		"Set the is correct mesh flag."
 		pass
 
+	def setCarveSimplification( self, simplification ):
+		"Set the simplification algorithm."
+		pass
+
 
 def main():
 	"Display the inset dialog."
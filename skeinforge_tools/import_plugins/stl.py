@@ -12,6 +12,10 @@ http://en.wikipedia.org/wiki/STL_(file_format)
 A good triangle surface format is the GNU Triangulated Surface format which is described at:
 http://gts.sourceforge.net/reference/gts-surfaces.html#GTS-SURFACE-WRITE
 
+An stl file lists the three vertices of each facet separately, so the vertices which are at the same place are welded into one vertex.  When the weld tolerance is zero, the default, only the vertices with the same coordinates are welded.  When it is greater than zero, the vertices whose coordinates round to the same multiple of the weld tolerance are welded.  The weld tolerance is the 'Weld Tolerance' setting of carve, chop or cleave, which is passed to getWeldedCarving.  If numpy is installed, all the vertices are welded at once by numpy.
+
+A binary stl is recognized by the number of facets in its header matching the file size, and a text stl by the vertex words at its start.  A text stl is read a chunk at a time and its facets are added to the carving as they are read, so the entire text is never in memory.
+
 This example gets a carving for the stl file Screw Holder Bottom.stl.  This example is run in a terminal in the folder which contains Screw Holder Bottom.stl and stl.py.
 
 
@@ -36,73 +40,134 @@ import __init__
 from skeinforge_tools.skeinforge_utilities.vector3 import Vector3
 from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import triangle_mesh
+from array import array
+from struct import Struct
 from struct import unpack
+import math
+import mmap
+import os
+try:
+	import numpy
+except:
+	numpy = None
 
 __author__ = "Enrique Perez (perez_enrique@yahoo.com)"
 __credits__ = 'Nophead <http://hydraraptor.blogspot.com/>\nArt of Illusion <http://www.artofillusion.org/>'
 __date__ = "$Date: 2008/21/04 $"
 __license__ = "GPL 3.0"
 
+globalFacetStruct = Struct( '<12x9f2x' )
+if numpy != None:
+	globalFacetDtype = numpy.dtype( [ ( 'normal', '<f4', ( 3, ) ), ( 'vertices', '<f4', ( 3, 3 ) ), ( 'attribute', '<u2' ) ] )
 
-def addFacesGivenBinary( stlData, triangleMesh, vertexIndexTable ):
-	"Add faces given stl binary."
+
+def addFacesGivenBinary( stlData, triangleMesh, vertexIndexTable, weldTolerance ):
+	"Add faces given stl binary, the facets are decoded all at once by numpy if it is installed, otherwise by a precompiled struct."
 	numberOfVertices = ( len( stlData ) - 84 ) / 50
+	if numpy != None:
+		facetArray = numpy.frombuffer( stlData, globalFacetDtype, numberOfVertices, 84 )
+		vertexArray = facetArray[ 'vertices' ].astype( numpy.float64 ).reshape( ( 3 * numberOfVertices, 3 ) )
+		del facetArray
+		addFacesGivenVertexArray( triangleMesh, vertexArray, weldTolerance )
+		return
 	vertices = []
 	for vertexIndex in xrange( numberOfVertices ):
-		byteIndex = 84 + vertexIndex * 50
-		vertices.append( getVertexGivenBinary( byteIndex + 12, stlData ) )
-		vertices.append( getVertexGivenBinary( byteIndex + 24, stlData ) )
-		vertices.append( getVertexGivenBinary( byteIndex + 36, stlData ) )
-	addFacesGivenVertices( triangleMesh, vertexIndexTable, vertices )
-
-def addFacesGivenText( stlText, triangleMesh, vertexIndexTable ):
-	"Add faces given stl text."
-	lines = gcodec.getTextLines( stlText )
+		facetFloats = globalFacetStruct.unpack_from( stlData, 84 + vertexIndex * 50 )
+		vertices.append( Vector3( facetFloats[ 0 ], facetFloats[ 1 ], facetFloats[ 2 ] ) )
+		vertices.append( Vector3( facetFloats[ 3 ], facetFloats[ 4 ], facetFloats[ 5 ] ) )
+		vertices.append( Vector3( facetFloats[ 6 ], facetFloats[ 7 ], facetFloats[ 8 ] ) )
+	addFacesGivenVertices( triangleMesh, vertexIndexTable, vertices, weldTolerance )
+
+def addFacesGivenTextFile( fileName, triangleMesh, vertexIndexTable, weldTolerance ):
+	"Add faces given an stl text file, which is read a chunk at a time and welded as it is read, so the entire text is never in memory."
+	numberOfFacetVertices = 0
+	vertexCoordinates = array( 'd' )
 	vertices = []
-	for line in lines:
+	for line in gcodec.getFileLineGenerator( fileName ):
 		if line.find( 'vertex' ) != - 1:
-			vertices.append( getVertexGivenLine( line ) )
-	addFacesGivenVertices( triangleMesh, vertexIndexTable, vertices )
-
-def addFacesGivenVertices( triangleMesh, vertexIndexTable, vertices ):
-	"Add faces given stl text."
+			vertex = getVertexGivenLine( line )
+			if numpy != None:
+				vertexCoordinates.extend( ( vertex.x, vertex.y, vertex.z ) )
+			else:
+				vertices.append( vertex )
+				if len( vertices ) == 3:
+					triangleMesh.faces.append( getFaceGivenLines( triangleMesh, 0, vertexIndexTable, vertices, weldTolerance ) )
+					numberOfFacetVertices += 3
+					vertices = []
+	if numpy != None:
+		numberOfVertices = len( vertexCoordinates ) / 3
+		addFacesGivenVertexArray( triangleMesh, numpy.frombuffer( vertexCoordinates, numpy.float64 ).reshape( ( numberOfVertices, 3 ) ), weldTolerance )
+		return
+	printNumberOfWeldedVertices( numberOfFacetVertices, len( triangleMesh.vertices ) )
+
+def addFacesGivenVertexArray( triangleMesh, vertexArray, weldTolerance ):
+	"Add faces given a numpy array of the vertices, three for each face, welding all the vertices within the weld tolerance at once."
+	weldArray = vertexArray
+	if weldTolerance > 0.0:
+		weldArray = numpy.floor( vertexArray / weldTolerance + 0.5 )
+	weldArray = numpy.ascontiguousarray( weldArray + 0.0 )
+	weldRows = weldArray.view( numpy.dtype( ( numpy.void, weldArray.dtype.itemsize * 3 ) ) ).ravel()
+	uniqueRows, firstIndexes, uniqueIndexes = numpy.unique( weldRows, return_index = True, return_inverse = True )
+	firstOrder = numpy.argsort( firstIndexes )
+	vertexIndexesFromUnique = numpy.empty( len( firstOrder ), numpy.int64 )
+	vertexIndexesFromUnique[ firstOrder ] = numpy.arange( len( firstOrder ) )
+	vertexIndexes = vertexIndexesFromUnique[ uniqueIndexes.ravel() ].tolist()
+	for vertexCoordinates in vertexArray[ firstIndexes[ firstOrder ] ].tolist():
+		triangleMesh.vertices.append( Vector3( vertexCoordinates[ 0 ], vertexCoordinates[ 1 ], vertexCoordinates[ 2 ] ) )
+	triangleMesh.faces.extendVertexIndexes( vertexIndexes )
+	printNumberOfWeldedVertices( len( vertexIndexes ), len( triangleMesh.vertices ) )
+
+def addFacesGivenVertices( triangleMesh, vertexIndexTable, vertices, weldTolerance ):
+	"Add faces given the vertices, three for each face, welding the vertices which are within the weld tolerance."
+	if numpy != None:
+		vertexCoordinates = []
+		for vertex in vertices:
+			vertexCoordinates.append( ( vertex.x, vertex.y, vertex.z ) )
+		addFacesGivenVertexArray( triangleMesh, numpy.array( vertexCoordinates, numpy.float64 ).reshape( ( len( vertices ), 3 ) ), weldTolerance )
+		return
 	for vertexIndex in xrange( 0, len( vertices ), 3 ):
-		triangleMesh.faces.append( getFaceGivenLines( triangleMesh, vertexIndex, vertexIndexTable, vertices ) )
+		triangleMesh.faces.append( getFaceGivenLines( triangleMesh, vertexIndex, vertexIndexTable, vertices, weldTolerance ) )
+	printNumberOfWeldedVertices( len( vertices ), len( triangleMesh.vertices ) )
+
+def getBinaryMap( fileName ):
+	"Get a read only memory map of the file if it is a binary stl whose size matches the number of facets in its header, otherwise return None."
+	try:
+		stlFile = open( fileName, 'rb' )
+	except IOError:
+		return None
+	fileSize = os.fstat( stlFile.fileno() ).st_size
+	if fileSize < 84:
+		stlFile.close()
+		return None
+	binaryMap = mmap.mmap( stlFile.fileno(), 0, access = mmap.ACCESS_READ )
+	stlFile.close()
+	if 84 + 50 * unpack( '<I', binaryMap[ 80 : 84 ] )[ 0 ] == fileSize:
+		return binaryMap
+	binaryMap.close()
+	return None
 
 def getCarving( fileName = '' ):
-	"Get the triangle mesh for the stl file."
+	"Get the triangle mesh for the stl file, welding only the vertices with the same coordinates."
 	if fileName == '':
 		unmodified = gcodec.getFilesWithFileTypeWithoutWords( 'stl' )
 		if len( unmodified ) == 0:
 			print( "There is no stl file in this folder." )
 			return None
 		fileName = unmodified[ 0 ]
-	stlData = gcodec.getFileText( fileName, 'rb' )
-	if stlData == '':
-		return None
-	triangleMesh = triangle_mesh.TriangleMesh()
-	vertexIndexTable = {}
-	numberOfVertexStrings = stlData.count( 'vertex' )
-	requiredVertexStringsForText = max( 2, len( stlData ) / 8000 )
-	if numberOfVertexStrings > requiredVertexStringsForText:
-		addFacesGivenText( stlData, triangleMesh, vertexIndexTable )
-	else:
-#	A binary stl should never start with the word "solid".  Because this error is common the file is been parsed as binary regardless.
-		addFacesGivenBinary( stlData, triangleMesh, vertexIndexTable )
-	triangleMesh.setEdgesForAllFaces()
-	return triangleMesh
+	return getWeldedCarving( fileName, 0.0 )
 
-def getFaceGivenLines( triangleMesh, vertexStartIndex, vertexIndexTable, vertices ):
+def getFaceGivenLines( triangleMesh, vertexStartIndex, vertexIndexTable, vertices, weldTolerance ):
 	"Add face given line index and lines."
 	face = triangle_mesh.Face()
 	face.index = len( triangleMesh.faces )
 	for vertexIndex in xrange( vertexStartIndex, vertexStartIndex + 3 ):
 		vertex = vertices[ vertexIndex ]
-		vertexUniqueIndex = len( vertexIndexTable )
-		if str( vertex ) in vertexIndexTable:
-			vertexUniqueIndex = vertexIndexTable[ str( vertex ) ]
+		weldKey = getWeldKey( vertex, weldTolerance )
+		if weldKey in vertexIndexTable:
+			vertexUniqueIndex = vertexIndexTable[ weldKey ]
 		else:
-			vertexIndexTable[ str( vertex ) ] = vertexUniqueIndex
+			vertexUniqueIndex = len( vertexIndexTable )
+			vertexIndexTable[ weldKey ] = vertexUniqueIndex
 			triangleMesh.vertices.append( vertex )
 		face.vertexIndexes.append( vertexUniqueIndex )
 	return face
@@ -114,15 +179,42 @@ def getFloat( floatString ):
 	except:
 		return float( floatString.replace( ',', '.' ) )
 
-def getFloatGivenBinary( byteIndex, stlData ):
-	"Get vertex given stl vertex line."
-	return unpack( 'f', stlData[ byteIndex : byteIndex + 4 ] )[ 0 ]
-
-def getVertexGivenBinary( byteIndex, stlData ):
-	"Get vertex given stl vertex line."
-	return Vector3( getFloatGivenBinary( byteIndex, stlData ), getFloatGivenBinary( byteIndex + 4, stlData ), getFloatGivenBinary( byteIndex + 8, stlData ) )
-
 def getVertexGivenLine( line ):
 	"Get vertex given stl vertex line."
 	splitLine = line.split()
 	return Vector3( getFloat( splitLine[ 1 ] ), getFloat( splitLine[ 2 ] ), getFloat( splitLine[ 3 ] ) )
+
+def getWeldedCarving( fileName, weldTolerance ):
+	"Get the triangle mesh for the stl file, welding the vertices which are within the weld tolerance."
+	triangleMesh = triangle_mesh.TriangleMesh()
+	vertexIndexTable = {}
+	binaryMap = getBinaryMap( fileName )
+	if binaryMap != None:
+		addFacesGivenBinary( binaryMap, triangleMesh, vertexIndexTable, weldTolerance )
+		binaryMap.close()
+		triangleMesh.setEdgesForAllFaces()
+		return triangleMesh
+	stlHead = gcodec.getFileHead( fileName, 8192 )
+	if stlHead == '':
+		return None
+	if isTextHead( stlHead ):
+		addFacesGivenTextFile( fileName, triangleMesh, vertexIndexTable, weldTolerance )
+	else:
+#	A binary stl should never start with the word "solid".  Because this error is common the file is been parsed as binary regardless.
+		addFacesGivenBinary( gcodec.getFileText( fileName, 'rb' ), triangleMesh, vertexIndexTable, weldTolerance )
+	triangleMesh.setEdgesForAllFaces()
+	return triangleMesh
+
+def getWeldKey( vertex, weldTolerance ):
+	"Get the key which the vertex is welded by, which is the coordinates rounded to the weld tolerance, or the coordinates if the weld tolerance is zero."
+	if weldTolerance <= 0.0:
+		return ( vertex.x + 0.0, vertex.y + 0.0, vertex.z + 0.0 )
+	return ( int( math.floor( vertex.x / weldTolerance + 0.5 ) ), int( math.floor( vertex.y / weldTolerance + 0.5 ) ), int( math.floor( vertex.z / weldTolerance + 0.5 ) ) )
+
+def isTextHead( stlHead ):
+	"Determine if the start of an stl file is text, which it is if the start has more than two vertex words."
+	return stlHead.count( 'vertex' ) > 2
+
+def printNumberOfWeldedVertices( numberOfFacetVertices, numberOfVertices ):
+	"Print the number of facet vertices which were welded into other vertices."
+	print( '%s of the %s facet vertices were welded, leaving %s vertices.' % ( numberOfFacetVertices - numberOfVertices, numberOfFacetVertices, numberOfVertices ) )
@@ -190,3 +190,7 @@ class SVGCarving:
 	def setCarveIsCorrectMesh( self, isCorrectMesh ):
 		"Set the is correct mesh flag."
 		pass
+
+	def setCarveSimplification( self, simplification ):
+		"Set the simplification algorithm."
+		pass
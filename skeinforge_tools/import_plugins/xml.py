@@ -32,9 +32,9 @@ import __init__
 
 from skeinforge_tools.skeinforge_utilities.vector3 import Vector3
 from skeinforge_tools.skeinforge_utilities.xml_simple_parser import XMLSimpleParser
+from skeinforge_tools.skeinforge_utilities import boolean_loops
 from skeinforge_tools.skeinforge_utilities import euclidean
 from skeinforge_tools.skeinforge_utilities import gcodec
-from skeinforge_tools.skeinforge_utilities import intercircle
 from skeinforge_tools.skeinforge_utilities import triangle_mesh
 import math
 import sys
@@ -65,55 +65,6 @@ def addCarvableObjectInfoWithMatrix( carvableObjectInfos, matrix4By4, objectInfo
 	carvableObjectInfo.setShape( newMatrix4By4 )
 	carvableObjectInfos.append( carvableObjectInfo )
 
-def addLineLoopsIntersections( loopLoopsIntersections, loops, pointBegin, pointEnd ):
-	"Add intersections of the line with the loops."
-	normalizedSegment = pointEnd - pointBegin
-	normalizedSegmentLength = abs( normalizedSegment )
-	if normalizedSegmentLength <= 0.0:
-		return
-	lineLoopsIntersections = []
-	normalizedSegment /= normalizedSegmentLength
-	segmentYMirror = complex( normalizedSegment.real, - normalizedSegment.imag )
-	pointBeginRotated = segmentYMirror * pointBegin
-	pointEndRotated = segmentYMirror * pointEnd
-	addLoopsXSegmentIntersections( lineLoopsIntersections, loops, pointBeginRotated.real, pointEndRotated.real, segmentYMirror, pointBeginRotated.imag )
-	for lineLoopsIntersection in lineLoopsIntersections:
-		point = complex( lineLoopsIntersection, pointBeginRotated.imag ) * normalizedSegment
-		loopLoopsIntersections.append( point )
-
-def addLineXSegmentIntersection( lineLoopsIntersections, segmentFirstX, segmentSecondX, vector3First, vector3Second, y ):
-	"Add intersections of the line with the x segment."
-	isYAboveFirst = y > vector3First.imag
-	isYAboveSecond = y > vector3Second.imag
-	if isYAboveFirst == isYAboveSecond:
-		return
-	xIntersection = euclidean.getXIntersection( vector3First, vector3Second, y )
-	if xIntersection <= min( segmentFirstX, segmentSecondX ):
-		return
-	if xIntersection >= max( segmentFirstX, segmentSecondX ):
-		return
-	lineLoopsIntersections.append( xIntersection )
-
-def addLoopLoopsIntersections( loop, loopsLoopsIntersections, otherLoops ):
-	"Add intersections of the loop with the other loops."
-	for pointIndex in xrange( len( loop ) ):
-		pointBegin = loop[ pointIndex ]
-		pointEnd = loop[ ( pointIndex + 1 ) % len( loop ) ]
-		addLineLoopsIntersections( loopsLoopsIntersections, otherLoops, pointBegin, pointEnd )
-
-def addLoopsXSegmentIntersections( lineLoopsIntersections, loops, segmentFirstX, segmentSecondX, segmentYMirror, y ):
-	"Add intersections of the loops with the x segment."
-	for loop in loops:
-		addLoopXSegmentIntersections( lineLoopsIntersections, loop, segmentFirstX, segmentSecondX, segmentYMirror, y )
-
-def addLoopXSegmentIntersections( lineLoopsIntersections, loop, segmentFirstX, segmentSecondX, segmentYMirror, y ):
-	"Add intersections of the loop with the x segment."
-	rotatedLoop = euclidean.getPointsRoundZAxis( segmentYMirror, loop )
-	for pointIndex in xrange( len( rotatedLoop ) ):
-		pointFirst = rotatedLoop[ pointIndex ]
-		pointSecond = rotatedLoop[ ( pointIndex + 1 ) % len( rotatedLoop ) ]
-		addLineXSegmentIntersection( lineLoopsIntersections, segmentFirstX, segmentSecondX, pointFirst, pointSecond, y )
-
 def getBottom( points ):
 	"Get the bottom of the points."
 	bottom = 999999999.9
@@ -155,69 +106,11 @@ def getCarving( fileName = '' ):
 	carving.parseXML( gcodec.getFileText( fileName ) )
 	return carving
 
-def getInBetweenPointsFromLoops( importRadius, loops ):
-	"Get the in between points from loops."
-	inBetweenPoints = []
-	for loop in loops:
-		for pointIndex in xrange( len( loop ) ):
-			pointBegin = loop[ pointIndex ]
-			pointEnd = loop[ ( pointIndex + 1 ) % len( loop ) ]
-			intercircle.addPointsFromSegment( pointBegin, pointEnd, inBetweenPoints, importRadius, 0.2123 )
-	return inBetweenPoints
-
-def getInBetweenPointsFromLoopsBoundarySideOtherLoops( inside, importRadius, loops, otherLoops, radiusSide ):
-	"Get the in between points from loops."
-	inBetweenPoints = []
-	for loop in loops:
-		for pointIndex in xrange( len( loop ) ):
-			pointBegin = loop[ pointIndex ]
-			pointEnd = loop[ ( pointIndex + 1 ) % len( loop ) ]
-			inBetweenSegmentPoints = []
-			intercircle.addPointsFromSegment( pointBegin, pointEnd, inBetweenSegmentPoints, importRadius, 0.2123 )
-			for inBetweenSegmentPoint in inBetweenSegmentPoints:
-				if isPointOrEitherLineBoundarySideInsideLoops( inside, otherLoops, pointBegin, inBetweenSegmentPoint, pointEnd, radiusSide ):
-					inBetweenPoints.append( inBetweenSegmentPoint )
-	return inBetweenPoints
-
-def getJoinedList( originalLists ):
-	"Get the lists as one joined list."
-	concatenatedList = []
-	for originalList in originalLists:
-		concatenatedList += originalList
-	return concatenatedList
-
-def getLoopsListsIntersections( loopsList ):
-	"Get intersections betweens the loops lists."
-	loopsListsIntersections = []
-	for loopsIndex in xrange( len( loopsList ) ):
-		loops = loopsList[ loopsIndex ]
-		for otherLoops in loopsList[ : loopsIndex ]:
-			loopsListsIntersections += getLoopsLoopsIntersections( loops, otherLoops )
-	return loopsListsIntersections
-
-def getLoopsLoopsIntersections( loops, otherLoops ):
-	"Get all the intersections of the loops with the other loops."
-	loopsLoopsIntersections = []
-	for loop in loops:
-		addLoopLoopsIntersections( loop, loopsLoopsIntersections, otherLoops )
-	return loopsLoopsIntersections
-
-def getPointsBoundarySideLoops( inside, loops, points, radius ):
-	"Get the points inside the loops."
-	pointsInsideLoops = []
-	for pointIndex in xrange( len( points ) ):
-		pointBegin = points[ ( pointIndex + len( points ) - 1 ) % len( points ) ]
-		pointCenter = points[ pointIndex ]
-		pointEnd = points[ ( pointIndex + 1 ) % len( points ) ]
-		if isPointOrEitherBoundarySideInsideLoops( inside, loops, pointBegin, pointCenter, pointEnd, radius ):
-			pointsInsideLoops.append( pointCenter )
-	return pointsInsideLoops
-
-def getSubObjectInfoLoopsList( importRadius, subObjectInfos, z ):
+def getSubObjectInfoLoopsList( importRadius, simplification, subObjectInfos, z ):
 	"Get subObjectInfo loops list."
 	subObjectInfoLoopsList = []
 	for subObjectInfo in subObjectInfos:
-		subObjectInfoLoops = subObjectInfo.getLoops( importRadius, z )
+		subObjectInfoLoops = subObjectInfo.getLoops( importRadius, simplification, z )
 		subObjectInfoLoopsList.append( subObjectInfoLoops )
 	return subObjectInfoLoopsList
 
@@ -252,43 +145,6 @@ def getVector3TransformedByMatrix( matrix, vector3 ):
 	vector3Transformed.z = getTransformedByList( matrix[ 2 ], vector3 )
 	return vector3Transformed
 
-def isPointOrEitherBoundarySideInsideLoops( inside, loops, pointBegin, pointCenter, pointEnd, radius ):
-	"Determine if the point or a point on either side of the point, is inside the loops."
-	if euclidean.isPointInsideLoops( loops, pointCenter ) != inside:
-		return False
-	segmentBegin = pointBegin - pointCenter
-	segmentEnd = pointEnd - pointCenter
-	segmentBeginLength = abs( segmentBegin )
-	segmentEndLength = abs( segmentEnd )
-	if segmentBeginLength <= 0.0 or segmentEndLength <= 0.0:
-		return False
-	segmentBegin /= segmentBeginLength
-	segmentEnd /= segmentEndLength
-	addedSegment = segmentBegin + segmentEnd
-	addedSegmentLength = abs( addedSegment )
-	if addedSegmentLength > 0.0:
-		addedSegment *= radius / addedSegmentLength
-	else:
-		addedSegment = radius * complex( segmentEnd.imag, - segmentEnd.real )
-	if euclidean.isPointInsideLoops( loops,  pointCenter + addedSegment ) != inside:
-		return False
-	return euclidean.isPointInsideLoops( loops,  pointCenter - addedSegment ) == inside
-
-def isPointOrEitherLineBoundarySideInsideLoops( inside, loops, pointBegin, pointCenter, pointEnd, radius ):
-	"Determine if the point or a point on either side of the point, is inside the loops."
-	if euclidean.isPointInsideLoops( loops, pointCenter ) != inside:
-		return False
-	segment = pointEnd - pointBegin
-	segmentLength = abs( segment )
-	if segmentLength <= 0.0:
-		return False
-	segment /= segmentLength
-	addedSegment = radius * complex( segment.imag, - segment.real )
-	if euclidean.isPointInsideLoops( loops,  pointCenter + addedSegment ) != inside:
-		return False
-	return euclidean.isPointInsideLoops( loops,  pointCenter - addedSegment ) == inside
-
-
 class Matrix4By4:
 	"A four by four matrix."
 	def __init__( self ):
@@ -346,6 +202,7 @@ class XMLCarving:
 		self.importRadius = 0.3
 		self.layerThickness = 0.4
 		self.rotatedBoundaryLayers = []
+		self.simplification = 'Channel'
 	
 	def __repr__( self ):
 		"Get the string representation of this carving."
@@ -396,7 +253,7 @@ class XMLCarving:
 		"Get extruder loops."
 		rotatedBoundaryLayer = euclidean.RotatedLoopLayer( z )
 		for carvableObjectInfo in self.carvableObjectInfos:
-			rotatedBoundaryLayer.loops += carvableObjectInfo.getLoops( self.importRadius, z )
+			rotatedBoundaryLayer.loops += carvableObjectInfo.getLoops( self.importRadius, self.simplification, z )
 		return rotatedBoundaryLayer
 
 	def getZAddExtruderPaths( self, z ):
@@ -419,8 +276,8 @@ class XMLCarving:
 			return z + self.layerThickness
 		allExtrudateLoops = []
 		for loop in rotatedBoundaryLayer.loops:
-			allExtrudateLoops += triangle_mesh.getBridgeLoops( self.layerThickness, loop )
-		rotatedBoundaryLayer.rotation = triangle_mesh.getBridgeDirection( self.belowLoops, allExtrudateLoops, self.layerThickness )
+			allExtrudateLoops += triangle_mesh.getBridgeLoops( self.layerThickness, loop, self.simplification )
+		rotatedBoundaryLayer.rotation = triangle_mesh.getBridgeDirection( self.belowLoops, allExtrudateLoops, self.layerThickness, self.simplification )
 		self.belowLoops = allExtrudateLoops
 		if rotatedBoundaryLayer.rotation == None:
 			return z + self.layerThickness
@@ -467,6 +324,10 @@ class XMLCarving:
 		"Set the is correct mesh flag."
 		self.isCorrectMesh = isCorrectMesh
 
+	def setCarveSimplification( self, simplification ):
+		"Set the simplification algorithm."
+		self.simplification = simplification
+
 
 class TriangleMeshObjectInfo:
 	"An Art of Illusion object info."
@@ -480,9 +341,10 @@ class TriangleMeshObjectInfo:
 			return self.__class__.__name__
 		return "%s %s\n%s" % ( self.name, self.__class__.__name__, self.triangleMesh )
 
-	def getLoops( self, importRadius, z ):
+	def getLoops( self, importRadius, simplification, z ):
 		"Get loops sliced through shape."
 		self.triangleMesh.importRadius = importRadius
+		self.triangleMesh.simplification = simplification
 		return self.triangleMesh.getLoopsFromMesh( z )
 
 	def getNewCarvableObjectInfo( self, objectInfoElement ):
@@ -550,36 +412,18 @@ class CSGObjectObjectInfo( TriangleMeshObjectInfo ):
 
 	def getIntersectedLoops( self, importRadius, subObjectInfoLoopsList ):
 		"Get intersected loops sliced through shape."
-		firstLoops = subObjectInfoLoopsList[ 0 ]
-		lastLoops = getJoinedList( subObjectInfoLoopsList[ 1 : ] )
-		radiusSide = 0.01 * importRadius
-		corners = getPointsBoundarySideLoops( True, firstLoops, getJoinedList( lastLoops ), radiusSide )
-		corners += getPointsBoundarySideLoops( True, lastLoops, getJoinedList( firstLoops ), radiusSide )
-		corners += getLoopsListsIntersections( subObjectInfoLoopsList )
-		allPoints = corners[ : ]
-		allPoints += getInBetweenPointsFromLoopsBoundarySideOtherLoops( True, importRadius, lastLoops, firstLoops, radiusSide )
-		allPoints += getInBetweenPointsFromLoopsBoundarySideOtherLoops( True, importRadius, firstLoops, lastLoops, radiusSide )
-		return triangle_mesh.getInclusiveLoops( allPoints, corners, importRadius, False )
+		return boolean_loops.getIntersectionLoops( subObjectInfoLoopsList[ 0 ], boolean_loops.getUnionLoopsFromLoopsList( subObjectInfoLoopsList[ 1 : ] ) )
 
 	def getJoinedLoops( self, importRadius, subObjectInfoLoopsList ):
 		"Get joined loops sliced through shape."
-		loops = []
-		for subObjectInfoLoops in subObjectInfoLoopsList:
-			loops += subObjectInfoLoops
-		corners = []
-		for loop in loops:
-			corners += loop
-		corners += getLoopsListsIntersections( subObjectInfoLoopsList )
-		allPoints = corners[ : ]
-		allPoints += getInBetweenPointsFromLoops( importRadius, loops )
-		return triangle_mesh.getInclusiveLoops( allPoints, corners, importRadius, False )
-
-	def getLoops( self, importRadius, z ):
+		return boolean_loops.getUnionLoopsFromLoopsList( subObjectInfoLoopsList )
+
+	def getLoops( self, importRadius, simplification, z ):
 		"Get loops sliced through shape."
 		if len( self.subObjectInfos ) < 1:
 			return []
 		operationString = self.object.attributeTable[ 'operation' ]
-		subObjectInfoLoopsList = getSubObjectInfoLoopsList( importRadius, self.subObjectInfos, z )
+		subObjectInfoLoopsList = getSubObjectInfoLoopsList( importRadius, simplification, self.subObjectInfos, z )
 		loops = []
 		if operationString == '0':
 			loops = self.getJoinedLoops( importRadius, subObjectInfoLoopsList )
@@ -590,21 +434,11 @@ class CSGObjectObjectInfo( TriangleMeshObjectInfo ):
 		elif operationString == '3':
 			subObjectInfoLoopsList.reverse()
 			loops = self.getSubtractedLoops( importRadius, subObjectInfoLoopsList )
-		return euclidean.getSimplifiedLoops( loops, importRadius )
+		return euclidean.getSimplifiedLoops( loops, importRadius, simplification )
 
 	def getSubtractedLoops( self, importRadius, subObjectInfoLoopsList ):
 		"Get subtracted loops sliced through shape."
-		negativeLoops = getJoinedList( subObjectInfoLoopsList[ 1 : ] )
-		positiveLoops = subObjectInfoLoopsList[ 0 ]
-		radiusSide = 0.01 * importRadius
-		corners = getPointsBoundarySideLoops( True, positiveLoops, getJoinedList( negativeLoops ), radiusSide )
-		corners += getPointsBoundarySideLoops( False, negativeLoops, getJoinedList( positiveLoops ), radiusSide )
-		loopsListsIntersections = getLoopsListsIntersections( subObjectInfoLoopsList )
-		corners += loopsListsIntersections
-		allPoints = corners[ : ]
-		allPoints += getInBetweenPointsFromLoopsBoundarySideOtherLoops( True, importRadius, negativeLoops, positiveLoops, radiusSide )
-		allPoints += getInBetweenPointsFromLoopsBoundarySideOtherLoops( False, importRadius, positiveLoops, negativeLoops, radiusSide )
-		return triangle_mesh.getInclusiveLoops( allPoints, corners, importRadius, False )
+		return boolean_loops.getDifferenceLoopsFromLoopsList( subObjectInfoLoopsList )
 
 	def getVertices( self ):
 		"Get all vertices."
@@ -0,0 +1,454 @@
+"""
+Boolean loops is a collection of utilities to join, intersect and subtract sets of complex loops.
+
+The segments of the loops are swept from left to right with euclidean.getSweptSegmentIndexPairs, so only the segments whose bounding boxes overlap are checked for contacts.  The vertices of the second set of loops which are within the contact tolerance of a vertex of the first set are moved onto that vertex, a segment is split at each vertex which touches it, and a pair of segments from different sets which cross is split at the crossing.  The split points within the contact tolerance of each other are moved onto the same point.  So the loops only meet at the ends of their edges, and the edges along a boundary which both sets share are identical.
+
+An edge is kept when it is on the wanted side of the other set of loops, the side only changes at a contact so it is only checked at the contacts.  Of a pair of identical edges the first is kept if they go the same way, because then the region is on the same side of both, and neither is kept if they go opposite ways.  The kept edges are linked into loops, at a point where more than one kept edge begins the edge which turns farthest to the left is followed, so the loops which touch at a point stay apart.
+
+The crossings and the winding number runs are also used by the vertex offset inset engine in intercircle.
+
+"""
+
+from __future__ import absolute_import
+try:
+	import psyco
+	psyco.full()
+except:
+	pass
+#Init has to be imported first because it has code to workaround the python bug where relative imports don't work if the module is imported as a main module.
+import __init__
+
+from skeinforge_tools.skeinforge_utilities import euclidean
+import math
+
+
+__author__ = "Enrique Perez (perez_enrique@yahoo.com)"
+__date__ = "$Date: 2008/21/04 $"
+__license__ = "GPL 3.0"
+
+globalContactTolerance = 0.0000001
+
+
+def addContacts( firstSegment, isCrossingWanted, loops, secondSegment, splitTable ):
+	"Add the contacts of a pair of segments, a segment is split at each end of the other segment which touches it, and if they do not touch and the crossing is wanted they are split at their crossing."
+	firstLoop = loops[ firstSegment[ 0 ] ]
+	secondLoop = loops[ secondSegment[ 0 ] ]
+	firstBegin = firstLoop[ firstSegment[ 1 ] ]
+	firstEnd = firstLoop[ ( firstSegment[ 1 ] + 1 ) % len( firstLoop ) ]
+	secondBegin = secondLoop[ secondSegment[ 1 ] ]
+	secondEnd = secondLoop[ ( secondSegment[ 1 ] + 1 ) % len( secondLoop ) ]
+	isTouching = firstBegin in ( secondBegin, secondEnd ) or firstEnd in ( secondBegin, secondEnd )
+	for point in ( secondBegin, secondEnd ):
+		isTouching = addTouch( firstBegin, firstEnd, point, firstSegment, splitTable ) or isTouching
+	for point in ( firstBegin, firstEnd ):
+		isTouching = addTouch( secondBegin, secondEnd, point, secondSegment, splitTable ) or isTouching
+	if isTouching or not isCrossingWanted:
+		return
+	firstSegmentComplex = firstEnd - firstBegin
+	secondSegmentComplex = secondEnd - secondBegin
+	denominator = euclidean.getCrossProduct( firstSegmentComplex, secondSegmentComplex )
+	if denominator == 0.0:
+		return
+	beginDifference = secondBegin - firstBegin
+	firstAlong = euclidean.getCrossProduct( beginDifference, secondSegmentComplex ) / denominator
+	secondAlong = euclidean.getCrossProduct( beginDifference, firstSegmentComplex ) / denominator
+	if not isAlongInside( firstAlong, abs( firstSegmentComplex ) ) or not isAlongInside( secondAlong, abs( secondSegmentComplex ) ):
+		return
+	crossingPoint = firstBegin + firstAlong * firstSegmentComplex
+	addSplit( firstAlong, crossingPoint, firstSegment, splitTable )
+	addSplit( secondAlong, crossingPoint, secondSegment, splitTable )
+
+def addCrossing( crossingPoints, firstSegment, loopCrossings, loops, secondSegment ):
+	"Add the crossing of the pair of segments, if they cross and are not adjacent."
+	firstLoopIndex, firstPointIndex = firstSegment
+	secondLoopIndex, secondPointIndex = secondSegment
+	if firstLoopIndex == secondLoopIndex:
+		pointIndexDifference = abs( firstPointIndex - secondPointIndex )
+		if pointIndexDifference < 2 or pointIndexDifference == len( loops[ firstLoopIndex ] ) - 1:
+			return
+	firstLoop = loops[ firstLoopIndex ]
+	secondLoop = loops[ secondLoopIndex ]
+	firstBegin = firstLoop[ firstPointIndex ]
+	secondBegin = secondLoop[ secondPointIndex ]
+	firstSegmentComplex = firstLoop[ ( firstPointIndex + 1 ) % len( firstLoop ) ] - firstBegin
+	secondSegmentComplex = secondLoop[ ( secondPointIndex + 1 ) % len( secondLoop ) ] - secondBegin
+	denominator = euclidean.getCrossProduct( firstSegmentComplex, secondSegmentComplex )
+	if abs( denominator ) <= 0.000000001 * abs( firstSegmentComplex ) * abs( secondSegmentComplex ):
+		return
+	beginDifference = secondBegin - firstBegin
+	firstAlong = euclidean.getCrossProduct( beginDifference, secondSegmentComplex ) / denominator
+	if firstAlong < 0.0 or firstAlong >= 1.0:
+		return
+	secondAlong = euclidean.getCrossProduct( beginDifference, firstSegmentComplex ) / denominator
+	if secondAlong < 0.0 or secondAlong >= 1.0:
+		return
+	crossingIndex = len( crossingPoints )
+	crossingPoints.append( firstBegin + firstAlong * firstSegmentComplex )
+	windingChange = 1
+	if denominator > 0.0:
+		windingChange = - 1
+	loopCrossings[ firstLoopIndex ].append( ( firstPointIndex, firstAlong, crossingIndex, windingChange ) )
+	loopCrossings[ secondLoopIndex ].append( ( secondPointIndex, secondAlong, crossingIndex, - windingChange ) )
+
+def addSplit( along, point, segment, splitTable ):
+	"Add the split at the point along the segment to the split table."
+	if segment not in splitTable:
+		splitTable[ segment ] = []
+	splitTable[ segment ].append( ( along, point.real, point.imag ) )
+
+def addTouch( segmentBegin, segmentEnd, point, segment, splitTable ):
+	"Add the split of the segment at the point and return true, if the point is within the contact tolerance of the segment and not of its ends."
+	segmentComplex = segmentEnd - segmentBegin
+	segmentLength = abs( segmentComplex )
+	if segmentLength <= globalContactTolerance:
+		return False
+	along = euclidean.getDotProduct( point - segmentBegin, segmentComplex ) / segmentLength / segmentLength
+	if not isAlongInside( along, segmentLength ):
+		return False
+	if abs( euclidean.getCrossProduct( point - segmentBegin, segmentComplex ) ) > globalContactTolerance * segmentLength:
+		return False
+	addSplit( along, point, segment, splitTable )
+	return True
+
+def getBooleanLoops( firstLoops, isFirstInsideWanted, secondLoops, isSecondInsideWanted ):
+	"Get the loops around the region bounded by the edges of the first loops which are inside or outside of the second loops, and the edges of the second loops which are inside or outside of the first loops."
+	firstLoops = getOrientedLoops( firstLoops )
+	secondLoops = getOrientedLoops( secondLoops )
+	if isFirstInsideWanted != isSecondInsideWanted:
+		for secondLoopIndex in xrange( len( secondLoops ) ):
+			secondLoops[ secondLoopIndex ] = secondLoops[ secondLoopIndex ][ : : - 1 ]
+	contactTable = {}
+	pointTable = {}
+	secondLoops = getSnappedLoops( contactTable, firstLoops, pointTable, secondLoops )
+	loops = firstLoops + secondLoops
+	loopSetIndexes = [ 0 ] * len( firstLoops ) + [ 1 ] * len( secondLoops )
+	splitTable = getSplitTable( contactTable, loops, loopSetIndexes, pointTable )
+	loopsEdges = getSplitEdges( contactTable, loops, splitTable )
+	edgeTables = [ {}, {} ]
+	for loopIndex in xrange( len( loops ) ):
+		for edge in loopsEdges[ loopIndex ]:
+			edgeTables[ loopSetIndexes[ loopIndex ] ][ edge ] = None
+	loopGrids = [ euclidean.LoopGrid( firstLoops ), euclidean.LoopGrid( secondLoops ) ]
+	insideWanteds = [ isFirstInsideWanted, isSecondInsideWanted ]
+	keptEdges = []
+	for loopIndex in xrange( len( loops ) ):
+		loopSetIndex = loopSetIndexes[ loopIndex ]
+		otherEdgeTable = edgeTables[ 1 - loopSetIndex ]
+		otherLoopGrid = loopGrids[ 1 - loopSetIndex ]
+		isKept = None
+		for edge in loopsEdges[ loopIndex ]:
+			begin, end = edge
+			if edge in otherEdgeTable:
+				isKept = None
+				if loopSetIndex == 0:
+					keptEdges.append( edge )
+			elif ( end, begin ) in otherEdgeTable:
+				isKept = None
+			else:
+				if isKept == None or begin in contactTable:
+					isKept = otherLoopGrid.isInFilledRegion( 0.5 * ( begin + end ) ) == insideWanteds[ loopSetIndex ]
+				if isKept:
+					keptEdges.append( edge )
+	return getLoopsFromEdges( contactTable, keptEdges )
+
+def getCrossings( loops ):
+	"Get the crossing points and the crossings along each loop."
+	crossingPoints = []
+	loopCrossings = []
+	segments = []
+	segmentLoopPointIndexes = []
+	for loopIndex in xrange( len( loops ) ):
+		loop = loops[ loopIndex ]
+		loopCrossings.append( [] )
+		for pointIndex in xrange( len( loop ) ):
+			segments.append( ( loop[ pointIndex ], loop[ ( pointIndex + 1 ) % len( loop ) ] ) )
+			segmentLoopPointIndexes.append( ( loopIndex, pointIndex ) )
+	for firstIndex, secondIndex in euclidean.getSweptSegmentIndexPairs( segments ):
+		addCrossing( crossingPoints, segmentLoopPointIndexes[ firstIndex ], loopCrossings, loops, segmentLoopPointIndexes[ secondIndex ] )
+	for crossings in loopCrossings:
+		crossings.sort()
+	return crossingPoints, loopCrossings
+
+def getDifferenceLoops( loops, subtractLoops ):
+	"Get the loops around the region of the loops which is not in the subtract loops."
+	return getBooleanLoops( loops, False, subtractLoops, True )
+
+def getDifferenceLoopsFromLoopsList( loopsList ):
+	"Get the loops around the region of the first loops of the list which is not in the rest of the loops."
+	if len( loopsList ) < 1:
+		return []
+	return getDifferenceLoops( loopsList[ 0 ], getUnionLoopsFromLoopsList( loopsList[ 1 : ] ) )
+
+def getFarthestLeftEdgeIndex( edgeIndexes, edges, isEdgeAdded, segment ):
+	"Get the index of the edge which is not added yet and which turns farthest to the left from the segment, or None if they are all added."
+	farthestLeftEdgeIndex = None
+	farthestLeftAngle = - 999.0
+	for edgeIndex in edgeIndexes:
+		if not isEdgeAdded[ edgeIndex ]:
+			begin, end = edges[ edgeIndex ]
+			turn = ( end - begin ) * segment.conjugate()
+			angle = math.atan2( turn.imag, turn.real )
+			if angle >= math.pi:
+				angle = - math.pi
+			if angle > farthestLeftAngle:
+				farthestLeftAngle = angle
+				farthestLeftEdgeIndex = edgeIndex
+	return farthestLeftEdgeIndex
+
+def getIntersectionLoops( loops, otherLoops ):
+	"Get the loops around the region which is in both the loops and the other loops."
+	return getBooleanLoops( loops, True, otherLoops, True )
+
+def getIntersectionLoopsFromLoopsList( loopsList ):
+	"Get the loops around the region which is in all the loops of the list."
+	if len( loopsList ) < 1:
+		return []
+	intersectionLoops = loopsList[ 0 ]
+	for loops in loopsList[ 1 : ]:
+		intersectionLoops = getIntersectionLoops( intersectionLoops, loops )
+	return intersectionLoops
+
+def getLoopFromEdges( edgeIndex, edgeIndexesTable, edges, isEdgeAdded ):
+	"Get the loop by following the edges from the edge until the loop closes, or an empty loop if there is no edge to follow."
+	loopBegin = edges[ edgeIndex ][ 0 ]
+	loop = []
+	for edgeCount in xrange( len( edges ) ):
+		isEdgeAdded[ edgeIndex ] = True
+		begin, end = edges[ edgeIndex ]
+		loop.append( begin )
+		if end == loopBegin:
+			return loop
+		edgeIndex = getFarthestLeftEdgeIndex( edgeIndexesTable.get( end, [] ), edges, isEdgeAdded, end - begin )
+		if edgeIndex == None:
+			return []
+	return []
+
+def getLoopFromRuns( isRunAdded, runIndex, runs, startRunIndexes ):
+	"Get the loop by following the kept runs, each run is followed by the run which leaves its end crossing along the other loop."
+	loop = []
+	for runCount in xrange( len( runs ) ):
+		if isRunAdded[ runIndex ]:
+			return loop
+		run, isKept, endCrossingIndex, nextRunIndex = runs[ runIndex ]
+		if not isKept:
+			return []
+		isRunAdded[ runIndex ] = True
+		loop += run
+		for startRunIndex in startRunIndexes[ endCrossingIndex ]:
+			if startRunIndex != nextRunIndex:
+				runIndex = startRunIndex
+	return loop
+
+def getLoopsFromCrossings( crossingPoints, isEvenOdd, loopCrossings, loops, startNumbers ):
+	"Get the loops made from the kept runs between the crossings.  The number of a run is the start number of its loop plus the winding changes of the crossings before it, and a run is kept when its number is zero, or even if the rule is even odd."
+	runs = []
+	startRunIndexes = [ [] for crossingPoint in crossingPoints ]
+	keptLoops = []
+	for loopIndex in xrange( len( loops ) ):
+		loop = loops[ loopIndex ]
+		crossings = loopCrossings[ loopIndex ]
+		number = startNumbers[ loopIndex ]
+		if len( crossings ) == 0:
+			if isNumberKept( isEvenOdd, number ):
+				keptLoops.append( loop[ : ] )
+			continue
+		firstRunIndex = len( runs )
+		for crossingIndex in xrange( len( crossings ) ):
+			pointIndex, along, crossingPointIndex, windingChange = crossings[ crossingIndex ]
+			number += windingChange
+			nextCrossing = crossings[ ( crossingIndex + 1 ) % len( crossings ) ]
+			numberOfPoints = ( nextCrossing[ 0 ] - pointIndex ) % len( loop )
+			if numberOfPoints == 0 and crossingIndex == len( crossings ) - 1:
+				numberOfPoints = len( loop )
+			run = [ crossingPoints[ crossingPointIndex ] ]
+			for pointIndexPlus in xrange( pointIndex + 1, pointIndex + numberOfPoints + 1 ):
+				run.append( loop[ pointIndexPlus % len( loop ) ] )
+			nextRunIndex = firstRunIndex + ( crossingIndex + 1 ) % len( crossings )
+			startRunIndexes[ crossingPointIndex ].append( len( runs ) )
+			runs.append( ( run, isNumberKept( isEvenOdd, number ), nextCrossing[ 2 ], nextRunIndex ) )
+	isRunAdded = [ False ] * len( runs )
+	for runIndex in xrange( len( runs ) ):
+		if runs[ runIndex ][ 1 ] and not isRunAdded[ runIndex ]:
+			keptLoop = getLoopFromRuns( isRunAdded, runIndex, runs, startRunIndexes )
+			if len( keptLoop ) > 2:
+				keptLoops.append( keptLoop )
+	return keptLoops
+
+def getLoopsFromEdges( contactTable, edges ):
+	"Get the loops made by linking the edges, without the contacts which are in the middle of a straight line."
+	edgeIndexesTable = {}
+	for edgeIndex in xrange( len( edges ) ):
+		begin = edges[ edgeIndex ][ 0 ]
+		if begin not in edgeIndexesTable:
+			edgeIndexesTable[ begin ] = []
+		edgeIndexesTable[ begin ].append( edgeIndex )
+	isEdgeAdded = [ False ] * len( edges )
+	loops = []
+	for edgeIndex in xrange( len( edges ) ):
+		if not isEdgeAdded[ edgeIndex ]:
+			loop = getLoopWithoutStraightContacts( contactTable, getLoopFromEdges( edgeIndex, edgeIndexesTable, edges, isEdgeAdded ) )
+			if len( loop ) > 2:
+				loops.append( loop )
+	return loops
+
+def getLoopWithoutStraightContacts( contactTable, loop ):
+	"Get the loop without the contacts which are in the middle of a straight line, like the ends of a shared edge between two joined loops."
+	loopWithoutStraightContacts = []
+	for pointIndex in xrange( len( loop ) ):
+		point = loop[ pointIndex ]
+		if point in contactTable:
+			beginSegment = point - loop[ pointIndex - 1 ]
+			endSegment = loop[ ( pointIndex + 1 ) % len( loop ) ] - point
+			isStraight = abs( euclidean.getCrossProduct( beginSegment, endSegment ) ) <= globalContactTolerance * abs( beginSegment + endSegment )
+			if isStraight and euclidean.getDotProduct( beginSegment, endSegment ) > 0.0:
+				continue
+		loopWithoutStraightContacts.append( point )
+	return loopWithoutStraightContacts
+
+def getOrientedLoops( loops ):
+	"Get the loops oriented so that the solid is to their left, so the loops around the solid are widdershins and the loops around the holes are clockwise."
+	loopGrid = euclidean.LoopGrid( loops )
+	orientedLoops = []
+	for loopIndex in xrange( len( loops ) ):
+		loop = loops[ loopIndex ]
+		if len( loop ) > 2:
+			isWiddershins = loopGrid.isWiddershins( loopIndex )
+			if isWiddershins == isHole( isWiddershins, loop, loopGrid, loopIndex ):
+				loop = loop[ : : - 1 ]
+			orientedLoops.append( loop )
+	return orientedLoops
+
+def getSnappedLoops( contactTable, firstLoops, pointTable, secondLoops ):
+	"Get the second loops with each vertex which is within the contact tolerance of a vertex of the first loops moved onto that vertex, the vertexes are added to the point table and the shared vertexes are added to the contact table."
+	firstPointTable = {}
+	for firstLoop in firstLoops:
+		for point in firstLoop:
+			firstPointTable[ point ] = None
+			pointTable[ getToleranceKey( point ) ] = point
+	snappedLoops = []
+	for secondLoop in secondLoops:
+		snappedLoop = []
+		for point in secondLoop:
+			point = getSnappedPoint( point, pointTable )
+			if point in firstPointTable:
+				contactTable[ point ] = None
+			snappedLoop.append( point )
+		snappedLoops.append( snappedLoop )
+	return snappedLoops
+
+def getSnappedPoint( point, pointTable ):
+	"Get the point of the point table which is within the contact tolerance of the point, or if there is none add the point to the table and return it."
+	key = getToleranceKey( point )
+	for x in xrange( key[ 0 ] - 1, key[ 0 ] + 2 ):
+		for y in xrange( key[ 1 ] - 1, key[ 1 ] + 2 ):
+			if ( x, y ) in pointTable:
+				tablePoint = pointTable[ ( x, y ) ]
+				if abs( tablePoint - point ) <= globalContactTolerance:
+					return tablePoint
+	pointTable[ key ] = point
+	return point
+
+def getSplitEdges( contactTable, loops, splitTable ):
+	"Get the edges of each loop beginning at its first contact, with each segment split at its splits in order along the segment."
+	loopsEdges = []
+	for loopIndex in xrange( len( loops ) ):
+		loop = loops[ loopIndex ]
+		loopEdges = []
+		for pointIndex in xrange( len( loop ) ):
+			points = [ loop[ pointIndex ] ]
+			segment = ( loopIndex, pointIndex )
+			if segment in splitTable:
+				splits = splitTable[ segment ]
+				splits.sort()
+				for split in splits:
+					points.append( complex( split[ 1 ], split[ 2 ] ) )
+			points.append( loop[ ( pointIndex + 1 ) % len( loop ) ] )
+			for edgeIndex in xrange( len( points ) - 1 ):
+				if points[ edgeIndex ] != points[ edgeIndex + 1 ]:
+					loopEdges.append( ( points[ edgeIndex ], points[ edgeIndex + 1 ] ) )
+		for edgeIndex in xrange( len( loopEdges ) ):
+			if loopEdges[ edgeIndex ][ 0 ] in contactTable:
+				loopEdges = loopEdges[ edgeIndex : ] + loopEdges[ : edgeIndex ]
+				break
+		loopsEdges.append( loopEdges )
+	return loopsEdges
+
+def getSplitTable( contactTable, loops, loopSetIndexes, pointTable ):
+	"Get the table of the splits of each segment at the vertexes which touch it, and at its crossings with the segments of the loops in the other set.  Each split point is moved onto the point of the point table within the contact tolerance, so the crossings of more than two segments at a point are the same point, and is added to the contact table."
+	segments = []
+	segmentLoopPointIndexes = []
+	splitTable = {}
+	for loopIndex in xrange( len( loops ) ):
+		loop = loops[ loopIndex ]
+		for pointIndex in xrange( len( loop ) ):
+			segments.append( ( loop[ pointIndex ], loop[ ( pointIndex + 1 ) % len( loop ) ] ) )
+			segmentLoopPointIndexes.append( ( loopIndex, pointIndex ) )
+	for firstIndex, secondIndex in euclidean.getSweptSegmentIndexPairs( segments ):
+		firstSegment = segmentLoopPointIndexes[ firstIndex ]
+		secondSegment = segmentLoopPointIndexes[ secondIndex ]
+		if firstSegment[ 0 ] == secondSegment[ 0 ]:
+			pointIndexDifference = abs( firstSegment[ 1 ] - secondSegment[ 1 ] )
+			if pointIndexDifference < 2 or pointIndexDifference == len( loops[ firstSegment[ 0 ] ] ) - 1:
+				continue
+		isCrossingWanted = loopSetIndexes[ firstSegment[ 0 ] ] != loopSetIndexes[ secondSegment[ 0 ] ]
+		addContacts( firstSegment, isCrossingWanted, loops, secondSegment, splitTable )
+	for splits in splitTable.values():
+		for splitIndex in xrange( len( splits ) ):
+			along, x, y = splits[ splitIndex ]
+			point = getSnappedPoint( complex( x, y ), pointTable )
+			contactTable[ point ] = None
+			splits[ splitIndex ] = ( along, point.real, point.imag )
+	return splitTable
+
+def getStartPoint( crossings, loop ):
+	"Get the point halfway along the first segment of the loop, or halfway to the first crossing if the crossing is on the first segment."
+	along = 0.5
+	if len( crossings ) > 0:
+		if crossings[ 0 ][ 0 ] == 0:
+			along = 0.5 * crossings[ 0 ][ 1 ]
+	return loop[ 0 ] + along * ( loop[ 1 ] - loop[ 0 ] )
+
+def getToleranceKey( point ):
+	"Get the key of the contact tolerance square which holds the point."
+	return ( int( math.floor( point.real / globalContactTolerance ) ), int( math.floor( point.imag / globalContactTolerance ) ) )
+
+def getUnionLoops( loops, otherLoops ):
+	"Get the loops around the region which is in the loops or in the other loops."
+	return getBooleanLoops( loops, False, otherLoops, False )
+
+def getUnionLoopsFromLoopsList( loopsList ):
+	"Get the loops around the region which is in any of the loops of the list."
+	unionLoops = []
+	for loops in loopsList:
+		unionLoops = getUnionLoops( unionLoops, loops )
+	return unionLoops
+
+def isAlongInside( along, segmentLength ):
+	"Determine if the point along the segment is farther than the contact tolerance from both ends of the segment."
+	return along * segmentLength > globalContactTolerance and ( 1.0 - along ) * segmentLength > globalContactTolerance
+
+def isHole( isWiddershins, loop, loopGrid, loopIndex ):
+	"Determine if the loop is a hole, in other words if the region just inside of the loop is in the filled region of the other loops.  The region is checked beside the middle of each segment in turn until the points just inside and just outside of the segment agree, because where they do not another loop touches the segment."
+	inward = 1j
+	if not isWiddershins:
+		inward = - 1j
+	isFirstInside = None
+	for pointIndex in xrange( len( loop ) ):
+		begin = loop[ pointIndex ]
+		segment = loop[ ( pointIndex + 1 ) % len( loop ) ] - begin
+		segmentLength = abs( segment )
+		if segmentLength > 0.0:
+			middle = begin + 0.5 * segment
+			offset = globalContactTolerance * inward * segment / segmentLength
+			isInside = loopGrid.isInFilledRegion( middle + offset, loopIndex )
+			if isInside == loopGrid.isInFilledRegion( middle - offset, loopIndex ):
+				return isInside
+			if isFirstInside == None:
+				isFirstInside = isInside
+	return isFirstInside == True
+
+def isNumberKept( isEvenOdd, number ):
+	"Determine if the run number is zero, or even if the rule is even odd."
+	if isEvenOdd:
+		return number % 2 == 0
+	return number == 0
@@ -9,6 +9,8 @@ import __init__
 
 from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import settings
+from skeinforge_tools.skeinforge_utilities import skein_tree
+from skeinforge_tools.skeinforge_utilities import stage_cache
 from skeinforge_tools import analyze
 from skeinforge_tools import profile
 import os
@@ -26,6 +28,13 @@ def getCraftModule( fileName ):
 	craftPluginsDirectoryPath = gcodec.getAbsoluteFolderPath( os.path.dirname( __file__ ), 'craft_plugins' )
 	return gcodec.getModuleWithDirectoryPath( craftPluginsDirectoryPath, fileName )
 
+def getCraftModules( procedures ):
+	"Get the craft modules of the procedures."
+	craftModules = []
+	for procedure in procedures:
+		craftModules.append( getCraftModule( procedure ) )
+	return craftModules
+
 def getChainText( fileName, procedure ):
 	"Get a crafted shape file."
 	text = gcodec.getFileText( fileName )
@@ -33,16 +42,39 @@ def getChainText( fileName, procedure ):
 	return getChainTextFromProcedures( fileName, procedures, text )
 
 def getChainTextFromProcedures( fileName, procedures, text ):
-	"Get a crafted shape file from a list of procedures."
+	"Get a crafted shape file from a list of procedures, resuming from the deepest procedure whose output is in the stage cache."
 	lastProcedureTime = time.time()
-	for procedure in procedures:
-		craftModule = getCraftModule( procedure )
+	craftModules = getCraftModules( procedures )
+	setStageCacheFromExportRepository()
+	stageKeys = stage_cache.getStageKeys( craftModules, fileName, procedures, text )
+	cachedIndex, cachedText = stage_cache.getDeepestCachedIndexText( stageKeys )
+	if cachedIndex >= 0:
+		print( 'The %s procedure output was loaded from the cache.' % procedures[ cachedIndex ] )
+		text = cachedText
+	skeinTree = None
+	for procedureIndex in xrange( cachedIndex + 1, len( procedures ) ):
+		craftModule = craftModules[ procedureIndex ]
+		procedure = procedures[ procedureIndex ]
 		if craftModule != None:
-			text = craftModule.getCraftedText( fileName, text )
-			if gcodec.isProcedureDone( text, procedure ):
+			if isSkeinTreeModule( craftModule, skeinTree, text ):
+				if skeinTree == None:
+					skeinTree = skein_tree.getSkeinStreamFromText( text )
+				skeinTree = craftModule.getCraftedTree( skeinTree )
+				isProcedureDone = skeinTree.isProcedureDone( procedure )
+				if stageKeys[ procedureIndex ] != None:
+					text = skeinTree.getText()
+					skeinTree = None
+					stage_cache.writeCachedText( stageKeys[ procedureIndex ], text )
+			else:
+				text = skein_tree.getTextFromSkeinTreeOrText( skeinTree, text )
+				skeinTree = None
+				text = craftModule.getCraftedText( fileName, text )
+				isProcedureDone = gcodec.isProcedureDone( text, procedure )
+				stage_cache.writeCachedText( stageKeys[ procedureIndex ], text )
+			if isProcedureDone:
 				print( '%s procedure took %s seconds.' % ( procedure.capitalize(), int( round( time.time() - lastProcedureTime ) ) ) )
 				lastProcedureTime = time.time()
-	return text
+	return skein_tree.getTextFromSkeinTreeOrText( skeinTree, text )
 
 def getLastModule():
 	"Get the last tool."
@@ -64,10 +96,13 @@ def getReadCraftSequence():
 
 def getSequenceIndexPlusOneFromText( fileText ):
 	"Get the profile sequence index of the file plus one.  Return zero if the procedure is not in the file"
+	if fileText == '':
+		return 0
 	craftSequence = getReadCraftSequence()
+	textHeader = gcodec.getTextHeader( fileText )
 	for craftSequenceIndex in xrange( len( craftSequence ) - 1, - 1, - 1 ):
 		procedure = craftSequence[ craftSequenceIndex ]
-		if gcodec.isProcedureDone( fileText, procedure ):
+		if textHeader.isProcedureDone( procedure ):
 			return craftSequenceIndex + 1
 	return 0
 
@@ -78,6 +113,21 @@ def getSequenceIndexFromProcedure( procedure ):
 		return 0
 	return craftSequence.index( procedure )
 
+def isSkeinTreeModule( craftModule, skeinTree, text ):
+	"Determine if the craft module can craft a skein tree and if there is a gcode skein to make the tree from."
+	if not hasattr( craftModule, 'getCraftedTree' ):
+		return False
+	return skeinTree != None or text.find( '(<extrusion>)' ) != - 1
+
+def setStageCacheFromExportRepository():
+	"Set whether the stage cache is active and the maximum cache size from the export settings."
+	exportModule = getCraftModule( 'export' )
+	if exportModule == None:
+		return
+	exportRepository = settings.getReadRepository( exportModule.getNewRepository() )
+	stage_cache.globalIsCacheActive = exportRepository.activateCache.value
+	stage_cache.globalMaximumCacheSize = exportRepository.maximumCacheSize.value * 1024 * 1024
+
 def writeChainTextWithNounMessage( fileName, procedure ):
 	"Get and write a crafted shape file."
 	print( '' )
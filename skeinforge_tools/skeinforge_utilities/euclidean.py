@@ -31,6 +31,9 @@ except:
 import __init__
 
 from skeinforge_tools.skeinforge_utilities.vector3 import Vector3
+from skeinforge_tools.skeinforge_utilities import path_order
+from skeinforge_tools.skeinforge_utilities import scanline
+from skeinforge_tools.skeinforge_utilities import simplification
 import math
 
 
@@ -38,6 +41,11 @@ __author__ = "Enrique Perez (perez_enrique@yahoo.com)"
 __date__ = "$Date: 2008/21/04 $"
 __license__ = "GPL 3.0"
 
+globalEmptyPixel = object()
+globalFixedPointFormatterTable = {}
+globalMaximumDensePixels = 1024 * 1024
+globalSweepBoxMargin = 0.000001
+
 
 def addCircleToPixelTable( pixelTable, point ):
 	"Add circle to the pixel table."
@@ -71,93 +79,13 @@ def addListToListTable( elementList, key, listTable ):
 	else:
 		listTable[ key ] = elementList
 
-def addLoopToPixelTable( loop, pixelTable, width ):
-	"Add loop to the pixel table."
-	for pointIndex in xrange( len( loop ) ):
-		pointBegin = loop[ pointIndex ]
-		pointEnd = loop[ ( pointIndex + 1 ) % len( loop ) ]
-		addValueSegmentToPixelTable( pointBegin, pointEnd, pixelTable, None, width )
-
-def addPathToPixelTable( path, pixelTable, value, width ):
-	"Add path to the pixel table."
-	for pointIndex in xrange( len( path ) - 1 ):
-		pointBegin = path[ pointIndex ]
-		pointEnd = path[ pointIndex + 1 ]
-		addValueSegmentToPixelTable( pointBegin, pointEnd, pixelTable, value, width )
-
-def addPixelTableToPixelTable( fromPixelTable, intoPixelTable ):
-	"Add from pixel table to the into pixel table."
-	for fromPixelTableKey in fromPixelTable.keys():
-		intoPixelTable[ fromPixelTableKey ] = fromPixelTable[ fromPixelTableKey ]
-
-def addPixelToPixelTable( pixelTable, value, x, y ):
-	"Add pixel to the pixel table."
-	pixelTable[ getStepKey( x, y ) ] = value
-
-def addPixelToPixelTableWithSteepness( isSteep, pixelTable, value, x, y ):
-	"Add pixels to the pixel table with steepness."
-	if isSteep:
-		addPixelToPixelTable( pixelTable, value, y, x )
-	else:
-		addPixelToPixelTable( pixelTable, value, x, y )
-
-def addPointToPath( path, pixelTable, point, value, width ):
-	"Add a point to a path and the pixel table."
+def addPointToPath( path, pixelGrid, point, value, width ):
+	"Add a point to a path and the pixel grid."
 	path.append( point )
 	if len( path ) < 2:
 		return
 	begin = path[ - 2 ]
-	addValueSegmentToPixelTable( begin, point, pixelTable, value, width )
-
-def addSegmentToPixelTable( beginComplex, endComplex, pixelTable, shortenDistanceBegin, shortenDistanceEnd, width ):
-	"Add line segment to the pixel table."
-	if abs( beginComplex - endComplex ) <= 0.0:
-		return
-	beginComplex /= width
-	endComplex /= width
-	if shortenDistanceBegin > 0.0:
-		endMinusBeginComplex = endComplex - beginComplex
-		endMinusBeginComplexLength = abs( endMinusBeginComplex )
-		if endMinusBeginComplexLength < shortenDistanceBegin:
-			return
-		beginComplex = beginComplex + endMinusBeginComplex * shortenDistanceBegin / endMinusBeginComplexLength
-	if shortenDistanceEnd > 0.0:
-		beginMinusEndComplex = beginComplex - endComplex
-		beginMinusEndComplexLength = abs( beginMinusEndComplex )
-		if beginMinusEndComplexLength < 0.0:
-			return
-		endComplex = endComplex + beginMinusEndComplex * shortenDistanceEnd / beginMinusEndComplexLength
-	deltaX = endComplex.real - beginComplex.real
-	deltaY = endComplex.imag - beginComplex.imag
-	isSteep = abs( deltaY ) > abs( deltaX )
-	if isSteep:
-		beginComplex = complex( beginComplex.imag, beginComplex.real )
-		endComplex = complex( endComplex.imag, endComplex.real )
-	if beginComplex.real > endComplex.real:
-		newBeginComplex = endComplex
-		endComplex = beginComplex
-		beginComplex = newBeginComplex
-	deltaX = endComplex.real - beginComplex.real
-	deltaY = endComplex.imag - beginComplex.imag
-	if deltaX > 0.0:
-		gradient = deltaY / deltaX
-	else:
-		gradient = 0.0
-		print( 'This should never happen, deltaX in addSegmentToPixelTable in euclidean is 0.' )
-		print( beginComplex )
-		print( endComplex )
-		print( shortenDistanceBegin )
-		print( shortenDistanceEnd )
-		print( width )
-	xBegin = int( round( beginComplex.real ) )
-	xEnd = int( round( endComplex.real ) )
-	yIntersection = beginComplex.imag - beginComplex.real * gradient
-	addPixelToPixelTableWithSteepness( isSteep, pixelTable, None, xBegin, int( round( beginComplex.imag ) ) )
-	addPixelToPixelTableWithSteepness( isSteep, pixelTable, None, xEnd, int( round( endComplex.imag ) ) )
-	for x in xrange( xBegin + 1, xEnd ):
-		y = int( math.floor( yIntersection + x * gradient ) )
-		addPixelToPixelTableWithSteepness( isSteep, pixelTable, None, x, y )
-		addPixelToPixelTableWithSteepness( isSteep, pixelTable, None, x, y + 1 )
+	pixelGrid.addSegment( begin, point, value, width )
 
 def addSurroundingLoopBeginning( distanceFeedRate, loop, z ):
 	"Add surrounding loop beginning to gcode output."
@@ -184,72 +112,18 @@ def addToThreadsRemoveFromSurroundings( oldOrderedLocation, surroundingLoops, sk
 	"Add to threads from the last location from surrounding loops."
 	if len( surroundingLoops ) < 1:
 		return
+	boundaries = []
+	for surroundingLoop in surroundingLoops:
+		boundaries.append( surroundingLoop.boundary )
+	closestGrid = getClosestGridFromLoops( boundaries )
+	indexedSurroundingLoops = surroundingLoops[ : ]
 	while len( surroundingLoops ) > 0:
-		getTransferClosestSurroundingLoop( oldOrderedLocation, surroundingLoops, skein )
-
-def addValueSegmentToPixelTable( beginComplex, endComplex, pixelTable, value, width ):
-	"Add line segment to the pixel table."
-	if abs( beginComplex - endComplex ) <= 0.0:
-		return
-	beginComplex /= width
-	endComplex /= width
-	deltaX = endComplex.real - beginComplex.real
-	deltaY = endComplex.imag - beginComplex.imag
-	isSteep = abs( deltaY ) > abs( deltaX )
-	if isSteep:
-		beginComplex = complex( beginComplex.imag, beginComplex.real )
-		endComplex = complex( endComplex.imag, endComplex.real )
-	if beginComplex.real > endComplex.real:
-		newBeginComplex = endComplex
-		endComplex = beginComplex
-		beginComplex = newBeginComplex
-	deltaX = endComplex.real - beginComplex.real
-	deltaY = endComplex.imag - beginComplex.imag
-	if deltaX > 0.0:
-		gradient = deltaY / deltaX
-	else:
-		gradient = 0.0
-		print( 'This should never happen, deltaX in addValueSegmentToPixelTable in euclidean is 0.' )
-		print( beginComplex )
-		print( value )
-		print( endComplex )
-		print( width )
-	xBegin = int( round( beginComplex.real ) )
-	xEnd = int( round( endComplex.real ) )
-	yIntersection = beginComplex.imag - beginComplex.real * gradient
-	addPixelToPixelTableWithSteepness( isSteep, pixelTable, value, xBegin, int( round( beginComplex.imag ) ) )
-	addPixelToPixelTableWithSteepness( isSteep, pixelTable, value, xEnd, int( round( endComplex.imag ) ) )
-	for x in xrange( xBegin + 1, xEnd ):
-		y = int( math.floor( yIntersection + x * gradient ) )
-		addPixelToPixelTableWithSteepness( isSteep, pixelTable, value, x, y )
-		addPixelToPixelTableWithSteepness( isSteep, pixelTable, value, x, y + 1 )
-
-def addXIntersectionIndexesFromLoop( frontOverWidth, loop, solidIndex, xIntersectionIndexLists, width, yList ):
-	"Add the x intersection indexes for a loop."
-	for pointIndex in xrange( len( loop ) ):
-		pointBegin = loop[ pointIndex ]
-		pointEnd = loop[ ( pointIndex + 1 ) % len( loop ) ]
-		if pointBegin.imag > pointEnd.imag:
-			pointOriginal = pointBegin
-			pointBegin = pointEnd
-			pointEnd = pointOriginal
-		fillBegin = int( math.ceil( pointBegin.imag / width - frontOverWidth ) )
-		fillBegin = max( 0, fillBegin )
-		fillEnd = int( math.ceil( pointEnd.imag / width - frontOverWidth ) )
-		fillEnd = min( len( xIntersectionIndexLists ), fillEnd )
-		if fillEnd > fillBegin:
-			secondMinusFirstComplex = pointEnd - pointBegin
-			secondMinusFirstImaginaryOverReal = secondMinusFirstComplex.real / secondMinusFirstComplex.imag
-			beginRealMinusImaginary = pointBegin.real - pointBegin.imag * secondMinusFirstImaginaryOverReal
-			for fillLine in xrange( fillBegin, fillEnd ):
-				xIntersection = yList[ fillLine ] * secondMinusFirstImaginaryOverReal + beginRealMinusImaginary
-				xIntersectionIndexList = xIntersectionIndexLists[ fillLine ]
-				xIntersectionIndexList.append( XIntersectionIndex( solidIndex, xIntersection ) )
-
-def addXIntersectionIndexesFromLoops( frontOverWidth, loops, solidIndex, xIntersectionIndexLists, width, yList ):
-	"Add the x intersection indexes for a loop."
-	for loop in loops:
-		addXIntersectionIndexesFromLoop( frontOverWidth, loop, solidIndex, xIntersectionIndexLists, width, yList )
+		oldOrderedLocation.z = surroundingLoops[ 0 ].z
+		closestIndex = closestGrid.getClosestIndex( oldOrderedLocation.dropAxis( 2 ) )
+		closestGrid.removeItem( closestIndex )
+		closestSurroundingLoop = indexedSurroundingLoops[ closestIndex ]
+		surroundingLoops.remove( closestSurroundingLoop )
+		closestSurroundingLoop.addToThreads( oldOrderedLocation, skein )
 
 def addXIntersectionIndexesFromLoopY( loop, solidIndex, xIntersectionIndexList, y ):
 	"Add the x intersection indexes for a loop."
@@ -298,45 +172,21 @@ def addXIntersections( loop, xIntersections, y ):
 		if isYAboveFirst != isYAboveSecond:
 			xIntersections.append( getXIntersection( pointFirst, pointSecond, y ) )
 
-def addXIntersectionsFromLoopForTable( loop, xIntersectionsTable, width ):
-	"Add the x intersections for a loop into a table."
-	for pointIndex in xrange( len( loop ) ):
-		pointBegin = loop[ pointIndex ]
-		pointEnd = loop[ ( pointIndex + 1 ) % len( loop ) ]
-		if pointBegin.imag > pointEnd.imag:
-			pointOriginal = pointBegin
-			pointBegin = pointEnd
-			pointEnd = pointOriginal
-		fillBegin = int( math.ceil( pointBegin.imag / width ) )
-		fillEnd = int( math.ceil( pointEnd.imag / width ) )
-		if fillEnd > fillBegin:
-			secondMinusFirstComplex = pointEnd - pointBegin
-			secondMinusFirstImaginaryOverReal = secondMinusFirstComplex.real / secondMinusFirstComplex.imag
-			beginRealMinusImaginary = pointBegin.real - pointBegin.imag * secondMinusFirstImaginaryOverReal
-			for fillLine in xrange( fillBegin, fillEnd ):
-				y = fillLine * width
-				xIntersection = y * secondMinusFirstImaginaryOverReal + beginRealMinusImaginary
-				addElementToListTable( xIntersection, fillLine, xIntersectionsTable )
-
 def addXIntersectionsFromLoops( loops, xIntersections, y ):
 	"Add the x intersections for the loops."
 	for loop in loops:
 		addXIntersections( loop, xIntersections, y )
 
 def addXIntersectionsFromLoopsForTable( loops, xIntersectionsTable, width ):
-	"Add the x intersections for a loop into a table."
-	for loop in loops:
-		addXIntersectionsFromLoopForTable( loop, xIntersectionsTable, width )
-
-def compareSegmentLength( endpoint, otherEndpoint ):
-	"Get comparison in order to sort endpoints in ascending order of segment length."
-	if endpoint.segmentLength > otherEndpoint.segmentLength:
-		return 1
-	if endpoint.segmentLength < otherEndpoint.segmentLength:
-		return - 1
-	return 0
+	"Add the x intersections for the loops into a table, the x intersections from the loops of each line are sorted."
+	loopsXIntersectionsTable = scanline.getXIntersectionsTable( loops, width )
+	for line, xIntersections in loopsXIntersectionsTable.iteritems():
+		if line in xIntersectionsTable:
+			xIntersectionsTable[ line ] += xIntersections
+		else:
+			xIntersectionsTable[ line ] = xIntersections
 
-def concatenateRemovePath( connectedPaths, pathIndex, paths, pixelTable, segments, width ):
+def concatenateRemovePath( connectedPaths, pathIndex, paths, pixelGrid, segments, width ):
 	"Get connected paths from paths."
 	bottomSegment = segments[ pathIndex ]
 	path = paths[ pathIndex ]
@@ -345,10 +195,10 @@ def concatenateRemovePath( connectedPaths, pathIndex, paths, pixelTable, segment
 		return
 	endpoints = getEndpointsFromSegments( segments[ pathIndex + 1 : ] )
 	bottomSegmentEndpoint = bottomSegment[ 0 ]
-	nextEndpoint = bottomSegmentEndpoint.getNearestMissCheckEndpointPath( endpoints, bottomSegmentEndpoint.path, pixelTable, width )
+	nextEndpoint = bottomSegmentEndpoint.getNearestMissCheckEndpointPath( endpoints, bottomSegmentEndpoint.path, pixelGrid, width )
 	if nextEndpoint == None:
 		bottomSegmentEndpoint = bottomSegment[ 1 ]
-		nextEndpoint = bottomSegmentEndpoint.getNearestMissCheckEndpointPath( endpoints, bottomSegmentEndpoint.path, pixelTable, width )
+		nextEndpoint = bottomSegmentEndpoint.getNearestMissCheckEndpointPath( endpoints, bottomSegmentEndpoint.path, pixelGrid, width )
 	if nextEndpoint == None:
 		connectedPaths.append( path )
 		return
@@ -356,7 +206,7 @@ def concatenateRemovePath( connectedPaths, pathIndex, paths, pixelTable, segment
 	concatenatedPath = bottomSegmentEndpoint.path + nextEndpoint.path
 	paths[ nextEndpoint.pathIndex ] = concatenatedPath
 	segments[ nextEndpoint.pathIndex ] = getSegmentFromPath( concatenatedPath, nextEndpoint.pathIndex )
-	addValueSegmentToPixelTable( bottomSegmentEndpoint.point, nextEndpoint.point, pixelTable, None, width )
+	pixelGrid.addSegment( bottomSegmentEndpoint.point, nextEndpoint.point, None, width )
 
 def getAngleAroundZAxisDifference( subtractFromVec3, subtractVec3 ):
 	"Get the angle around the Z axis difference between a pair of Vector3s."
@@ -452,7 +302,23 @@ def getClippedLoopPath( clip, loopPath ):
 		loopPath = [ newUltimatePoint ] + loopPath
 	return getClippedAtEndLoopPath( clip, loopPath )
 
-def getConnectedPaths( paths, pixelTable, width ):
+def getClosestGridFromEndpoints( endpoints ):
+	"Get the closest grid of the endpoints, and set the closest index of each endpoint to its index in the grid."
+	boxLists = []
+	for endpointIndex in xrange( len( endpoints ) ):
+		endpoint = endpoints[ endpointIndex ]
+		endpoint.closestIndex = endpointIndex
+		boxLists.append( [ ( endpoint.point, endpoint.point ) ] )
+	return path_order.ClosestGrid( boxLists, getDistanceToEndpoint, False, endpoints )
+
+def getClosestGridFromLoops( loops ):
+	"Get the closest grid of the bounding boxes of the loops."
+	boxLists = []
+	for loop in loops:
+		boxLists.append( [ ( getMinimumFromPoints( loop ), getMaximumFromPoints( loop ) ) ] )
+	return path_order.ClosestGrid( boxLists, getNearestDistance, True, loops )
+
+def getConnectedPaths( paths, pixelGrid, width ):
 	"Get connected paths from paths."
 	if len( paths ) < 2:
 		return paths
@@ -462,10 +328,17 @@ def getConnectedPaths( paths, pixelTable, width ):
 		path = paths[ pathIndex ]
 		segments.append( getSegmentFromPath( path, pathIndex ) )
 	for pathIndex in xrange( 0, len( paths ) - 1 ):
-		concatenateRemovePath( connectedPaths, pathIndex, paths, pixelTable, segments, width )
+		concatenateRemovePath( connectedPaths, pathIndex, paths, pixelGrid, segments, width )
 	connectedPaths.append( paths[ - 1 ] )
 	return connectedPaths
 
+def getCrossingsFromXIntersectionIndexes( xIntersectionIndexList ):
+	"Get the scanline crossings of the x intersection indexes."
+	crossings = []
+	for xIntersectionIndex in xIntersectionIndexList:
+		crossings.append( ( xIntersectionIndex.x, xIntersectionIndex.index ) )
+	return crossings
+
 def getCrossProduct( firstComplex, secondComplex ):
 	"Get z component cross product of a pair of complexes."
 	return firstComplex.real * secondComplex.imag - firstComplex.imag * secondComplex.real
@@ -484,6 +357,10 @@ def getDiagonalFlippedLoops( loops ):
 		diagonalFlippedLoops.append( getDiagonalFlippedLoop( loop ) )
 	return diagonalFlippedLoops
 
+def getDistanceToEndpoint( point, endpoint ):
+	"Get the distance from the point to the endpoint."
+	return abs( point - endpoint.point )
+
 def getDistanceToPlaneSegment( segmentBegin, segmentEnd, point ):
 	"Get the distance squared from a point to the x & y components of a segment."
 	segmentDifference = segmentEnd - segmentBegin
@@ -517,6 +394,10 @@ def getEndpointFromPath( path, pathIndex ):
 	endpointBegin.pathIndex = pathIndex
 	return endpointBegin
 
+def getEndpointSegmentLength( endpoint ):
+	"Get the segment length of the endpoint, in order to sort endpoints in ascending order of segment length."
+	return endpoint.segmentLength
+
 def getEndpointsFromSegments( segments ):
 	"Get endpoints from segments."
 	endpoints = []
@@ -543,6 +424,12 @@ def getFillOfSurroundings( surroundingLoops ):
 		fillOfSurroundings += surroundingLoop.getFillLoops()
 	return fillOfSurroundings
 
+def getFixedPointFormatter( decimalPlaces ):
+	"Get the fixed point formatter for the number of decimal places, the formatters are made once for each number of decimal places."
+	if decimalPlaces not in globalFixedPointFormatterTable:
+		globalFixedPointFormatterTable[ decimalPlaces ] = FixedPointFormatter( decimalPlaces )
+	return globalFixedPointFormatterTable[ decimalPlaces ]
+
 def getFourSignificantFigures( number ):
 	"Get number rounded to four significant figures as a string."
 	absoluteNumber = abs( number )
@@ -563,22 +450,6 @@ def getFrontOfLoops( loops ):
 		print( "This should never happen, there are no loops for getFrontOfLoops in euclidean" )
 	return front
 
-def getFrontOverWidthAddXListYList( front, loopLists, numberOfLines, xIntersectionIndexLists, width, yList ):
-	"Get the front over width and add the x intersection index lists and ylist."
-	frontOverWidth = getFrontOverWidthAddYList( front, numberOfLines, xIntersectionIndexLists, width, yList )
-	for loopListIndex in xrange( len( loopLists ) ):
-		loopList = loopLists[ loopListIndex ]
-		addXIntersectionIndexesFromLoops( frontOverWidth, loopList, loopListIndex, xIntersectionIndexLists, width, yList )
-	return frontOverWidth
-
-def getFrontOverWidthAddYList( front, numberOfLines, xIntersectionIndexLists, width, yList ):
-	"Get the front over width and add the x intersection index lists and ylist."
-	frontOverWidth = front / width
-	for fillLine in xrange( numberOfLines ):
-		yList.append( front + float( fillLine ) * width )
-		xIntersectionIndexLists.append( [] )
-	return frontOverWidth
-
 def getHalfSimplifiedLoop( loop, radius, remainder ):
 	"Get the loop with half of the points inside the channel removed."
 	if len( loop ) < 2:
@@ -613,14 +484,14 @@ def getHalfSimplifiedPath( path, radius, remainder ):
 
 def getHorizontalSegmentListsFromLoopLists( alreadyFilledArounds, front, numberOfLines, rotatedFillLoops, width ):
 	"Get horizontal segment lists inside loops."
-	xIntersectionIndexLists = []
-	yList = []
-	frontOverWidth = getFrontOverWidthAddXListYList( front, alreadyFilledArounds, numberOfLines, xIntersectionIndexLists, width, yList )
-	addXIntersectionIndexesFromLoops( frontOverWidth, rotatedFillLoops, - 1, xIntersectionIndexLists, width, yList )
+	indexedLoopLists = scanline.getIndexedLoopLists( alreadyFilledArounds ) + [ ( - 1, rotatedFillLoops ) ]
+	crossingsTable = scanline.getCrossingsTable( front, indexedLoopLists, width, numberOfLines )
 	horizontalSegmentLists = []
-	for xIntersectionIndexListIndex in xrange( len( xIntersectionIndexLists ) ):
-		xIntersectionIndexList = xIntersectionIndexLists[ xIntersectionIndexListIndex ]
-		lineSegments = getSegmentsFromXIntersectionIndexes( xIntersectionIndexList, yList[ xIntersectionIndexListIndex ] )
+	for fillLine in xrange( numberOfLines ):
+		lineSegments = []
+		if fillLine in crossingsTable:
+			xIntersections = scanline.getDifferenceOfCrossings( crossingsTable[ fillLine ] )
+			lineSegments = getSegmentsFromXIntersections( xIntersections, front + float( fillLine ) * width )
 		horizontalSegmentLists.append( lineSegments )
 	return horizontalSegmentLists
 
@@ -635,9 +506,10 @@ def getIncrementFromRank( rank ):
 def getInsidesAddToOutsides( loops, outsides ):
 	"Add loops to either the insides or outsides."
 	insides = []
+	loopGrid = LoopGrid( loops )
 	for loopIndex in xrange( len( loops ) ):
 		loop = loops[ loopIndex ]
-		if isInsideOtherLoops( loopIndex, loops ):
+		if loopGrid.isPathInsideLoops( loop, loopIndex ):
 			insides.append( loop )
 		else:
 			outsides.append( loop )
@@ -649,45 +521,25 @@ def getIntermediateLocation( alongWay, begin, end ):
 
 def getIntersectionOfXIntersectionIndexes( totalSolidSurfaceThickness, xIntersectionIndexList ):
 	"Get x intersections from surrounding layers."
-	xIntersectionList = []
-	solidTable = {}
-	solid = False
-	xIntersectionIndexList.sort()
-	for xIntersectionIndex in xIntersectionIndexList:
-		toggleHashtable( solidTable, xIntersectionIndex.index, "" )
-		oldSolid = solid
-		solid = len( solidTable ) >= totalSolidSurfaceThickness
-		if oldSolid != solid:
-			xIntersectionList.append( xIntersectionIndex.x )
-	return xIntersectionList
+	return scanline.getIntersectionOfCrossings( getCrossingsFromXIntersectionIndexes( xIntersectionIndexList ), totalSolidSurfaceThickness )
 
 def getIntersectionOfXIntersectionsTables( xIntersectionsTables ):
 	"Get the intersection of both XIntersections tables."
 	intersectionOfXIntersectionsTables = {}
 	firstIntersectionTable = xIntersectionsTables[ 0 ]
 	for firstIntersectionTableKey in firstIntersectionTable.keys():
-		xIntersectionIndexList = []
+		crossings = []
 		for xIntersectionsTableIndex in xrange( len( xIntersectionsTables ) ):
 			xIntersectionsTable = xIntersectionsTables[ xIntersectionsTableIndex ]
-			addXIntersectionIndexesFromXIntersections( xIntersectionsTableIndex, xIntersectionIndexList, xIntersectionsTable[ firstIntersectionTableKey ] )
-		xIntersections = getIntersectionOfXIntersectionIndexes( len( xIntersectionsTables ), xIntersectionIndexList )
+			scanline.addCrossingsFromXIntersections( crossings, xIntersectionsTableIndex, xIntersectionsTable[ firstIntersectionTableKey ] )
+		xIntersections = scanline.getIntersectionOfCrossings( crossings, len( xIntersectionsTables ) )
 		if len( xIntersections ) > 0:
 			intersectionOfXIntersectionsTables[ firstIntersectionTableKey ] = xIntersections
 	return intersectionOfXIntersectionsTables
 
 def getJoinOfXIntersectionIndexes( xIntersectionIndexList ):
 	"Get joined x intersections from surrounding layers."
-	xIntersections = []
-	solidTable = {}
-	solid = False
-	xIntersectionIndexList.sort()
-	for xIntersectionIndex in xIntersectionIndexList:
-		toggleHashtable( solidTable, xIntersectionIndex.index, "" )
-		oldSolid = solid
-		solid = len( solidTable ) > 0
-		if oldSolid != solid:
-			xIntersections.append( xIntersectionIndex.x )
-	return xIntersections
+	return scanline.getJoinOfCrossings( getCrossingsFromXIntersectionIndexes( xIntersectionIndexList ) )
 
 def getLargestLoop( loops ):
 	"Get largest loop from loops."
@@ -772,6 +624,10 @@ def getMinimumFromVec3List( vec3List ):
 		minimum = getMinimum( minimum, point.dropAxis( 2 ) )
 	return minimum
 
+def getNearestDistance( point, loop ):
+	"Get the distance squared to the nearest segment of the loop."
+	return getNearestDistanceIndex( point, loop ).distance
+
 def getNearestDistanceIndex( point, loop ):
 	"Get the distance squared to the nearest segment of the loop and index of that segment."
 	smallestDistance = 999999999999999999.0
@@ -825,16 +681,15 @@ def getNumberOfIntersectionsToLeftOfLoops( loops, point ):
 
 def getOrderedSurroundingLoops( perimeterWidth, surroundingLoops ):
 	"Get ordered surrounding loops from surrounding loops."
+	boundaries = []
 	insides = []
 	orderedSurroundingLoops = []
+	for surroundingLoop in surroundingLoops:
+		boundaries.append( surroundingLoop.boundary )
+	boundaryGrid = LoopGrid( boundaries )
 	for loopIndex in xrange( len( surroundingLoops ) ):
 		surroundingLoop = surroundingLoops[ loopIndex ]
-		otherLoops = []
-		for beforeIndex in xrange( loopIndex ):
-			otherLoops.append( surroundingLoops[ beforeIndex ].boundary )
-		for afterIndex in xrange( loopIndex + 1, len( surroundingLoops ) ):
-			otherLoops.append( surroundingLoops[ afterIndex ].boundary )
-		if isPathEntirelyInsideLoops( otherLoops, surroundingLoop.boundary ):
+		if boundaryGrid.isPathEntirelyInsideLoops( surroundingLoop.boundary, loopIndex ):
 			insides.append( surroundingLoop )
 		else:
 			orderedSurroundingLoops.append( surroundingLoop )
@@ -851,11 +706,11 @@ def getPathLength( path ):
 		pathLength += abs( firstPoint - secondPoint )
 	return pathLength
 
-def getPathsFromEndpoints( endpoints, fillInset, pixelTable, width ):
+def getPathsFromEndpoints( endpoints, fillInset, pixelGrid, width ):
 	"Get paths from endpoints."
 	for beginningEndpoint in endpoints[ : : 2 ]:
 		beginningPoint = beginningEndpoint.point
-		addSegmentToPixelTable( beginningPoint, beginningEndpoint.otherEndpoint.point, pixelTable, 0, 0, width )
+		pixelGrid.addSegment( beginningPoint, beginningEndpoint.otherEndpoint.point, None, width )
 	endpointFirst = endpoints[ 0 ]
 	endpoints.remove( endpointFirst )
 	otherEndpoint = endpointFirst.otherEndpoint
@@ -864,14 +719,15 @@ def getPathsFromEndpoints( endpoints, fillInset, pixelTable, width ):
 	path = []
 	paths = [ path ]
 	if len( endpoints ) > 1:
-		nextEndpoint = otherEndpoint.getNearestMiss( endpoints, path, pixelTable, width )
+		nextEndpoint = otherEndpoint.getNearestMiss( endpoints, path, pixelGrid, width )
 		if nextEndpoint != None:
 			if abs( nextEndpoint.point - endpointFirst.point ) < abs( nextEndpoint.point - otherEndpoint.point ):
 				endpointFirst = endpointFirst.otherEndpoint
 				otherEndpoint = endpointFirst.otherEndpoint
-	addPointToPath( path, pixelTable, endpointFirst.point, None, width )
-	addPointToPath( path, pixelTable, otherEndpoint.point, len( paths ) - 1, width )
+	addPointToPath( path, pixelGrid, endpointFirst.point, None, width )
+	addPointToPath( path, pixelGrid, otherEndpoint.point, len( paths ) - 1, width )
 	oneOverEndpointWidth = 0.2 / fillInset
+	closestGrid = None
 	endpointTable = {}
 	for endpoint in endpoints:
 		addElementToPixelListFromPoint( endpoint, endpointTable, endpoint.point * oneOverEndpointWidth )
@@ -880,24 +736,16 @@ def getPathsFromEndpoints( endpoints, fillInset, pixelTable, width ):
 			if len( endpointTable.values()[ 0 ] ) < 2:
 				return
 		endpoints = getSquareValuesFromPoint( endpointTable, otherEndpoint.point * oneOverEndpointWidth )
-		nextEndpoint = otherEndpoint.getNearestMiss( endpoints, path, pixelTable, width )
+		nextEndpoint = otherEndpoint.getNearestMiss( endpoints, path, pixelGrid, width )
 		if nextEndpoint == None:
 			path = []
 			paths.append( path )
-			endpoints = getListTableElements( endpointTable )
-			nextEndpoint = otherEndpoint.getNearestEndpoint( endpoints )
-# this commented code should be faster than the getListTableElements code, but it isn't, someday a spiral algorithim could be tried
-#			endpoints = getSquareValuesFromPoint( endpointTable, otherEndpoint.point * oneOverEndpointWidth )
-#			nextEndpoint = otherEndpoint.getNearestEndpoint( endpoints )
-#			if nextEndpoint == None:
-#				endpoints = []
-#				for endpointTableValue in endpointTable.values():
-#					endpoints.append( endpointTableValue[ 0 ] )
-#				nextEndpoint = otherEndpoint.getNearestEndpoint( endpoints )
-#				endpoints = getSquareValuesFromPoint( endpointTable, nextEndpoint.point * oneOverEndpointWidth )
-#				nextEndpoint = otherEndpoint.getNearestEndpoint( endpoints )
-		addPointToPath( path, pixelTable, nextEndpoint.point, len( paths ) - 1, width )
-		removeElementFromPixelListFromPoint( nextEndpoint, endpointTable, nextEndpoint.point * oneOverEndpointWidth )
+			if closestGrid == None:
+				closestEndpoints = getListTableElements( endpointTable )
+				closestGrid = getClosestGridFromEndpoints( closestEndpoints )
+			nextEndpoint = closestEndpoints[ closestGrid.getClosestIndex( otherEndpoint.point ) ]
+		addPointToPath( path, pixelGrid, nextEndpoint.point, len( paths ) - 1, width )
+		removeEndpointFromTableGrid( closestGrid, nextEndpoint, endpointTable, oneOverEndpointWidth )
 		otherEndpoint = nextEndpoint.otherEndpoint
 		hop = nextEndpoint.getHop( fillInset, path )
 		if hop != None:
@@ -906,10 +754,21 @@ def getPathsFromEndpoints( endpoints, fillInset, pixelTable, width ):
 				print( path )
 			path = [ hop ]
 			paths.append( path )
-		addPointToPath( path, pixelTable, otherEndpoint.point, len( paths ) - 1, width )
-		removeElementFromPixelListFromPoint( otherEndpoint, endpointTable, otherEndpoint.point * oneOverEndpointWidth )
+		addPointToPath( path, pixelGrid, otherEndpoint.point, len( paths ) - 1, width )
+		removeEndpointFromTableGrid( closestGrid, otherEndpoint, endpointTable, oneOverEndpointWidth )
 	return paths
 
+def getPixelGridAroundLoops( loops, width ):
+	"Get an empty pixel grid which is dense around the loops, the pixels are the points divided by the width."
+	maximum = complex( - 999999999.0, - 999999999.0 )
+	minimum = complex( 999999999.0, 999999999.0 )
+	for loop in loops:
+		maximum = getMaximum( maximum, getMaximumFromPoints( loop ) )
+		minimum = getMinimum( minimum, getMinimumFromPoints( loop ) )
+	if minimum.real > maximum.real:
+		return PixelGrid()
+	return PixelGrid( minimum / width, maximum / width )
+
 def getPlaneDot( vec3First, vec3Second ):
 	"Get the dot product of the x and y components of a pair of Vector3s."
 	return vec3First.x * vec3Second.x + vec3First.y * vec3Second.y
@@ -971,11 +830,11 @@ def getRoundedToDecimalPlaces( decimalPlaces, number ):
 
 def getRoundedToDecimalPlacesString( decimalPlaces, number ):
 	"Get number rounded to a number of decimal places as a string."
-	return str( getRoundedToDecimalPlaces( decimalPlaces, number ) )
+	return getFixedPointFormatter( decimalPlaces ).getString( number )
 
 def getRoundedToThreePlaces( number ):
 	"Get number rounded to three places as a string."
-	return str( round( number, 3 ) )
+	return getFixedPointFormatter( 3 ).getString( number )
 
 def getRoundZAxisByPlaneAngle( planeAngle, vector3 ):
 	"Get Vector3 rotated by a plane angle."
@@ -1000,6 +859,39 @@ def getSegmentFromPoints( begin, end ):
 	endpointFirst.getFromOtherPoint( endpointSecond, begin )
 	return ( endpointFirst, endpointSecond )
 
+def getSegmentPixels( beginComplex, endComplex ):
+	"Get the pixels which the segment from the beginning to the end in pixel units passes through."
+	deltaX = endComplex.real - beginComplex.real
+	deltaY = endComplex.imag - beginComplex.imag
+	isSteep = abs( deltaY ) > abs( deltaX )
+	if isSteep:
+		beginComplex = complex( beginComplex.imag, beginComplex.real )
+		endComplex = complex( endComplex.imag, endComplex.real )
+	if beginComplex.real > endComplex.real:
+		newBeginComplex = endComplex
+		endComplex = beginComplex
+		beginComplex = newBeginComplex
+	deltaX = endComplex.real - beginComplex.real
+	deltaY = endComplex.imag - beginComplex.imag
+	if deltaX > 0.0:
+		gradient = deltaY / deltaX
+	else:
+		gradient = 0.0
+		print( 'This should never happen, deltaX in getSegmentPixels in euclidean is 0.' )
+		print( beginComplex )
+		print( endComplex )
+	xBegin = int( round( beginComplex.real ) )
+	xEnd = int( round( endComplex.real ) )
+	yIntersection = beginComplex.imag - beginComplex.real * gradient
+	pixels = [ ( xBegin, int( round( beginComplex.imag ) ) ), ( xEnd, int( round( endComplex.imag ) ) ) ]
+	for x in xrange( xBegin + 1, xEnd ):
+		y = int( math.floor( yIntersection + x * gradient ) )
+		pixels.append( ( x, y ) )
+		pixels.append( ( x, y + 1 ) )
+	if isSteep:
+		return [ ( y, x ) for x, y in pixels ]
+	return pixels
+
 def getSegmentsFromXIntersections( xIntersections, y ):
 	"Get endpoint segments from the x intersections."
 	segments = []
@@ -1018,10 +910,12 @@ def getSegmentsFromXIntersectionIndexes( xIntersectionIndexList, y ):
 	xIntersections = getXIntersectionsFromIntersections( xIntersectionIndexList )
 	return getSegmentsFromXIntersections( xIntersections, y )
 
-def getSimplifiedLoop( loop, radius ):
-	"Get loop with points inside the channel removed."
+def getSimplifiedLoop( loop, radius, algorithm ):
+	"Get loop with points inside the channel removed, or if the algorithm is not Channel, with the points within a tenth of the radius removed by the algorithm, which is about as much as the channel removes."
 	if len( loop ) < 2:
 		return loop
+	if algorithm != 'Channel':
+		return getAwayPoints( simplification.getSimplifiedLoop( algorithm, loop, 0.1 * radius ), radius )
 	simplificationMultiplication = 256
 	simplificationRadius = radius / float( simplificationMultiplication )
 	maximumIndex = len( loop ) * simplificationMultiplication
@@ -1040,17 +934,19 @@ def getSimplifiedLoop( loop, radius ):
 		pointIndex += pointIndex
 	return getAwayPoints( loop, radius )
 
-def getSimplifiedLoops( loops, radius ):
+def getSimplifiedLoops( loops, radius, algorithm ):
 	"Get the simplified loops."
 	simplifiedLoops = []
 	for loop in loops:
-		simplifiedLoops.append( getSimplifiedLoop( loop, radius ) )
+		simplifiedLoops.append( getSimplifiedLoop( loop, radius, algorithm ) )
 	return simplifiedLoops
 
-def getSimplifiedPath( path, radius ):
-	"Get path with points inside the channel removed."
+def getSimplifiedPath( path, radius, algorithm ):
+	"Get path with points inside the channel removed, or if the algorithm is not Channel, with the points within a tenth of the radius removed by the algorithm, which is about as much as the channel removes."
 	if len( path ) < 2:
 		return path
+	if algorithm != 'Channel':
+		return getAwayPoints( simplification.getSimplifiedPath( algorithm, path, 0.1 * radius ), radius )
 	simplificationMultiplication = 256
 	simplificationRadius = radius / float( simplificationMultiplication )
 	maximumIndex = len( path ) * simplificationMultiplication
@@ -1109,6 +1005,28 @@ def getStepKeyFromPoint( point ):
 	"Get step key for the point."
 	return ( int( round( point.real ) ), int( round( point.imag ) ) )
 
+def getSweptSegmentIndexPairs( segments ):
+	"Get the index pairs of the segments whose bounding boxes overlap, the segments are swept from left to right so only the segments which overlap in x are compared."
+	boxes = []
+	for segmentIndex in xrange( len( segments ) ):
+		begin, end = segments[ segmentIndex ]
+		left = min( begin.real, end.real ) - globalSweepBoxMargin
+		right = max( begin.real, end.real ) + globalSweepBoxMargin
+		bottom = min( begin.imag, end.imag ) - globalSweepBoxMargin
+		top = max( begin.imag, end.imag ) + globalSweepBoxMargin
+		boxes.append( ( left, segmentIndex, right, bottom, top ) )
+	boxes.sort()
+	activeBoxes = []
+	indexPairs = []
+	for box in boxes:
+		left = box[ 0 ]
+		activeBoxes = [ activeBox for activeBox in activeBoxes if activeBox[ 2 ] >= left ]
+		for activeBox in activeBoxes:
+			if activeBox[ 4 ] >= box[ 3 ] and activeBox[ 3 ] <= box[ 4 ]:
+				indexPairs.append( ( activeBox[ 1 ], box[ 1 ] ) )
+		activeBoxes.append( box )
+	return indexPairs
+
 def getThreeSignificantFigures( number ):
 	"Get number rounded to three significant figures as a string."
 	absoluteNumber = abs( number )
@@ -1157,6 +1075,20 @@ def getUnitPolar( angle ):
 	"Get polar complex from counterclockwise angle from 1, 0."
 	return complex( math.cos( angle ), math.sin( angle ) )
 
+def getWindingNumberOfLoops( loops, point ):
+	"Get the number of times the loops wind around the point, widdershins loops wind positively and clockwise loops negatively."
+	windingNumber = 0
+	for loop in loops:
+		for pointIndex in xrange( len( loop ) ):
+			begin = loop[ pointIndex ]
+			end = loop[ ( pointIndex + 1 ) % len( loop ) ]
+			if begin.imag <= point.imag:
+				if end.imag > point.imag and getCrossProduct( end - begin, point - begin ) > 0.0:
+					windingNumber += 1
+			elif end.imag <= point.imag and getCrossProduct( end - begin, point - begin ) < 0.0:
+				windingNumber -= 1
+	return windingNumber
+
 def getXIntersection( firstComplex, secondComplex, y ):
 	"Get where the line crosses y."
 	secondMinusFirstComplex = secondComplex - firstComplex
@@ -1165,21 +1097,7 @@ def getXIntersection( firstComplex, secondComplex, y ):
 
 def getXIntersectionsFromIntersections( xIntersectionIndexList ):
 	"Get x intersections from the x intersection index list, in other words subtract non negative intersections from negatives."
-	xIntersections = []
-	fill = False
-	solid = False
-	solidTable = {}
-	xIntersectionIndexList.sort()
-	for solidX in xIntersectionIndexList:
-		if solidX.index >= 0:
-			toggleHashtable( solidTable, solidX.index, "" )
-		else:
-			fill = not fill
-		oldSolid = solid
-		solid = ( len( solidTable ) == 0 and fill )
-		if oldSolid != solid:
-			xIntersections.append( solidX.x )
-	return xIntersections
+	return scanline.getDifferenceOfCrossings( getCrossingsFromXIntersectionIndexes( xIntersectionIndexList ) )
 
 def getXYComplexFromVector3( vector3 ):
 	"Get an xy complex from a vector3 if it exists, otherwise return None."
@@ -1210,6 +1128,18 @@ def isLineIntersectingInsideXSegment( segmentFirstX, segmentSecondX, vector3Firs
 		return False
 	return xIntersection < max( segmentFirstX, segmentSecondX )
 
+def isLineIntersectingSegment( pointBegin, pointEnd, segmentBegin, segmentEnd ):
+	"Determine if the line is intersecting the segment, in the same way as isLineIntersectingLoop."
+	normalizedSegment = pointEnd - pointBegin
+	normalizedSegmentLength = abs( normalizedSegment )
+	if normalizedSegmentLength <= 0.0:
+		return False
+	normalizedSegment /= normalizedSegmentLength
+	segmentYMirror = complex( normalizedSegment.real, - normalizedSegment.imag )
+	pointBeginRotated = segmentYMirror * pointBegin
+	pointEndRotated = segmentYMirror * pointEnd
+	return isLineIntersectingInsideXSegment( pointBeginRotated.real, pointEndRotated.real, segmentYMirror * segmentBegin, segmentYMirror * segmentEnd, pointBeginRotated.imag )
+
 def isLineIntersectingLoop( loop, pointBegin, pointEnd ):
 	"Determine if the line is intersecting loops."
 	normalizedSegment = pointEnd - pointBegin
@@ -1264,6 +1194,24 @@ def isLoopIntersectingLoops( loop, otherLoops ):
 			return True
 	return False
 
+def isLoopListIntersecting( loops ):
+	"Determine if a loop in the list is intersecting a later loop in the list, only the segments found by the sweep are checked."
+	segments = []
+	segmentLoopIndexes = []
+	for loopIndex in xrange( len( loops ) ):
+		loop = loops[ loopIndex ]
+		for pointIndex in xrange( len( loop ) ):
+			segments.append( ( loop[ pointIndex ], loop[ ( pointIndex + 1 ) % len( loop ) ] ) )
+			segmentLoopIndexes.append( loopIndex )
+	for firstIndex, secondIndex in getSweptSegmentIndexPairs( segments ):
+		if segmentLoopIndexes[ firstIndex ] != segmentLoopIndexes[ secondIndex ]:
+			if segmentLoopIndexes[ firstIndex ] > segmentLoopIndexes[ secondIndex ]:
+				firstIndex, secondIndex = secondIndex, firstIndex
+			lineBegin, lineEnd = segments[ firstIndex ]
+			if isLineIntersectingSegment( lineBegin, lineEnd, segments[ secondIndex ][ 0 ], segments[ secondIndex ][ 1 ] ):
+				return True
+	return False
+
 def isLoopListIntersectingInsideXSegment( loopList, segmentFirstX, segmentSecondX, segmentYMirror, y ):
 	"Determine if the loop list is crossing inside the x segment."
 	for alreadyFilledLoop in loopList:
@@ -1300,15 +1248,6 @@ def isPathInsideLoops( loops, path ):
 			return True
 	return False
 
-def isPixelTableIntersecting( bigTable, littleTable, maskTable = {} ):
-	"Add path to the pixel table."
-	littleTableKeys = littleTable.keys()
-	for littleTableKey in littleTableKeys:
-		if littleTableKey not in maskTable:
-			if littleTableKey in bigTable:
-				return True
-	return False
-
 def isPointInsideLoop( loop, point ):
 	"Determine if a point is inside another loop."
 	return getNumberOfIntersectionsToLeft( loop, point ) % 2 == 1
@@ -1397,12 +1336,12 @@ def joinXIntersectionsTables( fromTable, intoTable ):
 	for concatenatedTableKey in concatenatedTableKeys:
 		joinedKeyTable[ concatenatedTableKey ] = None
 	for joinedKey in joinedKeyTable.keys():
-		xIntersectionIndexList = []
+		crossings = []
 		if joinedKey in intoTable:
-			addXIntersectionIndexesFromXIntersections( 0, xIntersectionIndexList, intoTable[ joinedKey ] )
+			scanline.addCrossingsFromXIntersections( crossings, 0, intoTable[ joinedKey ] )
 		if joinedKey in fromTable:
-			addXIntersectionIndexesFromXIntersections( 1, xIntersectionIndexList, fromTable[ joinedKey ] )
-		xIntersections = getJoinOfXIntersectionIndexes( xIntersectionIndexList )
+			scanline.addCrossingsFromXIntersections( crossings, 1, fromTable[ joinedKey ] )
+		xIntersections = scanline.getJoinOfCrossings( crossings )
 		if len( xIntersections ) > 0:
 			intoTable[ joinedKey ] = xIntersections
 		else:
@@ -1424,23 +1363,23 @@ def removeElementFromPixelListFromPoint( element, pixelTable, point ):
 	stepKey = getStepKeyFromPoint( point )
 	removeElementFromListTable( element, stepKey, pixelTable )
 
-def removePixelTableFromPixelTable( pixelTableToBeRemoved, pixelTableToBeRemovedFrom ):
-	"Remove pixel from the pixel table."
-	pixelTableToBeRemovedKeys = pixelTableToBeRemoved.keys()
-	for pixelTableToBeRemovedKey in pixelTableToBeRemovedKeys:
-		if pixelTableToBeRemovedKey in pixelTableToBeRemovedFrom:
-			del pixelTableToBeRemovedFrom[ pixelTableToBeRemovedKey ]
+def removeEndpointFromTableGrid( closestGrid, endpoint, endpointTable, oneOverEndpointWidth ):
+	"Remove the endpoint from the endpoint table, and from the closest grid if there is a closest grid."
+	removeElementFromPixelListFromPoint( endpoint, endpointTable, endpoint.point * oneOverEndpointWidth )
+	if closestGrid != None:
+		if not closestGrid.isRemovedList[ endpoint.closestIndex ]:
+			closestGrid.removeItem( endpoint.closestIndex )
 
 def subtractXIntersectionsTable( subtractFromTable, subtractTable ):
 	"Subtract the subtractTable from the subtractFromTable."
 	subtractFromTableKeys = subtractFromTable.keys()
 	subtractFromTableKeys.sort()
 	for subtractFromTableKey in subtractFromTableKeys:
-		xIntersectionIndexList = []
-		addXIntersectionIndexesFromXIntersections( - 1, xIntersectionIndexList, subtractFromTable[ subtractFromTableKey ] )
+		crossings = []
+		scanline.addCrossingsFromXIntersections( crossings, - 1, subtractFromTable[ subtractFromTableKey ] )
 		if subtractFromTableKey in subtractTable:
-			addXIntersectionIndexesFromXIntersections( 0, xIntersectionIndexList, subtractTable[ subtractFromTableKey ] )
-		xIntersections = getXIntersectionsFromIntersections( xIntersectionIndexList )
+			scanline.addCrossingsFromXIntersections( crossings, 0, subtractTable[ subtractFromTableKey ] )
+		xIntersections = scanline.getDifferenceOfCrossings( crossings )
 		if len( xIntersections ) > 0:
 			subtractFromTable[ subtractFromTableKey ] = xIntersections
 		else:
@@ -1469,6 +1408,23 @@ def transferClosestFillLoop( extrusionHalfWidth, oldOrderedLocation, remainingFi
 	remainingFillLoops.remove( closestFillLoop )
 	addToThreadsFromLoop( extrusionHalfWidth, 'loop', closestFillLoop[ : ], oldOrderedLocation, skein )
 
+def transferClosestFillLoops( extrusionHalfWidth, oldOrderedLocation, remainingFillLoops, skein ):
+	"Transfer the closest remaining fill loops, the closest loop is found in the closest grid of the loops."
+	fillLoops = remainingFillLoops[ : ]
+	closestGrid = getClosestGridFromLoops( fillLoops )
+	fillLoopIndexTable = {}
+	for fillLoopIndex in xrange( len( fillLoops ) ):
+		fillLoopIndexTable[ id( fillLoops[ fillLoopIndex ] ) ] = fillLoopIndex
+	while len( remainingFillLoops ) > 0:
+		closestFillLoop = fillLoops[ closestGrid.getClosestIndex( oldOrderedLocation.dropAxis( 2 ) ) ]
+		newClosestFillLoop = getLoopInsideContainingLoop( closestFillLoop, remainingFillLoops )
+		while newClosestFillLoop != None:
+			closestFillLoop = newClosestFillLoop
+			newClosestFillLoop = getLoopInsideContainingLoop( closestFillLoop, remainingFillLoops )
+		remainingFillLoops.remove( closestFillLoop )
+		closestGrid.removeItem( fillLoopIndexTable[ id( closestFillLoop ) ] )
+		addToThreadsFromLoop( extrusionHalfWidth, 'loop', closestFillLoop[ : ], oldOrderedLocation, skein )
+
 def transferClosestPath( oldOrderedLocation, remainingPaths, skein ):
 	"Transfer the closest remaining path."
 	closestDistance = 999999999999999999.0
@@ -1484,10 +1440,18 @@ def transferClosestPath( oldOrderedLocation, remainingPaths, skein ):
 	oldOrderedLocation.x = closestPath[ - 1 ].real
 	oldOrderedLocation.y = closestPath[ - 1 ].imag
 
-def transferClosestPaths( oldOrderedLocation, remainingPaths, skein ):
-	"Transfer the closest remaining paths."
-	while len( remainingPaths ) > 0:
-		transferClosestPath( oldOrderedLocation, remainingPaths, skein )
+def transferClosestPaths( oldOrderedLocation, remainingPaths, skein, improvementSeconds = 0.0 ):
+	"Transfer the closest remaining paths in nearest neighbour order, which is improved if there are improvement seconds."
+	if len( remainingPaths ) < 1:
+		return
+	oldOrderedLocationComplex = oldOrderedLocation.dropAxis( 2 )
+	paths = path_order.getPathsInClosestOrder( oldOrderedLocationComplex, remainingPaths )
+	paths = path_order.getImprovedPaths( oldOrderedLocationComplex, paths, improvementSeconds )
+	del remainingPaths[ : ]
+	for path in paths:
+		skein.addGcodeFromThreadZ( path, oldOrderedLocation.z )
+	oldOrderedLocation.x = paths[ - 1 ][ - 1 ].real
+	oldOrderedLocation.y = paths[ - 1 ][ - 1 ].imag
 
 def transferPathsToSurroundingLoops( paths, surroundingLoops ):
 	"Transfer paths to surrounding loops."
@@ -1495,8 +1459,10 @@ def transferPathsToSurroundingLoops( paths, surroundingLoops ):
 		surroundingLoop.transferPaths( paths )
 
 
-class DistanceIndex:
+class DistanceIndex( object ):
 	"A class to hold the distance and the index of the loop."
+	__slots__ = [ 'distance', 'index' ]
+
 	def __init__( self, distance, index ):
 		self.distance = distance
 		self.index = index
@@ -1506,8 +1472,10 @@ class DistanceIndex:
 		return '%s, %s' % ( self.distance, self.index )
 
 
-class Endpoint:
+class Endpoint( object ):
 	"The endpoint of a segment."
+	__slots__ = [ 'closestIndex', 'otherEndpoint', 'path', 'pathIndex', 'point', 'segment', 'segmentLength' ]
+
 	def __repr__( self ):
 		"Get the string representation of this Endpoint."
 		return 'Endpoint %s, %s' % ( self.point, self.otherEndpoint.point )
@@ -1553,53 +1521,21 @@ class Endpoint:
 				nearestEndpoint = endpoint
 		return nearestEndpoint
 
-	def getNearestMiss( self, endpoints, path, pixelTable, width ):
+	def getNearestMiss( self, endpoints, path, pixelGrid, width ):
 		"Get the nearest endpoint which the segment to that endpoint misses the other extrusions."
-		pathMaskTable = {}
-		smallestDistance = 9999999999.0
-		penultimateMinusPoint = complex( 0.0, 0.0 )
-		if len( path ) > 1:
-			penultimatePoint = path[ - 2 ]
-			addSegmentToPixelTable( penultimatePoint, self.point, pathMaskTable, 0, 0, width )
-			penultimateMinusPoint = penultimatePoint - self.point
-			if abs( penultimateMinusPoint ) > 0.0:
-				penultimateMinusPoint /= abs( penultimateMinusPoint )
-		for endpoint in endpoints:
-			endpoint.segment = endpoint.point - self.point
-			endpoint.segmentLength = abs( endpoint.segment )
-			if endpoint.segmentLength <= 0.0:
-#				print( 'This should never happen, the endpoints are touching' )
-#				print( endpoint )
-#				print( path )
-				return endpoint
-		endpoints.sort( compareSegmentLength )
-		for endpoint in endpoints[ : 15 ]: # increasing the number of searched endpoints increases the search time, with 20 fill took 600 seconds for cilinder.gts, with 10 fill took 533 seconds
-			normalizedSegment = endpoint.segment / endpoint.segmentLength
-			isOverlappingSelf = getDotProduct( penultimateMinusPoint, normalizedSegment ) > 0.9
-			if not isOverlappingSelf:
-				if len( path ) > 2:
-					segmentYMirror = complex( normalizedSegment.real, - normalizedSegment.imag )
-					pointRotated = segmentYMirror * self.point
-					endpointPointRotated = segmentYMirror * endpoint.point
-					if isXSegmentIntersectingPath( path[ max( 0, len( path ) - 21 ) : - 1 ], pointRotated.real, endpointPointRotated.real, segmentYMirror, pointRotated.imag ):
-						isOverlappingSelf = True
-			if not isOverlappingSelf:
-				totalMaskTable = pathMaskTable.copy()
-				addSegmentToPixelTable( endpoint.point, endpoint.otherEndpoint.point, totalMaskTable, 0, 0, width )
-				segmentTable = {}
-				addSegmentToPixelTable( self.point, endpoint.point, segmentTable, 0, 0, width )
-				if not isPixelTableIntersecting( pixelTable, segmentTable, totalMaskTable ):
-					return endpoint
-		return None
+		return self.getNearestMissFromPaths( endpoints, False, path, pixelGrid, width )
 
-	def getNearestMissCheckEndpointPath( self, endpoints, path, pixelTable, width ):
+	def getNearestMissCheckEndpointPath( self, endpoints, path, pixelGrid, width ):
 		"Get the nearest endpoint which the segment to that endpoint misses the other extrusions, also checking the path of the endpoint."
-		pathMaskTable = {}
-		smallestDistance = 9999999999.0
+		return self.getNearestMissFromPaths( endpoints, True, path, pixelGrid, width )
+
+	def getNearestMissFromPaths( self, endpoints, isEndpointPathChecked, path, pixelGrid, width ):
+		"Get the nearest endpoint which the segment to that endpoint misses the other extrusions, the endpoints are checked in order of distance until one misses."
+		pathMaskGrid = PixelGrid()
 		penultimateMinusPoint = complex( 0.0, 0.0 )
 		if len( path ) > 1:
 			penultimatePoint = path[ - 2 ]
-			addSegmentToPixelTable( penultimatePoint, self.point, pathMaskTable, 0, 0, width )
+			pathMaskGrid.addSegment( penultimatePoint, self.point, None, width )
 			penultimateMinusPoint = penultimatePoint - self.point
 			if abs( penultimateMinusPoint ) > 0.0:
 				penultimateMinusPoint /= abs( penultimateMinusPoint )
@@ -1611,7 +1547,7 @@ class Endpoint:
 #				print( endpoint )
 #				print( path )
 				return endpoint
-		endpoints.sort( compareSegmentLength )
+		endpoints.sort( key = getEndpointSegmentLength )
 		for endpoint in endpoints[ : 15 ]: # increasing the number of searched endpoints increases the search time, with 20 fill took 600 seconds for cilinder.gts, with 10 fill took 533 seconds
 			normalizedSegment = endpoint.segment / endpoint.segmentLength
 			isOverlappingSelf = getDotProduct( penultimateMinusPoint, normalizedSegment ) > 0.9
@@ -1622,22 +1558,178 @@ class Endpoint:
 					endpointPointRotated = segmentYMirror * endpoint.point
 					if isXSegmentIntersectingPath( path[ max( 0, len( path ) - 21 ) : - 1 ], pointRotated.real, endpointPointRotated.real, segmentYMirror, pointRotated.imag ):
 						isOverlappingSelf = True
-				endpointPath = endpoint.path
-				if len( endpointPath ) > 2:
-					segmentYMirror = complex( normalizedSegment.real, - normalizedSegment.imag )
-					pointRotated = segmentYMirror * self.point
-					endpointPointRotated = segmentYMirror * endpoint.point
-					if isXSegmentIntersectingPath( endpointPath, pointRotated.real, endpointPointRotated.real, segmentYMirror, pointRotated.imag ):
-						isOverlappingSelf = True
+				if isEndpointPathChecked:
+					endpointPath = endpoint.path
+					if len( endpointPath ) > 2:
+						segmentYMirror = complex( normalizedSegment.real, - normalizedSegment.imag )
+						pointRotated = segmentYMirror * self.point
+						endpointPointRotated = segmentYMirror * endpoint.point
+						if isXSegmentIntersectingPath( endpointPath, pointRotated.real, endpointPointRotated.real, segmentYMirror, pointRotated.imag ):
+							isOverlappingSelf = True
 			if not isOverlappingSelf:
-				totalMaskTable = pathMaskTable.copy()
-				addSegmentToPixelTable( endpoint.point, endpoint.otherEndpoint.point, totalMaskTable, 0, 0, width )
-				segmentTable = {}
-				addSegmentToPixelTable( self.point, endpoint.point, segmentTable, 0, 0, width )
-				if not isPixelTableIntersecting( pixelTable, segmentTable, totalMaskTable ):
+				if self.isMissing( endpoint, pathMaskGrid, pixelGrid, width ):
 					return endpoint
 		return None
 
+	def isMissing( self, endpoint, pathMaskGrid, pixelGrid, width ):
+		"Determine if the segment to the endpoint misses the extrusions in the pixel grid, other than the extrusions in the path mask grid and the segment of the endpoint.  The segment of the endpoint is only added to a mask when the segment to the endpoint meets an extrusion."
+		endpointMaskGrid = None
+		for pixel in getSegmentPixels( self.point / width, endpoint.point / width ):
+			if not pathMaskGrid.isPixelOccupied( pixel ) and pixelGrid.isPixelOccupied( pixel ):
+				if endpointMaskGrid == None:
+					endpointMaskGrid = PixelGrid()
+					endpointMaskGrid.addSegment( endpoint.point, endpoint.otherEndpoint.point, None, width )
+				if not endpointMaskGrid.isPixelOccupied( pixel ):
+					return False
+		return True
+
+
+class FixedPointFormatter( object ):
+	"A class to format numbers rounded to a fixed number of decimal places, with the trailing zeros after the first decimal place stripped."
+	__slots__ = [ 'decimalPlaces', 'formatString', 'scale' ]
+
+	def __init__( self, decimalPlaces ):
+		"Precompile the format string, there is always at least one decimal place."
+		self.decimalPlaces = max( 1, int( round( decimalPlaces ) ) )
+		self.formatString = '%.' + str( self.decimalPlaces ) + 'f'
+		self.scale = 10.0 ** self.decimalPlaces
+
+	def __repr__( self ):
+		"Get the string representation of this fixed point formatter."
+		return self.formatString
+
+	def getString( self, number ):
+		"Get the number rounded half away from zero like round, as a string like str of the rounded number but never in exponent notation."
+		if ( number * self.scale ) % 1.0 == 0.5: # The format rounds exact halves to even, so they are rounded by round.
+			number = round( number, self.decimalPlaces )
+		numberString = ( self.formatString % number ).rstrip( '0' )
+		if numberString[ - 1 ] == '.':
+			return numberString + '0'
+		return numberString
+
+
+class LoopGrid:
+	"A class to hold the bounding box, area and orientation of each loop, with the loops in a uniform grid of rows, so that the containment queries only check the loops whose bounding boxes could hold the point."
+	def __init__( self, loops ):
+		"Initialize, each loop is added to the rows which its bounding box spans."
+		self.areas = []
+		self.loops = loops
+		self.maximums = []
+		self.minimums = []
+		self.rows = []
+		marginComplex = complex( globalSweepBoxMargin, globalSweepBoxMargin )
+		for loop in loops:
+			self.areas.append( getPolygonArea( loop ) )
+			self.maximums.append( getMaximumFromPoints( loop ) + marginComplex )
+			self.minimums.append( getMinimumFromPoints( loop ) - marginComplex )
+		if len( loops ) < 1:
+			return
+		self.bottom = getMinimumFromPoints( self.minimums ).imag
+		top = getMaximumFromPoints( self.maximums ).imag
+		self.rowHeight = max( ( top - self.bottom ) / float( len( loops ) ), globalSweepBoxMargin )
+		for rowIndex in xrange( self.getRowIndex( top ) + 1 ):
+			self.rows.append( [] )
+		for loopIndex in xrange( len( loops ) ):
+			for rowIndex in xrange( self.getRowIndex( self.minimums[ loopIndex ].imag ), self.getRowIndex( self.maximums[ loopIndex ].imag ) + 1 ):
+				self.rows[ rowIndex ].append( loopIndex )
+
+	def __repr__( self ):
+		"Get the string representation of this loop grid."
+		return str( self.loops )
+
+	def getLoopIndexesOverlappingBox( self, minimum, maximum ):
+		"Get the indexes of the loops whose bounding boxes overlap the box, in order."
+		loopIndexTable = {}
+		for rowIndex in xrange( max( 0, self.getRowIndex( minimum.imag ) ), min( len( self.rows ), self.getRowIndex( maximum.imag ) + 1 ) ):
+			for loopIndex in self.rows[ rowIndex ]:
+				if self.isBoxOverlapping( loopIndex, minimum, maximum ):
+					loopIndexTable[ loopIndex ] = None
+		loopIndexes = loopIndexTable.keys()
+		loopIndexes.sort()
+		return loopIndexes
+
+	def getNumberOfIntersectionsToLeft( self, point, excludedIndex = None ):
+		"Get the number of intersections through the loops other than the excluded loop for the line starting from the left point and going left, only the loops which span the y of the point and begin to its left can be intersected."
+		numberOfIntersectionsToLeft = 0
+		for loopIndex in self.getRowLoopIndexes( point.imag ):
+			minimum = self.minimums[ loopIndex ]
+			if loopIndex != excludedIndex and minimum.real <= point.real and minimum.imag <= point.imag and point.imag <= self.maximums[ loopIndex ].imag:
+				numberOfIntersectionsToLeft += getNumberOfIntersectionsToLeft( self.loops[ loopIndex ], point )
+		return numberOfIntersectionsToLeft
+
+	def getRowIndex( self, y ):
+		"Get the index of the row which holds the y."
+		return int( math.floor( ( y - self.bottom ) / self.rowHeight ) )
+
+	def getRowLoopIndexes( self, y ):
+		"Get the indexes of the loops in the row which holds the y."
+		if len( self.rows ) < 1:
+			return []
+		rowIndex = self.getRowIndex( y )
+		if rowIndex < 0 or rowIndex >= len( self.rows ):
+			return []
+		return self.rows[ rowIndex ]
+
+	def isBoxInside( self, loopIndex, minimum, maximum ):
+		"Determine if the box is inside the bounding box of the loop."
+		loopMinimum = self.minimums[ loopIndex ]
+		loopMaximum = self.maximums[ loopIndex ]
+		if minimum.real < loopMinimum.real or minimum.imag < loopMinimum.imag:
+			return False
+		return maximum.real <= loopMaximum.real and maximum.imag <= loopMaximum.imag
+
+	def isBoxOverlapping( self, loopIndex, minimum, maximum ):
+		"Determine if the box overlaps the bounding box of the loop."
+		loopMinimum = self.minimums[ loopIndex ]
+		loopMaximum = self.maximums[ loopIndex ]
+		if maximum.real < loopMinimum.real or maximum.imag < loopMinimum.imag:
+			return False
+		return minimum.real <= loopMaximum.real and minimum.imag <= loopMaximum.imag
+
+	def isInFilledRegion( self, point, excludedIndex = None ):
+		"Determine if the left point is in the filled region of the loops other than the excluded loop."
+		return self.getNumberOfIntersectionsToLeft( point, excludedIndex ) % 2 == 1
+
+	def isLineIntersecting( self, pointBegin, pointEnd ):
+		"Determine if the line is intersecting the loops whose bounding boxes overlap the bounding box of the line."
+		overlappingLoops = []
+		for loopIndex in self.getLoopIndexesOverlappingBox( getMinimum( pointBegin, pointEnd ), getMaximum( pointBegin, pointEnd ) ):
+			overlappingLoops.append( self.loops[ loopIndex ] )
+		return isLineIntersectingLoops( overlappingLoops, pointBegin, pointEnd )
+
+	def isPathEntirelyInsideLoops( self, path, excludedIndex = None ):
+		"Determine if the path is entirely inside a loop other than the excluded loop, only the loops whose bounding boxes hold the bounding box of the path are checked."
+		minimum = getMinimumFromPoints( path )
+		maximum = getMaximumFromPoints( path )
+		for loopIndex in self.getRowLoopIndexes( minimum.imag ):
+			if loopIndex != excludedIndex and self.isBoxInside( loopIndex, minimum, maximum ):
+				if isPathEntirelyInsideLoop( self.loops[ loopIndex ], path ):
+					return True
+		return False
+
+	def isPathInsideLoop( self, loopIndex, path ):
+		"Determine if the path is inside the loop."
+		leftPoint = getLeftPoint( path )
+		if not self.isBoxInside( loopIndex, leftPoint, leftPoint ):
+			return False
+		return isPointInsideLoop( self.loops[ loopIndex ], leftPoint )
+
+	def isPathInsideLoops( self, path, excludedIndex = None ):
+		"Determine if the path is inside a loop other than the excluded loop."
+		return self.isPointInsideLoops( getLeftPoint( path ), excludedIndex )
+
+	def isPointInsideLoops( self, point, excludedIndex = None ):
+		"Determine if the point is inside a loop other than the excluded loop, only the loops whose bounding boxes hold the point are checked."
+		for loopIndex in self.getRowLoopIndexes( point.imag ):
+			if loopIndex != excludedIndex and self.isBoxInside( loopIndex, point, point ):
+				if isPointInsideLoop( self.loops[ loopIndex ], point ):
+					return True
+		return False
+
+	def isWiddershins( self, loopIndex ):
+		"Determine if the loop goes round in the widdershins direction."
+		return self.areas[ loopIndex ] > 0.0
+
 
 class LoopLayer:
 	"Loops with a z."
@@ -1661,6 +1753,176 @@ class PathZ:
 		return '%s, %s' % ( self.z, self.path )
 
 
+class PixelGrid:
+	"A grid of pixels with values, which is a dense list when the minimum and maximum pixels are known and the grid is not too big, otherwise a sparse table."
+	def __init__( self, minimumPixel = None, maximumPixel = None ):
+		"Initialize, the pixels outside of the dense list are held in the sparse table."
+		self.cells = None
+		self.table = {}
+		if minimumPixel == None or maximumPixel == None:
+			return
+		self.minimumX = int( math.floor( minimumPixel.real ) ) - 2
+		self.minimumY = int( math.floor( minimumPixel.imag ) ) - 2
+		self.width = int( math.ceil( maximumPixel.real ) ) + 3 - self.minimumX
+		self.height = int( math.ceil( maximumPixel.imag ) ) + 3 - self.minimumY
+		if self.width < 1 or self.height < 1 or self.width * self.height > globalMaximumDensePixels:
+			return
+		self.cells = [ globalEmptyPixel ] * ( self.width * self.height )
+
+	def __repr__( self ):
+		"Get the string representation of this pixel grid."
+		return str( self.getPixelValues() )
+
+	def addElement( self, element, pixel ):
+		"Add an element to the list of the pixel."
+		if self.isPixelOccupied( pixel ):
+			self.getPixelValue( pixel ).append( element )
+		else:
+			self.addPixels( [ element ], [ pixel ] )
+
+	def addElementFromPoint( self, element, point ):
+		"Add an element to the list of the pixel nearest to the point."
+		self.addElement( element, getStepKeyFromPoint( point ) )
+
+	def addGrid( self, fromGrid ):
+		"Add the pixels of the from grid to this grid, which is the union of the grids."
+		for pixel, value in fromGrid.getPixelValues():
+			self.addPixels( value, [ pixel ] )
+
+	def addLoop( self, loop, value, width ):
+		"Add the segments of the loop to the grid."
+		for pointIndex in xrange( len( loop ) ):
+			self.addSegment( loop[ pointIndex ], loop[ ( pointIndex + 1 ) % len( loop ) ], value, width )
+
+	def addPath( self, path, value, width ):
+		"Add the segments of the path to the grid."
+		for pointIndex in xrange( len( path ) - 1 ):
+			self.addSegment( path[ pointIndex ], path[ pointIndex + 1 ], value, width )
+
+	def addPixels( self, value, pixels ):
+		"Add the pixels with the value to the grid."
+		cells = self.cells
+		if cells == None:
+			for pixel in pixels:
+				self.table[ pixel ] = value
+			return
+		for pixel in pixels:
+			x = pixel[ 0 ] - self.minimumX
+			y = pixel[ 1 ] - self.minimumY
+			if x >= 0 and x < self.width and y >= 0 and y < self.height:
+				cells[ x + y * self.width ] = value
+			else:
+				self.table[ pixel ] = value
+
+	def addSegment( self, beginComplex, endComplex, value, width ):
+		"Add the pixels of the segment with the value to the grid."
+		if abs( beginComplex - endComplex ) <= 0.0:
+			return
+		self.addPixels( value, getSegmentPixels( beginComplex / width, endComplex / width ) )
+
+	def addShortenedSegment( self, beginComplex, endComplex, shortenDistanceBegin, shortenDistanceEnd, width ):
+		"Add the pixels of the segment shortened by the distances in pixels to the grid."
+		if abs( beginComplex - endComplex ) <= 0.0:
+			return
+		beginComplex /= width
+		endComplex /= width
+		if shortenDistanceBegin > 0.0:
+			endMinusBeginComplex = endComplex - beginComplex
+			endMinusBeginComplexLength = abs( endMinusBeginComplex )
+			if endMinusBeginComplexLength < shortenDistanceBegin:
+				return
+			beginComplex = beginComplex + endMinusBeginComplex * shortenDistanceBegin / endMinusBeginComplexLength
+		if shortenDistanceEnd > 0.0:
+			beginMinusEndComplex = beginComplex - endComplex
+			beginMinusEndComplexLength = abs( beginMinusEndComplex )
+			if beginMinusEndComplexLength < 0.0:
+				return
+			endComplex = endComplex + beginMinusEndComplex * shortenDistanceEnd / beginMinusEndComplexLength
+		self.addPixels( None, getSegmentPixels( beginComplex, endComplex ) )
+
+	def getPixelValue( self, pixel ):
+		"Get the value of the pixel, which must be in the grid."
+		if self.cells != None:
+			x = pixel[ 0 ] - self.minimumX
+			y = pixel[ 1 ] - self.minimumY
+			if x >= 0 and x < self.width and y >= 0 and y < self.height:
+				return self.cells[ x + y * self.width ]
+		return self.table[ pixel ]
+
+	def getPixelValues( self ):
+		"Get the pixel value pairs of the grid."
+		pixelValues = self.table.items()
+		if self.cells == None:
+			return pixelValues
+		for cellIndex in xrange( len( self.cells ) ):
+			value = self.cells[ cellIndex ]
+			if value is not globalEmptyPixel:
+				pixel = ( self.minimumX + cellIndex % self.width, self.minimumY + cellIndex / self.width )
+				pixelValues.append( ( pixel, value ) )
+		return pixelValues
+
+	def getPixels( self ):
+		"Get the pixels of the grid."
+		if self.cells == None:
+			return self.table.keys()
+		pixels = []
+		for pixel, value in self.getPixelValues():
+			pixels.append( pixel )
+		return pixels
+
+	def getSquareValues( self, pixel ):
+		"Get a list of the values of the lists in a square around the pixel."
+		squareValues = []
+		table = self.table
+		for x in xrange( pixel[ 0 ] - 1, pixel[ 0 ] + 2 ):
+			for y in xrange( pixel[ 1 ] - 1, pixel[ 1 ] + 2 ):
+				squarePixel = ( x, y )
+				if self.cells == None:
+					if squarePixel in table:
+						squareValues += table[ squarePixel ]
+				elif self.isPixelOccupied( squarePixel ):
+					squareValues += self.getPixelValue( squarePixel )
+		return squareValues
+
+	def getSquareValuesFromPoint( self, point ):
+		"Get a list of the values of the lists in a square around the pixel nearest to the point."
+		return self.getSquareValues( getStepKeyFromPoint( point ) )
+
+	def isIntersecting( self, littleGrid, maskGrid = None ):
+		"Determine if a pixel of the little grid, which is not in the mask grid, is in this grid."
+		for pixel in littleGrid.getPixels():
+			if maskGrid == None or not maskGrid.isPixelOccupied( pixel ):
+				if self.isPixelOccupied( pixel ):
+					return True
+		return False
+
+	def isPixelOccupied( self, pixel ):
+		"Determine if the pixel is in the grid."
+		if self.cells != None:
+			x = pixel[ 0 ] - self.minimumX
+			y = pixel[ 1 ] - self.minimumY
+			if x >= 0 and x < self.width and y >= 0 and y < self.height:
+				return self.cells[ x + y * self.width ] is not globalEmptyPixel
+		return pixel in self.table
+
+	def removeGrid( self, removeGrid ):
+		"Remove the pixels of the remove grid from this grid, which is the difference of the grids."
+		self.removePixels( removeGrid.getPixels() )
+
+	def removePixels( self, pixels ):
+		"Remove the pixels from the grid."
+		cells = self.cells
+		for pixel in pixels:
+			if cells != None:
+				x = pixel[ 0 ] - self.minimumX
+				y = pixel[ 1 ] - self.minimumY
+				if x >= 0 and x < self.width and y >= 0 and y < self.height:
+					cells[ x + y * self.width ] = globalEmptyPixel
+					continue
+			if pixel in self.table:
+				del self.table[ pixel ]
+
+
 class RotatedLoopLayer:
 	"A rotated layer."
 	def __init__( self, z ):
@@ -1681,10 +1943,11 @@ class RotatedLoopLayer:
 		return raisedRotatedLoopLayer
 
 
-class SurroundingLoop:
+class SurroundingLoop( object ):
 	"A loop that surrounds paths."
+	__slots__ = [ 'addToThreadsFunctions', 'boundary', 'extraLoops', 'extrusionHalfWidth', 'fillBoundaries', 'infillPaths', 'innerSurroundings', 'lastExistingFillLoops', 'lastFillLoops', 'loop', 'perimeterPaths', 'perimeterWidth', 'threadSequence', 'z' ]
+
 	def __init__( self, threadSequence ):
-		self.addToThreadsFunctions = []
 		self.boundary = []
 		self.extraLoops = []
 		self.infillPaths = []
@@ -1693,10 +1956,17 @@ class SurroundingLoop:
 		self.lastFillLoops = None
 		self.loop = None
 		self.perimeterPaths = []
+		self.threadSequence = threadSequence
 		self.z = None
-		threadFunctionTable = { 'infill' : self.transferInfillPaths, 'loops' : self.transferClosestFillLoops, 'perimeter' : self.addPerimeterInner }
-		for threadType in threadSequence:
-			self.addToThreadsFunctions.append( threadFunctionTable[ threadType ] )
+		self.setAddToThreadsFunctions()
+
+	def __getstate__( self ):
+		"Get the state to pickle, without the bound thread functions, so that the surrounding loop can be passed between processes."
+		state = {}
+		for slotName in self.__slots__:
+			if slotName != 'addToThreadsFunctions' and hasattr( self, slotName ):
+				state[ slotName ] = getattr( self, slotName )
+		return state
 
 	def __repr__( self ):
 		"Get the string representation of this surrounding loop."
@@ -1778,13 +2048,24 @@ class SurroundingLoop:
 		"Transfer closest fill loops."
 		if len( self.extraLoops ) < 1:
 			return
-		remainingFillLoops = self.extraLoops[ : ]
-		while len( remainingFillLoops ) > 0:
-			transferClosestFillLoop( self.extrusionHalfWidth, oldOrderedLocation, remainingFillLoops, skein )
+		transferClosestFillLoops( self.extrusionHalfWidth, oldOrderedLocation, self.extraLoops[ : ], skein )
 
 	def transferInfillPaths( self, oldOrderedLocation, skein ):
-		"Transfer the infill paths."
-		transferClosestPaths( oldOrderedLocation, self.infillPaths[ : ], skein )
+		"Transfer the infill paths, the order is improved for the path order improvement seconds."
+		transferClosestPaths( oldOrderedLocation, self.infillPaths[ : ], skein, path_order.globalImprovementSeconds )
+
+	def __setstate__( self, state ):
+		"Set the unpickled state and the thread functions."
+		for slotName, value in state.iteritems():
+			setattr( self, slotName, value )
+		self.setAddToThreadsFunctions()
+
+	def setAddToThreadsFunctions( self ):
+		"Set the thread functions from the thread sequence."
+		self.addToThreadsFunctions = []
+		threadFunctionTable = { 'infill' : self.transferInfillPaths, 'loops' : self.transferClosestFillLoops, 'perimeter' : self.addPerimeterInner }
+		for threadType in self.threadSequence:
+			self.addToThreadsFunctions.append( threadFunctionTable[ threadType ] )
 
 	def transferPaths( self, paths ):
 		"Transfer paths."
@@ -1793,8 +2074,10 @@ class SurroundingLoop:
 		self.infillPaths = getTransferredPaths( paths, self.boundary )
 
 
-class XIntersectionIndex:
+class XIntersectionIndex( object ):
 	"A class to hold the x intersection position and the index of the loop which intersected."
+	__slots__ = [ 'index', 'x' ]
+
 	def __init__( self, index, x ):
 		self.index = index
 		self.x = x
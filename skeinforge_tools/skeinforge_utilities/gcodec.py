@@ -31,6 +31,12 @@ __author__ = "Enrique Perez (perez_enrique@yahoo.com)"
 __date__ = "$Date: 2008/21/04 $"
 __license__ = "GPL 3.0"
 
+globalGcodeLineTable = {}
+globalMaximumGcodeLines = 65536
+globalMaximumTextHeaders = 4
+globalPreviousGcodeLineTable = {}
+globalTextHeaderTable = {}
+
 
 #getFileTextInFileDirectory might not be needed anymore
 def addLineAndNewlineIfNecessary( line, output ):
@@ -67,6 +73,18 @@ def getAbsoluteFolderPath( filePath, folderName = '' ):
 		return absoluteFolderPath
 	return os.path.join( absoluteFolderPath, folderName )
 
+def getCoordinateTable( splitLine ):
+	"Get the table of the double value of the first word of each letter after the first word, in one pass over the split line.  The value is None if the word is not a number."
+	coordinateTable = {}
+	for word in splitLine[ 1 : ]:
+		firstLetter = word[ 0 ]
+		if firstLetter not in coordinateTable:
+			try:
+				coordinateTable[ firstLetter ] = float( word[ 1 : ] )
+			except ValueError:
+				coordinateTable[ firstLetter ] = None
+	return coordinateTable
+
 def getDoubleAfterFirstLetter( word ):
 	"Get the double value of the word after the first letter."
 	return float( word[ 1 : ] )
@@ -143,6 +161,39 @@ def getFileText( fileName, readMode = 'r', printWarning = True ):
 			print( 'The file ' + fileName + ' does not exist.' )
 		return ''
 
+def getFileHead( fileName, numberOfBytes, readMode = 'rb', printWarning = True ):
+	"Get the text at the start of a file, which is at most the number of bytes long."
+	try:
+		file = open( fileName, readMode )
+		fileHead = file.read( numberOfBytes )
+		file.close()
+		return fileHead
+	except IOError:
+		if printWarning:
+			print( 'The file ' + fileName + ' does not exist.' )
+		return ''
+
+def getFileLineGenerator( fileName, chunkSize = 65536 ):
+	"Get a generator of the lines of a file, the file is read a chunk at a time so that the entire text is never in memory."
+	try:
+		file = open( fileName, 'rb' )
+	except IOError:
+		print( 'The file ' + fileName + ' does not exist.' )
+		return
+	remainder = ''
+	try:
+		chunk = file.read( chunkSize )
+		while chunk != '':
+			lines = ( remainder + chunk ).replace( '\r', '\n' ).split( '\n' )
+			remainder = lines.pop()
+			for line in lines:
+				yield line
+			chunk = file.read( chunkSize )
+	finally:
+		file.close()
+	if remainder != '':
+		yield remainder
+
 def getFileTextInFileDirectory( fileInDirectory, fileName, readMode = 'r' ):
 	"Get the entire text of a file in the directory of the file in directory."
 	absoluteFilePathInFileDirectory = os.path.join( os.path.dirname( fileInDirectory ), fileName )
@@ -166,6 +217,21 @@ def getGcodeFileText( fileName, gcodeText ):
 		return getFileText( fileName )
 	return ''
 
+def getGcodeLine( line ):
+	"Get the tokenized gcode line of the line.  The gcode lines are held in a pair of tables, so a line which is passed along by a craft plugin, or by the next plugin in the chain, is only tokenized once."
+	global globalGcodeLineTable, globalPreviousGcodeLineTable
+	if line in globalGcodeLineTable:
+		return globalGcodeLineTable[ line ]
+	if line in globalPreviousGcodeLineTable:
+		gcodeLine = globalPreviousGcodeLineTable[ line ]
+	else:
+		gcodeLine = GcodeLine( line )
+	if len( globalGcodeLineTable ) >= globalMaximumGcodeLines:
+		globalPreviousGcodeLineTable = globalGcodeLineTable
+		globalGcodeLineTable = {}
+	globalGcodeLineTable[ line ] = gcodeLine
+	return gcodeLine
+
 def getHasPrefix( name, prefix ):
 	"Determine if the word begins with the prefix."
 	return name[ : len( prefix ) ].lower() == prefix
@@ -174,14 +240,31 @@ def getHasSuffix( name, suffix ):
 	"Determine if the word ends with the suffix."
 	return name[ - len( suffix ) : ].lower() == suffix
 
-def getLocationFromSplitLine( oldLocation, splitLine ):
-	"Get the location from the split line."
+def getHeaderEndIndex( text, startIndex ):
+	"Get the index of the first extrusionStart or end extruderInitialization tag from the start index, or - 1 if there is neither."
+	headerEndIndex = - 1
+	for headerEndWord in [ 'extrusionStart', '(</extruderInitialization>)' ]:
+		headerEndWordIndex = text.find( headerEndWord, startIndex )
+		if headerEndWordIndex != - 1 and ( headerEndIndex == - 1 or headerEndWordIndex < headerEndIndex ):
+			headerEndIndex = headerEndWordIndex
+	return headerEndIndex
+
+def getLocationFromCoordinateTable( coordinateTable, oldLocation ):
+	"Get the location from the coordinate table, the missing coordinates are those of the old location."
 	if oldLocation == None:
 		oldLocation = Vector3()
-	return Vector3(
-		getDoubleFromCharacterSplitLineValue( 'X', splitLine, oldLocation.x ),
-		getDoubleFromCharacterSplitLineValue( 'Y', splitLine, oldLocation.y ),
-		getDoubleFromCharacterSplitLineValue( 'Z', splitLine, oldLocation.z ) )
+	location = Vector3( oldLocation.x, oldLocation.y, oldLocation.z )
+	if coordinateTable.get( 'X' ) != None:
+		location.x = coordinateTable[ 'X' ]
+	if coordinateTable.get( 'Y' ) != None:
+		location.y = coordinateTable[ 'Y' ]
+	if coordinateTable.get( 'Z' ) != None:
+		location.z = coordinateTable[ 'Z' ]
+	return location
+
+def getLocationFromSplitLine( oldLocation, splitLine ):
+	"Get the location from the split line."
+	return getLocationFromCoordinateTable( getCoordinateTable( splitLine ), oldLocation )
 
 def getModuleWithDirectoryPath( directoryPath, fileName ):
 	"Get the module from the fileName and folder name."
@@ -261,8 +344,34 @@ def getPythonFileNamesExceptInitRecursively( directoryName = '' ):
 	pythonFileNamesExceptInitRecursively.sort()
 	return pythonFileNamesExceptInitRecursively
 
+def getRotatedBoundaryLayers( lines ):
+	"Get the rotated boundary layers from the boundary points and bridge rotations of the gcode lines."
+	boundary = None
+	rotatedBoundaryLayer = None
+	rotatedBoundaryLayers = []
+	for line in lines:
+		splitLine = getSplitLineBeforeBracketSemicolon( line )
+		firstWord = getFirstWord( splitLine )
+		if firstWord == '(<boundaryPoint>':
+			location = getLocationFromSplitLine( None, splitLine )
+			boundary.append( location.dropAxis( 2 ) )
+		elif ( firstWord == '(<bridgeRotation>' or firstWord == '<!--bridgeRotation-->' ):
+			secondWordWithoutBrackets = splitLine[ 1 ].replace( '(', '' ).replace( ')', '' )
+			rotatedBoundaryLayer.rotation = complex( secondWordWithoutBrackets )
+		elif firstWord == '(<layer>':
+			rotatedBoundaryLayer = euclidean.RotatedLoopLayer( float( splitLine[ 1 ] ) )
+			rotatedBoundaryLayers.append( rotatedBoundaryLayer )
+		elif firstWord == '(<surroundingLoop>)':
+			boundary = []
+			rotatedBoundaryLayer.loops.append( boundary )
+	return rotatedBoundaryLayers
+
 def getSplitLineBeforeBracketSemicolon( line ):
-	"Get the split line before a bracket or semicolon."
+	"Get the split line before a bracket or semicolon, the split line is shared with the other callers and must not be changed."
+	return getGcodeLine( line ).splitLine
+
+def getSplitLineBeforeBracketSemicolonFromText( line ):
+	"Get the split line before a bracket or semicolon from the line text."
 	bracketSemicolonIndex = min( line.find( ';' ), line.find( '(' ) )
 	if bracketSemicolonIndex < 0:
 		return line.split()
@@ -281,6 +390,16 @@ def getSummarizedFileName( fileName ):
 		return os.path.basename( fileName )
 	return fileName
 
+def getTextHeader( text ):
+	"Get the header of the text, the headers of the most recent texts are held in a table so the header is only parsed once for each text."
+	if text in globalTextHeaderTable:
+		return globalTextHeaderTable[ text ]
+	if len( globalTextHeaderTable ) >= globalMaximumTextHeaders:
+		globalTextHeaderTable.clear()
+	textHeader = TextHeader().getFromText( text )
+	globalTextHeaderTable[ text ] = textHeader
+	return textHeader
+
 def getTextIfEmpty( fileName, text ):
 	"Get the text from a file if it the text is empty."
 	if text != '':
@@ -339,17 +458,7 @@ def isProcedureDone( gcodeText, procedure ):
 	"Determine if the procedure has been done on the gcode text."
 	if gcodeText == '':
 		return False
-	lines = getTextLines( gcodeText )
-	for line in lines:
-		withoutBracketsEqualTabQuotes = getWithoutBracketsEqualTab( line ).replace( '"', '' )
-		splitLine = getWithoutBracketsEqualTab( withoutBracketsEqualTabQuotes ).split()
-		firstWord = getFirstWord( splitLine )
-		if firstWord == 'procedureDone':
-			if splitLine[ 1 ].find( procedure ) != - 1:
-				return True
-		elif firstWord == 'extrusionStart':
-			return False
-	return False
+	return getTextHeader( gcodeText ).isProcedureDone( procedure )
 
 def isProcedureDoneOrFileIsEmpty( gcodeText, procedure ):
 	"Determine if the procedure has been done on the gcode text or the file is empty."
@@ -433,11 +542,13 @@ class DistanceFeedRate:
 		self.absoluteDistanceMode = True
 		self.decimalPlacesCarried = 3
 		self.extrusionDistanceFormat = ''
+		self.insetEngine = 'CircleIntersection'
 		self.maximumZDrillFeedRatePerSecond = None
 		self.maximumZFeedRatePerSecond = None
 		self.maximumZTravelFeedRatePerSecond = None
 		self.oldAddedLocation = None
 		self.output = cStringIO.StringIO()
+		self.simplification = 'Channel'
 
 	def addGcodeFromFeedRateThreadZ( self, feedRateMinute, thread, z ):
 		"Add a thread to the output."
@@ -449,10 +560,10 @@ class DistanceFeedRate:
 			print( "thread of only one point in addGcodeFromFeedRateThreadZ in gcodec, this should never happen" )
 			print( thread )
 			return
-		self.addLine( "M101" ) # Turn extruder on.
+		self.emitCommand( 'M101' ) # Turn extruder on.
 		for point in thread[ 1 : ]:
 			self.addGcodeMovementZWithFeedRate( feedRateMinute, point, z )
-		self.addLine( "M103" ) # Turn extruder off.
+		self.emitCommand( 'M103' ) # Turn extruder off.
 
 	def addGcodeFromLoop( self, loop, z ):
 		"Add the gcode loop."
@@ -471,42 +582,42 @@ class DistanceFeedRate:
 			print( "thread of only one point in addGcodeFromThreadZ in gcodec, this should never happen" )
 			print( thread )
 			return
-		self.addLine( "M101" ) # Turn extruder on.
+		self.emitCommand( 'M101' ) # Turn extruder on.
 		for point in thread[ 1 : ]:
 			self.addGcodeMovementZ( point, z )
-		self.addLine( "M103" ) # Turn extruder off.
+		self.emitCommand( 'M103' ) # Turn extruder off.
 
 	def addGcodeMovementZ( self, point, z ):
 		"Add a movement to the output."
-		self.addLine( self.getLinearGcodeMovement( point, z ) )
+		self.emitMove( point.real, point.imag, z )
 
 	def addGcodeMovementZWithFeedRate( self, feedRateMinute, point, z ):
 		"Add a movement to the output."
-		self.addLine( self.getLinearGcodeMovementWithFeedRate( feedRateMinute, point, z ) )
+		self.emitMove( point.real, point.imag, z, feedRateMinute )
 
 	def addLine( self, line ):
-		"Add a line of text and a newline to the output."
+		"Add a line of text and a newline to the output, parsing the line to update the state.  Lines which are built from known values should be added with the emit methods."
 		if len( line ) <= 0:
 			return
-		splitLine = getSplitLineBeforeBracketSemicolon( line )
-		firstWord = getFirstWord( splitLine )
+		gcodeLine = getGcodeLine( line )
+		firstWord = gcodeLine.firstWord
 		if firstWord == 'G90':
 			self.absoluteDistanceMode = True
 		elif firstWord == 'G91':
 			self.absoluteDistanceMode = False
 		elif firstWord == 'G1':
-			feedRateMinute = getFeedRateMinute( None, splitLine )
+			feedRateMinute = gcodeLine.getFeedRateMinute( None )
 			if self.absoluteDistanceMode:
-				location = getLocationFromSplitLine( self.oldAddedLocation, splitLine )
-				line = self.getLineWithZLimitedFeedRate( feedRateMinute, line, location, splitLine )
+				location = gcodeLine.getLocation( self.oldAddedLocation )
+				line = self.getLineWithZLimitedFeedRate( feedRateMinute, line, location, gcodeLine.splitLine )
 				self.oldAddedLocation = location
 			else:
 				if self.oldAddedLocation == None:
 					print( 'Warning: There was no absolute location when the G91 command was parsed, so the absolute location will be set to the origin.' )
 					self.oldAddedLocation = Vector3()
-				self.oldAddedLocation += getLocationFromSplitLine( None, splitLine )
+				self.oldAddedLocation += gcodeLine.getLocation( None )
 		elif firstWord == 'G92':
-			self.oldAddedLocation = getLocationFromSplitLine( self.oldAddedLocation, splitLine )
+			self.oldAddedLocation = gcodeLine.getLocation( self.oldAddedLocation )
 		elif firstWord == 'M101':
 			self.maximumZFeedRatePerSecond = self.maximumZDrillFeedRatePerSecond
 		elif firstWord == 'M103':
@@ -536,7 +647,52 @@ class DistanceFeedRate:
 
 	def addTagBracketedLine( self, tagName, value ):
 		"Add a begin tag, balue and end tag."
-		self.addLine( self.getTagBracketedLine( tagName, value ) )
+		self.emitTag( tagName, value )
+
+	def emitCommand( self, command ):
+		"Add a command without parameters, like M101 or G90, to the output and update the state without parsing the line."
+		if command == 'G90':
+			self.absoluteDistanceMode = True
+		elif command == 'G91':
+			self.absoluteDistanceMode = False
+		elif command == 'M101':
+			self.maximumZFeedRatePerSecond = self.maximumZDrillFeedRatePerSecond
+		elif command == 'M103':
+			self.maximumZFeedRatePerSecond = self.maximumZTravelFeedRatePerSecond
+		elif command == 'G1' or command == 'G92':
+			self.addLine( command )
+			return
+		self.output.write( command + '\n' )
+
+	def emitMove( self, x, y, z, feedRateMinute = None ):
+		"Add a linear movement to the output, formatting it once and updating the added location and the z limited feed rate without parsing the line."
+		xString = self.getRounded( x )
+		yString = self.getRounded( y )
+		zString = self.getRounded( z )
+		line = 'G1 X%s Y%s Z%s' % ( xString, yString, zString )
+		if feedRateMinute != None:
+			feedRateMinute = float( self.getRounded( feedRateMinute ) )
+		if not self.absoluteDistanceMode:
+			if feedRateMinute != None:
+				line += ' F' + self.getRounded( feedRateMinute )
+			self.addLine( line )
+			return
+		location = Vector3( float( xString ), float( yString ), float( zString ) )
+		if location == self.oldAddedLocation:
+			self.output.write( '\n' )
+			return
+		if feedRateMinute != None:
+			if self.oldAddedLocation != None:
+				deltaZ = abs( location.z - self.oldAddedLocation.z )
+				distance = abs( location - self.oldAddedLocation )
+				feedRateMinute = self.getZLimitedFeedRate( deltaZ, distance, feedRateMinute )
+			line += ' F' + self.getRounded( feedRateMinute )
+		self.oldAddedLocation = location
+		self.output.write( line + '\n' )
+
+	def emitTag( self, tagName, value ):
+		"Add a begin tag, value and end tag to the output without parsing the line."
+		self.output.write( self.getTagBracketedLine( tagName, value ) + '\n' )
 
 	def getBoundaryLine( self, location ):
 		"Get boundary gcode line."
@@ -626,7 +782,7 @@ class DistanceFeedRate:
 
 	def getRounded( self, number ):
 		"Get number rounded to the number of carried decimal places as a string."
-		return euclidean.getRoundedToDecimalPlacesString( self.decimalPlacesCarried, number )
+		return euclidean.getFixedPointFormatter( self.decimalPlacesCarried ).getString( number )
 
 	def getTagBracketedLine( self, tagName, value ):
 		"Add a begin tag, balue and end tag."
@@ -646,8 +802,231 @@ class DistanceFeedRate:
 		firstWord = getWithoutBracketsEqualTab( firstWord )
 		if firstWord == 'decimalPlacesCarried':
 			self.decimalPlacesCarried = int( splitLine[ 1 ] )
+		elif firstWord == 'insetEngine':
+			self.insetEngine = splitLine[ 1 ]
 		elif firstWord == 'maximumZDrillFeedRatePerSecond':
 			self.maximumZDrillFeedRatePerSecond = float( splitLine[ 1 ] )
 			self.maximumZFeedRatePerSecond = self.maximumZDrillFeedRatePerSecond
 		elif firstWord == 'maximumZTravelFeedRatePerSecond':
 			self.maximumZTravelFeedRatePerSecond = float( splitLine[ 1 ] )
+		elif firstWord == 'simplification':
+			self.simplification = splitLine[ 1 ].replace( '"', '' )
+
+
+class GcodeLine( object ):
+	"A class to hold a gcode line, its split line before a bracket or semicolon, its first word, its tag name and the coordinates of its words."
+	__slots__ = [ 'coordinateTable', 'firstWord', 'line', 'splitLine', 'tagName' ]
+
+	def __init__( self, line ):
+		"Tokenize the line, the coordinates are parsed the first time they are needed."
+		self.coordinateTable = None
+		self.line = line
+		self.splitLine = getSplitLineBeforeBracketSemicolonFromText( line )
+		self.firstWord = getFirstWord( self.splitLine )
+		self.tagName = ''
+		if self.firstWord.startswith( '(<' ) and not self.firstWord.startswith( '(</' ):
+			self.tagName = self.firstWord[ 2 : ].replace( '>', '' ).replace( ')', '' )
+
+	def __repr__( self ):
+		"Get the string representation of this gcode line."
+		return self.line
+
+	def getCoordinate( self, letter ):
+		"Get the double value of the first word of the letter, or None if there is no word of the letter or if it is not a number."
+		return self.getCoordinateTable().get( letter )
+
+	def getCoordinateTable( self ):
+		"Get the coordinate table, parsing it if it has not been parsed yet."
+		if self.coordinateTable == None:
+			self.coordinateTable = getCoordinateTable( self.splitLine )
+		return self.coordinateTable
+
+	def getFeedRateMinute( self, feedRateMinute ):
+		"Get the feed rate per minute if the line has a feed rate, otherwise the given feed rate."
+		lineFeedRateMinute = self.getCoordinate( 'F' )
+		if lineFeedRateMinute == None:
+			return feedRateMinute
+		return lineFeedRateMinute
+
+	def getLocation( self, oldLocation ):
+		"Get the location of the line, the missing coordinates are those of the old location."
+		return getLocationFromCoordinateTable( self.getCoordinateTable(), oldLocation )
+
+	def getTagValue( self ):
+		"Get the value of the tag, or None if the line is not a tag line or has no value."
+		if self.tagName == '' or len( self.splitLine ) < 2:
+			return None
+		return self.splitLine[ 1 ]
+
+
+class LayerSummary( object ):
+	"A class to hold the line range, times, boundary loops, boundary corners and thread count of a layer."
+	__slots__ = [ 'beginIndex', 'boundaryLoops', 'cornerMaximum', 'cornerMinimum', 'endIndex', 'extrusionTime', 'layerTime', 'threadCount', 'travelTime', 'z' ]
+
+	def __init__( self, beginIndex, z ):
+		"Initialize an empty layer summary, the end index is set when the layer ends."
+		self.beginIndex = beginIndex
+		self.boundaryLoops = []
+		self.cornerMaximum = None
+		self.cornerMinimum = None
+		self.endIndex = beginIndex + 1
+		self.extrusionTime = 0.0
+		self.layerTime = 0.0
+		self.threadCount = 0
+		self.travelTime = 0.0
+		self.z = z
+
+	def __repr__( self ):
+		"Get the string representation of this layer summary."
+		return '%s, %s, %s, %s, %s' % ( self.z, self.beginIndex, self.endIndex, self.layerTime, len( self.boundaryLoops ) )
+
+	def addBoundaryPoint( self, boundaryLoop, location ):
+		"Add the boundary point to the boundary loop and to the corners."
+		boundaryLoop.append( location.dropAxis( 2 ) )
+		if self.cornerMaximum == None:
+			self.cornerMaximum = location
+			self.cornerMinimum = location
+			return
+		self.cornerMaximum = euclidean.getPointMaximum( self.cornerMaximum, location )
+		self.cornerMinimum = euclidean.getPointMinimum( self.cornerMinimum, location )
+
+
+class LayerSummaryTable( object ):
+	"A class to summarize every layer of a gcode text in one pass, so that the layer can be looked up by the index of its layer line instead of scanned ahead."
+	__slots__ = [ 'layerSummaries', 'layerSummaryTable' ]
+
+	def __init__( self ):
+		"Initialize an empty layer summary table."
+		self.layerSummaries = []
+		self.layerSummaryTable = {}
+
+	def __repr__( self ):
+		"Get the string representation of this layer summary table."
+		return str( self.layerSummaries )
+
+	def getFromGcodeLines( self, lines, startIndex, feedRateMinute = None ):
+		"Summarize the layers of the lines from the start index, the moves before a feed rate is known are not timed."
+		boundaryLoop = None
+		extruderActive = False
+		layerSummary = None
+		oldLocation = None
+		for lineIndex in xrange( startIndex, len( lines ) ):
+			gcodeLine = getGcodeLine( lines[ lineIndex ] )
+			firstWord = gcodeLine.firstWord
+			if firstWord == 'G1':
+				location = gcodeLine.getLocation( oldLocation )
+				feedRateMinute = gcodeLine.getFeedRateMinute( feedRateMinute )
+				if layerSummary != None and oldLocation != None and feedRateMinute != None:
+					moveTime = location.distance( oldLocation ) / ( feedRateMinute / 60.0 )
+					layerSummary.layerTime += moveTime
+					if extruderActive:
+						layerSummary.extrusionTime += moveTime
+					else:
+						layerSummary.travelTime += moveTime
+				oldLocation = location
+			elif firstWord == 'M101':
+				extruderActive = True
+				if layerSummary != None:
+					layerSummary.threadCount += 1
+			elif firstWord == 'M103':
+				extruderActive = False
+			elif firstWord == '(<boundaryPoint>':
+				if layerSummary != None:
+					if boundaryLoop == None:
+						boundaryLoop = []
+						layerSummary.boundaryLoops.append( boundaryLoop )
+					layerSummary.addBoundaryPoint( boundaryLoop, gcodeLine.getLocation( None ) )
+			elif firstWord == '(</boundaryPerimeter>)':
+				boundaryLoop = None
+			elif firstWord == '(<layer>':
+				boundaryLoop = None
+				if layerSummary != None:
+					layerSummary.endIndex = lineIndex
+				layerSummary = LayerSummary( lineIndex, float( gcodeLine.splitLine[ 1 ] ) )
+				self.layerSummaries.append( layerSummary )
+				self.layerSummaryTable[ lineIndex ] = layerSummary
+			elif firstWord == '(</layer>)':
+				boundaryLoop = None
+				if layerSummary != None:
+					layerSummary.endIndex = lineIndex
+				layerSummary = None
+		if layerSummary != None:
+			layerSummary.endIndex = len( lines )
+		return self
+
+	def getLayerSummary( self, lineIndex ):
+		"Get the summary of the layer which begins at the line index, or None if no layer begins there."
+		if lineIndex in self.layerSummaryTable:
+			return self.layerSummaryTable[ lineIndex ]
+		return None
+
+
+class TextHeader( object ):
+	"A class to hold the procedures done and the tag values of the header of a gcode or svg text, which ends with the end extruderInitialization tag or the extrusionStart line."
+	__slots__ = [ 'decimalPlacesCarried', 'layerThickness', 'perimeterWidth', 'procedures', 'tagTable' ]
+
+	def __init__( self ):
+		"Initialize an empty header."
+		self.decimalPlacesCarried = None
+		self.layerThickness = None
+		self.perimeterWidth = None
+		self.procedures = []
+		self.tagTable = {}
+
+	def __repr__( self ):
+		"Get the string representation of this text header."
+		return '%s, %s' % ( self.procedures, self.tagTable )
+
+	def getFromText( self, text ):
+		"Parse the header lines of the text, without splitting the lines after the end of the header."
+		lineStart = 0
+		headerEndIndex = getHeaderEndIndex( text, 0 )
+		while headerEndIndex != - 1:
+			lineEnd = text.find( '\n', headerEndIndex )
+			if lineEnd == - 1:
+				lineEnd = len( text )
+			if self.isHeaderEndAfterLines( getTextLines( text[ lineStart : lineEnd ] ) ):
+				return self
+			lineStart = lineEnd
+			headerEndIndex = getHeaderEndIndex( text, lineEnd )
+		self.isHeaderEndAfterLines( getTextLines( text[ lineStart : ] ) )
+		return self
+
+	def isHeaderEndAfterLines( self, lines ):
+		"Parse the lines and determine if the end of the header has been reached."
+		for line in lines:
+			if getFirstWordFromLine( line ) == '(</extruderInitialization>)':
+				return True
+			withoutBracketsEqualTabQuotes = getWithoutBracketsEqualTab( line ).replace( '"', '' )
+			splitLine = getWithoutBracketsEqualTab( withoutBracketsEqualTabQuotes ).split()
+			firstWord = getFirstWord( splitLine )
+			if firstWord == 'extrusionStart':
+				return True
+			if len( splitLine ) > 1:
+				self.parseSplitLine( firstWord, splitLine )
+		return False
+
+	def isProcedureDone( self, procedure ):
+		"Determine if the procedure has been done."
+		for procedureDone in self.procedures:
+			if procedureDone.find( procedure ) != - 1:
+				return True
+		return False
+
+	def parseSplitLine( self, firstWord, splitLine ):
+		"Parse a split header line and store the procedure done or the tag value."
+		if firstWord == 'procedureDone':
+			self.procedures.append( splitLine[ 1 ] )
+			return
+		if firstWord in self.tagTable:
+			return
+		self.tagTable[ firstWord ] = splitLine[ 1 ]
+		try:
+			if firstWord == 'decimalPlacesCarried':
+				self.decimalPlacesCarried = int( splitLine[ 1 ] )
+			elif firstWord == 'layerThickness':
+				self.layerThickness = float( splitLine[ 1 ] )
+			elif firstWord == 'perimeterWidth':
+				self.perimeterWidth = float( splitLine[ 1 ] )
+		except ValueError:
+			pass
@@ -13,6 +13,7 @@ except:
 import __init__
 
 from skeinforge_tools.skeinforge_utilities.vector3 import Vector3
+from skeinforge_tools.skeinforge_utilities import boolean_loops
 from skeinforge_tools.skeinforge_utilities import euclidean
 import math
 
@@ -21,6 +22,10 @@ __author__ = "Enrique Perez (perez_enrique@yahoo.com)"
 __date__ = "$Date: 2008/21/04 $"
 __license__ = "GPL 3.0"
 
+globalCrossCheckAreaTolerance = 0.05
+globalVertexOffsetArcAngle = 0.125 * math.pi
+globalVertexOffsetMiterAngle = 2.0 / 3.0 * math.pi
+
 
 def addCircleIntersectionLoop( circleIntersectionPaths, circleIntersections ):
 	"Add a circle intersection loop."
@@ -91,25 +96,51 @@ def addPointsFromSegment( pointBegin, pointEnd, points, radius, thresholdRatio =
 		points.append( pointBegin )
 		pointBegin += segment
 
-def getAroundsFromLoop( loop, radius, thresholdRatio = 0.9 ):
+def addVertexOffsetJoin( aheadNormal, behindNormal, offset, rawLoop, vertex ):
+	"Add the join between the offset segment behind the vertex and the offset segment ahead of it to the raw offset loop."
+	behindEnd = vertex + offset * behindNormal
+	aheadBegin = vertex + offset * aheadNormal
+	turnAngle = math.atan2( euclidean.getCrossProduct( behindNormal, aheadNormal ), euclidean.getDotProduct( behindNormal, aheadNormal ) )
+	if abs( turnAngle ) > 0.999999 * math.pi:
+		turnAngle = math.pi
+		if offset > 0.0:
+			turnAngle = - math.pi
+	if abs( turnAngle ) <= globalVertexOffsetMiterAngle:
+		rawLoop.append( vertex + offset * ( behindNormal + aheadNormal ) / euclidean.getDotProductPlusOne( behindNormal, aheadNormal ) )
+		return
+	if turnAngle * offset > 0.0:
+		rawLoop.append( behindEnd )
+		rawLoop.append( vertex )
+		rawLoop.append( aheadBegin )
+		return
+	numberOfSteps = int( math.ceil( abs( turnAngle ) / globalVertexOffsetArcAngle ) )
+	stepRotation = euclidean.getUnitPolar( turnAngle / float( numberOfSteps ) )
+	arcRadius = offset * behindNormal
+	rawLoop.append( behindEnd )
+	for stepIndex in xrange( numberOfSteps - 1 ):
+		arcRadius *= stepRotation
+		rawLoop.append( vertex + arcRadius )
+	rawLoop.append( aheadBegin )
+
+def getAroundsFromLoop( loop, radius, simplification, thresholdRatio = 0.9 ):
 	"Get the arounds from the loop, later combine with get arounds."
 	slightlyGreaterThanRadius = 1.01 * abs( radius )
 	points = getPointsFromLoop( loop, slightlyGreaterThanRadius, thresholdRatio )
-	return getAroundsFromPoints( points, radius )
+	return getAroundsFromPoints( points, radius, simplification )
 
-def getAroundsFromLoops( loops, radius, thresholdRatio = 0.9 ):
+def getAroundsFromLoops( loops, radius, simplification, thresholdRatio = 0.9 ):
 	"Get the arounds from the loops."
 	slightlyGreaterThanRadius = 1.01 * abs( radius )
 	points = getPointsFromLoops( loops, slightlyGreaterThanRadius, thresholdRatio )
-	return getAroundsFromPoints( points, radius )
+	return getAroundsFromPoints( points, radius, simplification )
 
-def getAroundsFromPoints( points, radius ):
+def getAroundsFromPoints( points, radius, simplification ):
 	"Get the arounds from the points."
 	arounds = []
 	radius = abs( radius )
 	centers = getCentersFromPoints( points, radius )
 	for center in centers:
-		inset = getSimplifiedInsetFromClockwiseLoop( center, radius )
+		inset = getSimplifiedInsetFromClockwiseLoop( center, radius, simplification )
 		if isLargeSameDirection( inset, center, radius ):
 			arounds.append( inset )
 	return arounds
@@ -157,25 +188,25 @@ def getCircleIntersectionsFromCircleNodes( circleNodes ):
 		return []
 	circleIntersections = []
 	index = 0
-	pixelTable = {}
+	pixelGrid = euclidean.PixelGrid()
 	for circleNode in circleNodes:
-		euclidean.addElementToPixelListFromPoint( circleNode, pixelTable, circleNode.circle )
-	accumulatedCircleNodeTable = {}
+		pixelGrid.addElementFromPoint( circleNode, circleNode.circle )
+	accumulatedCircleNodeGrid = euclidean.PixelGrid()
 	for circleNodeIndex in xrange( len( circleNodes ) ):
 		circleNodeBehind = circleNodes[ circleNodeIndex ]
 		circleNodeIndexMinusOne = circleNodeIndex - 1
 		if circleNodeIndexMinusOne >= 0:
 			circleNodeAdditional = circleNodes[ circleNodeIndexMinusOne ]
-			euclidean.addElementToPixelListFromPoint( circleNodeAdditional, accumulatedCircleNodeTable, 0.5 * circleNodeAdditional.circle )
-		withinNodes = circleNodeBehind.getWithinNodes( accumulatedCircleNodeTable )
+			accumulatedCircleNodeGrid.addElementFromPoint( circleNodeAdditional, 0.5 * circleNodeAdditional.circle )
+		withinNodes = circleNodeBehind.getWithinNodes( accumulatedCircleNodeGrid )
 		for circleNodeAhead in withinNodes:
 			circleIntersectionForward = CircleIntersection( circleNodeAhead, index, circleNodeBehind )
-			if not circleIntersectionForward.isWithinCircles( pixelTable ):
+			if not circleIntersectionForward.isWithinCircles( pixelGrid ):
 				circleIntersections.append( circleIntersectionForward )
 				circleNodeBehind.circleIntersections.append( circleIntersectionForward )
 				index += 1
 			circleIntersectionBackward = CircleIntersection( circleNodeBehind, index, circleNodeAhead )
-			if not circleIntersectionBackward.isWithinCircles( pixelTable ):
+			if not circleIntersectionBackward.isWithinCircles( pixelGrid ):
 				circleIntersections.append( circleIntersectionBackward )
 				circleNodeAhead.circleIntersections.append( circleIntersectionBackward )
 				index += 1
@@ -239,12 +270,19 @@ def getInsetFromClockwiseLoop( loop, radius ):
 		insetLoop.append( getInsetFromClockwiseTriple( aheadAbsolute, behindAbsolute, center, radius ) )
 	return insetLoop
 
-def getInsetLoopsFromLoop( inset, loop, thresholdRatio = 0.9 ):
-	"Get the inset loops, which might overlap."
+def getCircleIntersectionInsetLoopsFromLoop( inset, loop, simplification, thresholdRatio = 0.9 ):
+	"Get the inset loops from the intersections of the circles around the loop, which might overlap."
+	return getInsetLoopsFromArounds( getAroundsFromLoop( loop, inset, simplification, thresholdRatio ), inset, loop )
+
+def getCircleIntersectionInsetSeparateLoopsFromLoops( inset, loops, simplification, thresholdRatio = 0.9 ):
+	"Get the separate inset loops from the intersections of the circles around the loops."
+	return getInsetSeparateLoopsFromArounds( getAroundsFromLoops( loops, abs( inset ), simplification, thresholdRatio ), inset, loops )
+
+def getInsetLoopsFromArounds( arounds, inset, loop ):
+	"Get the inset loops from the arounds which are on the inset side of the loop."
 	isInset = inset > 0
 	insetLoops = []
 	isLoopWiddershins = euclidean.isWiddershins( loop )
-	arounds = getAroundsFromLoop( loop, inset, thresholdRatio )
 	for around in arounds:
 		leftPoint = euclidean.getLeftPoint( around )
 		shouldBeWithin = ( isInset == isLoopWiddershins )
@@ -254,27 +292,44 @@ def getInsetLoopsFromLoop( inset, loop, thresholdRatio = 0.9 ):
 			insetLoops.append( around )
 	return insetLoops
 
-def getInsetLoopsFromLoops( inset, loops ):
-	"Get the inset loops, which might overlap."
+def getInsetLoopsFromLoops( inset, loops, insetEngine, simplification ):
+	"Get the inset loops made by the inset engine, which might overlap."
 	insetLoops = []
 	for loop in loops:
-		insetLoops += getInsetLoopsFromLoop( inset, loop )
+		insetLoops += getInsetLoopsFromLoop( inset, loop, insetEngine, simplification )
 	return insetLoops
 
-def getInsetSeparateLoopsFromLoops( inset, loops, thresholdRatio = 0.9 ):
-	"Get the separate inset loops."
+def getInsetLoopsFromLoop( inset, loop, insetEngine, simplification, thresholdRatio = 0.9 ):
+	"Get the inset loops made by the inset engine, which might overlap."
+	if insetEngine == 'VertexOffset':
+		return getVertexOffsetInsetLoopsFromLoop( inset, loop )
+	insetLoops = getCircleIntersectionInsetLoopsFromLoop( inset, loop, simplification, thresholdRatio )
+	if insetEngine == 'CrossCheck':
+		printInsetCrossCheck( insetLoops, inset, getVertexOffsetInsetLoopsFromLoop( inset, loop ) )
+	return insetLoops
+
+def getInsetSeparateLoopsFromArounds( arounds, inset, loops ):
+	"Get the separate inset loops from the arounds which are on the inset side of the loops."
 	isInset = inset > 0
 	insetSeparateLoops = []
-	radius = abs( inset )
-	arounds = getAroundsFromLoops( loops, radius, thresholdRatio )
+	loopGrid = euclidean.LoopGrid( loops )
 	for around in arounds:
 		leftPoint = euclidean.getLeftPoint( around )
-		if isInset == euclidean.isInFilledRegion( loops, leftPoint ):
+		if isInset == loopGrid.isInFilledRegion( leftPoint ):
 			if isInset:
 				around.reverse()
 			insetSeparateLoops.append( around )
 	return insetSeparateLoops
 
+def getInsetSeparateLoopsFromLoops( inset, loops, insetEngine, simplification, thresholdRatio = 0.9 ):
+	"Get the separate inset loops made by the inset engine."
+	if insetEngine == 'VertexOffset':
+		return getVertexOffsetInsetSeparateLoopsFromLoops( inset, loops )
+	insetSeparateLoops = getCircleIntersectionInsetSeparateLoopsFromLoops( inset, loops, simplification, thresholdRatio )
+	if insetEngine == 'CrossCheck':
+		printInsetCrossCheck( insetSeparateLoops, inset, getVertexOffsetInsetSeparateLoopsFromLoops( inset, loops ) )
+	return insetSeparateLoops
+
 def getIntersectionAtInset( ahead, behind, inset ):
 	"Get circle intersection loop at inset from segment."
 	aheadMinusBehind = 0.5 * ( ahead - behind )
@@ -282,23 +337,23 @@ def getIntersectionAtInset( ahead, behind, inset ):
 	rotatedClockwiseQuarter *= inset / abs( rotatedClockwiseQuarter )
 	return aheadMinusBehind + behind + rotatedClockwiseQuarter
 
-def getLargestInsetLoopFromLoop( loop, radius ):
+def getLargestInsetLoopFromLoop( loop, radius, insetEngine, simplification ):
 	"Get the largest inset loop from the loop."
-	loops = getInsetLoopsFromLoop( radius, loop )
+	loops = getInsetLoopsFromLoop( radius, loop, insetEngine, simplification )
 	return euclidean.getLargestLoop( loops )
 
-def getLargestInsetLoopFromLoopNoMatterWhat( loop, radius ):
+def getLargestInsetLoopFromLoopNoMatterWhat( loop, radius, insetEngine, simplification ):
 	"Get the largest inset loop from the loop, even if the radius has to be shrunk and even if there is still no inset loop."
-	largestInsetLoop = getLargestInsetLoopFromLoop( loop, radius )
+	largestInsetLoop = getLargestInsetLoopFromLoop( loop, radius, insetEngine, simplification )
 	if largestInsetLoop != None:
 		return largestInsetLoop
-	largestInsetLoop = getLargestInsetLoopFromLoop( loop, 0.55 * radius )
+	largestInsetLoop = getLargestInsetLoopFromLoop( loop, 0.55 * radius, insetEngine, simplification )
 	if largestInsetLoop != None:
 		return largestInsetLoop
-	largestInsetLoop = getLargestInsetLoopFromLoop( loop, 0.35 * radius )
+	largestInsetLoop = getLargestInsetLoopFromLoop( loop, 0.35 * radius, insetEngine, simplification )
 	if largestInsetLoop != None:
 		return largestInsetLoop
-	largestInsetLoop = getLargestInsetLoopFromLoop( loop, 0.2 * radius )
+	largestInsetLoop = getLargestInsetLoopFromLoop( loop, 0.2 * radius, insetEngine, simplification )
 	if largestInsetLoop != None:
 		return largestInsetLoop
 	print( 'This should never happen, there should always be a largestInsetLoop in getLargestInsetLoopFromLoopNoMatterWhat in intercircle.' )
@@ -331,9 +386,75 @@ def getPointsFromLoops( loops, radius, thresholdRatio = 0.9 ):
 		points += getPointsFromLoop( loop, radius, thresholdRatio )
 	return points
 
-def getSimplifiedInsetFromClockwiseLoop( loop, radius ):
+def getSimplifiedInsetFromClockwiseLoop( loop, radius, simplification ):
 	"Get loop inset from clockwise loop, out from widdershins loop."
-	return getWithoutIntersections( euclidean.getSimplifiedLoop( getInsetFromClockwiseLoop( loop, radius ), radius ) )
+	return getWithoutIntersections( euclidean.getSimplifiedLoop( getInsetFromClockwiseLoop( loop, radius ), radius, simplification ) )
+
+def getVertexOffsetInsetLoopsFromLoop( inset, loop ):
+	"Get the inset loops from the vertex offset of the loop, which might overlap."
+	if euclidean.isWiddershins( loop ):
+		arounds = getVertexOffsetLoops( [ loop ], inset )
+	else:
+		arounds = getVertexOffsetLoops( [ loop[ : : - 1 ] ], - inset )
+	return getInsetLoopsFromArounds( arounds, inset, loop )
+
+def getVertexOffsetInsetSeparateLoopsFromLoops( inset, loops ):
+	"Get the separate inset loops from the vertex offset of the loops."
+	arounds = getVertexOffsetLoops( boolean_loops.getOrientedLoops( loops ), inset )
+	if inset > 0:
+		for around in arounds:
+			around.reverse()
+	return getInsetSeparateLoopsFromArounds( arounds, inset, loops )
+
+def getVertexOffsetLoops( loops, offset ):
+	"Get the loops around the region which is offset to the left of the loops, the widdershins loops go around the solid and the clockwise loops go around the holes."
+	rawLoops = []
+	for loop in loops:
+		rawLoop = getVertexOffsetRawLoop( loop, offset )
+		if len( rawLoop ) > 2:
+			rawLoops.append( rawLoop )
+	crossingPoints, loopCrossings = boolean_loops.getCrossings( rawLoops )
+	startNumbers = []
+	for loopIndex in xrange( len( rawLoops ) ):
+		startNumbers.append( getVertexOffsetStartWindingNumber( loopCrossings[ loopIndex ], offset, rawLoops, rawLoops[ loopIndex ] ) )
+	offsetLoops = boolean_loops.getLoopsFromCrossings( crossingPoints, False, loopCrossings, rawLoops, startNumbers )
+	largeOffsetLoops = []
+	for offsetLoop in offsetLoops:
+		if euclidean.getMaximumSpan( offsetLoop ) > 2.01 * abs( offset ):
+			largeOffsetLoops.append( offsetLoop )
+	return largeOffsetLoops
+
+def getVertexOffsetRawLoop( loop, offset ):
+	"Get the raw offset loop, in which each segment of the loop is moved to the left by the offset and the segments are joined with miters, arcs or through the vertex."
+	withoutDuplicates = []
+	for pointIndex in xrange( len( loop ) ):
+		point = loop[ pointIndex ]
+		if point != loop[ pointIndex - 1 ]:
+			withoutDuplicates.append( point )
+	rawLoop = []
+	if len( withoutDuplicates ) < 3:
+		return rawLoop
+	for pointIndex in xrange( len( withoutDuplicates ) ):
+		behind = withoutDuplicates[ pointIndex - 1 ]
+		vertex = withoutDuplicates[ pointIndex ]
+		ahead = withoutDuplicates[ ( pointIndex + 1 ) % len( withoutDuplicates ) ]
+		behindNormal = euclidean.getNormalized( vertex - behind ) * 1j
+		aheadNormal = euclidean.getNormalized( ahead - vertex ) * 1j
+		addVertexOffsetJoin( aheadNormal, behindNormal, offset, rawLoop, vertex )
+	withoutDuplicates = []
+	for pointIndex in xrange( len( rawLoop ) ):
+		point = rawLoop[ pointIndex ]
+		if point != rawLoop[ pointIndex - 1 ]:
+			withoutDuplicates.append( point )
+	return withoutDuplicates
+
+def getVertexOffsetStartWindingNumber( crossings, offset, rawLoops, rawLoop ):
+	"Get the winding number of the raw offset loops to the right of the start of the raw loop, before the winding number is changed by the crossings along the raw loop."
+	rightPoint = boolean_loops.getStartPoint( crossings, rawLoop ) - 0.000001 * abs( offset ) * euclidean.getNormalized( rawLoop[ 1 ] - rawLoop[ 0 ] ) * 1j
+	windingNumber = euclidean.getWindingNumberOfLoops( rawLoops, rightPoint )
+	for crossing in crossings:
+		windingNumber -= crossing[ 3 ]
+	return windingNumber
 
 def getWithoutIntersections( loop ):
 	"Get loop without intersections."
@@ -372,6 +493,20 @@ def orbitsAreLarge( loop, temperatureChangeTime ):
 		return False
 	return temperatureChangeTime > 1.5
 
+def printInsetCrossCheck( circleIntersectionLoops, inset, vertexOffsetLoops ):
+	"Print a warning if the area of the vertex offset loops differs from the area of the circle intersection loops by more than the cross check tolerance."
+	circleIntersectionArea = 0.0
+	for circleIntersectionLoop in circleIntersectionLoops:
+		circleIntersectionArea += abs( euclidean.getPolygonArea( circleIntersectionLoop ) )
+	vertexOffsetArea = 0.0
+	for vertexOffsetLoop in vertexOffsetLoops:
+		vertexOffsetArea += abs( euclidean.getPolygonArea( vertexOffsetLoop ) )
+	if abs( vertexOffsetArea - circleIntersectionArea ) <= globalCrossCheckAreaTolerance * max( circleIntersectionArea, vertexOffsetArea ):
+		return
+	print( 'Warning, the vertex offset inset area differs from the circle intersection inset area in intercircle.' )
+	print( 'inset, circleIntersectionArea, vertexOffsetArea' )
+	print( '%s, %s, %s' % ( inset, circleIntersectionArea, vertexOffsetArea ) )
+
 def removeIntersection( loop ):
 	"Get loop without the first intersection."
 	withoutIntersection = []
@@ -422,14 +557,14 @@ class BoundingLoop:
 		self.minimum = euclidean.getMinimumFromPoints( loop )
 		return self
 
-	def getOutsetBoundingLoop( self, outsetDistance ):
+	def getOutsetBoundingLoop( self, outsetDistance, simplification ):
 		"Outset the bounding rectangle and loop by a distance."
 		outsetBoundingLoop = BoundingLoop()
 		outsetBoundingLoop.maximum = self.maximum + complex( outsetDistance, outsetDistance )
 		outsetBoundingLoop.minimum = self.minimum - complex( outsetDistance, outsetDistance )
 		greaterThanOutsetDistance = 1.1 * outsetDistance
 		centers = getCentersFromLoopDirection( True, self.loop, greaterThanOutsetDistance )
-		outsetBoundingLoop.loop = getSimplifiedInsetFromClockwiseLoop( centers[ 0 ], outsetDistance )
+		outsetBoundingLoop.loop = getSimplifiedInsetFromClockwiseLoop( centers[ 0 ], outsetDistance, simplification )
 		return outsetBoundingLoop
 
 	def isEntirelyInsideAnother( self, anotherBoundingLoop ):
@@ -469,8 +604,10 @@ class BoundingLoop:
 		return self.minimum.imag > anotherBoundingLoop.maximum.imag or self.minimum.real > anotherBoundingLoop.maximum.real
 
 
-class CircleIntersection:
+class CircleIntersection( object ):
 	"An intersection of two complex circles."
+	__slots__ = [ 'aheadMinusBehind', 'circleNodeAhead', 'circleNodeBehind', 'demichord', 'index', 'positionRelativeToBehind', 'steppedOn' ]
+
 	def __init__( self, circleNodeAhead, index, circleNodeBehind ):
 		self.aheadMinusBehind = 0.5 * ( circleNodeAhead.circle - circleNodeBehind.circle )
 		self.circleNodeAhead = circleNodeAhead
@@ -521,10 +658,10 @@ class CircleIntersection:
 				print( circleIntersection.circleNodeAhead.circle )
 		return circleIntersectionAhead
 
-	def isWithinCircles( self, pixelTable ):
+	def isWithinCircles( self, pixelGrid ):
 		"Determine if this circle intersection is within the circle node circles."
 		absolutePosition = self.getAbsolutePosition()
-		squareValues = euclidean.getSquareValuesFromPoint( pixelTable, absolutePosition )
+		squareValues = pixelGrid.getSquareValuesFromPoint( absolutePosition )
 		for squareValue in squareValues:
 			if abs( squareValue.circle - absolutePosition ) < 1.0:
 				if squareValue != self.circleNodeAhead and squareValue != self.circleNodeBehind:
@@ -532,8 +669,10 @@ class CircleIntersection:
 		return False
 
 
-class CircleNode:
+class CircleNode( object ):
 	"A complex node of complex circle intersections."
+	__slots__ = [ 'circle', 'circleIntersections', 'index' ]
+
 	def __init__( self, circle, index ):
 		self.circle = circle
 		self.circleIntersections = []
@@ -543,10 +682,10 @@ class CircleNode:
 		"Get the string representation of this CircleNode."
 		return '%s, %s' % ( self.index, self.circle )
 
-	def getWithinNodes( self, pixelTable ):
+	def getWithinNodes( self, pixelGrid ):
 		"Get the nodes this circle node is within."
 		withinNodes = []
-		squareValues = euclidean.getSquareValuesFromPoint( pixelTable, 0.5 * self.circle )
+		squareValues = pixelGrid.getSquareValuesFromPoint( 0.5 * self.circle )
 		for squareValue in squareValues:
 			if abs( self.circle - squareValue.circle ) < 2.0:
 				withinNodes.append( squareValue )
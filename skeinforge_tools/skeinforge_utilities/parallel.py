@@ -0,0 +1,104 @@
+"""
+Parallel is a collection of utilities to run the layer independent computations of the craft plugins in a pool of processes.
+
+The number of jobs is set on the command line of skeinforge.py or craft.py with the --jobs option, for example:
+python skeinforge.py --jobs 8 Screw Holder Bottom.stl
+
+When there is more than one job, the method of the skein is mapped over the layer arguments in a multiprocessing pool.  The pool is forked after the skein has been parsed, so the workers already have the skein and only the layer arguments and the results are passed between the processes.  The results are gathered in layer order, so the output is the same as when there is only one job.  On platforms which can not fork, the method is always called serially.
+
+"""
+
+from __future__ import absolute_import
+#Init has to be imported first because it has code to workaround the python bug where relative imports don't work if the module is imported as a main module.
+import __init__
+
+import copy
+import cStringIO
+import os
+try:
+	import multiprocessing
+except:
+	multiprocessing = None
+
+
+__author__ = "Enrique Perez (perez_enrique@yahoo.com)"
+__date__ = "$Date: 2008/21/04 $"
+__license__ = "GPL 3.0"
+
+globalJobs = 1
+globalMethod = None
+
+
+def getArgumentsSetJobs( arguments ):
+	"Get the arguments without the jobs option and set the number of jobs from the option."
+	global globalJobs
+	argumentsWithoutJobs = []
+	argumentIndex = 0
+	while argumentIndex < len( arguments ):
+		argument = arguments[ argumentIndex ]
+		if argument == '--jobs' and argumentIndex + 1 < len( arguments ):
+			globalJobs = max( 1, int( arguments[ argumentIndex + 1 ] ) )
+			argumentIndex += 1
+		elif argument.startswith( '--jobs=' ):
+			globalJobs = max( 1, int( argument[ len( '--jobs=' ) : ] ) )
+		else:
+			argumentsWithoutJobs.append( argument )
+		argumentIndex += 1
+	return argumentsWithoutJobs
+
+def getBatchSize():
+	"Get the number of arguments to map at a time when the results after an argument may be discarded, which is one when there is only one job."
+	if globalJobs < 2:
+		return 1
+	return 4 * globalJobs
+
+def getGlobalMethodResult( argument ):
+	"Get the result of calling the global method with the argument, this is called in the worker processes."
+	return globalMethod( argument )
+
+def getOutputTexts( skein, methodName, arguments ):
+	"Get the texts which the skein method adds to the output for each argument, the texts are added to the skein output by the caller in order."
+	return getResults( SkeinOutputMethod( methodName, skein ), 'getOutputText', arguments )
+
+def getResults( instance, methodName, arguments ):
+	"Get the results of calling the method of the instance with each argument."
+	return getResultsFromFunction( getattr( instance, methodName ), arguments )
+
+def getResultsFromFunction( function, arguments ):
+	"Get the results of calling the function with each argument, in a pool of processes if there is more than one job."
+	if not isParallel( arguments ):
+		return map( function, arguments )
+	global globalMethod
+	globalMethod = function
+	pool = multiprocessing.Pool( min( globalJobs, len( arguments ) ) )
+	try:
+		results = pool.map( getGlobalMethodResult, arguments, 1 )
+	finally:
+		pool.terminate()
+		globalMethod = None
+	return results
+
+def isParallel( arguments ):
+	"Determine if the arguments should be mapped in a pool of processes."
+	if globalJobs < 2 or len( arguments ) < 2 or multiprocessing == None:
+		return False
+	return hasattr( os, 'fork' )
+
+
+class SkeinOutputMethod:
+	"A class to get the text which a skein method adds to the skein output."
+	def __init__( self, methodName, skein ):
+		"Initialize."
+		self.methodName = methodName
+		self.skein = skein
+
+	def getOutputText( self, argument ):
+		"Get the text which the method adds to the skein output, the distance feed rate of the skein is restored afterwards."
+		distanceFeedRate = self.skein.distanceFeedRate
+		self.skein.distanceFeedRate = copy.copy( distanceFeedRate )
+		self.skein.distanceFeedRate.oldAddedLocation = None
+		self.skein.distanceFeedRate.output = cStringIO.StringIO()
+		getattr( self.skein, self.methodName )( argument )
+		outputText = self.skein.distanceFeedRate.output.getvalue()
+		self.skein.distanceFeedRate = distanceFeedRate
+		return outputText
@@ -0,0 +1,208 @@
+"""
+Path order is a collection of utilities to order paths and loops so that the travel between them is short.
+
+The boxes of the items are held in a closest grid, a path is held by the boxes of its two endpoints and a loop by its bounding box.  The closest remaining item to a point is found by checking the rings of cells around the point, until the next ring is farther than the closest item found so far.  Removed items are taken out of their cells, and when only a quarter of the items remain the grid is remade with bigger cells.  When items are the same distance from the point, the item with the lowest index is the closest, so the order is the same as when every remaining item is checked.
+
+After the paths are put in nearest neighbour order, the order can be improved with a 2-opt pass.  A run of paths is reversed, with each path in the run reversed, when that shortens the travel, until no reversal shortens the travel or the improvement time has passed.
+
+"""
+
+from __future__ import absolute_import
+#Init has to be imported first because it has code to workaround the python bug where relative imports don't work if the module is imported as a main module.
+import __init__
+
+import math
+import time
+
+
+__author__ = "Enrique Perez (perez_enrique@yahoo.com)"
+__date__ = "$Date: 2008/21/04 $"
+__license__ = "GPL 3.0"
+
+globalImprovementSeconds = 0.0
+globalMinimumImprovement = 0.000001
+
+
+def getClosestGridFromPaths( paths ):
+	"Get the closest grid of the endpoints of the paths."
+	boxLists = []
+	for path in paths:
+		boxLists.append( [ ( path[ 0 ], path[ 0 ] ), ( path[ - 1 ], path[ - 1 ] ) ] )
+	return ClosestGrid( boxLists, getEndpointDistance, False, paths )
+
+def getEndpointDistance( point, path ):
+	"Get the distance from the point to the nearest endpoint of the path."
+	return min( abs( point - path[ 0 ] ), abs( point - path[ - 1 ] ) )
+
+def getImprovedPaths( beginPoint, paths, improvementSeconds ):
+	"Get the paths with the runs of paths reversed when that shortens the travel, until no reversal shortens the travel or the improvement seconds have passed."
+	if improvementSeconds <= 0.0 or len( paths ) < 1:
+		return paths
+	endTime = time.time() + improvementSeconds
+	paths = paths[ : ]
+	isImproved = True
+	while isImproved:
+		isImproved = False
+		for beginIndex in xrange( len( paths ) ):
+			if time.time() > endTime:
+				return paths
+			beforePoint = beginPoint
+			if beginIndex > 0:
+				beforePoint = paths[ beginIndex - 1 ][ - 1 ]
+			for endIndex in xrange( beginIndex, len( paths ) ):
+				beginStart = paths[ beginIndex ][ 0 ]
+				endEnd = paths[ endIndex ][ - 1 ]
+				oldLength = abs( beginStart - beforePoint )
+				newLength = abs( endEnd - beforePoint )
+				if endIndex < len( paths ) - 1:
+					afterPoint = paths[ endIndex + 1 ][ 0 ]
+					oldLength += abs( afterPoint - endEnd )
+					newLength += abs( afterPoint - beginStart )
+				if newLength < oldLength - globalMinimumImprovement:
+					reversedPaths = []
+					for pathIndex in xrange( endIndex, beginIndex - 1, - 1 ):
+						reversedPaths.append( paths[ pathIndex ][ : : - 1 ] )
+					paths[ beginIndex : endIndex + 1 ] = reversedPaths
+					isImproved = True
+	return paths
+
+def getPathsInClosestOrder( beginPoint, paths ):
+	"Get the paths in nearest neighbour order, each path is the path with the endpoint closest to the end of the path before it."
+	closestGrid = getClosestGridFromPaths( paths )
+	orderedPaths = []
+	point = beginPoint
+	for path in paths:
+		closestIndex = closestGrid.getClosestIndex( point )
+		closestGrid.removeItem( closestIndex )
+		closestPath = paths[ closestIndex ]
+		orderedPaths.append( closestPath )
+		point = closestPath[ - 1 ]
+	return orderedPaths
+
+
+class ClosestGrid:
+	"A grid of the boxes of the items, to find the closest remaining item to a point."
+	def __init__( self, boxLists, getDistance, isDistanceSquared, items ):
+		"Initialize from the box list of each item, each box is a pair of its minimum and maximum complex."
+		self.boxLists = boxLists
+		self.getDistance = getDistance
+		self.isDistanceSquared = isDistanceSquared
+		self.isRemovedList = [ False ] * len( items )
+		self.items = items
+		self.setCells( range( len( items ) ) )
+
+	def __repr__( self ):
+		"Get the string representation of this closest grid."
+		return '%s, %s' % ( self.cellSize, self.cellTable )
+
+	def getClosestIndex( self, point ):
+		"Get the index of the closest remaining item to the point, or None if no items remain."
+		closestDistance = None
+		closestIndex = None
+		checkedTable = {}
+		x = int( math.floor( point.real / self.cellSize ) )
+		y = int( math.floor( point.imag / self.cellSize ) )
+		ringBegin = max( 0, self.minimumX - x, x - self.maximumX, self.minimumY - y, y - self.maximumY )
+		ringEnd = max( x - self.minimumX, self.maximumX - x, y - self.minimumY, self.maximumY - y )
+		for ring in xrange( ringBegin, ringEnd + 1 ):
+			if closestIndex != None and self.isRingFarther( closestDistance, ring ):
+				return closestIndex
+			for key in self.getRingKeys( ring, x, y ):
+				if key in self.cellTable:
+					for itemIndex in self.cellTable[ key ]:
+						if itemIndex not in checkedTable:
+							checkedTable[ itemIndex ] = None
+							distance = self.getDistance( point, self.items[ itemIndex ] )
+							if closestIndex == None or distance < closestDistance or ( distance == closestDistance and itemIndex < closestIndex ):
+								closestDistance = distance
+								closestIndex = itemIndex
+		return closestIndex
+
+	def getKeys( self, box ):
+		"Get the keys of the cells which the box overlaps."
+		keys = []
+		for x in xrange( int( math.floor( box[ 0 ].real / self.cellSize ) ), int( math.floor( box[ 1 ].real / self.cellSize ) ) + 1 ):
+			for y in xrange( int( math.floor( box[ 0 ].imag / self.cellSize ) ), int( math.floor( box[ 1 ].imag / self.cellSize ) ) + 1 ):
+				keys.append( ( x, y ) )
+		return keys
+
+	def getRingKeys( self, ring, x, y ):
+		"Get the keys of the cells in the ring around the cell at x and y, which are inside the grid."
+		if ring == 0:
+			return [ ( x, y ) ]
+		keys = []
+		for keyX in xrange( max( x - ring, self.minimumX ), min( x + ring, self.maximumX ) + 1 ):
+			for keyY in ( y - ring, y + ring ):
+				if keyY >= self.minimumY and keyY <= self.maximumY:
+					keys.append( ( keyX, keyY ) )
+		for keyY in xrange( max( y - ring + 1, self.minimumY ), min( y + ring - 1, self.maximumY ) + 1 ):
+			for keyX in ( x - ring, x + ring ):
+				if keyX >= self.minimumX and keyX <= self.maximumX:
+					keys.append( ( keyX, keyY ) )
+		return keys
+
+	def isRingFarther( self, distance, ring ):
+		"Determine if every cell in the ring is farther than the distance, the ring distance is one cell short so that a rounded key does not matter."
+		ringDistance = ( ring - 2 ) * self.cellSize
+		if ringDistance <= 0.0:
+			return False
+		if self.isDistanceSquared:
+			return ringDistance * ringDistance > distance
+		return ringDistance > distance
+
+	def removeItem( self, itemIndex ):
+		"Remove the item from its cells, and remake the grid when only a quarter of the items remain."
+		self.isRemovedList[ itemIndex ] = True
+		self.numberOfItems -= 1
+		if self.numberOfItems > 0 and 4 * self.numberOfItems < self.numberOfCellItems:
+			itemIndexes = []
+			for remainingIndex in xrange( len( self.items ) ):
+				if not self.isRemovedList[ remainingIndex ]:
+					itemIndexes.append( remainingIndex )
+			self.setCells( itemIndexes )
+			return
+		for box in self.boxLists[ itemIndex ]:
+			for key in self.getKeys( box ):
+				if key in self.cellTable:
+					cellItemIndexes = self.cellTable[ key ]
+					if itemIndex in cellItemIndexes:
+						cellItemIndexes.remove( itemIndex )
+					if len( cellItemIndexes ) < 1:
+						del self.cellTable[ key ]
+
+	def setCells( self, itemIndexes ):
+		"Set the cell size and put the items in the cells."
+		self.cellTable = {}
+		self.numberOfCellItems = len( itemIndexes )
+		self.numberOfItems = len( itemIndexes )
+		minimum = complex( 999999999.0, 999999999.0 )
+		maximum = complex( - 999999999.0, - 999999999.0 )
+		numberOfBoxes = 0
+		for itemIndex in itemIndexes:
+			for box in self.boxLists[ itemIndex ]:
+				minimum = complex( min( minimum.real, box[ 0 ].real ), min( minimum.imag, box[ 0 ].imag ) )
+				maximum = complex( max( maximum.real, box[ 1 ].real ), max( maximum.imag, box[ 1 ].imag ) )
+				numberOfBoxes += 1
+		self.cellSize = 1.0
+		self.minimumX = 0
+		self.minimumY = 0
+		self.maximumX = - 1
+		self.maximumY = - 1
+		if numberOfBoxes < 1:
+			return
+		extent = maximum - minimum
+		cellSize = max( math.sqrt( extent.real * extent.imag / float( numberOfBoxes ) ), max( extent.real, extent.imag ) / float( numberOfBoxes ) )
+		if cellSize > 0.0:
+			self.cellSize = cellSize
+		self.minimumX = int( math.floor( minimum.real / self.cellSize ) )
+		self.minimumY = int( math.floor( minimum.imag / self.cellSize ) )
+		self.maximumX = int( math.floor( maximum.real / self.cellSize ) )
+		self.maximumY = int( math.floor( maximum.imag / self.cellSize ) )
+		for itemIndex in itemIndexes:
+			for box in self.boxLists[ itemIndex ]:
+				for key in self.getKeys( box ):
+					if key not in self.cellTable:
+						self.cellTable[ key ] = []
+					cellItemIndexes = self.cellTable[ key ]
+					if len( cellItemIndexes ) < 1 or cellItemIndexes[ - 1 ] != itemIndex:
+						cellItemIndexes.append( itemIndex )
@@ -0,0 +1,182 @@
+"""
+Scanline is a collection of utilities to get where loops cross a set of evenly spaced horizontal lines, and to join, intersect and subtract the crossings of each line.
+
+The crossings of all the segments of the loops with all the lines are calculated in one pass, each segment only goes through the lines which it spans.  If numpy is installed, the segments are put in arrays and the crossings of all the lines are calculated and sorted at once by numpy.  A crossing is a tuple of its x and the index of the loop list which it came from, and the crossings of each line are sorted by x with a key.  So the crossings are not objects and the sort does not call a python comparison function for each pair, like the sort of the euclidean x intersection indexes does.  The key sort is stable, so crossings with the same x stay in the order that they were added, and the x intersections are the same as with the x intersection indexes.
+
+The fill, mill and raft get their x intersections from the crossings tables.
+
+"""
+
+from __future__ import absolute_import
+#Init has to be imported first because it has code to workaround the python bug where relative imports don't work if the module is imported as a main module.
+import __init__
+
+import math
+try:
+	import numpy
+except:
+	numpy = None
+
+
+__author__ = "Enrique Perez (perez_enrique@yahoo.com)"
+__date__ = "$Date: 2008/21/04 $"
+__license__ = "GPL 3.0"
+
+
+def addCrossingsFromXIntersections( crossings, index, xIntersections ):
+	"Add the crossings of the x intersections with the index."
+	for xIntersection in xIntersections:
+		crossings.append( ( xIntersection, index ) )
+
+def getCrossingsTable( front, indexedLoopLists, width, numberOfLines = None ):
+	"Get the table of the crossings of the loops with the lines, sorted by x and keyed by the line index.  The y of a line is the front plus the line index times the width, and if there is a number of lines, only the lines from zero to the number of lines are crossed.  The indexed loop lists are pairs of the index of the crossings and the loops."
+	if numpy != None:
+		return getCrossingsTableByArrays( front, indexedLoopLists, width, numberOfLines )
+	crossingsTable = {}
+	frontOverWidth = front / width
+	for index, loops in indexedLoopLists:
+		for loop in loops:
+			for pointIndex in xrange( len( loop ) ):
+				pointBegin = loop[ pointIndex ]
+				pointEnd = loop[ ( pointIndex + 1 ) % len( loop ) ]
+				if pointBegin.imag > pointEnd.imag:
+					pointOriginal = pointBegin
+					pointBegin = pointEnd
+					pointEnd = pointOriginal
+				lineBegin = int( math.ceil( pointBegin.imag / width - frontOverWidth ) )
+				lineEnd = int( math.ceil( pointEnd.imag / width - frontOverWidth ) )
+				if numberOfLines != None:
+					lineBegin = max( 0, lineBegin )
+					lineEnd = min( numberOfLines, lineEnd )
+				if lineEnd > lineBegin:
+					secondMinusFirstComplex = pointEnd - pointBegin
+					secondMinusFirstImaginaryOverReal = secondMinusFirstComplex.real / secondMinusFirstComplex.imag
+					beginRealMinusImaginary = pointBegin.real - pointBegin.imag * secondMinusFirstImaginaryOverReal
+					for line in xrange( lineBegin, lineEnd ):
+						y = front + float( line ) * width
+						crossing = ( y * secondMinusFirstImaginaryOverReal + beginRealMinusImaginary, index )
+						if line in crossingsTable:
+							crossingsTable[ line ].append( crossing )
+						else:
+							crossingsTable[ line ] = [ crossing ]
+	for crossings in crossingsTable.itervalues():
+		crossings.sort( key = getCrossingX )
+	return crossingsTable
+
+def getCrossingsTableByArrays( front, indexedLoopLists, width, numberOfLines ):
+	"Get the table of the crossings of the loops with the lines, with all the segments in arrays so that numpy calculates and sorts all the crossings at once."
+	beginComplexes = []
+	endComplexes = []
+	indexes = []
+	for index, loops in indexedLoopLists:
+		for loop in loops:
+			if len( loop ) > 0:
+				beginComplexes += loop
+				endComplexes += loop[ 1 : ] + loop[ : 1 ]
+				indexes += [ index ] * len( loop )
+	crossingsTable = {}
+	if len( indexes ) < 1:
+		return crossingsTable
+	beginArray = numpy.array( beginComplexes, numpy.complex128 )
+	endArray = numpy.array( endComplexes, numpy.complex128 )
+	isSwapped = beginArray.imag > endArray.imag
+	lowerArray = numpy.where( isSwapped, endArray, beginArray )
+	upperArray = numpy.where( isSwapped, beginArray, endArray )
+	frontOverWidth = front / width
+	lineBeginArray = numpy.ceil( lowerArray.imag / width - frontOverWidth ).astype( numpy.int64 )
+	lineEndArray = numpy.ceil( upperArray.imag / width - frontOverWidth ).astype( numpy.int64 )
+	if numberOfLines != None:
+		lineBeginArray = numpy.maximum( lineBeginArray, 0 )
+		lineEndArray = numpy.minimum( lineEndArray, numberOfLines )
+	lineCountArray = lineEndArray - lineBeginArray
+	isCrossing = lineCountArray > 0
+	if not isCrossing.any():
+		return crossingsTable
+	lowerArray = lowerArray[ isCrossing ]
+	upperArray = upperArray[ isCrossing ]
+	lineBeginArray = lineBeginArray[ isCrossing ]
+	lineCountArray = lineCountArray[ isCrossing ]
+	indexArray = numpy.array( indexes, numpy.int64 )[ isCrossing ]
+	upperMinusLowerArray = upperArray - lowerArray
+	slopeArray = upperMinusLowerArray.real / upperMinusLowerArray.imag
+	interceptArray = lowerArray.real - lowerArray.imag * slopeArray
+	segmentArray = numpy.repeat( numpy.arange( len( lineCountArray ) ), lineCountArray )
+	firstCrossingArray = numpy.cumsum( lineCountArray ) - lineCountArray
+	lineArray = lineBeginArray[ segmentArray ] + numpy.arange( len( segmentArray ) ) - firstCrossingArray[ segmentArray ]
+	yArray = front + lineArray.astype( numpy.float64 ) * width
+	xArray = yArray * slopeArray[ segmentArray ] + interceptArray[ segmentArray ]
+	order = numpy.lexsort( ( xArray, lineArray ) )
+	lineArray = lineArray[ order ]
+	xList = xArray[ order ].tolist()
+	indexList = indexArray[ segmentArray[ order ] ].tolist()
+	lineStarts = numpy.flatnonzero( numpy.diff( lineArray ) ) + 1
+	lineStartList = [ 0 ] + lineStarts.tolist()
+	lineEndList = lineStarts.tolist() + [ len( xList ) ]
+	for lineStart, lineEnd in zip( lineStartList, lineEndList ):
+		crossingsTable[ int( lineArray[ lineStart ] ) ] = zip( xList[ lineStart : lineEnd ], indexList[ lineStart : lineEnd ] )
+	return crossingsTable
+
+def getCrossingX( crossing ):
+	"Get the x of the crossing, in order to sort crossings in ascending order of x."
+	return crossing[ 0 ]
+
+def getDifferenceOfCrossings( crossings ):
+	"Get the x intersections of the region which is inside the crossings with a negative index and outside of the crossings with the other indexes."
+	xIntersections = []
+	fill = False
+	solid = False
+	solidTable = {}
+	crossings.sort( key = getCrossingX )
+	for x, index in crossings:
+		if index >= 0:
+			toggleHashtable( solidTable, index )
+		else:
+			fill = not fill
+		oldSolid = solid
+		solid = ( len( solidTable ) == 0 and fill )
+		if oldSolid != solid:
+			xIntersections.append( x )
+	return xIntersections
+
+def getIndexedLoopLists( loopLists ):
+	"Get the pairs of the index of each loop list and the loop list."
+	indexedLoopLists = []
+	for loopListIndex in xrange( len( loopLists ) ):
+		indexedLoopLists.append( ( loopListIndex, loopLists[ loopListIndex ] ) )
+	return indexedLoopLists
+
+def getIntersectionOfCrossings( crossings, numberOfSolids ):
+	"Get the x intersections of the region which is inside at least the number of solids of the crossings indexes."
+	xIntersections = []
+	solidTable = {}
+	solid = False
+	crossings.sort( key = getCrossingX )
+	for x, index in crossings:
+		toggleHashtable( solidTable, index )
+		oldSolid = solid
+		solid = len( solidTable ) >= numberOfSolids
+		if oldSolid != solid:
+			xIntersections.append( x )
+	return xIntersections
+
+def getJoinOfCrossings( crossings ):
+	"Get the x intersections of the region which is inside any of the crossings indexes."
+	return getIntersectionOfCrossings( crossings, 1 )
+
+def getXIntersectionsTable( loops, width ):
+	"Get the table of the sorted x intersections of the loops with the lines, keyed by the line index.  The y of a line is the line index times the width."
+	crossingsTable = getCrossingsTable( 0.0, [ ( 0, loops ) ], width )
+	xIntersectionsTable = {}
+	for line, crossings in crossingsTable.iteritems():
+		xIntersections = []
+		for x, index in crossings:
+			xIntersections.append( x )
+		xIntersectionsTable[ line ] = xIntersections
+	return xIntersectionsTable
+
+def toggleHashtable( hashtable, key ):
+	"Toggle a hashtable between having and not having a key."
+	if key in hashtable:
+		del hashtable[ key ]
+	else:
+		hashtable[ key ] = None
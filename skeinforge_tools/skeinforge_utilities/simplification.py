@@ -0,0 +1,313 @@
+"""
+Simplification is a collection of utilities to remove the points of loops and paths which are within a tolerance of the segment between the points around them.
+
+Douglas Peucker keeps the point of a span which is farthest from the line through the ends of the span, if it is farther than the tolerance, and then simplifies the spans on either side of it.  The farthest point of a span is found by scanning the span, by numpy if it is installed and the span is long.  On sliced loops the spans are split near their middles so the scans take O(n log n) time, but on a pathological path like a growing spiral each split only peels off one point, so once the scans have covered n log n points the farthest points of the remaining long spans are found on a tree of the convex hulls of the path.  The farthest point from a line is a vertex of the hull, found by a binary search over the hulls of the O(log n) tree nodes covering the span, so the worst case is O(n log n log n) time.
+
+Visvalingam removes the least significant point until every remaining point is farther than the tolerance from the segment between its neighbors.  The points are held in a heap, and when a point is removed only its two neighbors are pushed again, so it takes O(n log n) time in the worst case.  The significance of a point is the area of the triangle of the point and its neighbors over half the base, in other words its distance from the segment between its neighbors, so the tolerance is a distance like for Douglas Peucker.
+
+"""
+
+from __future__ import absolute_import
+#Init has to be imported first because it has code to workaround the python bug where relative imports don't work if the module is imported as a main module.
+import __init__
+
+import heapq
+import math
+try:
+	import numpy
+except:
+	numpy = None
+
+
+__author__ = "Enrique Perez (perez_enrique@yahoo.com)"
+__date__ = "$Date: 2008/21/04 $"
+__license__ = "GPL 3.0"
+
+globalHullLeafSpan = 32
+globalMinimumArraySpan = 64
+globalMinimumHullSpan = 128
+
+
+def getCrossProduct( origin, first, second ):
+	"Get the z component of the cross product of the first and second hull points minus the origin, which is positive if they turn widdershins."
+	return ( first[ 0 ] - origin[ 0 ] ) * ( second[ 1 ] - origin[ 1 ] ) - ( first[ 1 ] - origin[ 1 ] ) * ( second[ 0 ] - origin[ 0 ] )
+
+def getDistanceToLine( begin, end, point ):
+	"Get the distance from the point to the line through the begin and the end, or to the begin if the end is the begin."
+	segment = end - begin
+	pointMinusBegin = point - begin
+	segmentLength = abs( segment )
+	if segmentLength > 0.0:
+		return abs( pointMinusBegin.real * segment.imag - pointMinusBegin.imag * segment.real ) / segmentLength
+	return abs( pointMinusBegin )
+
+def getDistanceToSegment( begin, end, point ):
+	"Get the distance from the point to the segment from the begin to the end."
+	segment = end - begin
+	pointMinusBegin = point - begin
+	segmentLengthSquared = segment.real * segment.real + segment.imag * segment.imag
+	if segmentLengthSquared > 0.0:
+		along = ( pointMinusBegin.real * segment.real + pointMinusBegin.imag * segment.imag ) / segmentLengthSquared
+		along = max( 0.0, min( 1.0, along ) )
+		pointMinusBegin -= along * segment
+	return math.sqrt( pointMinusBegin.real * pointMinusBegin.real + pointMinusBegin.imag * pointMinusBegin.imag )
+
+def getDouglasPeuckerLoop( loop, tolerance ):
+	"Get the loop simplified by Douglas Peucker, the loop is split at the point farthest from the first point and at the point farthest from that, which are both corners of the loop."
+	if len( loop ) < 4:
+		return loop
+	beginIndex = getFarthestIndex( loop[ 0 ], loop )
+	endIndex = getFarthestIndex( loop[ beginIndex ], loop )
+	if endIndex < beginIndex:
+		endIndex += len( loop )
+	loop = loop[ beginIndex : ] + loop[ : beginIndex ]
+	endIndex -= beginIndex
+	simplifiedBegin = getDouglasPeuckerPath( loop[ : endIndex + 1 ], tolerance )
+	simplifiedEnd = getDouglasPeuckerPath( loop[ endIndex : ] + loop[ : 1 ], tolerance )
+	return simplifiedBegin + simplifiedEnd[ 1 : - 1 ]
+
+def getDouglasPeuckerPath( path, tolerance ):
+	"Get the path simplified by Douglas Peucker, the ends of the path are always kept."
+	if len( path ) < 3:
+		return path
+	isArrayPath = numpy != None and len( path ) > globalMinimumArraySpan
+	if isArrayPath:
+		pathArray = numpy.array( path, numpy.complex128 )
+		xArray = pathArray.real
+		yArray = pathArray.imag
+	hullTree = None
+	isKeptList = [ False ] * len( path )
+	isKeptList[ 0 ] = True
+	isKeptList[ - 1 ] = True
+	maximumScanLength = len( path ) * int( math.ceil( math.log( len( path ), 2 ) ) )
+	scanLength = 0
+	spans = [ ( 0, len( path ) - 1 ) ]
+	while len( spans ) > 0:
+		beginIndex, endIndex = spans.pop()
+		if endIndex - beginIndex < 2:
+			continue
+		if hullTree == None and scanLength > maximumScanLength:
+			hullTree = HullTree( path )
+		if hullTree != None and endIndex - beginIndex > globalMinimumHullSpan and path[ beginIndex ] != path[ endIndex ]:
+			farthestIndex, farthestDistance = hullTree.getFarthestIndexDistance( beginIndex, endIndex )
+		else:
+			scanLength += endIndex - beginIndex
+			if isArrayPath and endIndex - beginIndex > globalMinimumArraySpan:
+				farthestIndex, farthestDistance = getFarthestIndexDistanceByArrays( beginIndex, endIndex, xArray, yArray )
+			else:
+				farthestIndex, farthestDistance = getFarthestIndexDistance( beginIndex, endIndex, path )
+		if farthestDistance > tolerance:
+			isKeptList[ farthestIndex ] = True
+			spans.append( ( beginIndex, farthestIndex ) )
+			spans.append( ( farthestIndex, endIndex ) )
+	simplified = []
+	for pointIndex in xrange( len( path ) ):
+		if isKeptList[ pointIndex ]:
+			simplified.append( path[ pointIndex ] )
+	return simplified
+
+def getExtremeHullPoint( hull, directionX, directionY ):
+	"Get the point of the hull which is farthest in the direction.  Along an upper hull when the direction points up, or along a lower hull when it points down, the distance in the direction rises then falls, so the point is found by a binary search."
+	lowIndex = 0
+	highIndex = len( hull ) - 1
+	while lowIndex < highIndex:
+		middleIndex = ( lowIndex + highIndex ) >> 1
+		middle = hull[ middleIndex ]
+		after = hull[ middleIndex + 1 ]
+		if ( after[ 0 ] - middle[ 0 ] ) * directionX + ( after[ 1 ] - middle[ 1 ] ) * directionY > 0.0:
+			lowIndex = middleIndex + 1
+		else:
+			highIndex = middleIndex
+	return hull[ lowIndex ]
+
+def getFarthestIndex( point, points ):
+	"Get the index of the point of the points which is farthest from the point."
+	farthestIndex = 0
+	farthestDistanceSquared = - 1.0
+	for pointIndex in xrange( len( points ) ):
+		pointMinusPoint = points[ pointIndex ] - point
+		distanceSquared = pointMinusPoint.real * pointMinusPoint.real + pointMinusPoint.imag * pointMinusPoint.imag
+		if distanceSquared > farthestDistanceSquared:
+			farthestDistanceSquared = distanceSquared
+			farthestIndex = pointIndex
+	return farthestIndex
+
+def getFarthestIndexDistance( beginIndex, endIndex, path ):
+	"Get the index of the point between the begin and end index which is farthest from the line through them, and its distance."
+	begin = path[ beginIndex ]
+	end = path[ endIndex ]
+	farthestIndex = beginIndex + 1
+	farthestDistance = - 1.0
+	for pointIndex in xrange( beginIndex + 1, endIndex ):
+		distance = getDistanceToLine( begin, end, path[ pointIndex ] )
+		if distance > farthestDistance:
+			farthestDistance = distance
+			farthestIndex = pointIndex
+	return farthestIndex, farthestDistance
+
+def getFarthestIndexDistanceByArrays( beginIndex, endIndex, xArray, yArray ):
+	"Get the index of the point between the begin and end index which is farthest from the line through them, and its distance, calculated for all the points at once by numpy."
+	beginX = xArray[ beginIndex ]
+	beginY = yArray[ beginIndex ]
+	segmentX = xArray[ endIndex ] - beginX
+	segmentY = yArray[ endIndex ] - beginY
+	pointMinusBeginXArray = xArray[ beginIndex + 1 : endIndex ] - beginX
+	pointMinusBeginYArray = yArray[ beginIndex + 1 : endIndex ] - beginY
+	segmentLength = math.sqrt( segmentX * segmentX + segmentY * segmentY )
+	if segmentLength > 0.0:
+		distanceArray = numpy.abs( pointMinusBeginXArray * segmentY - pointMinusBeginYArray * segmentX ) / segmentLength
+	else:
+		distanceArray = numpy.sqrt( pointMinusBeginXArray * pointMinusBeginXArray + pointMinusBeginYArray * pointMinusBeginYArray )
+	farthestOffset = int( numpy.argmax( distanceArray ) )
+	return beginIndex + 1 + farthestOffset, float( distanceArray[ farthestOffset ] )
+
+def getLowerHull( sortedPoints ):
+	"Get the lower convex hull of the points, which are sorted by x and then y."
+	lowerHull = []
+	for point in sortedPoints:
+		while len( lowerHull ) > 1 and getCrossProduct( lowerHull[ - 2 ], lowerHull[ - 1 ], point ) <= 0.0:
+			lowerHull.pop()
+		lowerHull.append( point )
+	return lowerHull
+
+def getSimplifiedLoop( algorithm, loop, tolerance ):
+	"Get the loop simplified by the algorithm, which is DouglasPeucker or Visvalingam."
+	if algorithm == 'Visvalingam':
+		return getVisvalingamLoop( loop, tolerance )
+	return getDouglasPeuckerLoop( loop, tolerance )
+
+def getSimplifiedPath( algorithm, path, tolerance ):
+	"Get the path simplified by the algorithm, which is DouglasPeucker or Visvalingam."
+	if algorithm == 'Visvalingam':
+		return getVisvalingamPath( path, tolerance )
+	return getDouglasPeuckerPath( path, tolerance )
+
+def getUpperHull( sortedPoints ):
+	"Get the upper convex hull of the points, which are sorted by x and then y."
+	upperHull = []
+	for point in sortedPoints:
+		while len( upperHull ) > 1 and getCrossProduct( upperHull[ - 2 ], upperHull[ - 1 ], point ) >= 0.0:
+			upperHull.pop()
+		upperHull.append( point )
+	return upperHull
+
+def getVisvalingam( isLoop, points, tolerance ):
+	"Get the points with the least significant points removed, until the remaining points are farther than the tolerance from the segment between their neighbors."
+	numberOfPoints = len( points )
+	minimumNumberOfPoints = 2
+	if isLoop:
+		minimumNumberOfPoints = 3
+	if numberOfPoints <= minimumNumberOfPoints:
+		return points
+	nextIndexes = range( 1, numberOfPoints + 1 )
+	previousIndexes = range( - 1, numberOfPoints - 1 )
+	if isLoop:
+		nextIndexes[ - 1 ] = 0
+		previousIndexes[ 0 ] = numberOfPoints - 1
+	isRemovedList = [ False ] * numberOfPoints
+	versions = [ 0 ] * numberOfPoints
+	heap = []
+	for pointIndex in xrange( numberOfPoints ):
+		if isLoop or ( pointIndex > 0 and pointIndex < numberOfPoints - 1 ):
+			significance = getDistanceToSegment( points[ previousIndexes[ pointIndex ] ], points[ nextIndexes[ pointIndex ] ], points[ pointIndex ] )
+			heap.append( ( significance, pointIndex, 0 ) )
+	heapq.heapify( heap )
+	numberOfRemainingPoints = numberOfPoints
+	while len( heap ) > 0 and numberOfRemainingPoints > minimumNumberOfPoints:
+		significance, pointIndex, version = heapq.heappop( heap )
+		if isRemovedList[ pointIndex ] or version != versions[ pointIndex ]:
+			continue
+		if significance > tolerance:
+			break
+		isRemovedList[ pointIndex ] = True
+		numberOfRemainingPoints -= 1
+		previousIndex = previousIndexes[ pointIndex ]
+		nextIndex = nextIndexes[ pointIndex ]
+		nextIndexes[ previousIndex ] = nextIndex
+		previousIndexes[ nextIndex ] = previousIndex
+		for neighborIndex in ( previousIndex, nextIndex ):
+			if isLoop or ( neighborIndex > 0 and neighborIndex < numberOfPoints - 1 ):
+				versions[ neighborIndex ] += 1
+				significance = getDistanceToSegment( points[ previousIndexes[ neighborIndex ] ], points[ nextIndexes[ neighborIndex ] ], points[ neighborIndex ] )
+				heapq.heappush( heap, ( significance, neighborIndex, versions[ neighborIndex ] ) )
+	simplified = []
+	for pointIndex in xrange( numberOfPoints ):
+		if not isRemovedList[ pointIndex ]:
+			simplified.append( points[ pointIndex ] )
+	return simplified
+
+def getVisvalingamLoop( loop, tolerance ):
+	"Get the loop simplified by Visvalingam."
+	return getVisvalingam( True, loop, tolerance )
+
+def getVisvalingamPath( path, tolerance ):
+	"Get the path simplified by Visvalingam, the ends of the path are always kept."
+	return getVisvalingam( False, path, tolerance )
+
+
+class HullTree:
+	"A tree of the lower and upper convex hulls of the spans of a path, to find the point of a span which is farthest from a line."
+	def __init__( self, path ):
+		"Build the hulls of the leaf spans, then the hulls of each pair of nodes up to the root."
+		self.points = []
+		for pointIndex in xrange( len( path ) ):
+			point = path[ pointIndex ]
+			self.points.append( ( point.real, point.imag, pointIndex ) )
+		level = []
+		for leafBeginIndex in xrange( 0, len( self.points ), globalHullLeafSpan ):
+			sortedPoints = sorted( self.points[ leafBeginIndex : leafBeginIndex + globalHullLeafSpan ] )
+			level.append( ( getLowerHull( sortedPoints ), getUpperHull( sortedPoints ) ) )
+		self.levels = [ level ]
+		while len( level ) > 1:
+			parentLevel = []
+			for nodeIndex in xrange( 0, len( level ) - 1, 2 ):
+				lowerHull, upperHull = level[ nodeIndex ]
+				nextLowerHull, nextUpperHull = level[ nodeIndex + 1 ]
+				parentLevel.append( ( getLowerHull( sorted( lowerHull + nextLowerHull ) ), getUpperHull( sorted( upperHull + nextUpperHull ) ) ) )
+			if len( level ) % 2 == 1:
+				parentLevel.append( level[ - 1 ] )
+			self.levels.append( parentLevel )
+			level = parentLevel
+
+	def addExtremePoints( self, extremePoints, levelIndex, nodeIndex, normalX, normalY ):
+		"Add the points of the node which are farthest on either side of the line with the normal."
+		lowerHull, upperHull = self.levels[ levelIndex ][ nodeIndex ]
+		if normalY == 0.0:
+			extremePoints.append( upperHull[ 0 ] )
+			extremePoints.append( upperHull[ - 1 ] )
+		elif normalY > 0.0:
+			extremePoints.append( getExtremeHullPoint( upperHull, normalX, normalY ) )
+			extremePoints.append( getExtremeHullPoint( lowerHull, - normalX, - normalY ) )
+		else:
+			extremePoints.append( getExtremeHullPoint( lowerHull, normalX, normalY ) )
+			extremePoints.append( getExtremeHullPoint( upperHull, - normalX, - normalY ) )
+
+	def getFarthestIndexDistance( self, beginIndex, endIndex ):
+		"Get the index of the point between the begin and end index which is farthest from the line through them, and its distance.  The end must not be the begin."
+		begin = self.points[ beginIndex ]
+		end = self.points[ endIndex ]
+		normalX = begin[ 1 ] - end[ 1 ]
+		normalY = end[ 0 ] - begin[ 0 ]
+		firstLeafIndex = ( beginIndex + 1 ) // globalHullLeafSpan + 1
+		lastLeafIndex = ( endIndex - 1 ) // globalHullLeafSpan - 1
+		extremePoints = self.points[ beginIndex + 1 : min( firstLeafIndex * globalHullLeafSpan, endIndex ) ]
+		extremePoints += self.points[ max( ( lastLeafIndex + 1 ) * globalHullLeafSpan, firstLeafIndex * globalHullLeafSpan ) : endIndex ]
+		levelIndex = 0
+		while firstLeafIndex <= lastLeafIndex:
+			if firstLeafIndex % 2 == 1:
+				self.addExtremePoints( extremePoints, levelIndex, firstLeafIndex, normalX, normalY )
+				firstLeafIndex += 1
+			if lastLeafIndex % 2 == 0:
+				self.addExtremePoints( extremePoints, levelIndex, lastLeafIndex, normalX, normalY )
+				lastLeafIndex -= 1
+			firstLeafIndex >>= 1
+			lastLeafIndex >>= 1
+			levelIndex += 1
+		farthestIndex = beginIndex + 1
+		farthestProduct = - 1.0
+		for extremePoint in extremePoints:
+			product = abs( ( extremePoint[ 0 ] - begin[ 0 ] ) * normalX + ( extremePoint[ 1 ] - begin[ 1 ] ) * normalY )
+			if product > farthestProduct or ( product == farthestProduct and extremePoint[ 2 ] < farthestIndex ):
+				farthestProduct = product
+				farthestIndex = extremePoint[ 2 ]
+		return farthestIndex, farthestProduct / math.sqrt( normalX * normalX + normalY * normalY )
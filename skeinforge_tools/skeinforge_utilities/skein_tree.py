@@ -0,0 +1,433 @@
+"""
+Skein tree is a structured, layer indexed representation of a gcode skein, which the craft plugins can read and change directly instead of reparsing the gcode text.
+
+The tree has the header lines up to and including the extrusion start, the extrusion elements and the footer lines from the extrusion end on.  The extrusion elements are the layers, the surrounding loops, the boundary perimeters, the perimeters, the loops, the threads and the moves.  The tag lines are kept in place and are also indexed as attributes.
+
+A craft plugin which has a getCraftedTree function is given the tree by consecution, the other craft plugins are given the text from getText, so that the tree is only turned back into text when a text plugin or the export is reached.  When the stage cache is active, the output of each tree plugin is also turned into text, so that it can be written to the cache like the output of the text plugins.  So far fill, temperature and chamber have getCraftedTree.  The other craft plugins, including raft, comb and clip which parse the most, still parse and write text, and in the extrusion sequence fill is followed by multiply, temperature by raft and chamber by tower, so the tree is made and turned back into text around each of them.  Moving a run of neighboring plugins onto the tree is what would keep the skein out of text between them.
+
+Consecution makes the tree as a stream, the header is parsed at once and the extrusion elements are parsed one layer at a time as they are read, so a chain of tree plugins holds only the layers it is working on.  A plugin which changes one layer at a time wraps the elements in its own generator, a plugin which needs the neighboring layers gets them from getLayerWindowGenerator with the number of layers it needs below and above, and a plugin which needs all the layers at once calls getLayers, which reads the rest of the stream.  Fill gets the layers up to the solid surface thickness above each layer from the layer window and lets go of the layers below once no later layer is surrounded by them, so it holds only those layers while it fills a batch of layers in the process pool.  Raft still works on text, because it makes the raft from the bounds of all the layers and the supports of each layer from all the layers above it.  Since the plugins around fill work on text, the whole skein is still held as text between them, so the stream lowers the layers which fill holds rather than the peak memory of the chain.
+
+"""
+
+from __future__ import absolute_import
+#Init has to be imported first because it has code to workaround the python bug where relative imports don't work if the module is imported as a main module.
+import __init__
+
+from skeinforge_tools.skeinforge_utilities import euclidean
+from skeinforge_tools.skeinforge_utilities import gcodec
+import collections
+import cStringIO
+import itertools
+
+
+__author__ = "Enrique Perez (perez_enrique@yahoo.com)"
+__date__ = "$Date: 2008/21/04 $"
+__license__ = "GPL 3.0"
+
+globalBeginEndWordTable = {
+	'(<boundaryPerimeter>)' : '(</boundaryPerimeter>)',
+	'(<layer>' : '(</layer>)',
+	'(<loop>' : '(</loop>)',
+	'(<perimeter>' : '(</perimeter>)',
+	'(<surroundingLoop>)' : '(</surroundingLoop>)' }
+globalEndWords = globalBeginEndWordTable.values()
+
+
+def addLinesToOutput( lines, output ):
+	"Add the lines and newlines to the output."
+	for line in lines:
+		output.write( line + '\n' )
+
+def addTagToTable( firstWord, splitLine, tagTable ):
+	"Add the tag value to the tag table if the first word is a tag."
+	tagName = getTagName( firstWord )
+	if tagName == '' or len( splitLine ) < 2:
+		return
+	if tagName not in tagTable:
+		tagTable[ tagName ] = []
+	tagTable[ tagName ].append( splitLine[ 1 ] )
+
+def getBlockFromBeginWord( firstWord, line, splitLine ):
+	"Get the block which is begun by the first word, or None if the first word does not begin a block."
+	if firstWord == '(<layer>':
+		return SkeinLayer( line, splitLine )
+	if firstWord in globalBeginEndWordTable:
+		return SkeinBlock( line, firstWord )
+	return None
+
+def getLayerWindowGenerator( elements, numberOfLayersBelow, numberOfLayersAbove ):
+	"Get a generator of ( element, layersBelow, layersAbove ) tuples, the windows hold up to the number of layers below and above the element."
+	layersBelow = collections.deque()
+	pendingElements = collections.deque()
+	pendingLayers = collections.deque()
+	for element in elements:
+		pendingElements.append( element )
+		if element.__class__ == SkeinLayer:
+			pendingLayers.append( element )
+		while len( pendingLayers ) > numberOfLayersAbove:
+			for window in getWindowsFromPendingElements( layersBelow, numberOfLayersBelow, pendingElements, pendingLayers ):
+				yield window
+	while len( pendingElements ) > 0:
+		for window in getWindowsFromPendingElements( layersBelow, numberOfLayersBelow, pendingElements, pendingLayers ):
+			yield window
+
+def getSkeinStreamFromText( gcodeText ):
+	"Get a skein tree whose extrusion elements are read one layer at a time from gcode text."
+	return SkeinTree().getStreamFromText( gcodeText )
+
+def getSkeinTreeFromText( gcodeText ):
+	"Get a skein tree from gcode text."
+	return SkeinTree().getFromText( gcodeText )
+
+def getTagName( firstWord ):
+	"Get the tag name from the first word of a tag line, or an empty string if the word is not a tag."
+	if not firstWord.startswith( '(<' ) or firstWord.startswith( '(</' ):
+		return ''
+	return firstWord[ 2 : ].replace( '>', '' ).replace( ')', '' )
+
+def getTextFromSkeinTreeOrText( skeinTree, text ):
+	"Get the text of the skein tree if it exists, otherwise get the text."
+	if skeinTree == None:
+		return text
+	return skeinTree.getText()
+
+def getTextLineGenerator( text ):
+	"Get a generator of the lines of a text, so that the lines are not all split at once."
+	if text.find( '\r' ) != - 1:
+		for line in gcodec.getTextLines( text ):
+			yield line
+		return
+	for line in cStringIO.StringIO( text ):
+		yield line.rstrip( '\n' )
+
+def getWindowsFromPendingElements( layersBelow, numberOfLayersBelow, pendingElements, pendingLayers ):
+	"Get the windows of the pending elements up to and including the first pending layer, or of all the pending elements if there is no pending layer."
+	windows = []
+	while len( pendingElements ) > 0:
+		element = pendingElements.popleft()
+		if element.__class__ != SkeinLayer:
+			windows.append( ( element, [], [] ) )
+		else:
+			pendingLayers.popleft()
+			windows.append( ( element, list( layersBelow ), list( pendingLayers ) ) )
+			layersBelow.append( element )
+			if len( layersBelow ) > numberOfLayersBelow:
+				layersBelow.popleft()
+			return windows
+	return windows
+
+def popBlocks( blocks, endWord ):
+	"Pop the open blocks above the block which is ended by the end word, return False if no open block is ended by the end word."
+	for blockIndex in xrange( len( blocks ) - 1, - 1, - 1 ):
+		if blocks[ blockIndex ].endWord == endWord:
+			del blocks[ blockIndex + 1 : ]
+			return True
+	return False
+
+
+class Move:
+	"A class to hold a linear move line, its location and feed rate."
+	def __init__( self, line, location, feedRateMinute ):
+		"Initialize."
+		self.feedRateMinute = feedRateMinute
+		self.line = line
+		self.location = location
+
+	def __repr__( self ):
+		"Get the string representation of this move."
+		return '%s, %s' % ( self.location, self.feedRateMinute )
+
+	def addToLines( self, decimalPlacesCarried, lines ):
+		"Add the line of this move to the lines."
+		lines.append( self.getLine( decimalPlacesCarried ) )
+
+	def getLine( self, decimalPlacesCarried ):
+		"Get the line of this move, formatting a new line if the move was changed."
+		if self.line != None:
+			return self.line
+		location = self.location
+		line = 'G1 X%s Y%s Z%s' % ( euclidean.getRoundedToDecimalPlacesString( decimalPlacesCarried, location.x ), euclidean.getRoundedToDecimalPlacesString( decimalPlacesCarried, location.y ), euclidean.getRoundedToDecimalPlacesString( decimalPlacesCarried, location.z ) )
+		if self.feedRateMinute == None:
+			return line
+		return line + ' F' + euclidean.getRoundedToDecimalPlacesString( decimalPlacesCarried, self.feedRateMinute )
+
+	def setLocationFeedRate( self, location, feedRateMinute ):
+		"Set the location and feed rate, the line will be formatted when the text is gotten."
+		self.feedRateMinute = feedRateMinute
+		self.line = None
+		self.location = location
+
+
+class SkeinBlock:
+	"A class to hold a block of elements, like a surrounding loop, a perimeter or a thread."
+	def __init__( self, beginLine, beginWord ):
+		"Initialize."
+		self.beginLine = beginLine
+		self.beginWord = beginWord
+		self.elements = []
+		self.endLine = None
+		self.endWord = globalBeginEndWordTable[ beginWord ]
+		self.tagTable = {}
+
+	def __repr__( self ):
+		"Get the string representation of this block."
+		return '%s, %s' % ( self.beginWord, self.elements )
+
+	def addToLines( self, decimalPlacesCarried, lines ):
+		"Add the lines of this block to the lines."
+		if self.beginLine != None:
+			lines.append( self.beginLine )
+		for element in self.elements:
+			if element.__class__ == str:
+				lines.append( element )
+			else:
+				element.addToLines( decimalPlacesCarried, lines )
+		if self.endLine != None:
+			lines.append( self.endLine )
+
+	def getBlocks( self, beginWord ):
+		"Get the blocks inside this block which are begun by the begin word."
+		blocks = []
+		for element in self.elements:
+			if isinstance( element, SkeinBlock ):
+				if element.beginWord == beginWord:
+					blocks.append( element )
+				blocks += element.getBlocks( beginWord )
+		return blocks
+
+	def getMoves( self ):
+		"Get all the moves inside this block."
+		moves = []
+		for element in self.elements:
+			if element.__class__ == Move:
+				moves.append( element )
+			elif isinstance( element, SkeinBlock ):
+				moves += element.getMoves()
+		return moves
+
+	def getTagValue( self, tagName ):
+		"Get the value of the tag in this block, or None if the tag is not in this block."
+		if tagName in self.tagTable:
+			return self.tagTable[ tagName ][ - 1 ]
+		return None
+
+	def getTagValues( self, tagName ):
+		"Get all the values of the tag in this block."
+		if tagName in self.tagTable:
+			return self.tagTable[ tagName ]
+		return []
+
+
+class SkeinLayer( SkeinBlock ):
+	"A class to hold a layer block."
+	def __init__( self, beginLine, splitLine ):
+		"Initialize."
+		SkeinBlock.__init__( self, beginLine, '(<layer>' )
+		self.z = float( splitLine[ 1 ] )
+
+	def __repr__( self ):
+		"Get the string representation of this layer."
+		return '%s, %s' % ( self.z, self.elements )
+
+	def getRotation( self ):
+		"Get the bridge rotation of this layer, or None if the layer is not a bridge layer."
+		bridgeRotation = self.getTagValue( 'bridgeRotation' )
+		if bridgeRotation == None:
+			return None
+		return complex( bridgeRotation.replace( '(', '' ).replace( ')', '' ) )
+
+
+class SkeinThread( SkeinBlock ):
+	"A class to hold an extruded thread, which is begun by an extruder on command and ended by an extruder off command."
+	def __init__( self, beginLine ):
+		"Initialize."
+		self.beginLine = beginLine
+		self.beginWord = 'M101'
+		self.elements = []
+		self.endLine = None
+		self.endWord = 'M103'
+		self.tagTable = {}
+
+
+class SkeinTree( SkeinBlock ):
+	"A class to hold a skein tree."
+	def __init__( self ):
+		"Initialize."
+		self.beginLine = None
+		self.beginWord = ''
+		self.decimalPlacesCarried = 3
+		self.elements = []
+		self.endLine = None
+		self.endWord = ''
+		self.footerLines = []
+		self.headerLines = []
+		self.headerTagTable = {}
+		self.layers = []
+		self.procedures = []
+		self.tagTable = {}
+
+	def __repr__( self ):
+		"Get the string representation of this skein tree."
+		return '%s, %s' % ( self.procedures, self.layers )
+
+	def addExtrusionBeginningLines( self, lines ):
+		"Add the lines to the beginning of the extrusion elements."
+		if self.isStreaming():
+			self.elements = itertools.chain( lines, self.elements )
+		else:
+			self.elements = lines + self.elements
+
+	def addHeaderLinesBeforeFirstWord( self, firstWord, lines ):
+		"Add the lines to the header before the first line which begins with the first word."
+		for headerLineIndex in xrange( len( self.headerLines ) ):
+			if gcodec.getFirstWordFromLine( self.headerLines[ headerLineIndex ] ) == firstWord:
+				self.headerLines = self.headerLines[ : headerLineIndex ] + lines + self.headerLines[ headerLineIndex : ]
+				for line in lines:
+					self.parseHeaderLine( line, gcodec.getSplitLineBeforeBracketSemicolon( line ) )
+				return
+
+	def addProcedureDone( self, procedure ):
+		"Add the procedure done line before the extruder initialization end."
+		self.addHeaderLinesBeforeFirstWord( '(</extruderInitialization>)', [ '(<procedureDone> %s </procedureDone>)' % procedure ] )
+
+	def getBlocks( self, beginWord ):
+		"Get the blocks inside the skein tree which are begun by the begin word."
+		self.getElements()
+		return SkeinBlock.getBlocks( self, beginWord )
+
+	def getElements( self ):
+		"Get the extrusion elements, reading the rest of the stream if the skein tree is streaming."
+		if self.isStreaming():
+			self.elements = list( self.elements )
+			self.layers = []
+			for element in self.elements:
+				if element.__class__ == SkeinLayer:
+					self.layers.append( element )
+		return self.elements
+
+	def getExtrusionElementGenerator( self, lines ):
+		"Get a generator of the top level extrusion elements, each is yielded when it is complete.  The lines from the extrusion end on are the footer lines."
+		blocks = []
+		feedRateMinute = None
+		location = None
+		for line in lines:
+			if len( line ) > 0:
+				gcodeLine = gcodec.getGcodeLine( line )
+				splitLine = gcodeLine.splitLine
+				firstWord = gcodeLine.firstWord
+				element = None
+				if len( self.footerLines ) > 0 or firstWord == '(</extrusion>)':
+					self.footerLines.append( line )
+				elif firstWord == 'G1':
+					location = gcodeLine.getLocation( location )
+					feedRateMinute = gcodeLine.getFeedRateMinute( feedRateMinute )
+					element = Move( line, location, feedRateMinute )
+				elif firstWord == 'M101':
+					element = SkeinThread( line )
+				elif firstWord == 'M103' and len( blocks ) > 0 and blocks[ - 1 ].endWord == 'M103':
+					blocks.pop().endLine = line
+					if len( blocks ) == 0:
+						yield topBlock
+				elif firstWord in globalBeginEndWordTable:
+					element = getBlockFromBeginWord( firstWord, line, splitLine )
+				elif firstWord in globalEndWords and popBlocks( blocks, firstWord ):
+					blocks.pop().endLine = line
+					if len( blocks ) == 0:
+						yield topBlock
+				else:
+					element = line
+					tagTable = self.tagTable
+					if len( blocks ) > 0:
+						tagTable = blocks[ - 1 ].tagTable
+					addTagToTable( firstWord, splitLine, tagTable )
+				if element != None:
+					if len( blocks ) > 0:
+						blocks[ - 1 ].elements.append( element )
+					elif isinstance( element, SkeinBlock ):
+						topBlock = element
+					else:
+						yield element
+					if isinstance( element, SkeinBlock ):
+						blocks.append( element )
+		if len( blocks ) > 0:
+			yield topBlock
+
+	def getFromText( self, gcodeText ):
+		"Parse the gcode text into the skein tree."
+		self.getStreamFromText( gcodeText )
+		self.getElements()
+		return self
+
+	def getHeaderTagValue( self, tagName ):
+		"Get the value of the header tag, or None if the tag is not in the header."
+		if tagName in self.headerTagTable:
+			return self.headerTagTable[ tagName ]
+		return None
+
+	def getLayers( self ):
+		"Get the layers, reading the rest of the stream if the skein tree is streaming."
+		self.getElements()
+		return self.layers
+
+	def getMoves( self ):
+		"Get all the moves inside the skein tree."
+		self.getElements()
+		return SkeinBlock.getMoves( self )
+
+	def getStreamFromText( self, gcodeText ):
+		"Parse the header of the gcode text into the skein tree and set the extrusion elements to a generator, so that the skein can be crafted one layer at a time."
+		lines = getTextLineGenerator( gcodeText )
+		for line in lines:
+			if len( line ) > 0:
+				splitLine = gcodec.getSplitLineBeforeBracketSemicolon( line )
+				self.headerLines.append( line )
+				self.parseHeaderLine( line, splitLine )
+				if gcodec.getFirstWord( splitLine ) == '(<extrusion>)':
+					self.elements = self.getExtrusionElementGenerator( lines )
+					return self
+		return self
+
+	def getText( self ):
+		"Get the gcode text of the skein tree."
+		output = cStringIO.StringIO()
+		addLinesToOutput( self.headerLines, output )
+		for element in self.elements:
+			if element.__class__ == str:
+				output.write( element + '\n' )
+			else:
+				lines = []
+				element.addToLines( self.decimalPlacesCarried, lines )
+				addLinesToOutput( lines, output )
+		addLinesToOutput( self.footerLines, output )
+		return output.getvalue()
+
+	def isProcedureDone( self, procedure ):
+		"Determine if the procedure has been done on the skein tree."
+		for procedureDone in self.procedures:
+			if procedureDone.find( procedure ) != - 1:
+				return True
+		return False
+
+	def isProcedureDoneOrEmpty( self, procedure ):
+		"Determine if the procedure has been done on the skein tree or if the skein tree is empty."
+		if len( self.headerLines ) < 1:
+			return True
+		return self.isProcedureDone( procedure )
+
+	def isStreaming( self ):
+		"Determine if the extrusion elements are a stream which has not been read yet."
+		return self.elements.__class__ != list
+
+	def parseHeaderLine( self, line, splitLine ):
+		"Parse a header line and index its tag."
+		firstWord = gcodec.getFirstWord( splitLine )
+		if firstWord == '(<procedureDone>':
+			self.procedures.append( splitLine[ 1 ] )
+			return
+		tagName = getTagName( firstWord )
+		if tagName == '' or len( splitLine ) < 2:
+			return
+		if tagName not in self.headerTagTable:
+			self.headerTagTable[ tagName ] = splitLine[ 1 ]
+		if tagName == 'decimalPlacesCarried':
+			self.decimalPlacesCarried = int( splitLine[ 1 ] )
@@ -0,0 +1,227 @@
+"""
+Stage cache is a collection of utilities to save the output of each craft procedure on disk, so that a chain can resume from the deepest procedure whose output has not changed.
+
+The output of a procedure is keyed by a hash of the input file, the alterations, the code version, and the settings of that procedure and of every procedure before it in the chain.  So when only a setting of a late procedure like speed or cool is changed, the chain resumes after the last unchanged procedure instead of carving, insetting and filling again.
+
+The geometric procedures also cache the result of each layer, keyed by the inputs which the layer depends on.  When the output of a procedure is not cached, only the layers whose inputs have changed are computed, and the cached layers are spliced in with them.  For example, when layers to in carve is changed, carve slices, and inset and fill craft, only the layers which were not there before.
+
+The outputs are compressed and saved in the cache folder in the .skeinforge folder in the home directory.  When the cache is bigger than the maximum cache size, the least recently used outputs are deleted.  The cache is turned on or off and its maximum size is set with the 'Activate Cache' and 'Maximum Cache Size' settings of export, which are read at the start of each chain.
+
+"""
+
+from __future__ import absolute_import
+#Init has to be imported first because it has code to workaround the python bug where relative imports don't work if the module is imported as a main module.
+import __init__
+
+from skeinforge_tools.skeinforge_utilities import gcodec
+from skeinforge_tools.skeinforge_utilities import parallel
+from skeinforge_tools.skeinforge_utilities import settings
+import cPickle
+import os
+import zlib
+try:
+	import hashlib
+	newHash = hashlib.sha1
+except:
+	import sha
+	newHash = sha.new
+
+
+__author__ = "Enrique Perez (perez_enrique@yahoo.com)"
+__date__ = "$Date: 2008/21/04 $"
+__license__ = "GPL 3.0"
+
+globalCodeVersion = None
+globalIsCacheActive = True
+globalMaximumCacheSize = 256 * 1024 * 1024
+
+
+def addDirectoryTextsToHash( directory, fileHash, suffix = '' ):
+	"Add the file names and the texts of the files in the directory and its subdirectories to the hash."
+	if not os.path.isdir( directory ):
+		return
+	directoryListing = os.listdir( directory )
+	directoryListing.sort()
+	for directoryFile in directoryListing:
+		path = os.path.join( directory, directoryFile )
+		if os.path.isdir( path ):
+			addDirectoryTextsToHash( path, fileHash, suffix )
+		elif directoryFile.endswith( suffix ):
+			fileHash.update( directoryFile )
+			fileHash.update( gcodec.getFileText( path, 'rb', False ) )
+
+def getCacheDirectoryPath():
+	"Get the cache directory path, which is the settings directory joined with cache."
+	return settings.getSettingsDirectoryPath( 'cache' )
+
+def getCachedText( stageKey ):
+	"Get the cached output text for the stage key, or None if the output is not in the cache."
+	cachePath = getCachePath( stageKey )
+	if not os.path.isfile( cachePath ):
+		return None
+	try:
+		cachedText = zlib.decompress( gcodec.getFileText( cachePath, 'rb', False ) )
+	except zlib.error:
+		return None
+	os.utime( cachePath, None )
+	return cachedText
+
+def getCachedLayerResult( layerKey ):
+	"Get the cached result for the layer key, or None if the result is not in the cache."
+	cachePath = getLayerCachePath( layerKey )
+	if not os.path.isfile( cachePath ):
+		return None
+	try:
+		cachedResult = cPickle.loads( zlib.decompress( gcodec.getFileText( cachePath, 'rb', False ) ) )
+	except:
+		return None
+	os.utime( cachePath, None )
+	return cachedResult
+
+def getCachePath( stageKey ):
+	"Get the path of the cached output for the stage key."
+	return os.path.join( getCacheDirectoryPath(), stageKey + '.gcode.z' )
+
+def getCodeVersion():
+	"Get the hash of the skeinforge tools code, which is only calculated once."
+	global globalCodeVersion
+	if globalCodeVersion == None:
+		codeHash = newHash( gcodec.getFileText( gcodec.getVersionFileName(), 'r', False ) )
+		addDirectoryTextsToHash( settings.getSkeinforgeToolsDirectoryPath(), codeHash, '.py' )
+		globalCodeVersion = codeHash.hexdigest()
+	return globalCodeVersion
+
+def getDeepestCachedIndexText( stageKeys ):
+	"Get the index of the deepest cached stage and its output text, the index is minus one if no stage is cached."
+	if not globalIsCacheActive:
+		return - 1, None
+	for stageIndex in xrange( len( stageKeys ) - 1, - 1, - 1 ):
+		cachedText = getCachedText( stageKeys[ stageIndex ] )
+		if cachedText != None:
+			return stageIndex, cachedText
+	return - 1, None
+
+def getHashKey( texts ):
+	"Get the hash key of the texts."
+	keyHash = newHash()
+	for text in texts:
+		keyHash.update( str( len( text ) ) + ':' )
+		keyHash.update( text )
+	return keyHash.hexdigest()
+
+def getInputKey( fileName, text ):
+	"Get the key of the input file and text, which includes the alterations and the code version."
+	inputHash = newHash( getCodeVersion() )
+	inputHash.update( os.path.basename( fileName ) )
+	inputHash.update( gcodec.getFileText( fileName, 'rb', False ) )
+	inputHash.update( text )
+	addDirectoryTextsToHash( settings.getSettingsDirectoryPath( 'alterations' ), inputHash )
+	addDirectoryTextsToHash( settings.getDirectoryInAboveDirectory( 'alterations' ), inputHash )
+	return inputHash.hexdigest()
+
+def getLayerCachePath( layerKey ):
+	"Get the path of the cached result for the layer key."
+	return os.path.join( getCacheDirectoryPath(), layerKey + '.layer.z' )
+
+def getHeaderKey( procedure, repository, headerLines ):
+	"Get the key of the header lines, which depends on the code version and the settings.  Return None if the cache is not active."
+	if not globalIsCacheActive:
+		return None
+	return getHashKey( [ getCodeVersion(), procedure, settings.getArchiveText( repository ), '\n'.join( headerLines ) ] )
+
+def getLayerKeys( procedure, repository, lines, lineIndex ):
+	"Get the key of each layer after the line index, which depends on the code version, the settings, the lines before the line index and the lines of the layer.  Return None if the cache is not active."
+	headerKey = getHeaderKey( procedure, repository, lines[ : lineIndex ] )
+	if headerKey == None:
+		return None
+	layerKeys = []
+	layerLines = None
+	for line in lines[ lineIndex : ]:
+		if gcodec.getFirstWordFromLine( line ) == '(<layer>':
+			if layerLines != None:
+				layerKeys.append( getHashKey( [ headerKey ] + layerLines ) )
+			layerLines = []
+		if layerLines != None:
+			layerLines.append( line )
+	if layerLines != None:
+		layerKeys.append( getHashKey( [ headerKey ] + layerLines ) )
+	return layerKeys
+
+def getLayerOutputTexts( skein, methodName, arguments, layerKeys ):
+	"Get the texts which the skein method adds to the output for each layer argument, only the texts which are not in the layer cache are crafted."
+	return getLayerResults( parallel.SkeinOutputMethod( methodName, skein ), 'getOutputText', arguments, layerKeys )
+
+def getLayerResults( instance, methodName, arguments, layerKeys ):
+	"Get the results of calling the method of the instance with each layer argument, only the results which are not in the layer cache are computed."
+	if layerKeys == None or len( layerKeys ) != len( arguments ):
+		return parallel.getResults( instance, methodName, arguments )
+	missingArguments = []
+	missingIndexes = []
+	results = []
+	for argumentIndex in xrange( len( arguments ) ):
+		cachedResult = getCachedLayerResult( layerKeys[ argumentIndex ] )
+		if cachedResult == None:
+			missingArguments.append( arguments[ argumentIndex ] )
+			missingIndexes.append( argumentIndex )
+		results.append( cachedResult )
+	missingResults = parallel.getResults( instance, methodName, missingArguments )
+	if len( missingResults ) > 0:
+		settings.makeDirectory( getCacheDirectoryPath() )
+	for missingIndex, missingResult in zip( missingIndexes, missingResults ):
+		results[ missingIndex ] = missingResult
+		writeCacheFile( getLayerCachePath( layerKeys[ missingIndex ] ), cPickle.dumps( missingResult, cPickle.HIGHEST_PROTOCOL ) )
+	return results
+
+def getSettingsSnapshot( craftModule ):
+	"Get the archive text of the settings of the craft module."
+	if craftModule == None:
+		return ''
+	return settings.getArchiveText( settings.getReadRepository( craftModule.getNewRepository() ) )
+
+def getStageKeys( craftModules, fileName, procedures, text ):
+	"Get the cache key of the output of each procedure, each key depends on the key before it."
+	if not globalIsCacheActive:
+		return [ None ] * len( procedures )
+	stageKey = getInputKey( fileName, text )
+	stageKeys = []
+	for procedureIndex in xrange( len( procedures ) ):
+		stageHash = newHash( stageKey )
+		stageHash.update( procedures[ procedureIndex ] )
+		stageHash.update( getSettingsSnapshot( craftModules[ procedureIndex ] ) )
+		stageKey = stageHash.hexdigest()
+		stageKeys.append( stageKey )
+	return stageKeys
+
+def removeLeastRecentlyUsed( maximumSize ):
+	"Remove the least recently used outputs until the cache is no bigger than the maximum size."
+	cacheDirectory = getCacheDirectoryPath()
+	cacheFiles = []
+	cacheSize = 0
+	for directoryFile in os.listdir( cacheDirectory ):
+		path = os.path.join( cacheDirectory, directoryFile )
+		fileSize = os.path.getsize( path )
+		cacheFiles.append( ( os.path.getmtime( path ), fileSize, path ) )
+		cacheSize += fileSize
+	cacheFiles.sort()
+	for modifiedTime, fileSize, path in cacheFiles:
+		if cacheSize <= maximumSize:
+			return
+		os.remove( path )
+		cacheSize -= fileSize
+
+def writeCachedText( stageKey, text ):
+	"Write the output text of the stage to the cache and remove the least recently used files if the cache is too big.  The layer results are only removed here, so that the cache directory is not listed after every layer."
+	if not globalIsCacheActive or stageKey == None or text == '':
+		return
+	settings.makeDirectory( getCacheDirectoryPath() )
+	writeCacheFile( getCachePath( stageKey ), text )
+	removeLeastRecentlyUsed( globalMaximumCacheSize )
+
+def writeCacheFile( cachePath, text ):
+	"Write the compressed text to the cache path through a temporary file, so that a partly written file is never read."
+	temporaryPath = cachePath + '.%s.tmp' % os.getpid()
+	gcodec.writeFileText( temporaryPath, zlib.compress( text, 1 ), 'wb' )
+	try:
+		os.rename( temporaryPath, cachePath )
+	except OSError:
+		print( 'The cache file ' + cachePath + ' can not be written to.' )
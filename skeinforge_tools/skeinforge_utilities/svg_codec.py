@@ -23,8 +23,8 @@ __date__ = "$Date: 2008/02/05 $"
 __license__ = "GPL 3.0"
 
 
-def getCarving( fileName ):
-	"Get a carving for the file using an import plugin."
+def getCarving( fileName, weldTolerance = 0.0 ):
+	"Get a carving for the file using an import plugin, the import plugins which weld vertices weld them within the weld tolerance."
 	importPluginFileNames = interpret.getImportPluginFileNames()
 	for importPluginFileName in importPluginFileNames:
 		fileTypeDot = '.' + importPluginFileName
@@ -32,6 +32,8 @@ def getCarving( fileName ):
 			importPluginsDirectoryPath = gcodec.getAbsoluteFolderPath( os.path.dirname( __file__ ), 'import_plugins' )
 			pluginModule = gcodec.getModuleWithDirectoryPath( importPluginsDirectoryPath, importPluginFileName )
 			if pluginModule != None:
+				if hasattr( pluginModule, 'getWeldedCarving' ):
+					return pluginModule.getWeldedCarving( fileName, weldTolerance )
 				return pluginModule.getCarving( fileName )
 	print( 'Could not find plugin to handle ' + fileName )
 	return None
@@ -85,6 +87,7 @@ class SVGCodecSkein:
 	def __init__( self ):
 		self.margin = 20
 		self.output = cStringIO.StringIO()
+		self.simplification = 'Channel'
 		self.textHeight = 22.5
 		self.unitScale = 3.7
 
@@ -149,6 +152,7 @@ class SVGCodecSkein:
 		canvasInitializationOutput.write( '\tlayerThickness = %s\n' % self.getRounded( self.layerThickness ) ) # Set layer thickness.
 		canvasInitializationOutput.write( '\tperimeterWidth = %s\n' % self.getRounded( self.perimeterWidth ) ) # Set perimeter width.
 		canvasInitializationOutput.write( '\tprocedureDone = "%s"\n' % procedureName ) # The procedure done one this svg file.
+		canvasInitializationOutput.write( '\tsimplification = "%s"\n' % self.simplification ) # Set the simplification algorithm.
 		canvasInitializationOutput.write( '\textrusionStart = 1\n' ) # Initialization is finished, extrusion is starting.
 		return canvasInitializationOutput.getvalue()
 
@@ -194,7 +198,7 @@ class SVGCodecSkein:
 
 	def getRounded( self, number ):
 		"Get number rounded to the number of carried decimal places as a string."
-		return euclidean.getRoundedToDecimalPlacesString( self.decimalPlacesCarried, number )
+		return euclidean.getFixedPointFormatter( self.decimalPlacesCarried ).getString( number )
 
 	def getRoundedComplexString( self, point ):
 		"Get the rounded complex string."
@@ -42,9 +42,17 @@ from skeinforge_tools.skeinforge_utilities.vector3 import Vector3
 from skeinforge_tools.skeinforge_utilities import euclidean
 from skeinforge_tools.skeinforge_utilities import gcodec
 from skeinforge_tools.skeinforge_utilities import intercircle
+from skeinforge_tools.skeinforge_utilities import parallel
+from skeinforge_tools.skeinforge_utilities import stage_cache
+import array
+import bisect
 import cmath
 import cStringIO
 import math
+try:
+	import numpy
+except:
+	numpy = None
 
 
 __author__ = "Enrique Perez (perez_enrique@yahoo.com)"
@@ -67,10 +75,10 @@ def addLoopToPointTable( loop, pointTable ):
 	for point in loop:
 		pointTable[ point ] = loop
 
-def addPointsAtZ( edgePair, points, radius, vertices, z ):
+def addPointsAtZ( carveIntersectionTable, edgePair, points, radius ):
 	"Add point complexes on the segment between the edge intersections with z."
-	carveIntersectionFirst = getCarveIntersectionFromEdge( edgePair.edges[ 0 ], vertices, z )
-	carveIntersectionSecond = getCarveIntersectionFromEdge( edgePair.edges[ 1 ], vertices, z )
+	carveIntersectionFirst = carveIntersectionTable[ edgePair.edgeIndexes[ 0 ] ]
+	carveIntersectionSecond = carveIntersectionTable[ edgePair.edgeIndexes[ 1 ] ]
 	intercircle.addPointsFromSegment( carveIntersectionFirst, carveIntersectionSecond, points, radius, 0.3 )
 
 def addToZoneArray( point, z, zoneArray, zZoneInterval ):
@@ -122,7 +130,7 @@ def getAdditionalLoopLength( loop, point, pointIndex ):
 	beforePoint = loop[ ( pointIndex + len( loop ) - 1 ) % len( loop ) ]
 	return abs( point - beforePoint ) + abs( point - afterPoint ) - abs( afterPoint - beforePoint )
 
-def getBridgeDirection( belowLoops, layerLoops, layerThickness ):
+def getBridgeDirection( belowLoops, layerLoops, layerThickness, simplification ):
 	"Get span direction for the majority of the overhanging extrusion perimeter, if any."
 	if len( belowLoops ) < 1:
 		return None
@@ -132,7 +140,7 @@ def getBridgeDirection( belowLoops, layerLoops, layerThickness ):
 	for loop in belowLoops:
 		centers = intercircle.getCentersFromLoopDirection( True, loop, slightlyGreaterThanOverhang )
 		for center in centers:
-			outset = intercircle.getSimplifiedInsetFromClockwiseLoop( center, overhangInset )
+			outset = intercircle.getSimplifiedInsetFromClockwiseLoop( center, overhangInset, simplification )
 			if intercircle.isLargeSameDirection( outset, center, overhangInset ):
 				belowOutsetLoops.append( outset )
 	bridgeRotation = complex()
@@ -146,14 +154,14 @@ def getBridgeDirection( belowLoops, layerLoops, layerThickness ):
 		bridgeRotation /= abs( bridgeRotation )
 		return cmath.sqrt( bridgeRotation )
 
-def getBridgeLoops( layerThickness, loop ):
+def getBridgeLoops( layerThickness, loop, simplification ):
 	"Get the inset bridge loops from the loop."
 	halfWidth = 1.5 * layerThickness
 	slightlyGreaterThanHalfWidth = 1.1 * halfWidth
 	extrudateLoops = []
 	centers = intercircle.getCentersFromLoop( loop, slightlyGreaterThanHalfWidth )
 	for center in centers:
-		extrudateLoop = intercircle.getSimplifiedInsetFromClockwiseLoop( center, halfWidth )
+		extrudateLoop = intercircle.getSimplifiedInsetFromClockwiseLoop( center, halfWidth, simplification )
 		if intercircle.isLargeSameDirection( extrudateLoop, center, halfWidth ):
 			if euclidean.isPathInsideLoop( loop, extrudateLoop ) == euclidean.isWiddershins( loop ):
 				extrudateLoop.reverse()
@@ -170,6 +178,27 @@ def getCommonVertexIndex( edgeFirst, edgeSecond ):
 	print( edgeSecond )
 	return 0
 
+def getCarveIntersectionTableFromArrays( edgeIndexes, edgeVertexArray, vertexArray, z ):
+	"Get the table of the complexes where the carve intersects the edges, calculated for all the edges at once by numpy."
+	edgeIndexArray = numpy.array( edgeIndexes, numpy.int32 )
+	firstVertexArray = vertexArray[ edgeVertexArray[ edgeIndexArray, 0 ] ]
+	secondVertexArray = vertexArray[ edgeVertexArray[ edgeIndexArray, 1 ] ]
+	zMinusFirstArray = z - firstVertexArray[ :, 2 ]
+	upArray = secondVertexArray[ :, 2 ] - firstVertexArray[ :, 2 ]
+	xArray = zMinusFirstArray * ( secondVertexArray[ :, 0 ] - firstVertexArray[ :, 0 ] ) / upArray + firstVertexArray[ :, 0 ]
+	yArray = zMinusFirstArray * ( secondVertexArray[ :, 1 ] - firstVertexArray[ :, 1 ] ) / upArray + firstVertexArray[ :, 1 ]
+	carveIntersectionTable = {}
+	for edgeIndex, x, y in zip( edgeIndexes, xArray.tolist(), yArray.tolist() ):
+		carveIntersectionTable[ edgeIndex ] = complex( x, y )
+	return carveIntersectionTable
+
+def getCarveIntersectionTableFromEdges( edgeIndexes, edges, vertices, z ):
+	"Get the table of the complexes where the carve intersects the edges."
+	carveIntersectionTable = {}
+	for edgeIndex in edgeIndexes:
+		carveIntersectionTable[ edgeIndex ] = getCarveIntersectionFromEdge( edges[ edgeIndex ], vertices, z )
+	return carveIntersectionTable
+
 def getCarveIntersectionFromEdge( edge, vertices, z ):
 	"Get the complex where the carve intersects the edge."
 	firstVertex = vertices[ edge.vertexIndexes[ 0 ] ]
@@ -241,9 +270,8 @@ def getInsetPoint( loop, tinyRadius ):
 	midpointNormalized = midpoint / abs( midpoint )
 	return point + midpointNormalized * tinyRadius
 
-def getLoopsFromCorrectMesh( edges, faces, vertices, z ):
+def getLoopsFromCorrectMesh( carveIntersectionTable, faces, remainingEdgeTable, z ):
 	"Get loops from a carve of a correct mesh."
-	remainingEdgeTable = getRemainingEdgeTable( edges, vertices, z )
 	remainingValues = remainingEdgeTable.values()
 	for edge in remainingValues:
 		if len( edge.faceIndexes ) < 2:
@@ -254,16 +282,14 @@ def getLoopsFromCorrectMesh( edges, faces, vertices, z ):
 			print( z )
 			return []
 	loops = []
-	while isPathAdded( edges, faces, loops, remainingEdgeTable, vertices, z ):
+	while isPathAdded( carveIntersectionTable, faces, loops, remainingEdgeTable, z ):
 		pass
-	for loopIndex in xrange( len( loops ) - 1 ):
-		loop = loops[ loopIndex ]
-		if euclidean.isLoopIntersectingLoops( loop, loops[ loopIndex + 1 : ] ):
-			print( 'This should never happen, the triangle mesh slice intersects itself.' )
-			print( "Something will still be printed, but there is no guarantee that it will be the correct shape." )
-			print( 'Once the gcode is saved, you should check over the layer with a z of:' )
-			print( z )
-			return []
+	if euclidean.isLoopListIntersecting( loops ):
+		print( 'This should never happen, the triangle mesh slice intersects itself.' )
+		print( "Something will still be printed, but there is no guarantee that it will be the correct shape." )
+		print( 'Once the gcode is saved, you should check over the layer with a z of:' )
+		print( z )
+		return []
 	return loops
 #	untouchables = []
 #	for boundingLoop in boundingLoops:
@@ -278,23 +304,21 @@ def getLoopsFromCorrectMesh( edges, faces, vertices, z ):
 #		remainingLoops.append( untouchable.loop )
 #	return remainingLoops
 
-def getLoopsFromUnprovenMesh( edges, faces, importRadius, vertices, z ):
+def getLoopsFromUnprovenMesh( carveIntersectionTable, edges, faces, importRadius, remainingEdgeTable ):
 	"Get loops from a carve of an unproven mesh."
 	edgePairTable = {}
 	corners = []
-	remainingEdgeTable = getRemainingEdgeTable( edges, vertices, z )
 	remainingEdgeTableKeys = remainingEdgeTable.keys()
 	for remainingEdgeIndexKey in remainingEdgeTable:
 		edge = remainingEdgeTable[ remainingEdgeIndexKey ]
-		carveIntersection = getCarveIntersectionFromEdge( edge, vertices, z )
+		carveIntersection = carveIntersectionTable[ remainingEdgeIndexKey ]
 		corners.append( carveIntersection )
 		for edgeFaceIndex in edge.faceIndexes:
-			face = faces[ edgeFaceIndex ]
-			for edgeIndex in face.edgeIndexes:
+			for edgeIndex in faces.getEdgeIndexes( edgeFaceIndex ):
 				addEdgePair( edgePairTable, edges, edgeIndex, remainingEdgeIndexKey, remainingEdgeTable )
 	allPoints = corners[ : ]
 	for edgePairValue in edgePairTable.values():
-		addPointsAtZ( edgePairValue, allPoints, importRadius, vertices, z )
+		addPointsAtZ( carveIntersectionTable, edgePairValue, allPoints, importRadius )
 	pointTable = {}
 	return getInclusiveLoops( allPoints, corners, importRadius )
 
@@ -332,8 +356,7 @@ def getLowestZoneIndex( zoneArray, z ):
 def getNextEdgeIndexAroundZ( edge, faces, remainingEdgeTable ):
 	"Get the next edge index in the mesh carve."
 	for faceIndex in edge.faceIndexes:
-		face = faces[ faceIndex ]
-		for edgeIndex in face.edgeIndexes:
+		for edgeIndex in faces.getEdgeIndexes( faceIndex ):
 			if edgeIndex in remainingEdgeTable:
 				return edgeIndex
 	return - 1
@@ -374,30 +397,13 @@ def getOverlapRatio( loop, pointTable ):
 			numberOfOverlaps += 1
 	return float( numberOfOverlaps ) / float( len( loop ) )
 
-def getPath( edges, pathIndexes, loop, z ):
+def getPath( carveIntersectionTable, pathIndexes ):
 	"Get the path from the edge intersections."
 	path = []
-	for pathIndexIndex in xrange( len( pathIndexes ) ):
-		pathIndex = pathIndexes[ pathIndexIndex ]
-		edge = edges[ pathIndex ]
-		carveIntersection = getCarveIntersectionFromEdge( edge, loop, z )
-		path.append( carveIntersection )
+	for pathIndex in pathIndexes:
+		path.append( carveIntersectionTable[ pathIndex ] )
 	return path
 
-def getRemainingEdgeTable( edges, vertices, z ):
-	"Get the remaining edge hashtable."
-	remainingEdgeTable = {}
-	if len( edges ) > 0:
-		if edges[ 0 ].zMinimum == None:
-			for edge in edges:
-				edge.zMinimum = min( vertices[ edge.vertexIndexes[ 0 ] ].z, vertices[ edge.vertexIndexes[ 1 ] ].z )
-				edge.zMaximum = max( vertices[ edge.vertexIndexes[ 0 ] ].z, vertices[ edge.vertexIndexes[ 1 ] ].z )
-	for edgeIndex in xrange( len( edges ) ):
-		edge = edges[ edgeIndex ]
-		if ( edge.zMinimum < z ) and ( edge.zMaximum > z ):
-			remainingEdgeTable[ edgeIndex ] = edge
-	return remainingEdgeTable
-
 def getSharedFace( firstEdge, faces, secondEdge ):
 	"Get the face which is shared by two edges."
 	for firstEdgeFaceIndex in firstEdge.faceIndexes:
@@ -455,35 +461,33 @@ def isInline( beginComplex, centerComplex, endComplex ):
 	centerEndComplex /= centerEndLength
 	return euclidean.getDotProduct( centerBeginComplex, centerEndComplex ) < - 0.999
 
-def isPathAdded( edges, faces, loops, remainingEdgeTable, vertices, z ):
+def isPathAdded( carveIntersectionTable, faces, loops, remainingEdgeTable, z ):
 	"Get the path indexes around a triangle mesh carve and add the path to the flat loops."
 	if len( remainingEdgeTable ) < 1:
 		return False
 	pathIndexes = []
 	remainingEdgeIndexKey = remainingEdgeTable.keys()[ 0 ]
 	pathIndexes.append( remainingEdgeIndexKey )
-	del remainingEdgeTable[ remainingEdgeIndexKey ]
-	nextEdgeIndexAroundZ = getNextEdgeIndexAroundZ( edges[ remainingEdgeIndexKey ], faces, remainingEdgeTable )
+	nextEdgeIndexAroundZ = getNextEdgeIndexAroundZ( remainingEdgeTable.pop( remainingEdgeIndexKey ), faces, remainingEdgeTable )
 	while nextEdgeIndexAroundZ != - 1:
 		pathIndexes.append( nextEdgeIndexAroundZ )
-		del remainingEdgeTable[ nextEdgeIndexAroundZ ]
-		nextEdgeIndexAroundZ = getNextEdgeIndexAroundZ( edges[ nextEdgeIndexAroundZ ], faces, remainingEdgeTable )
+		nextEdgeIndexAroundZ = getNextEdgeIndexAroundZ( remainingEdgeTable.pop( nextEdgeIndexAroundZ ), faces, remainingEdgeTable )
 	if len( pathIndexes ) < 3:
 		print( "Dangling edges, will use intersecting circles to get import layer at height %s" % z )
 		del loops[ : ]
 		return False
-	loops.append( getPath( edges, pathIndexes, vertices, z ) )
+	loops.append( getPath( carveIntersectionTable, pathIndexes ) )
 	return True
 
 
-class Edge:
+class Edge( object ):
 	"An edge of a triangle mesh."
+	__slots__ = [ 'faceIndexes', 'index', 'vertexIndexes' ]
+
 	def __init__( self ):
 		"Set the face indexes to None."
 		self.faceIndexes = []
 		self.vertexIndexes = []
-		self.zMaximum = None
-		self.zMinimum = None
 	
 	def __repr__( self ):
 		"Get the string representation of this Edge."
@@ -505,6 +509,73 @@ class Edge:
 		return '%s %s' % ( self.vertexIndexes[ 0 ] + 1, self.vertexIndexes[ 1 ] + 1 )
 
 
+class EdgeArray( object ):
+	"The edges of a triangle mesh, held in integer arrays instead of as an Edge instance for each edge."
+	__slots__ = [ 'extraFaceIndexTable', 'faceIndexes', 'vertexIndexes' ]
+
+	def __init__( self ):
+		"Set the empty arrays.  Each edge has two face index slots, which are -1 until a face is added, the faces after the second are in the extra table."
+		self.extraFaceIndexTable = {}
+		self.faceIndexes = array.array( 'i' )
+		self.vertexIndexes = array.array( 'i' )
+
+	def __getitem__( self, edgeIndex ):
+		"Get an Edge made from the arrays."
+		edge = Edge()
+		edge.faceIndexes = self.getFaceIndexes( edgeIndex )
+		edge.index = edgeIndex
+		edge.vertexIndexes = self.vertexIndexes[ 2 * edgeIndex : 2 * edgeIndex + 2 ].tolist()
+		return edge
+
+	def __iter__( self ):
+		"Get the edges in order."
+		for edgeIndex in xrange( len( self ) ):
+			yield self[ edgeIndex ]
+
+	def __len__( self ):
+		"Get the number of edges."
+		return len( self.vertexIndexes ) / 2
+
+	def __repr__( self ):
+		"Get the string representation of the edges, which is the same as that of a list of edges."
+		return str( list( self ) )
+
+	def addFaceIndex( self, edgeIndex, faceIndex ):
+		"Add a face index to the edge."
+		faceIndexIndex = 2 * edgeIndex
+		if self.faceIndexes[ faceIndexIndex ] < 0:
+			self.faceIndexes[ faceIndexIndex ] = faceIndex
+			return
+		if self.faceIndexes[ faceIndexIndex + 1 ] < 0:
+			self.faceIndexes[ faceIndexIndex + 1 ] = faceIndex
+			return
+		if edgeIndex not in self.extraFaceIndexTable:
+			self.extraFaceIndexTable[ edgeIndex ] = []
+		self.extraFaceIndexTable[ edgeIndex ].append( faceIndex )
+
+	def append( self, edge ):
+		"Add the vertex and face indexes of the edge, which is the next edge."
+		edgeIndex = len( self )
+		self.appendVertexIndexes( edge.vertexIndexes )
+		for faceIndex in edge.faceIndexes:
+			self.addFaceIndex( edgeIndex, faceIndex )
+
+	def appendVertexIndexes( self, vertexIndexes ):
+		"Add an edge without faces given its vertex indexes."
+		self.vertexIndexes.extend( vertexIndexes )
+		self.faceIndexes.extend( [ - 1, - 1 ] )
+
+	def getFaceIndexes( self, edgeIndex ):
+		"Get the face indexes of the edge."
+		faceIndexes = []
+		for faceIndex in self.faceIndexes[ 2 * edgeIndex : 2 * edgeIndex + 2 ]:
+			if faceIndex > - 1:
+				faceIndexes.append( faceIndex )
+		if edgeIndex in self.extraFaceIndexTable:
+			faceIndexes += self.extraFaceIndexTable[ edgeIndex ]
+		return faceIndexes
+
+
 class EdgePair:
 	def __init__( self ):
 		"Pair of edges on a face."
@@ -524,8 +595,10 @@ class EdgePair:
 		return self
 
 
-class Face:
+class Face( object ):
 	"A face of a triangle mesh."
+	__slots__ = [ 'edgeIndexes', 'index', 'vertexIndexes' ]
+
 	def __init__( self ):
 		"Set the edge indexes to None."
 		self.edgeIndexes = []
@@ -541,7 +614,7 @@ class Face:
 		self.index = faceIndex
 		self.edgeIndexes = edgeIndexes
 		for edgeIndex in edgeIndexes:
-			edges[ edgeIndex ].addFaceIndex( faceIndex )
+			edges.addFaceIndex( edgeIndex, faceIndex )
 		for triangleIndex in xrange( 3 ):
 			indexFirst = ( 3 - triangleIndex ) % 3
 			indexSecond = ( 4 - triangleIndex ) % 3
@@ -552,25 +625,57 @@ class Face:
 		"Get the GNU Triangulated Surface (.gts) line of text."
 		return '%s %s %s' % ( self.edgeIndexes[ 0 ] + 1, self.edgeIndexes[ 1 ] + 1, self.edgeIndexes[ 2 ] + 1 )
 
-	def setEdgeIndexesToVertexIndexes( self, edges, edgeTable ):
-		"Set the edge indexes to the vertex indexes."
-		for triangleIndex in xrange( 3 ):
-			indexFirst = ( 3 - triangleIndex ) % 3
-			indexSecond = ( 4 - triangleIndex ) % 3
-			vertexIndexFirst = self.vertexIndexes[ indexFirst ]
-			vertexIndexSecond = self.vertexIndexes[ indexSecond ]
-			vertexIndexPair = [ vertexIndexFirst, vertexIndexSecond ]
-			vertexIndexPair.sort()
-			edgeIndex = len( edges )
-			if str( vertexIndexPair ) in edgeTable:
-				edgeIndex = edgeTable[ str( vertexIndexPair ) ]
-			else:
-				edgeTable[ str( vertexIndexPair ) ] = edgeIndex
-				edge = Edge().getFromVertexIndexes( edgeIndex, vertexIndexPair )
-				edges.append( edge )
-			edges[ edgeIndex ].addFaceIndex( self.index )
-			self.edgeIndexes.append( edgeIndex )
-		return self
+
+class FaceArray( object ):
+	"The faces of a triangle mesh, held in integer arrays instead of as a Face instance for each face."
+	__slots__ = [ 'edgeIndexes', 'vertexIndexes' ]
+
+	def __init__( self ):
+		"Set the empty arrays.  The edge indexes of a face are -1 until its edges are set."
+		self.edgeIndexes = array.array( 'i' )
+		self.vertexIndexes = array.array( 'i' )
+
+	def __getitem__( self, faceIndex ):
+		"Get a Face made from the arrays."
+		face = Face()
+		face.edgeIndexes = self.getEdgeIndexes( faceIndex )
+		face.index = faceIndex
+		face.vertexIndexes = self.vertexIndexes[ 3 * faceIndex : 3 * faceIndex + 3 ].tolist()
+		return face
+
+	def __iter__( self ):
+		"Get the faces in order."
+		for faceIndex in xrange( len( self ) ):
+			yield self[ faceIndex ]
+
+	def __len__( self ):
+		"Get the number of faces."
+		return len( self.vertexIndexes ) / 3
+
+	def __repr__( self ):
+		"Get the string representation of the faces, which is the same as that of a list of faces."
+		return str( list( self ) )
+
+	def append( self, face ):
+		"Add the vertex and edge indexes of the face, which is the next face."
+		self.vertexIndexes.extend( face.vertexIndexes )
+		if len( face.edgeIndexes ) < 3:
+			self.edgeIndexes.extend( [ - 1, - 1, - 1 ] )
+			return
+		self.edgeIndexes.extend( face.edgeIndexes )
+
+	def extendVertexIndexes( self, vertexIndexes ):
+		"Add faces without edges given their vertex indexes, three for each face."
+		self.vertexIndexes.extend( vertexIndexes )
+		self.edgeIndexes.extend( array.array( 'i', [ - 1 ] ) * len( vertexIndexes ) )
+
+	def getEdgeIndexes( self, faceIndex ):
+		"Get the edge indexes of the face, or an empty list if they have not been set."
+		edgeIndexes = self.edgeIndexes[ 3 * faceIndex : 3 * faceIndex + 3 ].tolist()
+		if edgeIndexes[ 0 ] < 0:
+			return []
+		return edgeIndexes
+
 
 
 class LoopArea:
@@ -599,12 +704,16 @@ class TriangleMesh:
 		"Add empty lists."
 		self.belowLoops = []
 		self.bridgeLayerThickness = None
-		self.edges = []
-		self.faces = []
+		self.edges = EdgeArray()
+		self.edgeSweepZ = None
+		self.edgeVertexArray = None
+		self.faces = FaceArray()
 		self.importCoarseness = 1.0
 		self.isCorrectMesh = True
 		self.rotatedBoundaryLayers = []
+		self.simplification = 'Channel'
 		self.vertices = []
+		self.zMinimumEdgeIndexes = None
 	
 	def __repr__( self ):
 		"Get the string representation of this TriangleMesh."
@@ -618,6 +727,32 @@ class TriangleMesh:
 		"Get the corner minimum of the vertices."
 		return self.cornerMinimum
 
+	def getCarveIntersectionTable( self, edgeIndexes, z ):
+		"Get the table of the complexes where the carve intersects the edges, by numpy if it is installed."
+		if numpy == None or len( edgeIndexes ) < 1:
+			return getCarveIntersectionTableFromEdges( edgeIndexes, self.edges, self.vertices, z )
+		if self.edgeVertexArray is None:
+			self.setArrays()
+		return getCarveIntersectionTableFromArrays( edgeIndexes, self.edgeVertexArray, self.vertexArray, z )
+
+	def getCarveKey( self ):
+		"Get the key of the mesh and the carve settings for the layer cache, or None if the cache is not active."
+		if not stage_cache.globalIsCacheActive:
+			return None
+		carveTexts = [ stage_cache.getCodeVersion(), self.simplification, repr( self.importRadius ), str( self.isCorrectMesh ), repr( self.zZoneInterval ), str( self.edges ), str( self.faces ) ]
+		for vertex in self.vertices:
+			carveTexts.append( '%r %r %r' % ( vertex.x, vertex.y, vertex.z ) )
+		return stage_cache.getHashKey( carveTexts )
+
+	def getCarveLayerKeys( self, zs ):
+		"Get the key of each layer for the layer cache, which depends on the mesh, the carve settings and the z of the layer."
+		if self.carveKey == None:
+			return None
+		layerKeys = []
+		for z in zs:
+			layerKeys.append( stage_cache.getHashKey( [ self.carveKey, repr( z ) ] ) )
+		return layerKeys
+
 	def getCarveLayerThickness( self ):
 		"Get the layer thickness."
 		return self.layerThickness
@@ -631,10 +766,13 @@ class TriangleMesh:
 			self.cornerMinimum = euclidean.getPointMinimum( self.cornerMinimum, point )
 		halfHeight = 0.5 * self.layerThickness
 		self.zZoneInterval = getZoneInterval( self.layerThickness )
+		self.setZSortedVertexIndexes()
+		self.edgeVertexArray = None
 		layerTop = self.cornerMaximum.z - halfHeight * 0.5
+		self.carveKey = self.getCarveKey()
 		z = self.cornerMinimum.z + halfHeight
 		while z < layerTop:
-			z = self.getZAddExtruderPaths( z )
+			z = self.getZAddExtruderPathsBatch( layerTop, z )
 		return self.rotatedBoundaryLayers
 
 	def getGNUTriangulatedSurfaceText( self ):
@@ -645,54 +783,119 @@ class TriangleMesh:
 		for vertex in self.vertices[ 1 : ]:
 			distanceFeedRate.output.write( '%s %s %s\n' % ( vertex.x, vertex.y, vertex.z ) )
 		distanceFeedRate.output.write( '%s Edge Vertex Indices Starting from 1\n' % self.edges[ 0 ].getGNUTriangulatedSurfaceLine() )
-		for edge in self.edges[ 1 : ]:
-			distanceFeedRate.output.write( '%s\n' % edge.getGNUTriangulatedSurfaceLine() )
+		for edgeIndex in xrange( 1, len( self.edges ) ):
+			distanceFeedRate.output.write( '%s\n' % self.edges[ edgeIndex ].getGNUTriangulatedSurfaceLine() )
 		distanceFeedRate.output.write( '%s Face Edge Indices Starting from 1\n' % self.faces[ 0 ].getGNUTriangulatedSurfaceLine() )
-		for face in self.faces[ 1 : ]:
-			distanceFeedRate.output.write( '%s\n' % face.getGNUTriangulatedSurfaceLine() )
+		for faceIndex in xrange( 1, len( self.faces ) ):
+			distanceFeedRate.output.write( '%s\n' % self.faces[ faceIndex ].getGNUTriangulatedSurfaceLine() )
 		return output.getvalue()
 
 	def getLoopsFromMesh( self, z ):
 		"Get loops from a carve of a mesh."
 		originalLoops = []
+		remainingEdgeTable = self.getRemainingEdgeTable( z )
+		carveIntersectionTable = self.getCarveIntersectionTable( remainingEdgeTable.keys(), z )
 		if self.isCorrectMesh:
-			originalLoops = getLoopsFromCorrectMesh( self.edges, self.faces, self.vertices, z )
+			originalLoops = getLoopsFromCorrectMesh( carveIntersectionTable, self.faces, remainingEdgeTable, z )
 		if len( originalLoops ) < 1:
-			originalLoops = getLoopsFromUnprovenMesh( self.edges, self.faces, self.importRadius, self.vertices, z )
-		loops = getLoopsInOrderOfArea( compareAreaDescending, euclidean.getSimplifiedLoops( originalLoops, self.importRadius ) )
+			originalLoops = getLoopsFromUnprovenMesh( carveIntersectionTable, self.edges, self.faces, self.importRadius, self.getRemainingEdgeTable( z ) )
+		loops = getLoopsInOrderOfArea( compareAreaDescending, euclidean.getSimplifiedLoops( originalLoops, self.importRadius, self.simplification ) )
+		loopGrid = euclidean.LoopGrid( loops )
 		for loopIndex in xrange( len( loops ) ):
 			loop = loops[ loopIndex ]
 			leftPoint = euclidean.getLeftPoint( loop )
-			isInFilledRegion = euclidean.isInFilledRegion( loops[ : loopIndex ] + loops[ loopIndex + 1 : ], leftPoint )
-			if isInFilledRegion == euclidean.isWiddershins( loop ):
+			isInFilledRegion = loopGrid.isInFilledRegion( leftPoint, loopIndex )
+			if isInFilledRegion == loopGrid.isWiddershins( loopIndex ):
 				loop.reverse()
 		return loops
 
-	def getZAddExtruderPaths( self, z ):
-		"Get next z and add extruder loops."
-		zoneArray = []
-		for point in self.vertices:
-			addToZoneArray( point, z, zoneArray, self.zZoneInterval )
-		lowestZoneIndex = getLowestZoneIndex( zoneArray, z )
+	def getRemainingEdgeTable( self, z ):
+		"Get the hashtable of the edges which cross z.  The edges are swept in order of their minimum z, so when z rises only the edges which have started since the last z and the edges which were crossing the last z are checked."
+		if self.zMinimumEdgeIndexes == None:
+			self.setZMinimumEdgeIndexes()
+		if self.edgeSweepZ == None or z < self.edgeSweepZ:
+			self.edgeSweepIndex = 0
+			self.sweptEdgeIndexes = []
+		self.edgeSweepZ = z
+		while self.edgeSweepIndex < len( self.zMinimumEdgeIndexes ):
+			edgeIndex = self.zMinimumEdgeIndexes[ self.edgeSweepIndex ]
+			if self.edgeZMinimums[ edgeIndex ] >= z:
+				break
+			self.sweptEdgeIndexes.append( edgeIndex )
+			self.edgeSweepIndex += 1
+		crossingEdgeIndexes = []
+		for edgeIndex in self.sweptEdgeIndexes:
+			if self.edgeZMaximums[ edgeIndex ] > z:
+				crossingEdgeIndexes.append( edgeIndex )
+		self.sweptEdgeIndexes = crossingEdgeIndexes[ : ]
+		crossingEdgeIndexes.sort()
+		remainingEdgeTable = {}
+		for edgeIndex in crossingEdgeIndexes:
+			remainingEdgeTable[ edgeIndex ] = self.edges[ edgeIndex ]
+		return remainingEdgeTable
+
+	def getRotatedBoundaryLayer( self, z ):
+		"Get the rotated boundary layer of the carve around z, which is moved slightly so that it is not on a vertex."
+		lowestZoneIndex = getLowestZoneIndex( self.getZoneArray( z ), z )
 		halfAround = int( math.ceil( float( lowestZoneIndex ) / 2.0 ) )
 		zAround = float( halfAround ) * self.zZoneInterval
 		if lowestZoneIndex % 2 == 1:
 			zAround = - zAround
 		zPlusAround = z + zAround
 		rotatedBoundaryLayer = euclidean.RotatedLoopLayer( zPlusAround )
-		self.rotatedBoundaryLayers.append( rotatedBoundaryLayer )
 		rotatedBoundaryLayer.loops = self.getLoopsFromMesh( zPlusAround )
+		return rotatedBoundaryLayer
+
+	def getZoneArray( self, z ):
+		"Get the zone array around z.  Only the vertices which could be in a zone are added, they are found by a binary search of the vertex heights."
+		zoneArray = []
+		zoneDistance = ( 0.5 * float( len( zoneArray ) ) + 1.0 ) * self.zZoneInterval
+		beginIndex = bisect.bisect_left( self.zSortedVertexZs, z - zoneDistance )
+		endIndex = bisect.bisect_right( self.zSortedVertexZs, z + zoneDistance )
+		for vertexIndex in self.zSortedVertexIndexes[ beginIndex : endIndex ]:
+			addToZoneArray( self.vertices[ vertexIndex ], z, zoneArray, self.zZoneInterval )
+		return zoneArray
+
+	def getZAddExtruderPaths( self, z ):
+		"Get next z and add extruder loops."
+		return self.getZAddRotatedBoundaryLayer( self.getRotatedBoundaryLayer( z ), z )
+
+	def getZAddExtruderPathsBatch( self, layerTop, z ):
+		"Get the z after a batch of layers and add their extruder loops.  The batch layers are spaced by the layer thickness and are carved in parallel, the batch is cut short after a bridge layer because the next layer is spaced by the bridge layer thickness."
+		zs = []
+		while z < layerTop and len( zs ) < parallel.getBatchSize():
+			zs.append( z )
+			z += self.layerThickness
+		rotatedBoundaryLayers = stage_cache.getLayerResults( self, 'getRotatedBoundaryLayer', zs, self.getCarveLayerKeys( zs ) )
+		for rotatedBoundaryLayerIndex in xrange( len( rotatedBoundaryLayers ) ):
+			z = zs[ rotatedBoundaryLayerIndex ]
+			nextZ = self.getZAddRotatedBoundaryLayer( rotatedBoundaryLayers[ rotatedBoundaryLayerIndex ], z )
+			if nextZ != z + self.layerThickness:
+				return nextZ
+		return nextZ
+
+	def getZAddRotatedBoundaryLayer( self, rotatedBoundaryLayer, z ):
+		"Get next z, add the rotated boundary layer and set its bridge rotation."
+		self.rotatedBoundaryLayers.append( rotatedBoundaryLayer )
 		if self.bridgeLayerThickness == None:
 			return z + self.layerThickness
 		allExtrudateLoops = []
 		for loop in rotatedBoundaryLayer.loops:
-			allExtrudateLoops += getBridgeLoops( self.layerThickness, loop )
-		rotatedBoundaryLayer.rotation = getBridgeDirection( self.belowLoops, allExtrudateLoops, self.layerThickness )
+			allExtrudateLoops += getBridgeLoops( self.layerThickness, loop, self.simplification )
+		rotatedBoundaryLayer.rotation = getBridgeDirection( self.belowLoops, allExtrudateLoops, self.layerThickness, self.simplification )
 		self.belowLoops = allExtrudateLoops
 		if rotatedBoundaryLayer.rotation == None:
 			return z + self.layerThickness
 		return z + self.bridgeLayerThickness
 
+	def setArrays( self ):
+		"Set the numpy arrays of the vertex coordinates and of the edge vertex indexes."
+		vertexCoordinates = []
+		for vertex in self.vertices:
+			vertexCoordinates.append( ( vertex.x, vertex.y, vertex.z ) )
+		self.vertexArray = numpy.array( vertexCoordinates, numpy.float64 )
+		self.edgeVertexArray = numpy.fromstring( self.edges.vertexIndexes.tostring(), numpy.int32 ).reshape( ( len( self.edges ), 2 ) )
+
 	def setCarveBridgeLayerThickness( self, bridgeLayerThickness ):
 		"Set the bridge layer thickness.  If the infill is not in the direction of the bridge, the bridge layer thickness should be given as None or not set at all."
 		self.bridgeLayerThickness = bridgeLayerThickness
@@ -709,8 +912,55 @@ class TriangleMesh:
 		"Set the is correct mesh flag."
 		self.isCorrectMesh = isCorrectMesh
 
+	def setCarveSimplification( self, simplification ):
+		"Set the simplification algorithm."
+		self.simplification = simplification
+
 	def setEdgesForAllFaces( self ):
-		"Set the face edges of all the faces."
+		"Set the face edges of all the faces.  The edges are numbered in the order they are first met going around the faces."
 		edgeTable = {}
-		for face in self.faces:
-			face.setEdgeIndexesToVertexIndexes( self.edges, edgeTable )
+		faceEdgeIndexes = self.faces.edgeIndexes
+		faceVertexIndexes = self.faces.vertexIndexes
+		for faceIndex in xrange( len( self.faces ) ):
+			for triangleIndex in xrange( 3 ):
+				vertexIndexFirst = faceVertexIndexes[ 3 * faceIndex + ( 3 - triangleIndex ) % 3 ]
+				vertexIndexSecond = faceVertexIndexes[ 3 * faceIndex + ( 4 - triangleIndex ) % 3 ]
+				vertexIndexPair = ( min( vertexIndexFirst, vertexIndexSecond ), max( vertexIndexFirst, vertexIndexSecond ) )
+				if vertexIndexPair in edgeTable:
+					edgeIndex = edgeTable[ vertexIndexPair ]
+				else:
+					edgeIndex = len( self.edges )
+					edgeTable[ vertexIndexPair ] = edgeIndex
+					self.edges.appendVertexIndexes( vertexIndexPair )
+				self.edges.addFaceIndex( edgeIndex, faceIndex )
+				faceEdgeIndexes[ 3 * faceIndex + triangleIndex ] = edgeIndex
+
+	def setZMinimumEdgeIndexes( self ):
+		"Set the minimum and maximum z of the edges and the edge indexes sorted by minimum z."
+		self.edgeZMaximums = array.array( 'd' )
+		self.edgeZMinimums = array.array( 'd' )
+		edgeVertexIndexes = self.edges.vertexIndexes
+		zMinimumEdgeIndexes = []
+		for edgeIndex in xrange( len( self.edges ) ):
+			firstZ = self.vertices[ edgeVertexIndexes[ 2 * edgeIndex ] ].z
+			secondZ = self.vertices[ edgeVertexIndexes[ 2 * edgeIndex + 1 ] ].z
+			zMinimum = min( firstZ, secondZ )
+			self.edgeZMaximums.append( max( firstZ, secondZ ) )
+			self.edgeZMinimums.append( zMinimum )
+			zMinimumEdgeIndexes.append( ( zMinimum, edgeIndex ) )
+		zMinimumEdgeIndexes.sort()
+		self.zMinimumEdgeIndexes = array.array( 'i' )
+		for zMinimumEdgeIndex in zMinimumEdgeIndexes:
+			self.zMinimumEdgeIndexes.append( zMinimumEdgeIndex[ 1 ] )
+
+	def setZSortedVertexIndexes( self ):
+		"Set the vertex indexes sorted by z and their heights."
+		zVertexIndexes = []
+		for vertexIndex in xrange( len( self.vertices ) ):
+			zVertexIndexes.append( ( self.vertices[ vertexIndex ].z, vertexIndex ) )
+		zVertexIndexes.sort()
+		self.zSortedVertexIndexes = []
+		self.zSortedVertexZs = []
+		for zVertexIndex in zVertexIndexes:
+			self.zSortedVertexZs.append( zVertexIndex[ 0 ] )
+			self.zSortedVertexIndexes.append( zVertexIndex[ 1 ] )
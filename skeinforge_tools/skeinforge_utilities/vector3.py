@@ -41,7 +41,7 @@ __date__ = "$Date: 2008/21/04 $"
 __license__ = "GPL 3.0"
 
 
-class Vector3:
+class Vector3( object ):
 	"A three dimensional vector class."
 	__slots__ = [ 'x', 'y', 'z' ]
 